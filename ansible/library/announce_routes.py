@@ -12,6 +12,7 @@ import sys
 import socket
 import random
 import logging
+import threading
 import time
 from multiprocessing.pool import ThreadPool
 from ansible.module_utils.basic import AnsibleModule
@@ -95,7 +96,14 @@ T1_ROUTER_TYPE_BY_PROPERTY = {
 # routes must not collide with the frontend ones, otherwise the DUT builds a
 # single ECMP group spanning both frontend uplinks and backend ports.
 T1_BACKEND_PROPERTIES = frozenset(['bt0', 'bt1', 'bt2'])
+# Number of routes posted in the first request to an exabgp HTTP API. The number of routes of the next requests is
+# adapted to the rate exabgp takes the routes at, so that a request takes about ROUTES_BATCH_TARGET_TIME seconds
 ROUTES_BATCH_SIZE = 200
+MIN_ROUTES_BATCH_SIZE = 50
+MAX_ROUTES_BATCH_SIZE = 10000
+ROUTES_BATCH_TARGET_TIME = 1.0
+# Interval in seconds of the progress reports of changing routes
+ROUTES_PROGRESS_INTERVAL = 10
 
 # Describe default number of COLOs
 COLO_NUMBER = 30
@@ -187,35 +195,113 @@ def read_topo(topo_name, path):
         return {}
 
 
+_http_sessions = {}
+_http_sessions_lock = threading.Lock()
+
+
+def get_http_session(url):
+    """
+    Gets the persistent HTTP session of an exabgp HTTP API.
+
+    The connection to the HTTP API is kept alive between the requests posting batches of routes, instead of opening
+    a new connection for each request.
+
+    Args:
+        url (str): URL of the exabgp HTTP API.
+
+    Returns:
+        requests.Session
+    """
+    with _http_sessions_lock:
+        session = _http_sessions.get(url)
+        if session is None:
+            session = requests.Session()
+            _http_sessions[url] = session
+        return session
+
+
+def get_next_routes_batch_size(batch_size, routes_number, elapsed):
+    """
+    Gets the number of routes to post in the next request to an exabgp HTTP API.
+
+    The HTTP API writes the routes to the pipe read by exabgp before replying, so the time a request takes is the
+    time exabgp takes to read the routes. The batch size is adapted to this rate, so that a request takes about
+    ROUTES_BATCH_TARGET_TIME seconds. It is at most doubled at each request.
+
+    Args:
+        batch_size (int): Number of routes of the last request.
+        routes_number (int): Number of routes actually posted in the last request.
+        elapsed (float): Time in seconds the last request took.
+
+    Returns:
+        int: Number of routes of the next request.
+    """
+    if routes_number < batch_size:
+        # The last batch of the routes, not a measurement of a full batch
+        return batch_size
+    if elapsed <= 0:
+        next_batch_size = batch_size * 2
+    else:
+        next_batch_size = min(int(routes_number / elapsed * ROUTES_BATCH_TARGET_TIME), batch_size * 2)
+    return max(MIN_ROUTES_BATCH_SIZE, min(MAX_ROUTES_BATCH_SIZE, next_batch_size))
+
+
+def format_route_command(action, prefix, nexthop, aspath):
+    if aspath:
+        return "{} route {} next-hop {} as-path [ {} ]".format(action, prefix, nexthop, aspath)
+    return "{} route {} next-hop {}".format(action, prefix, nexthop)
+
+
 def change_routes(action, ptf_ip, port, routes, routes_batch_size=ROUTES_BATCH_SIZE):
+    """
+    Announces or withdraws routes through the exabgp HTTP API of a neighbor.
+
+    The routes are posted in batches on a persistent HTTP session. The size of the batches starts at
+    routes_batch_size and is adapted to the rate exabgp takes the routes at. The progress is logged every
+    ROUTES_PROGRESS_INTERVAL seconds.
+
+    Returns:
+        tuple: (number of routes, time in seconds taken to post the routes)
+    """
     logging.debug("action = {}, ptf_ip = {}, port = {}, routes_batch_size = {}, routes = {}"
                   .format(action, ptf_ip, port, routes_batch_size, routes))
-    messages = []
-    for prefix, nexthop, aspath in routes:
-        if aspath:
-            messages.append(
-                "{} route {} next-hop {} as-path [ {} ]".format(action, prefix, nexthop, aspath))
-        else:
-            messages.append(
-                "{} route {} next-hop {}".format(action, prefix, nexthop))
+    routes = list(routes)
     wait_for_http(ptf_ip, port, timeout=60)
     url = "http://%s:%d" % (ptf_ip, port)
-    for i in range(0, len(messages), routes_batch_size):
-        batch_messages = messages[i:i+routes_batch_size]
-        data = {"commands": ";".join(batch_messages)}
+    session = get_http_session(url)
+    batch_size = routes_batch_size
+    start_time = last_report_time = time.time()
+    posted = 0
+    while posted < len(routes):
+        batch = routes[posted:posted + batch_size]
+        data = {"commands": ";".join(format_route_command(action, *route) for route in batch)}
         logging.debug("Posting to url={} data={}".format(url, json.dumps(data)))
-        post_data_to_url(url, data)
-
-
-def post_data_to_url(url, data):
+        batch_start_time = time.time()
+        post_data_to_url(url, data, session=session)
+        now = time.time()
+        posted += len(batch)
+        batch_size = get_next_routes_batch_size(batch_size, len(batch), now - batch_start_time)
+        if now - last_report_time >= ROUTES_PROGRESS_INTERVAL:
+            logging.info("{} routes on url={}: {}/{} routes in {:.1f}s, {:.0f} routes/s, batch size {}".format(
+                action, url, posted, len(routes), now - start_time, posted / (now - start_time), batch_size))
+            last_report_time = now
+
+    elapsed = time.time() - start_time
+    logging.info("{} routes on url={}: {} routes in {:.1f}s, {:.0f} routes/s".format(
+        action, url, len(routes), elapsed, len(routes) / elapsed if elapsed > 0 else 0))
+    return len(routes), elapsed
+
+
+def post_data_to_url(url, data, session=None):
     # nosemgrep-next-line
     # Flaky error `ConnectionResetError(104, 'Connection reset by peer')` may happen while using `requests.post`
     # To avoid this error, we add sleep time before sending request.
     # We use a "backoff" algorithm here, the maximum retry times is five.
     # If one retry fails, we increase the waiting time.
+    post = session.post if session else requests.post
     for i in range(0, 5):
         try:
-            r = requests.post(url, data=data, timeout=360, proxies={"http": None, "https": None})
+            r = post(url, data=data, timeout=360, proxies={"http": None, "https": None})
             break
         except Exception as e:
             logging.debug("Got exception {}, will try to connect again".format(e))
@@ -238,7 +324,7 @@ def post_data_to_url(url, data):
 
 def send_routes_for_each_set(args):
     routes, port, action, ptf_ip = args
-    change_routes(action, ptf_ip, port, routes)
+    return change_routes(action, ptf_ip, port, routes)
 
 
 def send_routes_in_parallel(route_set):
@@ -255,12 +341,14 @@ def send_routes_in_parallel(route_set):
     pool = ThreadPool(processes=len(route_set))
 
     # Use the ThreadPool.map function to apply the function to each set of routes
+    start_time = time.time()
     results = pool.map(send_routes_for_each_set, route_set)
+    elapsed = time.time() - start_time
 
-    # Optionally, process the results
-    for result in results:
-        # Process individual results here
-        pass
+    # Report the overall throughput, each set of routes is reported by change_routes
+    routes_number = sum(result[0] for result in results)
+    logging.info("Changed {} routes of {} sets in parallel in {:.1f}s, {:.0f} routes/s".format(
+        routes_number, len(route_set), elapsed, routes_number / elapsed if elapsed > 0 else 0))
 
     # Close the pool and wait for all processes to complete
     pool.close()
@@ -398,6 +486,9 @@ def generate_m0_routes(nexthop, colo_number, m0_number, m0_subnet_number, m0_asn
     return []
 
 
+_generated_routes = {}
+
+
 def generate_routes(family, podset_number, tor_number, tor_subnet_number,
                     spine_asn, leaf_asn_start, tor_asn_start, nexthop,
                     nexthop_v6, tor_subnet_size, max_tor_subnet_number, topo,
@@ -405,6 +496,29 @@ def generate_routes(family, podset_number, tor_number, tor_subnet_number,
                     no_default_route=False, core_ra_asn=CORE_RA_ASN,
                     ipv6_address_pattern=IPV6_ADDRESS_PATTERN_DEFAULT_VALUE,
                     tor_default_route=False, offset=0):
+    """
+    Generates the routes of a neighbor.
+
+    Most neighbors of a topology advertise the same routes, so the routes are generated once per set of arguments.
+    A copy of the routes is returned, the callers extend and shuffle it.
+
+    Returns:
+        tuple: (list of (prefix, nexthop, aspath), suffix of the last route)
+    """
+    key = (family, podset_number, tor_number, tor_subnet_number, spine_asn, leaf_asn_start, tor_asn_start, nexthop,
+           nexthop_v6, tor_subnet_size, max_tor_subnet_number, topo, router_type, tor_index, set_num,
+           no_default_route, core_ra_asn, ipv6_address_pattern, tor_default_route, offset)
+    if key not in _generated_routes:
+        _generated_routes[key] = _generate_routes(*key)
+    routes, suffix = _generated_routes[key]
+    return list(routes), suffix
+
+
+def _generate_routes(family, podset_number, tor_number, tor_subnet_number,
+                     spine_asn, leaf_asn_start, tor_asn_start, nexthop,
+                     nexthop_v6, tor_subnet_size, max_tor_subnet_number, topo,
+                     router_type, tor_index, set_num, no_default_route, core_ra_asn,
+                     ipv6_address_pattern, tor_default_route, offset):
     routes = []
     if not no_default_route and (router_type != "tor" or tor_default_route):
         default_route_as_path = get_uplink_router_as_path(
@@ -416,6 +530,13 @@ def generate_routes(family, podset_number, tor_number, tor_subnet_number,
             if family in ["v6", "both"]:
                 routes.append(("::/0", nexthop_v6, default_route_as_path))
 
+    # First 3 pods are advertised from T1 - so remove 3 from the total pods being advertised by T3
+    first_third_podset_number = int(
+        math.ceil((podset_number - 3) / 3.0))
+    second_third_podset_number = int(
+        math.ceil(((podset_number - 3) * 2) / 3.0))
+    prefixlen_v4 = (32 - int(math.log(tor_subnet_size, 2)))
+
     # NOTE: Using large enough values (e.g., podset_number = 200,
     # us to overflow the 192.168.0.0/16 private address space here.
     # This should be fine for internal use, but may pose an issue if used otherwise
@@ -428,12 +549,6 @@ def generate_routes(family, podset_number, tor_number, tor_subnet_number,
                     if podset < 3:
                         continue
 
-                    # First 3 pods are advertised from T1 - so remove 3 from the total pods being advertised by T3
-                    first_third_podset_number = int(
-                        math.ceil((podset_number - 3) / 3.0))
-                    second_third_podset_number = int(
-                        math.ceil(((podset_number - 3) * 2) / 3.0))
-
                     if set_num is not None:
                         # For T2, we have 3 sets - 1 set advertises first 1/3 podsets,
                         # second set advertises second 1/3 podsets, and all VM's advertises the last 1/3 podsets
@@ -489,7 +604,6 @@ def generate_routes(family, podset_number, tor_number, tor_subnet_number,
                 octet2 = (octet2 % 256)
                 octet3 = (int(suffix / 256) % 256)
                 octet4 = (suffix % 256)
-                prefixlen_v4 = (32 - int(math.log(tor_subnet_size, 2)))
 
                 prefix = "{}.{}.{}.{}/{}".format(octet1,
                                                  octet2, octet3, octet4, prefixlen_v4)
@@ -1846,14 +1960,52 @@ def filterout_subnet_ipv6(aggregate_routes, candidate_routes):
     return filterout_subnet(ars_ipv6, candidate_routes)
 
 
+class PrefixTree(object):
+    """
+    Binary prefix tree of IP networks, to find if a network is a subnet of one of the networks of the tree.
+
+    Finding the supernets of a network walks at most one node per bit of its prefix, whatever the number of networks
+    in the tree.
+    """
+
+    def __init__(self, networks=()):
+        self._roots = {4: {}, 6: {}}
+        for network in networks:
+            self.add(network)
+
+    def add(self, network):
+        node = self._roots[network.version]
+        address = int(network.network_address)
+        for depth in range(network.prefixlen):
+            node = node.setdefault((address >> (network.max_prefixlen - 1 - depth)) & 1, {})
+        # None key marks the end of a network of the tree
+        node[None] = True
+
+    def has_supernet_of(self, network):
+        node = self._roots[network.version]
+        address = int(network.network_address)
+        for depth in range(network.prefixlen + 1):
+            if None in node:
+                return True
+            if depth == network.prefixlen:
+                break
+            node = node.get((address >> (network.max_prefixlen - 1 - depth)) & 1)
+            if node is None:
+                break
+        return False
+
+
 def filterout_subnet(aggregate_routes, candidate_routes):
-    subnets = []
-    for ar in aggregate_routes:
-        ar_net = ipaddress.ip_network(UNICODE_TYPE(ar[0]))
-        for cr in candidate_routes:
-            if ipaddress.ip_network(UNICODE_TYPE(cr[0])).subnet_of(ar_net):
-                subnets.append(cr)
-    return list(set(candidate_routes) - set(subnets))
+    tree = PrefixTree(ipaddress.ip_network(UNICODE_TYPE(ar[0])) for ar in aggregate_routes)
+    routes = []
+    seen = set()
+    for cr in candidate_routes:
+        if cr in seen:
+            continue
+        seen.add(cr)
+        if not tree.has_supernet_of(ipaddress.ip_network(UNICODE_TYPE(cr[0]))):
+            routes.append(cr)
+    return routes
 
 
 def convert_routes_to_str(topo_routes):
@@ -11,6 +11,7 @@ import sys
 import re
 import gzip
 import os
+import shutil
 import locale
 DOCUMENTATION = '''
 module:  extract_log
@@ -42,6 +43,19 @@ Options:
       required: True
       Default: None
 
+    - option-name: start_inode
+      description: inode of the log file which was current when the start tag was added. Used together with
+                   'start_offset' to avoid searching all the log files for the start tag. Rotation of the log
+                   file is followed by the inode. If the start tag is not found at the offset, all the log
+                   files are searched as usual.
+      required: False
+      Default: None
+
+    - option-name: start_offset
+      description: size of the log file with 'start_inode' before the start tag was added.
+      required: False
+      Default: None
+
 '''
 
 EXAMPLES = '''
@@ -58,6 +72,15 @@ EXAMPLES = '''
     dest: '/tmp/'
     flat: yes
 
+- name: Extract syslog entries after a start tag added when syslog inode was 1234 and size was 56789
+  extract_log:
+    directory: '/var/log'
+    file_prefix: 'syslog'
+    start_string: 'start-LogAnalyzer-test_bgp'
+    target_filename: '/tmp/syslog'
+    start_inode: 1234
+    start_offset: 56789
+
 - name: Extract all sairedis.rec entries since the last reboot
   extract_log:
     directory: '/var/log/swss'
@@ -285,11 +308,62 @@ def combine_logs_and_save(directory, filenames, start_string, target_string, tar
                 path, line_processed, line_copied))
 
 
-def extract_log(directory, prefixname, target_string, target_filename):
+def find_file_by_inode(directory, filenames, inode):
+    """Returns the file in @filenames with inode @inode, None if not found.
+    Compressed files are skipped, they are new files created by logrotate"""
+    for filename in filenames:
+        if 'gz' in filename:
+            continue
+        try:
+            if os.stat(os.path.join(directory, filename)).st_ino == inode:
+                return filename
+        except OSError:
+            continue
+    return None
+
+
+def combine_logs_from_offset(directory, filenames, start_filename, start_offset, target_string, target_filename):
+    """Copies lines starting from the first line with @target_string after @start_offset in @start_filename,
+    followed by all the newer files. Only the part of @start_filename after @start_offset is scanned.
+    Returns False without creating @target_filename if @target_string is not found after @start_offset"""
+    path = os.path.join(directory, start_filename)
+    target = target_string.encode('utf-8')
+    with open(path, 'rb') as file:
+        if os.fstat(file.fileno()).st_size < start_offset:
+            # The file was truncated, the offset is not valid anymore
+            return False
+        file.seek(start_offset)
+        for line in iter(file.readline, b''):
+            if target in line and b'extract_log' not in line:
+                break
+        else:
+            return False
+
+        logger.debug("extract_log found start string in file {} at offset {}".format(
+            path, file.tell() - len(line)))
+        with open(target_filename, 'wb') as fp:
+            fp.write(line)
+            shutil.copyfileobj(file, fp)
+            for filename in reversed(calculate_files_to_copy(filenames, start_filename)[:-1]):
+                newer_path = os.path.join(directory, filename)
+                logger.debug("extract_log combine_logs from file {}".format(newer_path))
+                with (gzip.open(newer_path, mode='rb') if 'gz' in newer_path else open(newer_path, 'rb')) as newer:
+                    shutil.copyfileobj(newer, fp)
+    return True
+
+
+def extract_log(directory, prefixname, target_string, target_filename, start_inode=None, start_offset=None):
     logger.debug("extract_log for start string {}".format(
         target_string.replace("start-", "")))
     filenames = list_files(directory, prefixname)
     logger.debug("extract_log from files {}".format(filenames))
+    if start_inode is not None and start_offset is not None:
+        start_filename = find_file_by_inode(directory, filenames, start_inode)
+        if start_filename and combine_logs_from_offset(directory, filenames, start_filename, start_offset,
+                                                       target_string, target_filename):
+            return
+        logger.debug("extract_log start string not found in inode {} after offset {}, search all files".format(
+            start_inode, start_offset))
     file_with_latest_line, file_create_time, latest_line, file_size = extract_latest_line_with_string(
         directory, filenames, target_string)
     m = hashlib.md5()
@@ -311,6 +385,8 @@ def main():
             file_prefix=dict(required=True, type='str'),
             start_string=dict(required=True, type='str'),
             target_filename=dict(required=True, type='str'),
+            start_inode=dict(required=False, type='int', default=None),
+            start_offset=dict(required=False, type='int', default=None),
         ),
         supports_check_mode=False)
 
@@ -322,7 +398,8 @@ def main():
 
     try:
         extract_log(p['directory'], p['file_prefix'],
-                    p['start_string'], p['target_filename'])
+                    p['start_string'], p['target_filename'],
+                    start_inode=p['start_inode'], start_offset=p['start_offset'])
     except Exception:
         tb = traceback.format_exc()
         module.fail_json(msg=tb)
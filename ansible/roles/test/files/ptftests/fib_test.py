@@ -39,6 +39,7 @@ from ptf.testutils import verify_packet_any_port
 from ptf.testutils import verify_no_packet_any
 
 from collections.abc import Iterable
+from collections import Counter
 from collections import defaultdict
 
 
@@ -76,6 +77,7 @@ class FibTest(BaseTest):
     DEFAULT_BALANCING_RANGE = 0.25
     BALANCING_TEST_TIMES = 625
     DEFAULT_BALANCING_TEST_NUMBER = 1
+    DEFAULT_BALANCING_BURST_SIZE = 100
     ACTION_FWD = 'fwd'
     ACTION_DROP = 'drop'
     DEFAULT_SWITCH_TYPE = 'voq'
@@ -116,6 +118,9 @@ class FibTest(BaseTest):
          - dst_vid                vlan tag id of dst pkts. Default: None(untag)
          - ignore_ttl:            mask the ttl field in the expected packet
          - single_fib_for_duts:   have a single fib file for all DUTs in multi-dut case. Default: False
+         - balancing_burst:       send the packets of the balancing test in bursts instead of one by one.
+                                  Default: False
+         - balancing_burst_size:  number of packets sent in a burst. Default: 100
         '''
         self.dataplane = ptf.dataplane_instance
         self.asic_type = self.test_params.get('asic_type')
@@ -150,6 +155,9 @@ class FibTest(BaseTest):
         self.balancing_test_number = self.test_params.get(
             'balancing_test_number', self.DEFAULT_BALANCING_TEST_NUMBER)
         self.balancing_test_count = 0
+        self.balancing_burst = self.test_params.get('balancing_burst', False)
+        self.balancing_burst_size = self.test_params.get(
+            'balancing_burst_size', self.DEFAULT_BALANCING_BURST_SIZE)
         self.switch_type = self.test_params.get(
             'switch_type', self.DEFAULT_SWITCH_TYPE)
 
@@ -297,11 +305,16 @@ class FibTest(BaseTest):
                 # Change balancing_test_times according to number of next hop groups
                 logging.info('Checking ip range balancing {}, src_port={}, exp_ports={}, dst_ip={}, dut_index={}'
                              .format(ip_range, src_port, exp_port_lists, dst_ip, dut_index))
-                for i in range(0, self.balancing_test_times*len(list(itertools.chain(*exp_port_lists)))):
-                    (matched_port, _) = self.check_ip_route(
-                        src_port, dst_ip, exp_port_lists, ipv4)
-                    hit_count_map[matched_port] = hit_count_map.get(
-                        matched_port, 0) + 1
+                pkt_count = self.balancing_test_times*len(list(itertools.chain(*exp_port_lists)))
+                if self.balancing_burst:
+                    hit_count_map = self.check_balancing_burst(
+                        src_port, dst_ip, exp_port_lists, pkt_count, ipv4)
+                else:
+                    for i in range(0, pkt_count):
+                        (matched_port, _) = self.check_ip_route(
+                            src_port, dst_ip, exp_port_lists, ipv4)
+                        hit_count_map[matched_port] = hit_count_map.get(
+                            matched_port, 0) + 1
                 for next_hop in next_hops:
                     # only check balance on a DUT
                     self.check_hit_count_map(
@@ -310,6 +323,143 @@ class FibTest(BaseTest):
                 if self.balancing_test_count >= self.balancing_test_number:
                     break
 
+    def build_balancing_packet(self, src_port, dst_ip_addr, sport, dport, ipv4=True):
+        '''
+        @summary: Build a packet of a flow of the balancing test, like check_ipv4_route and check_ipv6_route do.
+        @param src_port: index of port to use for sending packet to switch
+        @param dst_ip_addr: destination IP to build packet with.
+        @param sport: TCP source port of the flow
+        @param dport: TCP destination port of the flow
+        @return packet
+        '''
+        src_mac = self.dataplane.get_mac(0, src_port)
+        router_mac = self.ptf_test_port_map[str(src_port)]['target_dest_mac']
+        if ipv4:
+            return simple_tcp_packet(
+                pktlen=self.pktlen,
+                eth_dst=router_mac,
+                eth_src=src_mac,
+                ip_src="30.0.0.1",
+                ip_dst=dst_ip_addr,
+                tcp_sport=sport,
+                tcp_dport=dport,
+                ip_ttl=self.ttl,
+                ip_options=self.ip_options,
+                dl_vlan_enable=self.src_vid is not None,
+                vlan_vid=self.src_vid or 0)
+        return simple_tcpv6_packet(
+            pktlen=self.pktlen,
+            eth_dst=router_mac,
+            eth_src=src_mac,
+            ipv6_dst=dst_ip_addr,
+            ipv6_src='2000:0030::1',
+            tcp_sport=sport,
+            tcp_dport=dport,
+            ipv6_hlim=self.ttl,
+            dl_vlan_enable=self.src_vid is not None,
+            vlan_vid=self.src_vid or 0)
+
+    def check_balancing_burst(self, src_port, dst_ip_addr, dst_port_lists, pkt_count, ipv4=True):
+        '''
+        @summary: Send the packets of the balancing test in bursts and count the packets received on each port.
+
+        The packets of all the flows are built up front, each flow has a distinct pair of TCP ports. The packets
+        of a burst are sent back to back, then the packets received on any port are collected from the dataplane
+        and matched to their flows, until all the flows of the burst are received. The flows which are not
+        received are sent again once. Only the flow and the source MAC of the received packets are checked, the
+        content of the forwarded packets is verified by check_ip_range.
+        @param src_port: index of port to use for sending packet to switch
+        @param dst_ip_addr: destination IP to build packet with.
+        @param dst_port_lists: list of ports on which to expect packet to come back from the switch
+        @param pkt_count: number of flows to send
+        @return dict of port to number of packets received on the port
+        '''
+        flows = set()
+        while len(flows) < pkt_count:
+            flows.add((random.randint(0, 65535), random.randint(0, 65535)))
+        pkts = {flow: self.build_balancing_packet(src_port, dst_ip_addr, flow[0], flow[1], ipv4) for flow in flows}
+        ip_layer = scapy.IP if ipv4 else scapy.IPv6
+        # Addresses as formatted by scapy, to compare with received packets
+        sample_pkt = next(iter(pkts.values()))
+        ip_addrs = (sample_pkt[ip_layer].src, sample_pkt[ip_layer].dst)
+
+        rcvd_ports = {}
+        pending = list(flows)
+        for attempt in range(2):
+            if attempt > 0:
+                logging.warning("{} packets weren't received, trying again".format(len(pending)))
+            for start in range(0, len(pending), self.balancing_burst_size):
+                burst = pending[start:start + self.balancing_burst_size]
+                for flow in burst:
+                    send_packet(self, src_port, pkts[flow])
+                self.receive_balancing_burst(set(burst), ip_layer, ip_addrs, src_port, dst_port_lists, rcvd_ports)
+            pending = [flow for flow in pending if flow not in rcvd_ports]
+            if not pending:
+                break
+
+        assert not pending, "{} of {} packets sent from port {} to {} were not received on ports {}".format(
+            len(pending), len(flows), src_port, dst_ip_addr, dst_port_lists)
+        logging.info("Received {} packets sent from port {} to {}".format(len(rcvd_ports), src_port, dst_ip_addr))
+        return dict(Counter(rcvd_ports.values()))
+
+    def receive_balancing_burst(self, flows, ip_layer, ip_addrs, src_port, dst_port_lists, rcvd_ports):
+        '''
+        @summary: Collect the packets of a burst of flows from the dataplane.
+        @param flows: set of (sport, dport) of the flows to receive
+        @param ip_layer: scapy.IP or scapy.IPv6
+        @param ip_addrs: (source IP, destination IP) of the flows
+        @param src_port: index of port the packets were sent from
+        @param dst_port_lists: list of ports on which to expect packet to come back from the switch
+        @param rcvd_ports: dict updated with (sport, dport) to the port the flow was received on
+        '''
+        dst_ports = set(itertools.chain(*dst_port_lists))
+        waiting = set(flows)
+        deadline = time.time() + self.PTF_TIMEOUT
+        while waiting:
+            timeout = deadline - time.time()
+            if timeout <= 0:
+                break
+            result = self.dataplane.poll(device_number=0, timeout=timeout)
+            if not isinstance(result, self.dataplane.PollSuccess):
+                break
+            if result.port not in dst_ports:
+                continue
+            rcvd_pkt = scapy.Ether(result.packet)
+            if ip_layer not in rcvd_pkt or scapy.TCP not in rcvd_pkt or \
+                    (rcvd_pkt[ip_layer].src, rcvd_pkt[ip_layer].dst) != ip_addrs:
+                continue
+            flow = (rcvd_pkt[scapy.TCP].sport, rcvd_pkt[scapy.TCP].dport)
+            if flow not in waiting:
+                continue
+            exp_src_mac = self.get_exp_src_mac(result.port, dst_port_lists)
+            if str(exp_src_mac).lower() != str(rcvd_pkt.src).lower():
+                raise Exception(
+                    "Pkt sent from {} to {} on port {} was rcvd pkt on {} which is one of the expected ports, "
+                    "but the src mac doesn't match, expected {}, got {}".
+                    format(ip_addrs[0], ip_addrs[1], src_port, result.port, exp_src_mac, rcvd_pkt.src))
+            waiting.discard(flow)
+            rcvd_ports[flow] = result.port
+
+    def get_exp_src_mac(self, rcvd_port, dst_port_lists):
+        '''
+        @summary: Get the source MAC of packets forwarded by the DUT to a port.
+        @param rcvd_port: index of port the packet was received on
+        @param dst_port_lists: list of ports on which to expect packet to come back from the switch
+        @return MAC address
+        '''
+        exp_src_mac = None
+        if len(self.ptf_test_port_map[str(rcvd_port)]["target_src_mac"]) > 1:
+            # active-active dualtor, the packet could be received from either ToR, so use the received
+            # port to find the corresponding ToR
+            for dut_index, port_list in enumerate(dst_port_lists):
+                if rcvd_port in port_list:
+                    exp_src_mac = self.ptf_test_port_map[str(
+                        rcvd_port)]["target_src_mac"][dut_index]
+        else:
+            exp_src_mac = self.ptf_test_port_map[str(
+                rcvd_port)]["target_src_mac"][0]
+        return exp_src_mac
+
     def check_ip_route(self, src_port, dst_ip_addr, dst_port_lists, ipv4=True):
         if ipv4:
             res = self.check_ipv4_route(src_port, dst_ip_addr, dst_port_lists)
@@ -414,17 +564,7 @@ class FibTest(BaseTest):
                 rcvd_port, len_rcvd_pkt))
             logging.info(
                 'Recieved packet with length of {}'.format(len_rcvd_pkt))
-            exp_src_mac = None
-            if len(self.ptf_test_port_map[str(rcvd_port)]["target_src_mac"]) > 1:
-                # active-active dualtor, the packet could be received from either ToR, so use the received
-                # port to find the corresponding ToR
-                for dut_index, port_list in enumerate(dst_port_lists):
-                    if rcvd_port in port_list:
-                        exp_src_mac = self.ptf_test_port_map[str(
-                            rcvd_port)]["target_src_mac"][dut_index]
-            else:
-                exp_src_mac = self.ptf_test_port_map[str(
-                    rcvd_port)]["target_src_mac"][0]
+            exp_src_mac = self.get_exp_src_mac(rcvd_port, dst_port_lists)
             actual_src_mac = scapy.Ether(rcvd_pkt).src
             if str(exp_src_mac).lower() != str(actual_src_mac).lower():
                 raise Exception(
@@ -522,17 +662,7 @@ class FibTest(BaseTest):
                 rcvd_port, len_rcvd_pkt))
             logging.info(
                 'Recieved packet with length of {}'.format(len_rcvd_pkt))
-            exp_src_mac = None
-            if len(self.ptf_test_port_map[str(rcvd_port)]["target_src_mac"]) > 1:
-                # active-active dualtor, the packet could be received from either ToR, so use the received
-                # port to find the corresponding ToR
-                for dut_index, port_list in enumerate(dst_port_lists):
-                    if rcvd_port in port_list:
-                        exp_src_mac = self.ptf_test_port_map[str(
-                            rcvd_port)]["target_src_mac"][dut_index]
-            else:
-                exp_src_mac = self.ptf_test_port_map[str(
-                    rcvd_port)]["target_src_mac"][0]
+            exp_src_mac = self.get_exp_src_mac(rcvd_port, dst_port_lists)
             actual_src_mac = scapy.Ether(rcvd_pkt).src
             if str(exp_src_mac).lower() != str(actual_src_mac).lower():
                 raise Exception(
@@ -73,6 +73,7 @@ import scapy.all as scapyall
 from scapy.arch.linux import attach_filter as attach_filter
 
 import sad_path as sp
+import pcap_flow
 
 from ptf import config
 from ptf.base_tests import BaseTest
@@ -1988,8 +1989,12 @@ class ReloadTest(BaseTest):
             else:
                 self.start_sniffer_on_ptf(self.capture_pcap, sniff_filter, wait)
 
-            self.packets = scapyall.rdpcap(self.capture_pcap)
-            self.log("Number of all packets captured: {}".format(len(self.packets)))
+            if self.can_examine_pcap_flow():
+                # The capture file is examined by examine_flow(), without loading all the packets with scapy
+                self.packets = None
+            else:
+                self.packets = scapyall.rdpcap(self.capture_pcap)
+                self.log("Number of all packets captured: {}".format(len(self.packets)))
         except Exception:
             traceback_msg = traceback.format_exc()
             self.log("Error in tcpdump_sniff: {}".format(traceback_msg))
@@ -2120,22 +2125,43 @@ class ReloadTest(BaseTest):
         else:
             return False
 
-    def examine_flow(self, filename=None):
+    def can_examine_pcap_flow(self):
         """
-        This method examines pcap file (if given), or self.packets scapy file.
-        The method compares TCP payloads of the packets one by one (assuming all payloads are consecutive integers),
-        and the losses if found - are treated as disruptions in Dataplane forwarding.
-        All disruptions are saved to self.lost_packets dictionary, in format:
-        disrupt_start_id = (missing_packets_count, disrupt_time, disrupt_start_timestamp, disrupt_stop_timestamp)
+        This method returns True if the capture file can be examined by pcap_flow, without scapy.
+        The vnet packets are decapsulated with scapy, so the vnet captures are examined with scapy.
         """
-        if filename:
-            all_packets = scapyall.rdpcap(filename)
-        elif self.packets:
-            all_packets = self.packets
-        else:
-            self.log("Filename and self.packets are not defined.")
-            self.fails['dut'].add("Filename and self.packets are not defined")
+        return pcap_flow.is_supported() and not self.vnet
+
+    def examine_pcap_flow(self, filename):
+        """
+        This method examines pcap file with pcap_flow: the fields of the packets are read at fixed offsets,
+        and the disruptions are computed with NumPy, instead of dissecting all packets with scapy.
+        It returns pcap_flow.FlowSummary, or None if the capture is not supported by pcap_flow.
+        """
+        try:
+            records_count, flow = pcap_flow.read_tcp_flow(filename, 1234, 5000)
+        except pcap_flow.UnsupportedCaptureError as e:
+            self.log("Capture is examined with scapy: {}".format(e))
             return None
+        self.log("Number of all packets captured: {}".format(records_count))
+        macs = [self.dut_mac, self.vlan_mac]
+        order, _ = pcap_flow.filter_tcp_flow(flow, macs)
+        self.fails['dut'].add("Sniffer failed to capture any traffic")
+        self.assertTrue(len(order), "Sniffer failed to capture any traffic")
+        self.fails['dut'].clear()
+        summary = pcap_flow.examine_tcp_flow(flow, macs, self.log)
+
+        filtered_filename = ('/tmp/capture_filtered.pcap' if self.logfile_suffix is None
+                             else "/tmp/capture_filtered_%s.pcap" % self.logfile_suffix)
+        pcap_flow.write_tcp_flow(filename, flow, order, filtered_filename)
+        self.log("Filtered pcap dumped to %s" % filtered_filename)
+        return summary
+
+    def examine_packets_flow(self, all_packets):
+        """
+        This method examines the scapy packets, see examine_flow().
+        It returns pcap_flow.FlowSummary.
+        """
         # Filter out packets and remove floods:
         # This list will contain all unique Payload ID, to filter out received floods.
         self.unique_id = list()
@@ -2166,8 +2192,7 @@ class ReloadTest(BaseTest):
         # Re-arrange packets, if delayed, by Payload ID and Timestamp:
         packets = sorted(filtered_packets, key=lambda packet: (
             int(bytes(packet[scapyall.TCP].payload)), float(packet.time)))
-        self.lost_packets = dict()
-        self.max_disrupt, self.total_disruption = 0, 0
+        lost_packets = dict()
         sent_packets = dict()
         # Track packet id's that were neither sent or received
         missing_sent_and_received_packet_id_sequences = []
@@ -2186,7 +2211,7 @@ class ReloadTest(BaseTest):
             missed_vlan_to_t1 = 0
             missed_t1_to_vlan = 0
             flooded_pkts = []
-            self.disruption_start, self.disruption_stop = None, None
+            disruption_start, disruption_stop = None, None
             for packet in packets:
                 if packet[scapyall.Ether].dst == self.dut_mac or packet[scapyall.Ether].dst == self.vlan_mac:
                     # This is a sent packet - keep track of it as payload_id:timestamp.
@@ -2260,7 +2285,7 @@ class ReloadTest(BaseTest):
                         disrupt = this_sent_packet_time - prev_sent_packet_time
 
                         # Add disrupt to the dict:
-                        self.lost_packets[prev_payload] = (
+                        lost_packets[prev_payload] = (
                             lost_id, disrupt, received_time - disrupt, received_time)
                         self.log("Disruption between packet ID %d and %d. For %.4f " % (
                             prev_payload, received_payload, disrupt))
@@ -2272,22 +2297,82 @@ class ReloadTest(BaseTest):
                                 else:
                                     missed_t1_to_vlan += 1
                         self.log("")
-                        if not self.disruption_start:
-                            self.disruption_start = datetime.datetime.fromtimestamp(
-                               float(prev_time))
-                        self.disruption_stop = datetime.datetime.fromtimestamp(
-                            float(received_time))
+                        if disruption_start is None:
+                            disruption_start = float(prev_time)
+                        disruption_stop = float(received_time)
                 prev_payload = received_payload
                 prev_time = received_time
-            self.log(
-                "**************** Packet received summary: ********************")
-            self.log("*********** Sent packets captured - {}".format(sent_counter))
-            self.log("*********** received packets captured - t1-to-vlan - {}".format(received_t1_to_vlan))
-            self.log("*********** received packets captured - vlan-to-t1 - {}".format(received_vlan_to_t1))
-            self.log("*********** Missed received packets - t1-to-vlan - {}".format(missed_t1_to_vlan))
-            self.log("*********** Missed received packets - vlan-to-t1 - {}".format(missed_vlan_to_t1))
-            self.log("*********** Flooded pkts - {}".format(flooded_pkts))
-            self.log("**************************************************************")
+
+        if packets:
+            filename = ('/tmp/capture_filtered.pcap' if self.logfile_suffix is None
+                        else "/tmp/capture_filtered_%s.pcap" % self.logfile_suffix)
+            scapyall.wrpcap(filename, packets)
+            self.log("Filtered pcap dumped to %s" % filename)
+
+        return pcap_flow.FlowSummary(
+            sent_counter=sent_counter,
+            received_counter=received_counter,
+            received_t1_to_vlan=received_t1_to_vlan,
+            received_vlan_to_t1=received_vlan_to_t1,
+            missed_t1_to_vlan=missed_t1_to_vlan,
+            missed_vlan_to_t1=missed_vlan_to_t1,
+            flooded_pkts=flooded_pkts,
+            lost_packets=lost_packets,
+            missing_sent_and_received_packet_id_sequences=missing_sent_and_received_packet_id_sequences,
+            disruption_start=disruption_start,
+            disruption_stop=disruption_stop,
+            last_payload=prev_payload,
+        )
+
+    def examine_flow(self, filename=None):
+        """
+        This method examines pcap file (if given), or self.packets scapy file.
+        The method compares TCP payloads of the packets one by one (assuming all payloads are consecutive integers),
+        and the losses if found - are treated as disruptions in Dataplane forwarding.
+        All disruptions are saved to self.lost_packets dictionary, in format:
+        disrupt_start_id = (missing_packets_count, disrupt_time, disrupt_start_timestamp, disrupt_stop_timestamp)
+        The pcap file is examined with pcap_flow if possible, otherwise with scapy.
+        """
+        if filename is None and self.packets is None and os.path.exists(self.capture_pcap):
+            # The capture was not loaded by the sniffer, see tcpdump_sniff()
+            filename = self.capture_pcap
+        summary = None
+        if filename and self.can_examine_pcap_flow():
+            summary = self.examine_pcap_flow(filename)
+        if summary is None:
+            if filename:
+                all_packets = scapyall.rdpcap(filename)
+            elif self.packets:
+                all_packets = self.packets
+            else:
+                self.log("Filename and self.packets are not defined.")
+                self.fails['dut'].add("Filename and self.packets are not defined")
+                return None
+            summary = self.examine_packets_flow(all_packets)
+
+        self.lost_packets = summary.lost_packets
+        self.max_disrupt, self.total_disruption = 0, 0
+        self.disruption_start, self.disruption_stop = None, None
+        if summary.disruption_start is not None:
+            self.disruption_start = datetime.datetime.fromtimestamp(summary.disruption_start)
+            self.disruption_stop = datetime.datetime.fromtimestamp(summary.disruption_stop)
+        sent_counter = summary.sent_counter
+        received_counter = summary.received_counter
+        received_t1_to_vlan = summary.received_t1_to_vlan
+        received_vlan_to_t1 = summary.received_vlan_to_t1
+        missed_t1_to_vlan = summary.missed_t1_to_vlan
+        missed_vlan_to_t1 = summary.missed_vlan_to_t1
+        missing_sent_and_received_packet_id_sequences = summary.missing_sent_and_received_packet_id_sequences
+        prev_payload = summary.last_payload
+        self.log(
+            "**************** Packet received summary: ********************")
+        self.log("*********** Sent packets captured - {}".format(sent_counter))
+        self.log("*********** received packets captured - t1-to-vlan - {}".format(received_t1_to_vlan))
+        self.log("*********** received packets captured - vlan-to-t1 - {}".format(received_vlan_to_t1))
+        self.log("*********** Missed received packets - t1-to-vlan - {}".format(missed_t1_to_vlan))
+        self.log("*********** Missed received packets - vlan-to-t1 - {}".format(missed_vlan_to_t1))
+        self.log("*********** Flooded pkts - {}".format(summary.flooded_pkts))
+        self.log("**************************************************************")
         self.fails['dut'].add("Sniffer failed to filter any traffic from DUT")
         self.assertTrue(received_counter,
                         "Sniffer failed to filter any traffic from DUT")
@@ -2358,11 +2443,6 @@ class ReloadTest(BaseTest):
             self.fails["dut"].add(message)
 
         self.log("Total incoming packets captured %d" % received_counter)
-        if packets:
-            filename = ('/tmp/capture_filtered.pcap' if self.logfile_suffix is None
-                        else "/tmp/capture_filtered_%s.pcap" % self.logfile_suffix)
-            scapyall.wrpcap(filename, packets)
-            self.log("Filtered pcap dumped to %s" % filename)
 
     def check_forwarding_stop(self, signal):
         self.asic_start_recording_vlan_reachability()
@@ -9,6 +9,7 @@ import random
 import json
 import time
 import six
+import struct
 import itertools
 
 from collections.abc import Iterable
@@ -16,6 +17,7 @@ from collections import defaultdict
 from ipaddress import ip_address, ip_network
 import ptf
 import ptf.packet as scapy
+from scapy.all import Raw
 from utilities import retry_call
 from ptf.base_tests import BaseTest
 from ptf.mask import Mask
@@ -42,7 +44,12 @@ class HashTest(BaseTest):
     RELAXED_BALANCING_RANGE = 0.8
     RELAXED_BALANCING_RANGE_MAXTOPO = 1.5
     BALANCING_TEST_TIMES = 250
+    DEFAULT_BALANCING_BURST_SIZE = 100
     DEFAULT_SWITCH_TYPE = 'voq'
+    # Seconds to wait for the packets sent to be received
+    PTF_TIMEOUT = 10
+    # Prefix of the flow ID written in the payload of the packets sent in burst mode
+    FLOW_ID_MAGIC = b'HASH'
     _required_params = [
         'fib_info_files',
         'ptf_test_port_map'
@@ -99,6 +106,13 @@ class HashTest(BaseTest):
             'balancing_range', self.DEFAULT_BALANCING_RANGE)
         self.balancing_test_times = self.test_params.get(
             'balancing_test_times', self.BALANCING_TEST_TIMES)
+        # In burst mode, the packets of a hash key are sent in bursts and matched by the flow ID in their payload,
+        # instead of being sent and verified one by one
+        self.balancing_burst = self.test_params.get('balancing_burst', False)
+        self.balancing_burst_size = self.test_params.get(
+            'balancing_burst_size', self.DEFAULT_BALANCING_BURST_SIZE)
+        self.sweep_id = 0
+        self.hash_stats = {}
         self.switch_type = self.test_params.get(
             'switch_type', self.DEFAULT_SWITCH_TYPE)
         self.ignore_ttl = self.test_params.get('ignore_ttl', False)
@@ -203,28 +217,37 @@ class HashTest(BaseTest):
                 port_list = self.src_ports
             else:
                 port_list = self.get_ingress_ports(exp_port_lists, dst_ip)
-            for ingress_port in port_list:
-                print(ingress_port)
-                logging.info('Checking hash key {}, src_port={}, exp_ports={}, dst_ip={}'
-                             .format(hash_key, ingress_port, exp_port_lists, dst_ip))
-                (matched_port, _) = self.check_ip_route(
-                    hash_key, ingress_port, dst_ip, exp_port_lists)
-                hit_count_map[matched_port] = hit_count_map.get(
-                    matched_port, 0) + 1
+            if self.balancing_burst:
+                hit_count_map = self.check_hash_burst(
+                    hash_key, port_list, exp_port_lists, self.get_packet_version(dst_ip))
+            else:
+                for ingress_port in port_list:
+                    print(ingress_port)
+                    logging.info('Checking hash key {}, src_port={}, exp_ports={}, dst_ip={}'
+                                 .format(hash_key, ingress_port, exp_port_lists, dst_ip))
+                    (matched_port, _) = self.check_ip_route(
+                        hash_key, ingress_port, dst_ip, exp_port_lists)
+                    hit_count_map[matched_port] = hit_count_map.get(
+                        matched_port, 0) + 1
             logging.info("hit count map: {}".format(hit_count_map))
             # if the packet from the ingress port could go to both ToRs(active-active dualtor), we should
             # expect that the packets go to the same ToR has same egress port, so there should be two entries
             # in the hit count map.
             assert len(hit_count_map.keys()) == len(
-                self.ptf_test_port_map[str(ingress_port)]["target_dut"])
+                self.ptf_test_port_map[str(port_list[-1])]["target_dut"])
         else:
-            for _ in range(0, self.balancing_test_times * len(list(itertools.chain(*exp_port_lists)))):
-                logging.info('Checking hash key {}, src_port={}, exp_ports={}, dst_ip={}'
-                             .format(hash_key, src_port, exp_port_lists, dst_ip))
-                (matched_port, _) = self.check_ip_route(
-                    hash_key, src_port, dst_ip, exp_port_lists)
-                hit_count_map[matched_port] = hit_count_map.get(
-                    matched_port, 0) + 1
+            pkt_count = self.balancing_test_times * len(list(itertools.chain(*exp_port_lists)))
+            if self.balancing_burst:
+                hit_count_map = self.check_hash_burst(
+                    hash_key, [src_port] * pkt_count, exp_port_lists, self.get_packet_version(dst_ip))
+            else:
+                for _ in range(0, pkt_count):
+                    logging.info('Checking hash key {}, src_port={}, exp_ports={}, dst_ip={}'
+                                 .format(hash_key, src_port, exp_port_lists, dst_ip))
+                    (matched_port, _) = self.check_ip_route(
+                        hash_key, src_port, dst_ip, exp_port_lists)
+                    hit_count_map[matched_port] = hit_count_map.get(
+                        matched_port, 0) + 1
             logging.info("hash_key={}, hit count map: {}".format(
                 hash_key, hit_count_map))
             for next_hop in next_hops:
@@ -276,7 +299,7 @@ class HashTest(BaseTest):
             logging.info(log)
         kwargs = {}
         if is_timeout:
-            kwargs["timeout"] = 10
+            kwargs["timeout"] = self.PTF_TIMEOUT
         dst_ports = list(itertools.chain(*dst_port_lists))
         rcvd_port_index, rcvd_pkt = verify_packet_any_port(
             self, masked_exp_pkt, dst_ports, **kwargs)
@@ -356,7 +379,7 @@ class HashTest(BaseTest):
                 ipv6_hlim=63)
         return pkt, exp_pkt, None
 
-    def get_validated_packet(self, rcvd_port, rcvd_pkt, dst_port_lists, ip_src, ip_dst, src_port):
+    def get_exp_src_mac(self, rcvd_port, dst_port_lists):
         exp_src_mac = None
         if len(self.ptf_test_port_map[str(rcvd_port)]["target_src_mac"]) > 1:
             # active-active dualtor, the packet could be received from either ToR, so use the received
@@ -368,6 +391,10 @@ class HashTest(BaseTest):
         else:
             exp_src_mac = self.ptf_test_port_map[str(
                 rcvd_port)]["target_src_mac"][0]
+        return exp_src_mac
+
+    def get_validated_packet(self, rcvd_port, rcvd_pkt, dst_port_lists, ip_src, ip_dst, src_port):
+        exp_src_mac = self.get_exp_src_mac(rcvd_port, dst_port_lists)
         actual_src_mac = scapy.Ether(rcvd_pkt).src
         if str(exp_src_mac).lower() != str(actual_src_mac).lower():
             raise Exception("Pkt sent from {} to {} on port {} was rcvd pkt on {} which is one of the expected ports, "
@@ -397,10 +424,10 @@ class HashTest(BaseTest):
                 pkt['IPv6'].nh = ip_proto
                 exp_pkt['IPv6'].nh = ip_proto
 
-    def check_ipv4_route(self, hash_key, src_port, dst_port_lists, outer_sport=None, outer_dst_ip=None,
-                         outer_src_ip=None):
+    def generate_packet(self, hash_key, src_port, version='IP', outer_src_ip=None, outer_dst_ip=None):
         '''
-        @summary: Check IPv4 route works.
+        @summary: Generate a packet with random values of the fields of hash_key.
+        @return (pkt, masked_exp_pkt, logs, ip_src, ip_dst)
         '''
         ip_src = self.src_ip_interval.get_random_ip(
         ) if hash_key == 'src-ip' else self.src_ip_interval.get_first_ip()
@@ -415,7 +442,8 @@ class HashTest(BaseTest):
             if hash_key == 'dst-mac' else self.base_mac
         router_mac = self.ptf_test_port_map[str(src_port)]['target_dest_mac']
         vlan_id = random.choice(self.vlan_ids) if hash_key == 'vlan-id' else 0
-        ip_proto = self._get_ip_proto() if hash_key == 'ip-proto' else None
+        ip_proto = self._get_ip_proto(
+            ipv6=version == 'IPv6') if hash_key == 'ip-proto' else None
         pkt, exp_pkt, inner_pkt = self.create_pkt(
             vlan_id=vlan_id,
             router_mac=router_mac,
@@ -430,12 +458,12 @@ class HashTest(BaseTest):
             outer_src_ipv6=outer_src_ip,
             outer_dst_ipv6=outer_dst_ip,
             outer_sport=outer_sport,
-            version='IP',
+            version=version,
             hash_key=hash_key
         )
-        self.set_packet_parameter(pkt, exp_pkt, hash_key, ip_proto, version='IP')
+        self.set_packet_parameter(pkt, exp_pkt, hash_key, ip_proto, version=version)
         masked_exp_pkt = Mask(exp_pkt)
-        masked_exp_pkt = self.apply_mask_to_exp_pkt(masked_exp_pkt, version='IP')
+        masked_exp_pkt = self.apply_mask_to_exp_pkt(masked_exp_pkt, version=version)
         logs = self.create_packets_logs(
             src_port=src_port,
             pkt=pkt,
@@ -448,8 +476,18 @@ class HashTest(BaseTest):
             dport=dport,
             ip_src=ip_src,
             ip_dst=ip_dst,
-            ip_proto=ip_proto
+            ip_proto=ip_proto,
+            version=version
         )
+        return pkt, masked_exp_pkt, logs, ip_src, ip_dst
+
+    def check_ipv4_route(self, hash_key, src_port, dst_port_lists, outer_sport=None, outer_dst_ip=None,
+                         outer_src_ip=None):
+        '''
+        @summary: Check IPv4 route works.
+        '''
+        pkt, masked_exp_pkt, logs, ip_src, ip_dst = self.generate_packet(
+            hash_key, src_port, version='IP', outer_src_ip=outer_src_ip, outer_dst_ip=outer_dst_ip)
         if isinstance(self, HashTest):
             rcvd_port, rcvd_pkt = retry_call(
                 self.send_and_verify_packets,
@@ -465,56 +503,8 @@ class HashTest(BaseTest):
         '''
         @summary: Check IPv6 route works.
         '''
-        ip_src = self.src_ip_interval.get_random_ip(
-        ) if hash_key == 'src-ip' else self.src_ip_interval.get_first_ip()
-        ip_dst = self.dst_ip_interval.get_random_ip(
-        ) if hash_key == 'dst-ip' else self.dst_ip_interval.get_first_ip()
-        sport = random.randint(0, 65535) if hash_key == 'src-port' else 1234
-        dport = random.randint(0, 65535) if hash_key == 'dst-port' else 80
-        outer_sport = self.generate_random_sport() if hash_key == 'outer-src-port' else 1234
-        src_mac = (self.base_mac[:-5] + "%02x" % random.randint(0, 255) + ":" + "%02x" % random.randint(0, 255)) \
-            if hash_key == 'src-mac' else self.base_mac
-        dst_mac = (self.base_mac[:-5] + "%02x" % random.randint(0, 255) + ":" + "%02x" % random.randint(0, 255)) \
-            if hash_key == 'dst-mac' else self.base_mac
-        router_mac = self.ptf_test_port_map[str(src_port)]['target_dest_mac']
-        vlan_id = random.choice(self.vlan_ids) if hash_key == 'vlan-id' else 0
-        ip_proto = self._get_ip_proto(
-            ipv6=True) if hash_key == "ip-proto" else None
-        pkt, exp_pkt, inner_pkt = self.create_pkt(
-            vlan_id=vlan_id,
-            router_mac=router_mac,
-            src_mac=src_mac,
-            dst_mac=dst_mac,
-            ip_src=ip_src,
-            ip_dst=ip_dst,
-            sport=sport,
-            dport=dport,
-            outer_src_ip=outer_src_ip,
-            outer_dst_ip=outer_dst_ip,
-            outer_src_ipv6=outer_src_ip,
-            outer_dst_ipv6=outer_dst_ip,
-            outer_sport=outer_sport,
-            version='IPv6',
-            hash_key=hash_key
-        )
-        self.set_packet_parameter(pkt, exp_pkt, hash_key, ip_proto, version='IPv6')
-        masked_exp_pkt = Mask(exp_pkt)
-        masked_exp_pkt = self.apply_mask_to_exp_pkt(masked_exp_pkt, version='IPv6')
-        logs = self.create_packets_logs(
-            src_port=src_port,
-            pkt=pkt,
-            ipinip_pkt=pkt,
-            vxlan_pkt=pkt,
-            nvgre_pkt=pkt,
-            inner_pkt=inner_pkt,
-            outer_sport=outer_sport,
-            sport=sport,
-            dport=dport,
-            ip_src=ip_src,
-            ip_dst=ip_dst,
-            ip_proto=ip_proto,
-            version='IPv6'
-        )
+        pkt, masked_exp_pkt, logs, ip_src, ip_dst = self.generate_packet(
+            hash_key, src_port, version='IPv6', outer_src_ip=outer_src_ip, outer_dst_ip=outer_dst_ip)
         if isinstance(self, HashTest):
             rcvd_port, rcvd_pkt = retry_call(
                 self.send_and_verify_packets,
@@ -526,6 +516,131 @@ class HashTest(BaseTest):
             rcvd_port, rcvd_pkt = self.send_and_verify_packets(src_port, pkt, masked_exp_pkt, dst_port_lists, logs=logs)
         return self.get_validated_packet(rcvd_port, rcvd_pkt, dst_port_lists, ip_src, ip_dst, src_port)
 
+    def get_packet_version(self, dst_ip):
+        '''
+        @summary: Get the version of the packets generated for dst_ip, 'IP' or 'IPv6'
+        '''
+        return 'IP' if ip_network(six.text_type(dst_ip)).version == 4 else 'IPv6'
+
+    def set_flow_id(self, pkt, flow_id):
+        '''
+        @summary: Write a flow ID at the beginning of the payload of the innermost packet, which is not used by hash.
+        '''
+        payload = pkt.lastlayer()
+        if not isinstance(payload, Raw) or len(payload.load) < len(flow_id):
+            raise Exception("No room for the flow ID in the payload of packet {}".format(pkt.summary()))
+        payload.load = flow_id + payload.load[len(flow_id):]
+
+    def check_hash_burst(self, hash_key, src_ports, dst_port_lists, version, outer_src_ip=None, outer_dst_ip=None):
+        '''
+        @summary: Send a packet of hash_key from each port of src_ports, and count the packets received on each port.
+
+        All the packets are generated up front, each with a flow ID in its payload. The packets are sent back to
+        back in bursts of balancing_burst_size, then the received packets are matched to the sent packets by the
+        flow ID, in any order. The packets which are not received are sent again once. Only the egress port and the
+        source MAC of the received packets are checked, the content of the forwarded packets is verified by the
+        tests which don't use burst mode.
+        @param hash_key: hash key to generate packets for
+        @param src_ports: list of ports to send the packets from, one packet per entry
+        @param dst_port_lists: list of ports on which to expect packet to come back from the switch
+        @param version: 'IP' or 'IPv6'
+        @return dict of port to number of packets received on the port
+        '''
+        # The sweep ID makes the flow IDs unique across hash keys, so late packets of a sweep are not counted in
+        # the next one
+        self.sweep_id = (self.sweep_id + 1) % 65536
+        flow_id_prefix = self.FLOW_ID_MAGIC + struct.pack('!H', self.sweep_id)
+        flows = []
+        for index, src_port in enumerate(src_ports):
+            pkt, _, _, ip_src, ip_dst = self.generate_packet(
+                hash_key, src_port, version=version, outer_src_ip=outer_src_ip, outer_dst_ip=outer_dst_ip)
+            self.set_flow_id(pkt, flow_id_prefix + struct.pack('!I', index))
+            flows.append((src_port, pkt, ip_src, ip_dst))
+        logging.info('Checking hash key {} in burst mode, {} packets, exp_ports={}'
+                     .format(hash_key, len(flows), dst_port_lists))
+
+        start = time.time()
+        self.dataplane.flush()
+        rcvd_ports = {}
+        pending = list(range(len(flows)))
+        for attempt in range(2):
+            if attempt > 0:
+                logging.warning("{} packets weren't received, trying again".format(len(pending)))
+            for start_index in range(0, len(pending), self.balancing_burst_size):
+                burst = pending[start_index:start_index + self.balancing_burst_size]
+                for index in burst:
+                    send_packet(self, flows[index][0], flows[index][1])
+                self.receive_hash_burst(flows, set(burst), flow_id_prefix, dst_port_lists, rcvd_ports)
+            pending = [index for index in pending if index not in rcvd_ports]
+            if not pending:
+                break
+
+        assert not pending, "{} of {} packets of hash key {} were not received on ports {}".format(
+            len(pending), len(flows), hash_key, dst_port_lists)
+        hit_count_map = {}
+        for rcvd_port in rcvd_ports.values():
+            hit_count_map[rcvd_port] = hit_count_map.get(rcvd_port, 0) + 1
+        self.record_hash_stats(hash_key, len(flows), time.time() - start, hit_count_map, dst_port_lists)
+        return hit_count_map
+
+    def receive_hash_burst(self, flows, waiting, flow_id_prefix, dst_port_lists, rcvd_ports):
+        '''
+        @summary: Collect the packets of a burst from the dataplane.
+        @param flows: list of (src_port, pkt, ip_src, ip_dst) indexed by flow ID
+        @param waiting: set of the flow IDs of the burst
+        @param flow_id_prefix: prefix of the flow IDs of the sweep
+        @param dst_port_lists: list of ports on which to expect packet to come back from the switch
+        @param rcvd_ports: dict updated with flow ID to the port the packet was received on
+        '''
+        dst_ports = set(itertools.chain(*dst_port_lists))
+        deadline = time.time() + self.PTF_TIMEOUT
+        while waiting:
+            timeout = deadline - time.time()
+            if timeout <= 0:
+                break
+            result = self.dataplane.poll(device_number=0, timeout=timeout)
+            if not isinstance(result, self.dataplane.PollSuccess):
+                break
+            if result.port not in dst_ports:
+                continue
+            rcvd_pkt = bytes(result.packet)
+            offset = rcvd_pkt.find(flow_id_prefix)
+            if offset < 0:
+                continue
+            offset += len(flow_id_prefix)
+            if len(rcvd_pkt) < offset + 4:
+                continue
+            index = struct.unpack('!I', rcvd_pkt[offset:offset + 4])[0]
+            if index not in waiting:
+                continue
+            self.get_validated_packet(result.port, rcvd_pkt, dst_port_lists, flows[index][2], flows[index][3],
+                                      flows[index][0])
+            waiting.discard(index)
+            rcvd_ports[index] = result.port
+
+    def record_hash_stats(self, hash_key, pkt_count, seconds, hit_count_map, dst_port_lists):
+        '''
+        @summary: Record the balance statistics of a hash key, reported at the end of the test.
+        '''
+        hits = [hit_count_map.get(port, 0) for port in set(itertools.chain(*dst_port_lists))]
+        mean = float(sum(hits)) / len(hits)
+        self.hash_stats[hash_key] = {
+            'packets': pkt_count,
+            'seconds': seconds,
+            'ports': len(hits),
+            'min': min(hits),
+            'max': max(hits),
+            'max_diff': max(abs(hit - mean) for hit in hits) / mean if mean else 0.0
+        }
+
+    def log_hash_stats(self):
+        logging.info("%-16s \t %8s \t %8s \t %6s \t %8s \t %8s \t %10s" %
+                     ("hash_key", "packets", "time(s)", "ports", "min_cnt", "max_cnt", "diff(%)"))
+        for hash_key, stats in self.hash_stats.items():
+            logging.info("%-16s \t %8d \t %8.2f \t %6d \t %8d \t %8d \t %10s"
+                         % (hash_key, stats['packets'], stats['seconds'], stats['ports'], stats['min'],
+                            stats['max'], str(round(stats['max_diff'] * 100, 2)) + '%'))
+
     def check_within_expected_range(self, actual, expected, hash_key):
         '''
         @summary: Check if the actual number is within the accepted range of the expected number
@@ -641,9 +756,13 @@ class HashTest(BaseTest):
         expect the packet to be received from one of the expected ports
         """
         logging.info("List of hash_keys: {}".format(self.hash_keys))
-        for hash_key in self.hash_keys:
-            logging.info("hash test hash_key: {}".format(hash_key))
-            self.check_hash(hash_key)
+        try:
+            for hash_key in self.hash_keys:
+                logging.info("hash test hash_key: {}".format(hash_key))
+                self.check_hash(hash_key)
+        finally:
+            if self.hash_stats:
+                self.log_hash_stats()
 
 
 class IPinIPHashTest(HashTest):
@@ -757,6 +876,9 @@ class IPinIPHashTest(HashTest):
             masked_exp_pkt.set_do_not_care_scapy(scapy.TCP, "chksum")
         return masked_exp_pkt
 
+    def get_packet_version(self, dst_ip):
+        return 'IP' if self.ipver == 'ipv4' else 'IPv6'
+
     def check_ip_route(self, hash_key, src_port, dst_port_lists, outer_src_ip, outer_dst_ip):
         if self.ipver == 'ipv4':
             (matched_port, received) = self.check_ipv4_route(
@@ -796,36 +918,54 @@ class IPinIPHashTest(HashTest):
             # The 'ingress-port' key is not used in hash by design. We are doing negative test for 'ingress-port'.
             # When 'ingress-port' is included in HASH_KEYS, the PTF test will try to inject same packet to different
             # ingress ports and expect that they are forwarded from same egress port.
-            for ingress_port in self.get_ingress_ports(exp_port_lists, outer_dst_ip):
-                logging.info('Checking hash key {}, src_port={}, exp_ports={}, outer_src_ip={}, outer_dst_ip={}'
-                             .format(hash_key, ingress_port, exp_port_lists, outer_src_ip, outer_dst_ip))
-                (matched_index, _) = self.check_ip_route(hash_key,
-                                                         ingress_port, exp_port_lists, outer_src_ip, outer_dst_ip)
-                hit_count_map[matched_index] = hit_count_map.get(
-                    matched_index, 0) + 1
+            ingress_ports = self.get_ingress_ports(exp_port_lists, outer_dst_ip)
+            if self.balancing_burst:
+                hit_count_map = self.check_hash_burst(hash_key, ingress_ports, exp_port_lists,
+                                                      self.get_packet_version(outer_dst_ip), outer_src_ip,
+                                                      outer_dst_ip)
+            else:
+                for ingress_port in ingress_ports:
+                    logging.info('Checking hash key {}, src_port={}, exp_ports={}, outer_src_ip={}, outer_dst_ip={}'
+                                 .format(hash_key, ingress_port, exp_port_lists, outer_src_ip, outer_dst_ip))
+                    (matched_index, _) = self.check_ip_route(hash_key,
+                                                             ingress_port, exp_port_lists, outer_src_ip, outer_dst_ip)
+                    hit_count_map[matched_index] = hit_count_map.get(
+                        matched_index, 0) + 1
             logging.info("hit count map: {}".format(hit_count_map))
             assert True if len(hit_count_map.keys()) == 1 else False
         elif hash_key == 'inner_length':
             # The length of inner_frame is not used as hash key for IPinIP packet.
             # The test generates IPinIP packets with random inner_frame_length, and then verify the egress path.
             # The egress port should never change
-            for _ in range(0, self.balancing_test_times * len(list(itertools.chain(*exp_port_lists)))):
-                logging.info('Checking hash key {}, exp_ports={}, outer_src_ip={}, outer_dst_ip={}'
-                             .format(hash_key, exp_port_lists, outer_src_ip, outer_dst_ip))
-                (matched_index, _) = self.check_ip_route(hash_key,
-                                                         src_port, exp_port_lists, outer_src_ip, outer_dst_ip)
-                hit_count_map[matched_index] = hit_count_map.get(
-                    matched_index, 0) + 1
+            pkt_count = self.balancing_test_times * len(list(itertools.chain(*exp_port_lists)))
+            if self.balancing_burst:
+                hit_count_map = self.check_hash_burst(hash_key, [src_port] * pkt_count, exp_port_lists,
+                                                      self.get_packet_version(outer_dst_ip), outer_src_ip,
+                                                      outer_dst_ip)
+            else:
+                for _ in range(0, pkt_count):
+                    logging.info('Checking hash key {}, exp_ports={}, outer_src_ip={}, outer_dst_ip={}'
+                                 .format(hash_key, exp_port_lists, outer_src_ip, outer_dst_ip))
+                    (matched_index, _) = self.check_ip_route(hash_key,
+                                                             src_port, exp_port_lists, outer_src_ip, outer_dst_ip)
+                    hit_count_map[matched_index] = hit_count_map.get(
+                        matched_index, 0) + 1
             logging.info("hit count map: {}".format(hit_count_map))
             assert True if len(hit_count_map.keys()) == 1 else False
         else:
-            for _ in range(0, self.balancing_test_times * len(list(itertools.chain(*exp_port_lists)))):
-                logging.info('Checking hash key {}, src_port={}, exp_ports={}, outer_src_ip={}, outer_dst_ip={}'
-                             .format(hash_key, src_port, exp_port_lists, outer_src_ip, outer_dst_ip))
-                (matched_index, _) = self.check_ip_route(hash_key,
-                                                         src_port, exp_port_lists, outer_src_ip, outer_dst_ip)
-                hit_count_map[matched_index] = hit_count_map.get(
-                    matched_index, 0) + 1
+            pkt_count = self.balancing_test_times * len(list(itertools.chain(*exp_port_lists)))
+            if self.balancing_burst:
+                hit_count_map = self.check_hash_burst(hash_key, [src_port] * pkt_count, exp_port_lists,
+                                                      self.get_packet_version(outer_dst_ip), outer_src_ip,
+                                                      outer_dst_ip)
+            else:
+                for _ in range(0, pkt_count):
+                    logging.info('Checking hash key {}, src_port={}, exp_ports={}, outer_src_ip={}, outer_dst_ip={}'
+                                 .format(hash_key, src_port, exp_port_lists, outer_src_ip, outer_dst_ip))
+                    (matched_index, _) = self.check_ip_route(hash_key,
+                                                             src_port, exp_port_lists, outer_src_ip, outer_dst_ip)
+                    hit_count_map[matched_index] = hit_count_map.get(
+                        matched_index, 0) + 1
             logging.info("hash_key={}, hit count map: {}".format(
                 hash_key, hit_count_map))
             for next_hop in next_hops:
@@ -968,6 +1108,9 @@ class VxlanHashTest(HashTest):
             masked_exp_pkt.set_do_not_care_scapy(scapy.TCP, "chksum")
         return masked_exp_pkt
 
+    def get_packet_version(self, dst_ip):
+        return 'IP' if self.ipver == 'ipv4-ipv4' or self.ipver == 'ipv4-ipv6' else 'IPv6'
+
     def check_ip_route(self, hash_key, src_port, dst_port_lists, outer_src_ip,
                        outer_dst_ip):
         if self.ipver == 'ipv4-ipv4' or self.ipver == 'ipv4-ipv6':
@@ -1005,13 +1148,18 @@ class VxlanHashTest(HashTest):
                     outer_dst_ip, exp_port_list))
                 assert False
         hit_count_map = {}
-        for _ in range(0, self.balancing_test_times * len(list(itertools.chain(*exp_port_lists)))):
-            logging.info('Checking hash key {}, src_port={}, exp_ports={}, outer_src_ip={}, outer_dst_ip={}'
-                         .format(hash_key, src_port, exp_port_lists, outer_src_ip, outer_dst_ip))
-            (matched_index, _) = self.check_ip_route(hash_key,
-                                                     src_port, exp_port_lists, outer_src_ip, outer_dst_ip)
-            hit_count_map[matched_index] = hit_count_map.get(
-                matched_index, 0) + 1
+        pkt_count = self.balancing_test_times * len(list(itertools.chain(*exp_port_lists)))
+        if self.balancing_burst:
+            hit_count_map = self.check_hash_burst(hash_key, [src_port] * pkt_count, exp_port_lists,
+                                                  self.get_packet_version(outer_dst_ip), outer_src_ip, outer_dst_ip)
+        else:
+            for _ in range(0, pkt_count):
+                logging.info('Checking hash key {}, src_port={}, exp_ports={}, outer_src_ip={}, outer_dst_ip={}'
+                             .format(hash_key, src_port, exp_port_lists, outer_src_ip, outer_dst_ip))
+                (matched_index, _) = self.check_ip_route(hash_key,
+                                                         src_port, exp_port_lists, outer_src_ip, outer_dst_ip)
+                hit_count_map[matched_index] = hit_count_map.get(
+                    matched_index, 0) + 1
         logging.info("hash_key={}, hit count map: {}".format(
             hash_key, hit_count_map))
         for next_hop in next_hops:
@@ -1181,6 +1329,9 @@ class NvgreHashTest(HashTest):
             exp_pkt = nvgre_pkt.copy()
         return nvgre_pkt, exp_pkt, inner_pkt
 
+    def get_packet_version(self, dst_ip):
+        return 'IP' if self.ipver == 'ipv4-ipv4' or self.ipver == 'ipv4-ipv6' else 'IPv6'
+
     def check_ip_route(self, hash_key, src_port, dst_port_lists, outer_src_ip,
                        outer_dst_ip, outer_src_ipv6, outer_dst_ipv6):
         if self.ipver == 'ipv4-ipv4' or self.ipver == 'ipv4-ipv6':
@@ -1216,14 +1367,22 @@ class NvgreHashTest(HashTest):
                     outer_dst_ip, exp_port_list))
                 assert False
         hit_count_map = {}
-        for _ in range(0, self.balancing_test_times * len(list(itertools.chain(*exp_port_lists)))):
-            logging.info('Checking hash key {}, src_port={}, exp_ports={}, outer_src_ip={}, outer_dst_ip={}'
-                         .format(hash_key, src_port, exp_port_lists, outer_src_ip, outer_dst_ip))
-            (matched_index, _) = self.check_ip_route(hash_key,
-                                                     src_port, exp_port_lists, outer_src_ip, outer_dst_ip,
-                                                     outer_src_ipv6, outer_dst_ipv6)
-            hit_count_map[matched_index] = hit_count_map.get(
-                matched_index, 0) + 1
+        pkt_count = self.balancing_test_times * len(list(itertools.chain(*exp_port_lists)))
+        if self.balancing_burst:
+            version = self.get_packet_version(outer_dst_ip)
+            hit_count_map = self.check_hash_burst(
+                hash_key, [src_port] * pkt_count, exp_port_lists, version,
+                outer_src_ip if version == 'IP' else outer_src_ipv6,
+                outer_dst_ip if version == 'IP' else outer_dst_ipv6)
+        else:
+            for _ in range(0, pkt_count):
+                logging.info('Checking hash key {}, src_port={}, exp_ports={}, outer_src_ip={}, outer_dst_ip={}'
+                             .format(hash_key, src_port, exp_port_lists, outer_src_ip, outer_dst_ip))
+                (matched_index, _) = self.check_ip_route(hash_key,
+                                                         src_port, exp_port_lists, outer_src_ip, outer_dst_ip,
+                                                         outer_src_ipv6, outer_dst_ipv6)
+                hit_count_map[matched_index] = hit_count_map.get(
+                    matched_index, 0) + 1
         logging.info("hash_key={}, hit count map: {}".format(
             hash_key, hit_count_map))
         for next_hop in next_hops:
@@ -0,0 +1,421 @@
+"""
+Fast path of the data plane flow examination of advanced-reboot, for the captures of long reboot runs.
+
+The capture file is streamed record by record, without dissecting the packets with scapy. Only the fields used by
+the examination are read at fixed byte offsets of the frames, into NumPy arrays: the MAC addresses, the timestamp
+and the payload ID of the TCP packets of the flow. The lost packets and the disruptions are then computed with
+array operations, with the same results as ReloadTest.examine_flow() on the scapy packets.
+"""
+import datetime
+import struct
+from array import array
+from collections import namedtuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+LINKTYPE_ETHERNET = 1
+ETH_P_IP = 0x0800
+ETH_P_IPV6 = 0x86dd
+VLAN_ETHER_TYPES = (0x8100, 0x88a8, 0x9100)
+IPPROTO_TCP = 6
+
+# pcap magic number -> (byte order, timestamp ticks per second)
+PCAP_MAGICS = {
+    b"\xd4\xc3\xb2\xa1": ("<", 10 ** 6),
+    b"\xa1\xb2\xc3\xd4": (">", 10 ** 6),
+    b"\x4d\x3c\xb2\xa1": ("<", 10 ** 9),
+    b"\xa1\xb2\x3c\x4d": (">", 10 ** 9),
+}
+PCAPNG_SECTION_HEADER = b"\x0a\x0d\x0d\x0a"
+PCAPNG_INTERFACE_DESCRIPTION = 1
+PCAPNG_OBSOLETE_PACKET = 2
+PCAPNG_SIMPLE_PACKET = 3
+PCAPNG_ENHANCED_PACKET = 6
+PCAPNG_OPT_IF_TSRESOL = 9
+PCAPNG_OPT_IF_TSOFFSET = 14
+
+FlowSummary = namedtuple("FlowSummary", [
+    "sent_counter",
+    "received_counter",
+    "received_t1_to_vlan",
+    "received_vlan_to_t1",
+    "missed_t1_to_vlan",
+    "missed_vlan_to_t1",
+    "flooded_pkts",
+    # disrupt_start_id: (missing_packets_count, disrupt_time, disrupt_start_timestamp, disrupt_stop_timestamp)
+    "lost_packets",
+    "missing_sent_and_received_packet_id_sequences",
+    # Timestamps of the first and last disruptions, None if there is no disruption
+    "disruption_start",
+    "disruption_stop",
+    # Payload ID of the last received packet
+    "last_payload",
+])
+
+
+class UnsupportedCaptureError(Exception):
+    """
+    The capture file has a format or packets which are not handled by the fast path.
+    """
+    pass
+
+
+def is_supported():
+    return np is not None
+
+
+def mac_to_int(mac):
+    """
+    Convert a MAC address as formatted by scapy to an integer, -1 if it is not in this format
+    (it would never be equal to a MAC address of a packet).
+    """
+    parts = mac.split(":") if isinstance(mac, str) else []
+    if len(parts) != 6 or any(len(part) != 2 or part != part.lower() for part in parts):
+        return -1
+    try:
+        return int("".join(parts), 16)
+    except ValueError:
+        return -1
+
+
+def _read_pcap_records(f, header):
+    byte_order, ticks_per_second = PCAP_MAGICS[header[:4]]
+    header += f.read(16)
+    if len(header) < 24:
+        raise UnsupportedCaptureError("Truncated pcap file header")
+    linktype = struct.unpack_from(byte_order + "I", header, 20)[0] & 0xffff
+    if linktype != LINKTYPE_ETHERNET:
+        raise UnsupportedCaptureError("Unsupported link type {}".format(linktype))
+    record_header = struct.Struct(byte_order + "IIII")
+    position = 24
+    while True:
+        data = f.read(16)
+        if len(data) < 16:
+            return
+        seconds, fraction, caplen, _ = record_header.unpack(data)
+        frame = f.read(caplen)
+        if len(frame) < caplen:
+            # The capture was stopped while writing the last packet
+            return
+        yield (seconds * ticks_per_second + fraction) / ticks_per_second, frame, position + 16
+        position += 16 + caplen
+
+
+def _parse_pcapng_interface(body, byte_order):
+    linktype = struct.unpack_from(byte_order + "H", body, 0)[0]
+    ticks_per_second, offset_seconds = 10 ** 6, 0
+    pos = 8
+    while pos + 4 <= len(body):
+        code, length = struct.unpack_from(byte_order + "HH", body, pos)
+        value = body[pos + 4:pos + 4 + length]
+        if code == 0:
+            break
+        if code == PCAPNG_OPT_IF_TSRESOL and length >= 1:
+            resolution = value[0]
+            ticks_per_second = 2 ** (resolution & 0x7f) if resolution & 0x80 else 10 ** resolution
+        elif code == PCAPNG_OPT_IF_TSOFFSET and length >= 8:
+            offset_seconds = struct.unpack_from(byte_order + "q", value, 0)[0]
+        pos += 4 + (length + 3) // 4 * 4
+    return linktype, ticks_per_second, offset_seconds
+
+
+def _read_pcapng_records(f, header):
+    byte_order = "<"
+    interfaces = []
+    position = 0
+    while len(header) == 8:
+        block_position = position
+        if header[:4] == PCAPNG_SECTION_HEADER:
+            # The byte order of a section is given by its byte-order magic
+            byte_order_magic = f.read(4)
+            byte_order = "<" if byte_order_magic == b"\x4d\x3c\x2b\x1a" else ">"
+            interfaces = []
+            block_type = None
+            body_length = struct.unpack_from(byte_order + "I", header, 4)[0] - 12
+            position += 4
+        else:
+            block_type, block_length = struct.unpack_from(byte_order + "II", header, 0)
+            body_length = block_length - 8
+        body = f.read(body_length)
+        if len(body) < body_length:
+            # The capture was stopped while writing the last block
+            return
+        position += 8 + body_length
+        if block_type == PCAPNG_INTERFACE_DESCRIPTION:
+            interfaces.append(_parse_pcapng_interface(body, byte_order))
+        elif block_type == PCAPNG_ENHANCED_PACKET:
+            interface_id, ts_high, ts_low, caplen = struct.unpack_from(byte_order + "IIII", body, 0)
+            linktype, ticks_per_second, offset_seconds = interfaces[interface_id]
+            if linktype != LINKTYPE_ETHERNET:
+                raise UnsupportedCaptureError("Unsupported link type {}".format(linktype))
+            yield (offset_seconds + ((ts_high << 32) | ts_low) / ticks_per_second, body[20:20 + caplen],
+                   block_position + 28)
+        elif block_type in (PCAPNG_OBSOLETE_PACKET, PCAPNG_SIMPLE_PACKET):
+            raise UnsupportedCaptureError("Unsupported pcapng block type {}".format(block_type))
+        header = f.read(8)
+
+
+def read_pcap_records(filename):
+    """
+    Stream the records of a pcap or pcapng file of an Ethernet capture.
+    Yield (timestamp, frame, offset of the frame in the file) of each record.
+    """
+    with open(filename, "rb", buffering=1 << 20) as f:
+        header = f.read(8)
+        if header[:4] in PCAP_MAGICS:
+            records = _read_pcap_records(f, header)
+        elif header[:4] == PCAPNG_SECTION_HEADER:
+            records = _read_pcapng_records(f, header)
+        else:
+            raise UnsupportedCaptureError("Not a pcap or pcapng file: {}".format(filename))
+        for record in records:
+            yield record
+
+
+def parse_tcp_frame(frame, sport, dport):
+    """
+    Parse an Ether/[802.1Q]/IPv4|IPv6/TCP frame at fixed byte offsets.
+    Return (dst MAC, src MAC, TCP payload) if it is a TCP packet from sport to dport, None otherwise.
+    """
+    size = len(frame)
+    if size < 14:
+        return None
+    ether_type = struct.unpack_from("!H", frame, 12)[0]
+    offset = 14
+    while ether_type in VLAN_ETHER_TYPES and size >= offset + 4:
+        ether_type = struct.unpack_from("!H", frame, offset + 2)[0]
+        offset += 4
+    if ether_type == ETH_P_IP:
+        if size < offset + 20:
+            return None
+        version_ihl, total_length, fragment, protocol = struct.unpack_from("!BxHxxHxB", frame, offset)
+        header_length = (version_ihl & 0xf) * 4
+        # Only the first fragment holds the TCP header
+        if protocol != IPPROTO_TCP or fragment & 0x1fff or header_length < 20:
+            return None
+        tcp = offset + header_length
+        # The bytes after the IP total length are padding, unless the total length is not set
+        end = offset + total_length if total_length >= header_length else size
+    elif ether_type == ETH_P_IPV6:
+        if size < offset + 40:
+            return None
+        payload_length, next_header = struct.unpack_from("!HB", frame, offset + 4)
+        if next_header != IPPROTO_TCP or payload_length == 0:
+            return None
+        tcp = offset + 40
+        end = tcp + payload_length
+    else:
+        return None
+    end = min(end, size)
+    if end < tcp + 20:
+        return None
+    if struct.unpack_from("!HH", frame, tcp) != (sport, dport):
+        return None
+    data = tcp + max(20, (frame[tcp + 12] >> 4) * 4)
+    return frame[0:6], frame[6:12], frame[data:end]
+
+
+def read_tcp_flow(filename, sport, dport):
+    """
+    Read the TCP packets from sport to dport with an integer payload (the packet ID) of a capture file.
+    Return (number of records, flow), the flow being a dict of NumPy arrays in capture order:
+    "dst" and "src" MAC addresses as integers, "payload_id", "time", and "offset" and "length" of the frame
+    in the capture file.
+    """
+    dst_macs, src_macs, payload_ids, times = array("q"), array("q"), array("q"), array("d")
+    offsets, lengths = array("q"), array("q")
+    records_count = 0
+    for timestamp, frame, offset in read_pcap_records(filename):
+        records_count += 1
+        fields = parse_tcp_frame(frame, sport, dport)
+        if fields is None:
+            continue
+        try:
+            payload_id = int(fields[2])
+        except ValueError:
+            continue
+        if not -2 ** 63 <= payload_id < 2 ** 63:
+            raise UnsupportedCaptureError("Payload ID {} out of range".format(payload_id))
+        dst_macs.append(int.from_bytes(fields[0], "big"))
+        src_macs.append(int.from_bytes(fields[1], "big"))
+        payload_ids.append(payload_id)
+        times.append(timestamp)
+        offsets.append(offset)
+        lengths.append(len(frame))
+    flow = {
+        "dst": np.array(dst_macs, dtype=np.int64),
+        "src": np.array(src_macs, dtype=np.int64),
+        "payload_id": np.array(payload_ids, dtype=np.int64),
+        "time": np.array(times, dtype=np.float64),
+        "offset": np.array(offsets, dtype=np.int64),
+        "length": np.array(lengths, dtype=np.int64),
+    }
+    return records_count, flow
+
+
+def filter_tcp_flow(flow, macs):
+    """
+    Filter out the floods of a flow read by read_tcp_flow(), and sort its packets by payload ID and timestamp.
+    The packets with a destination MAC in macs are sent packets, the packets with a source MAC in macs are
+    received packets.
+    Return (indices of the packets kept in the flow arrays in sorted order, sent flag of each packet kept).
+    """
+    mac_values = [mac_to_int(mac) for mac in macs]
+    is_sent = np.isin(flow["dst"], mac_values)
+    is_received = np.isin(flow["src"], mac_values)
+
+    # Keep the sent packets and the first received packet of each payload ID
+    received_idx = np.flatnonzero(is_received)
+    _, first_idx = np.unique(flow["payload_id"][received_idx], return_index=True)
+    keep = is_sent.copy()
+    keep[received_idx[first_idx]] = True
+
+    # Re-arrange packets, if delayed, by Payload ID and Timestamp
+    order = np.flatnonzero(keep)
+    order = order[np.lexsort((flow["time"][order], flow["payload_id"][order]))]
+    return order, is_sent[order]
+
+
+def write_tcp_flow(capture_filename, flow, order, filename):
+    """
+    Write packets of a flow read by read_tcp_flow() from capture_filename to a pcap file, in the given order.
+    """
+    with open(capture_filename, "rb") as capture, open(filename, "wb", buffering=1 << 20) as f:
+        f.write(struct.pack("<IHHiIII", 0xa1b2c3d4, 2, 4, 0, 0, 65535, LINKTYPE_ETHERNET))
+        for timestamp, offset, length in zip(flow["time"][order].tolist(), flow["offset"][order].tolist(),
+                                             flow["length"][order].tolist()):
+            capture.seek(offset)
+            seconds = int(timestamp)
+            f.write(struct.pack("<IIII", seconds, int(round((timestamp - seconds) * 10 ** 6)), length, length))
+            f.write(capture.read(length))
+
+
+def examine_tcp_flow(flow, macs, log):
+    """
+    Compute the lost packets and disruptions of a flow read by read_tcp_flow(), as ReloadTest.examine_flow().
+    The packets with a destination MAC in macs are sent packets, the packets with a source MAC in macs are
+    received packets. The messages about the disruptions are logged with log, as examine_flow() does.
+    Return FlowSummary.
+    """
+    order, sent = filter_tcp_flow(flow, macs)
+    ids, times = flow["payload_id"][order], flow["time"][order]
+    positions = np.arange(len(ids))
+
+    # Sent packets, the timestamp of a payload ID being the one of its last sent packet
+    sent_pos = np.flatnonzero(sent)
+    sent_ids = ids[sent_pos]
+    flooded_pkts = sent_ids[1:][sent_ids[1:] == sent_ids[:-1]].tolist()
+    last_of_id = np.append(sent_ids[1:] != sent_ids[:-1], True)[:len(sent_ids)]
+    # The last payload ID never matches, so that a search always returns a valid index
+    unique_sent_ids = np.append(sent_ids[last_of_id], np.iinfo(np.int64).max)
+    unique_sent_times = np.append(times[sent_pos][last_of_id], 0.0)
+    vlan_to_t1_before = np.concatenate(([0], np.cumsum(unique_sent_ids % 5 == 0)))
+
+    # Received packets, and the last packet with the same payload ID sent before each of them
+    received_pos = np.flatnonzero(~sent)
+    received_ids, received_times = ids[received_pos], times[received_pos]
+    last_sent_pos = np.maximum.accumulate(np.where(sent, positions, -1))[received_pos]
+    sent_before = (last_sent_pos >= 0) & (ids[np.maximum(last_sent_pos, 0)] == received_ids)
+    this_sent_times = times[np.maximum(last_sent_pos, 0)]
+    received_vlan_to_t1 = int(np.count_nonzero(received_ids % 5 == 0))
+
+    # A received packet with a gap since the previous received packet is ignored if it was not sent.
+    # The previous received packet of the next one is then the same, so this is resolved in order.
+    accepted = np.ones(len(received_ids), dtype=bool)
+    # Messages by index of the received packet, logged in the order of the packets
+    messages = []
+    last_candidate, last_prev = -2, None
+    for k in np.flatnonzero(~sent_before & (received_ids != 0)).tolist():
+        if k == 0:
+            prev_payload = -1
+        elif k - 1 == last_candidate and not accepted[k - 1]:
+            prev_payload = last_prev
+        else:
+            prev_payload = int(received_ids[k - 1])
+        received_payload = int(received_ids[k])
+        if received_payload - prev_payload > 1:
+            messages.append((k, "Ignoring received packet with payload {}, as it was not sent".format(
+                received_payload)))
+            accepted[k] = False
+        last_candidate, last_prev = k, prev_payload
+    received_but_not_sent = np.unique(received_ids[~accepted])
+
+    # Gaps between the accepted received packets
+    accepted_idx = np.flatnonzero(accepted)
+    payloads = received_ids[accepted_idx]
+    prev_payloads = np.concatenate(([-1], payloads[:-1]))
+    prev_times = np.concatenate(([0.0], received_times[accepted_idx][:-1]))
+    gaps = np.flatnonzero((payloads != 0) & (payloads - prev_payloads > 1))
+
+    gap_received = payloads[gaps]
+    gap_prev = prev_payloads[gaps]
+    gap_received_idx = accepted_idx[gaps]
+    gap_times = received_times[gap_received_idx]
+    # First payload ID sent between the previous and the received packet
+    first_sent_idx = np.searchsorted(unique_sent_ids, gap_prev + 1)
+    found = unique_sent_ids[first_sent_idx] < gap_received
+    stop = np.where(found, unique_sent_ids[first_sent_idx], gap_received)
+    disrupts = this_sent_times[gap_received_idx] - unique_sent_times[first_sent_idx]
+    # Payload IDs neither sent nor received before the first sent one
+    missing_counts = (stop - gap_prev - 1) - (np.searchsorted(received_but_not_sent, stop) -
+                                              np.searchsorted(received_but_not_sent, gap_prev + 1))
+    # Sent payload IDs lost between the previous and the received packet
+    lost_end_idx = np.searchsorted(unique_sent_ids, gap_received)
+    missed_total = lost_end_idx - first_sent_idx
+    missed_vlan_to_t1 = vlan_to_t1_before[lost_end_idx] - vlan_to_t1_before[first_sent_idx]
+    # Counters of the sent and received packets up to each received packet
+    received_counters = gap_received_idx + 1
+    sent_counters = received_pos[gap_received_idx] - gap_received_idx
+
+    lost_packets = dict()
+    missing_sequences = []
+    disruption_start, disruption_stop = None, None
+    missed = [0, 0]
+    for (k, received_payload, prev_payload, received_time, prev_time, sent_counter, received_counter, is_found,
+         missing_count, disrupt, total, vlan_to_t1) in zip(
+            gap_received_idx.tolist(), gap_received.tolist(), gap_prev.tolist(), gap_times.tolist(),
+            prev_times[gaps].tolist(), sent_counters.tolist(), received_counters.tolist(), found.tolist(),
+            missing_counts.tolist(), disrupts.tolist(), missed_total.tolist(), missed_vlan_to_t1.tolist()):
+        # Packets in a row are missing, a potential disruption.
+        messages.append((k, "received_payload: {} (at {}), prev_payload: {} (at {}), "
+                            "sent_counter: {}, received_counter: {}".format(
+                                received_payload, datetime.datetime.fromtimestamp(received_time),
+                                prev_payload, datetime.datetime.fromtimestamp(prev_time),
+                                sent_counter, received_counter)))
+        if missing_count > 0:
+            missing_sequences.append(
+                str(prev_payload + 1) if missing_count == 1
+                else "{}-{}".format(prev_payload + 1, received_payload - 1))
+        if not is_found:
+            continue
+        # Disruption occurred - some sent packets were not received
+        lost_packets[prev_payload] = (
+            (received_payload - 1) - prev_payload, disrupt, received_time - disrupt, received_time)
+        messages.append((k, "Disruption between packet ID %d and %d. For %.4f " % (
+            prev_payload, received_payload, disrupt)))
+        messages.append((k, ""))
+        missed[0] += total - vlan_to_t1
+        missed[1] += vlan_to_t1
+        if disruption_start is None:
+            disruption_start = prev_time
+        disruption_stop = received_time
+    for _, message in sorted(messages, key=lambda message: message[0]):
+        log(message)
+
+    return FlowSummary(
+        sent_counter=len(sent_pos),
+        received_counter=len(received_ids),
+        received_t1_to_vlan=len(received_ids) - received_vlan_to_t1,
+        received_vlan_to_t1=received_vlan_to_t1,
+        missed_t1_to_vlan=missed[0],
+        missed_vlan_to_t1=missed[1],
+        flooded_pkts=flooded_pkts,
+        lost_packets=lost_packets,
+        missing_sent_and_received_packet_id_sequences=missing_sequences,
+        disruption_start=disruption_start,
+        disruption_stop=disruption_stop,
+        last_payload=int(payloads[-1]) if len(payloads) else -1,
+    )
@@ -25,6 +25,7 @@ Usage:          Examples of how to use log analyzer
 
 import sys
 import getopt
+import json
 import re
 import os
 import os.path
@@ -34,6 +35,11 @@ import logging
 import logging.handlers
 from datetime import datetime
 
+try:
+    import re._parser as sre_parse
+except ImportError:
+    import sre_parse
+
 # ---------------------------------------------------------------------
 # Global variables
 # ---------------------------------------------------------------------
@@ -56,6 +62,182 @@ err_start_ignore_marker = -8
 # will not be picked up by the analyzer.
 MAX_LOG_MESSAGE_LENGTH = 1000
 
+# -- Size of the blocks used to read log files backwards
+READ_BLOCK_SIZE = 1024 * 1024
+
+
+def read_lines_reversed(log_file, block_size=READ_BLOCK_SIZE):
+    '''
+    @summary: Yield lines of a file from the last one to the first one.
+
+    The file is read backwards block by block, so only the part of the file after the
+    start marker is ever read, and memory usage does not depend on the file size.
+
+    @param log_file: File object opened in binary mode.
+    @param block_size: Size of the blocks to read.
+    '''
+    log_file.seek(0, os.SEEK_END)
+    position = log_file.tell()
+    # -- Beginning of the line cut by the boundary of the previously read block
+    tail = b''
+    while position > 0:
+        read_size = min(block_size, position)
+        position -= read_size
+        log_file.seek(position)
+        pieces = (log_file.read(read_size) + tail).split(b'\n')
+        lines = [piece + b'\n' for piece in pieces[:-1]]
+        if pieces[-1]:
+            lines.append(pieces[-1])
+        if position > 0 and lines:
+            tail = lines.pop(0)
+        else:
+            tail = b''
+        for line in reversed(lines):
+            yield line.decode('utf-8', 'replace')
+    if tail:
+        yield tail.decode('utf-8', 'replace')
+
+
+# -- Minimum length of a literal to be used as keyword for pre-filtering lines
+MIN_KEYWORD_LENGTH = 3
+
+
+def required_literal(pattern):
+    '''
+    @summary: Find the longest literal string which must be present in any string matching
+        the regular expression. Only the top level of the expression is inspected, so
+        literals inside groups, alternations and repeats are not considered.
+
+    @param pattern: Regular expression string.
+
+    @return: The literal string, or None if there is no literal long enough.
+    '''
+    try:
+        if re.compile(pattern).flags & re.IGNORECASE:
+            return None
+        parsed = sre_parse.parse(pattern)
+    except (re.error, TypeError):
+        return None
+
+    literals = []
+    run = []
+    for op, av in list(parsed) + [(None, None)]:
+        if op == sre_parse.LITERAL:
+            run.append(chr(av))
+        elif run:
+            literals.append(''.join(run))
+            run = []
+    if any(op == sre_parse.BRANCH for op, _ in parsed):
+        return None
+    longest = max(literals, key=len) if literals else ''
+    return longest if len(longest) >= MIN_KEYWORD_LENGTH else None
+
+
+class PatternSet(object):
+    '''
+    @summary: A set of regular expressions compiled once and matched together.
+
+    Duplicated expressions are removed. Each expression is checked against a line only if
+    the literal keyword extracted from it is found in the line, and lines without any keyword
+    are rejected by a single pre-filter scan. So most of the lines are never run through the
+    expressions, and the expressions matching a line are known in the same pass.
+    The set can be used in place of the compiled combined regular expression by
+    AnsibleLogAnalyzer: search, match and findall return the result of the first matching
+    expression.
+    '''
+
+    def __init__(self, patterns):
+        self.patterns = list(dict.fromkeys(patterns))
+        self.pattern = '|'.join(self.patterns)
+        self._checks = [(required_literal(p), re.compile(p)) for p in self.patterns]
+
+        keywords = [keyword for keyword, _ in self._checks]
+        if all(keywords):
+            # -- A keyword containing another one is redundant for pre-filtering
+            minimal = []
+            for keyword in sorted(set(keywords), key=len):
+                if not any(k in keyword for k in minimal):
+                    minimal.append(keyword)
+            self._prefilter = re.compile('|'.join(re.escape(k) for k in minimal))
+        else:
+            self._prefilter = None
+
+    def __len__(self):
+        return len(self.patterns)
+
+    def _candidates(self, line):
+        '''
+        @summary: Yield (index, compiled expression) of the expressions which could match the line.
+        '''
+        if self._prefilter is not None and self._prefilter.search(line) is None:
+            return
+        for index, (keyword, compiled) in enumerate(self._checks):
+            if keyword is None or keyword in line:
+                yield index, compiled
+
+    def search(self, line):
+        for _, compiled in self._candidates(line):
+            result = compiled.search(line)
+            if result:
+                return result
+        return None
+
+    def match(self, line):
+        for _, compiled in self._candidates(line):
+            result = compiled.match(line)
+            if result:
+                return result
+        return None
+
+    def findall(self, line):
+        for _, compiled in self._candidates(line):
+            result = compiled.findall(line)
+            if result:
+                return result
+        return []
+
+    def matching_patterns(self, line):
+        '''
+        @summary: Get the expressions which are found in the line.
+        '''
+        return [self.patterns[index] for index, compiled in self._candidates(line) if compiled.search(line)]
+
+    def unused_patterns(self, lines):
+        '''
+        @summary: Get the expressions which are not found in any of the lines.
+        '''
+        unused = dict.fromkeys(self.patterns)
+        for line in lines:
+            if not unused:
+                break
+            for pattern in self.matching_patterns(line):
+                unused.pop(pattern, None)
+        return list(unused)
+
+
+# -- Pattern sets compiled in this process, keyed by the tuple of expressions
+_pattern_sets = {}
+PATTERN_SETS_CACHE_SIZE = 64
+
+
+def get_pattern_set(patterns):
+    '''
+    @summary: Get the PatternSet of the expressions, compiled only once per process.
+
+    @param patterns: List of regular expression strings.
+
+    @return: PatternSet instance, or None if the list is empty.
+    '''
+    if not patterns:
+        return None
+    key = tuple(patterns)
+    if key not in _pattern_sets:
+        if len(_pattern_sets) >= PATTERN_SETS_CACHE_SIZE:
+            # -- Drop the oldest one
+            del _pattern_sets[next(iter(_pattern_sets))]
+        _pattern_sets[key] = PatternSet(patterns)
+    return _pattern_sets[key]
+
 
 class AnsibleLogAnalyzer:
     '''
@@ -248,6 +430,23 @@ class AnsibleLogAnalyzer:
 
         return False
 
+    def get_log_positions(self, log_file_list):
+        '''
+        @summary: Get inode and size of each log file specified.
+            Recorded before placing the start marker, they tell extract_log where to
+            start searching for the marker, instead of searching all rotated log files.
+        @param log_file_list : List of file paths.
+        @return: Dictionary of <file path, {"inode": inode, "offset": size}>
+        '''
+        positions = {}
+        for log_file in log_file_list:
+            try:
+                st = os.stat(log_file)
+            except OSError:
+                continue
+            positions[log_file] = {"inode": st.st_ino, "offset": st.st_size}
+        return positions
+
     def place_marker(self, log_file_list, marker, wait_for_marker=False):
         '''
         @summary: Place marker into '/dev/log' and each log file specified.
@@ -308,7 +507,7 @@ class AnsibleLogAnalyzer:
 
         @param file_list : List of file paths, contains search expressions.
 
-        @return: A regex class instance, corresponding to loaded regex expressions.
+        @return: A PatternSet instance, corresponding to loaded regex expressions.
             Will be used for matching operations by callers.
         '''
         messages_regex = []
@@ -360,11 +559,7 @@ class AnsibleLogAnalyzer:
                         print((repr(e)))
                         sys.exit(err_invalid_string_format)
 
-        if (len(messages_regex)):
-            regex = re.compile('|'.join(messages_regex))
-        else:
-            regex = None
-        return regex, messages_regex
+        return get_pattern_set(messages_regex), messages_regex
     # ---------------------------------------------------------------------
 
     def line_matches(self, str, match_messages_regex, ignore_messages_regex):
@@ -455,14 +650,16 @@ class AnsibleLogAnalyzer:
         found_end_marker = False
         if stdin_as_input:
             log_file = sys.stdin
+            rev_lines = reversed(log_file.readlines())
         else:
-            log_file = open(log_file_path, 'r')
+            log_file = open(log_file_path, 'rb')
+            rev_lines = read_lines_reversed(log_file)
 
         start_marker = self.create_start_marker()
         end_marker = self.create_end_marker()
 
         ignore_marker_run_ids = []
-        for rev_line in reversed(log_file.readlines()):
+        for rev_line in rev_lines:
             if stdin_as_input:
                 in_analysis_range = True
             else:
@@ -530,6 +727,9 @@ class AnsibleLogAnalyzer:
                 elif self.line_matches(rev_line, match_messages_regex, ignore_messages_regex):
                     matching_lines.append(rev_line)
 
+        if not stdin_as_input:
+            log_file.close()
+
         # care about the markers only if input is not stdin or no need to check start marker
         if not stdin_as_input and check_marker:
             if (not found_start_marker):
@@ -591,6 +791,8 @@ def usage():
     print('                                 to all log files specified in --logs parameter.')
     print('                                 analyze - perform log analysis of files specified in --logs parameter.')
     print('                                 add_end_marker - add end marker to all log files specified in --logs parameter.')           # noqa: E501
+    print('                                 analyze_extracted - analyze log files specified in --logs parameter with')
+    print('                                 regular expressions from --regex_file, print the result as JSON.')
     print('--out_dir path                   Directory path where to place output files, ')
     print('                                 must be present when --action == analyze')
     print('--logs path{,path}               List of full paths to log files to be analyzed.')
@@ -609,11 +811,14 @@ def usage():
     print('                                 All the strings from these files will be expected to present')
     print('                                 in one of specified log files during the analysis. Must be present')
     print('                                 when action == analyze.')
+    print('--regex_file path                Path to JSON file with "match", "ignore" and "expect" lists of regular')
+    print('                                 expressions. Must be present when action == analyze_extracted.')
+    print('--maximum_log_length length      Log messages longer than length are skipped in files without markers.')
 
 # ---------------------------------------------------------------------
 
 
-def check_action(action, log_files_in, out_dir, match_files_in, ignore_files_in, expect_files_in):
+def check_action(action, log_files_in, out_dir, match_files_in, ignore_files_in, expect_files_in, regex_file=None):
     '''
     @summary: This function validates command line parameter 'action' and
         other related parameters.
@@ -633,6 +838,14 @@ def check_action(action, log_files_in, out_dir, match_files_in, ignore_files_in,
         elif match_files_in is None or len(match_files_in) == 0:
             print('ERROR: missing required match_files_in for analyze action')
             ret_code = False
+    elif action == 'analyze_extracted':
+        if not log_files_in:
+            print('ERROR: missing required logs for analyze_extracted action')
+            ret_code = False
+
+        elif not regex_file:
+            print('ERROR: missing required regex_file for analyze_extracted action')
+            ret_code = False
 
     else:
         ret_code = False
@@ -703,12 +916,8 @@ def write_result_file(run_id, out_dir, analysis_result_per_file, messages_regex_
             "\n-------------------------------------------------\n\n")
         out_file.write('Total matches:%d\n' % match_cnt)
         # Find unused regex matches
-        for regex in messages_regex_e:
-            for line in expected_lines_total:
-                if re.search(regex, line):
-                    break
-            else:
-                unused_regex_messages.append(regex)
+        if messages_regex_e:
+            unused_regex_messages.extend(get_pattern_set(messages_regex_e).unused_patterns(expected_lines_total))
 
         out_file.write('Total expected and found matches:%d\n' % expected_cnt)
         out_file.write('Total expected but not found matches: %d\n\n' %
@@ -763,6 +972,32 @@ def write_summary_file(run_id, out_dir, analysis_result_per_file, unused_regex_m
 # ---------------------------------------------------------------------
 
 
+def analyze_extracted(analyzer, log_file_list, regex_file, maximum_log_length=None):
+    '''
+    @summary: Analyze log files already extracted on the DUT and print the result as JSON,
+        so that only matching lines are sent back instead of the whole log files.
+
+    @param analyzer: AnsibleLogAnalyzer instance.
+
+    @param log_file_list: List of paths to the log files.
+
+    @param regex_file: Path to JSON file with "match", "ignore" and "expect" lists of regular expressions.
+
+    @param maximum_log_length: The long log message (length > maximum_log_length) will be dropped.
+    '''
+    with open(regex_file) as fp:
+        regex = json.load(fp)
+
+    compiled = {}
+    for kind in ('match', 'ignore', 'expect'):
+        compiled[kind] = get_pattern_set(regex.get(kind) or [])
+
+    result = analyzer.analyze_file_list(log_file_list, compiled['match'], compiled['ignore'], compiled['expect'],
+                                        maximum_log_length=maximum_log_length)
+    print(json.dumps(result))
+# ---------------------------------------------------------------------
+
+
 def main(argv):
 
     action = None
@@ -773,13 +1008,15 @@ def main(argv):
     match_files_in = None
     ignore_files_in = None
     expect_files_in = None
+    regex_file = None
+    maximum_log_length = None
     verbose = False
 
     try:
         opts, args = getopt.getopt(argv, "a:r:s:l:o:m:i:e:vh",
                                    ["action=", "run_id=", "start_marker=", "logs=",
                                     "out_dir=", "match_files_in=", "ignore_files_in=",
-                                    "expect_files_in=", "verbose", "help"])
+                                    "expect_files_in=", "regex_file=", "maximum_log_length=", "verbose", "help"])
 
     except getopt.GetoptError:
         print("Invalid option specified")
@@ -815,11 +1052,17 @@ def main(argv):
         elif (opt in ("-e", "--expect_files_in")):
             expect_files_in = arg
 
+        elif (opt == "--regex_file"):
+            regex_file = arg
+
+        elif (opt == "--maximum_log_length"):
+            maximum_log_length = int(arg)
+
         elif (opt in ("-v", "--verbose")):
             verbose = True
 
-    if not (check_action(action, log_files_in, out_dir, match_files_in, ignore_files_in, expect_files_in)
-            and check_run_id(run_id)):
+    if not (check_action(action, log_files_in, out_dir, match_files_in, ignore_files_in, expect_files_in,
+                         regex_file) and check_run_id(run_id)):
         usage()
         sys.exit(err_invalid_input)
 
@@ -829,7 +1072,9 @@ def main(argv):
 
     result = {}
     if action == "init":
+        positions = analyzer.get_log_positions([system_log_file] + log_file_list)
         analyzer.place_marker(log_file_list, analyzer.create_start_marker())
+        print(json.dumps(positions))
         return 0
     elif action == "analyze":
         match_file_list = match_files_in.split(tokenizer)
@@ -856,6 +1101,9 @@ def main(argv):
         write_result_file(run_id, out_dir, result,
                           messages_regex_e, unused_regex_messages)
         write_summary_file(run_id, out_dir, result, unused_regex_messages)
+    elif action == "analyze_extracted":
+        analyze_extracted(analyzer, log_file_list, regex_file, maximum_log_length=maximum_log_length)
+        return 0
     elif action == "add_end_marker":
         analyzer.place_marker(
             log_file_list, analyzer.create_end_marker(), wait_for_marker=True)
@@ -0,0 +1,210 @@
+"""
+Unit tests for the burst mode of the load balancing check of ansible/roles/test/files/ptftests/fib_test.py.
+
+FibTest.check_balancing_burst() sends the packets to a fake dataplane forwarding every flow to one of the expected
+ports, like an ECMP group would. They cover:
+
+  * the packets are sent in bursts of balancing_burst_size and every flow is counted on the port it's received on
+  * packets not part of the flows of the burst, or received on unexpected ports, are ignored
+  * the flows which are not received are sent again once, and the check fails if they are still not received
+  * the source MAC of the received packets is checked, per ToR on an active-active dualtor
+
+These tests are not under ptftests: ptf imports every module of its test directory.
+
+Run from the repo root with:
+    python -m pytest --noconftest ansible/roles/test/files/unit_tests/unit_test_fib_test.py -v
+"""
+import os
+import sys
+import time
+from collections import Counter
+
+import pytest
+
+pytest.importorskip("ptf")
+pytest.importorskip("SubnetTree")
+
+import ptf.packet as scapy  # noqa: E402
+from ptf.dataplane import DataPlane  # noqa: E402
+
+PTFTESTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "ptftests", "py3")
+if PTFTESTS_DIR not in sys.path:
+    sys.path.insert(0, PTFTESTS_DIR)
+
+import fib_test  # noqa: E402
+
+SRC_PORT = 0
+ROUTER_MAC = "00:11:22:33:44:55"
+TOR_MACS = ["00:11:22:33:44:01", "00:11:22:33:44:02"]
+
+
+class FakeDataplane(object):
+    """
+    Forward the TCP packets sent to one of the ports of dst_ports chosen by the flow, with the source MAC of the
+    ToR of the port.
+    """
+
+    PollSuccess = DataPlane.PollSuccess
+    PollFailure = DataPlane.PollFailure
+
+    def __init__(self, dst_ports, tor_macs, drop=lambda flow, sent: False, noise=True):
+        """
+        @param dst_ports: ports the packets are forwarded to
+        @param tor_macs: dict of port to the source MAC of the packets forwarded to the port
+        @param drop: function of (sport, dport) and the number of times the flow was sent, True to drop the packet
+        @param noise: forward packets of other flows, other destinations and on other ports with each packet
+        """
+        self.dst_ports = dst_ports
+        self.tor_macs = tor_macs
+        self.drop = drop
+        self.noise = noise
+        self.queue = []
+        self.sent = Counter()
+        # Number of packets sent since the dataplane was last polled
+        self.sent_since_poll = 0
+        self.max_sent_since_poll = 0
+
+    def get_mac(self, device, port):
+        return "00:aa:bb:cc:dd:{:02x}".format(port)
+
+    def send(self, device, port, pkt):
+        assert (device, port) == (0, SRC_PORT)
+        self.sent_since_poll += 1
+        self.max_sent_since_poll = max(self.max_sent_since_poll, self.sent_since_poll)
+        sent_pkt = scapy.Ether(pkt)
+        assert sent_pkt.dst == ROUTER_MAC
+        flow = (sent_pkt[scapy.TCP].sport, sent_pkt[scapy.TCP].dport)
+        self.sent[flow] += 1
+        if self.drop(flow, self.sent[flow]):
+            return len(pkt)
+        rcvd_port = self.dst_ports[hash(flow) % len(self.dst_ports)]
+        self.forward(rcvd_port, sent_pkt)
+        if self.noise:
+            other_flow = sent_pkt.copy()
+            other_flow[scapy.TCP].sport = (flow[0] + 1) % 65536
+            other_flow[scapy.TCP].dport = (flow[1] + 1) % 65536
+            self.forward(rcvd_port, other_flow)
+            self.forward(rcvd_port, scapy.Ether() / scapy.IP() / scapy.UDP())
+            self.forward(rcvd_port, scapy.Ether() / scapy.IP(dst="10.10.10.10") / scapy.TCP(sport=flow[0]))
+            self.forward(SRC_PORT, sent_pkt)
+        return len(pkt)
+
+    def forward(self, port, pkt):
+        pkt = pkt.copy()
+        pkt.src = self.tor_macs.get(port, "00:00:00:00:00:00")
+        self.queue.append((port, bytes(pkt)))
+
+    def poll(self, device_number=0, port_number=None, timeout=None, exp_pkt=None, filters=[]):
+        self.sent_since_poll = 0
+        if not self.queue:
+            return self.PollFailure(exp_pkt, [], 0)
+        port, pkt = self.queue.pop(0)
+        return self.PollSuccess(device_number, port, pkt, exp_pkt, time.time())
+
+
+def _fib_test(dataplane, port_map, burst_size=8):
+    """A FibTest checking the load balancing in burst mode, without running the test."""
+    test = fib_test.FibTest.__new__(fib_test.FibTest)
+    test.dataplane = dataplane
+    test.ptf_test_port_map = port_map
+    test.pktlen = 100
+    test.ttl = 64
+    test.ip_options = False
+    test.src_vid = None
+    test.balancing_burst = True
+    test.balancing_burst_size = burst_size
+    # Don't wait for packets which won't come
+    test.PTF_TIMEOUT = 1
+    return test
+
+
+def _port_map(ports, tor_macs):
+    return {str(port): {"target_dut": [0], "target_src_mac": tor_macs, "target_dest_mac": ROUTER_MAC,
+                        "asic_idx": 0}
+            for port in ports}
+
+
+def _single_tor(dst_ports):
+    return _port_map([SRC_PORT] + dst_ports, [TOR_MACS[0]]), {port: TOR_MACS[0] for port in dst_ports}
+
+
+@pytest.mark.parametrize("ipv4, dst_ip", [(True, "192.168.0.1"), (False, "fc00::1")], ids=["ipv4", "ipv6"])
+def test_check_balancing_burst(ipv4, dst_ip):
+    dst_ports = [1, 2, 3, 4]
+    port_map, tor_macs = _single_tor(dst_ports)
+    dataplane = FakeDataplane(dst_ports, tor_macs)
+    test = _fib_test(dataplane, port_map)
+
+    hit_count_map = test.check_balancing_burst(SRC_PORT, dst_ip, [dst_ports], 40, ipv4)
+
+    # Each flow is sent once, in bursts
+    assert len(dataplane.sent) == 40
+    assert set(dataplane.sent.values()) == {1}
+    assert dataplane.max_sent_since_poll == 8
+    expected = Counter(dst_ports[hash(flow) % len(dst_ports)] for flow in dataplane.sent)
+    assert hit_count_map == dict(expected)
+
+
+def test_check_balancing_burst_resend():
+    dst_ports = [1, 2]
+    port_map, tor_macs = _single_tor(dst_ports)
+    # The first 5 flows are lost the first time they are sent
+    dropped = set()
+
+    def drop(flow, sent):
+        if sent == 1 and len(dropped) < 5:
+            dropped.add(flow)
+            return True
+        return False
+    dataplane = FakeDataplane(dst_ports, tor_macs, drop=drop)
+    test = _fib_test(dataplane, port_map)
+
+    hit_count_map = test.check_balancing_burst(SRC_PORT, "192.168.0.1", [dst_ports], 20)
+
+    assert len(dropped) == 5
+    assert set(flow for flow, sent in dataplane.sent.items() if sent == 2) == dropped
+    assert max(dataplane.sent.values()) == 2
+    assert sum(hit_count_map.values()) == 20
+
+
+def test_check_balancing_burst_lost():
+    dst_ports = [1, 2]
+    port_map, tor_macs = _single_tor(dst_ports)
+    # The first flow is lost every time it's sent
+    lost = []
+
+    def drop(flow, sent):
+        if not lost or flow == lost[0]:
+            lost[:] = [flow]
+            return True
+        return False
+    dataplane = FakeDataplane(dst_ports, tor_macs, drop=drop, noise=False)
+    test = _fib_test(dataplane, port_map)
+
+    with pytest.raises(AssertionError, match="1 of 10 packets sent from port 0"):
+        test.check_balancing_burst(SRC_PORT, "192.168.0.1", [dst_ports], 10)
+    assert dataplane.sent[lost[0]] == 2
+
+
+def test_check_balancing_burst_wrong_src_mac():
+    dst_ports = [1, 2]
+    port_map, _ = _single_tor(dst_ports)
+    dataplane = FakeDataplane(dst_ports, {port: TOR_MACS[1] for port in dst_ports}, noise=False)
+    test = _fib_test(dataplane, port_map)
+
+    with pytest.raises(Exception, match="the src mac doesn't match, expected {}".format(TOR_MACS[0])):
+        test.check_balancing_burst(SRC_PORT, "192.168.0.1", [dst_ports], 10)
+
+
+def test_check_balancing_burst_active_active():
+    # The ports of each ToR, the packets are received from the ToR of the port
+    dst_port_lists = [[1, 2], [3, 4]]
+    port_map = _port_map([SRC_PORT, 1, 2, 3, 4], TOR_MACS)
+    tor_macs = {1: TOR_MACS[0], 2: TOR_MACS[0], 3: TOR_MACS[1], 4: TOR_MACS[1]}
+    dataplane = FakeDataplane([1, 2, 3, 4], tor_macs)
+    test = _fib_test(dataplane, port_map)
+
+    hit_count_map = test.check_balancing_burst(SRC_PORT, "192.168.0.1", dst_port_lists, 20)
+
+    assert sum(hit_count_map.values()) == 20
+    assert set(hit_count_map) <= {1, 2, 3, 4}
@@ -0,0 +1,189 @@
+"""
+Unit tests for the burst mode of ansible/roles/test/files/ptftests/py3/hash_test.py.
+
+HashTest.check_hash_burst() sends the packets to a fake dataplane forwarding every packet to one of the expected
+ports, chosen by the hash of its 5-tuple. They cover:
+
+  * the packets are sent in bursts of balancing_burst_size and matched by the flow ID in their payload
+  * packets without a flow ID of the sweep, or received on unexpected ports, are ignored
+  * the packets which are not received are sent again once, and the check fails if they are still not received
+  * the dataplane is not polled for longer than PTF_TIMEOUT
+
+These tests are not under ptftests: ptf imports every module of its test directory.
+
+Run from the repo root with:
+    python -m pytest --noconftest ansible/roles/test/files/unit_tests/unit_test_hash_test.py -v
+"""
+import os
+import sys
+import time
+from collections import Counter
+from ipaddress import ip_address
+
+import pytest
+
+pytest.importorskip("ptf")
+pytest.importorskip("SubnetTree")
+
+import ptf.packet as scapy  # noqa: E402
+from ptf.dataplane import DataPlane  # noqa: E402
+from scapy.all import Raw  # noqa: E402
+
+PTFTESTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "ptftests", "py3")
+if PTFTESTS_DIR not in sys.path:
+    sys.path.insert(0, PTFTESTS_DIR)
+
+import hash_test  # noqa: E402
+import lpm  # noqa: E402
+
+SRC_PORT = 0
+DST_PORTS = [1, 2, 3, 4]
+ROUTER_MAC = "00:11:22:33:44:55"
+TOR_MAC = "00:11:22:33:44:01"
+
+
+def _five_tuple(pkt):
+    ip_layer = scapy.IP if scapy.IP in pkt else scapy.IPv6
+    return (pkt[ip_layer].src, pkt[ip_layer].dst, pkt[scapy.TCP].sport, pkt[scapy.TCP].dport)
+
+
+class FakeDataplane(object):
+    """Forward the packets sent to one of DST_PORTS chosen by their 5-tuple, like an ECMP group would."""
+
+    PollSuccess = DataPlane.PollSuccess
+    PollFailure = DataPlane.PollFailure
+
+    def __init__(self, drop=lambda index, sent: False):
+        """
+        @param drop: function of the index of the packet in the sweep and the number of times it was sent, True to
+                     drop the packet
+        """
+        self.drop = drop
+        self.queue = []
+        self.sent = Counter()
+        self.five_tuples = {}
+        self.forwarded = []
+        # Number of packets sent since the dataplane was last polled
+        self.sent_since_poll = 0
+        self.max_sent_since_poll = 0
+        self.poll_timeouts = []
+
+    def get_mac(self, device, port):
+        return "00:aa:bb:cc:dd:{:02x}".format(port)
+
+    def flush(self):
+        self.queue = []
+
+    def send(self, device, port, pkt):
+        assert (device, port) == (0, SRC_PORT)
+        self.sent_since_poll += 1
+        self.max_sent_since_poll = max(self.max_sent_since_poll, self.sent_since_poll)
+        sent_pkt = scapy.Ether(pkt)
+        assert sent_pkt.dst == ROUTER_MAC
+        # The flow ID is the sweep ID and the index of the packet in the sweep
+        offset = pkt.find(hash_test.HashTest.FLOW_ID_MAGIC) + len(hash_test.HashTest.FLOW_ID_MAGIC) + 2
+        index = int.from_bytes(pkt[offset:offset + 4], "big")
+        self.sent[index] += 1
+        self.five_tuples[index] = _five_tuple(sent_pkt)
+        if self.drop(index, self.sent[index]):
+            return len(pkt)
+        rcvd_port = DST_PORTS[hash(_five_tuple(sent_pkt)) % len(DST_PORTS)]
+        self.forward(rcvd_port, sent_pkt)
+        self.forwarded.append(self.queue[-1])
+        # Not a packet of the sweep, and a packet received on an unexpected port
+        self.forward(rcvd_port, scapy.Ether() / scapy.IP() / scapy.TCP() / Raw(b"\x00" * 16))
+        self.forward(SRC_PORT, sent_pkt)
+        return len(pkt)
+
+    def forward(self, port, pkt):
+        pkt = pkt.copy()
+        pkt.src = TOR_MAC
+        self.queue.append((port, bytes(pkt)))
+
+    def poll(self, device_number=0, port_number=None, timeout=None, exp_pkt=None, filters=[]):
+        self.sent_since_poll = 0
+        self.poll_timeouts.append(timeout)
+        if not self.queue:
+            return self.PollFailure(exp_pkt, [], 0)
+        port, pkt = self.queue.pop(0)
+        return self.PollSuccess(device_number, port, pkt, exp_pkt, time.time())
+
+
+def _hash_test(dataplane, version):
+    """A HashTest checking the hash keys in burst mode, without running the test."""
+    test = hash_test.HashTest.__new__(hash_test.HashTest)
+    test.dataplane = dataplane
+    test.ptf_test_port_map = {str(port): {"target_dut": [0], "target_src_mac": [TOR_MAC],
+                                          "target_dest_mac": ROUTER_MAC, "asic_idx": 0}
+                              for port in [SRC_PORT] + DST_PORTS}
+    if version == "IP":
+        src_ip_range, dst_ip_range = ("8.0.0.0", "8.255.255.255"), ("9.0.0.0", "9.255.255.255")
+    else:
+        src_ip_range, dst_ip_range = ("20d0:a800::", "20d0:a800::ffff"), ("20d0:a801::", "20d0:a801::ffff")
+    test.src_ip_interval = lpm.LpmDict.IpInterval(ip_address(src_ip_range[0]), ip_address(src_ip_range[1]))
+    test.dst_ip_interval = lpm.LpmDict.IpInterval(ip_address(dst_ip_range[0]), ip_address(dst_ip_range[1]))
+    test.vlan_ids = []
+    test.ignore_ttl = False
+    test.base_mac = dataplane.get_mac(0, SRC_PORT)
+    test.sweep_id = 0
+    test.hash_stats = {}
+    test.balancing_burst = True
+    test.balancing_burst_size = 8
+    test.PTF_TIMEOUT = 1
+    return test
+
+
+@pytest.mark.parametrize("version", ["IP", "IPv6"])
+@pytest.mark.parametrize("hash_key", ["src-ip", "dst-port"])
+def test_check_hash_burst(version, hash_key):
+    dataplane = FakeDataplane()
+    test = _hash_test(dataplane, version)
+
+    hit_count_map = test.check_hash_burst(hash_key, [SRC_PORT] * 40, [DST_PORTS], version)
+
+    # Each packet is sent once, in bursts
+    assert sorted(dataplane.sent) == list(range(40))
+    assert set(dataplane.sent.values()) == {1}
+    assert dataplane.max_sent_since_poll == 8
+    # Only the field of the hash key varies
+    assert len(set(dataplane.five_tuples.values())) > 1
+    expected = Counter(DST_PORTS[hash(five_tuple) % len(DST_PORTS)] for five_tuple in dataplane.five_tuples.values())
+    assert hit_count_map == dict(expected)
+    assert test.hash_stats[hash_key]["packets"] == 40
+    assert 0 < max(dataplane.poll_timeouts) <= test.PTF_TIMEOUT
+
+
+def test_check_hash_burst_resend():
+    # The packets of an index multiple of 4 are lost the first time they are sent
+    dataplane = FakeDataplane(drop=lambda index, sent: index % 4 == 0 and sent == 1)
+    test = _hash_test(dataplane, "IP")
+
+    hit_count_map = test.check_hash_burst("src-ip", [SRC_PORT] * 20, [DST_PORTS], "IP")
+
+    assert sorted(index for index, sent in dataplane.sent.items() if sent == 2) == [0, 4, 8, 12, 16]
+    assert max(dataplane.sent.values()) == 2
+    assert sum(hit_count_map.values()) == 20
+
+
+def test_check_hash_burst_lost():
+    dataplane = FakeDataplane(drop=lambda index, sent: index == 3)
+    test = _hash_test(dataplane, "IP")
+
+    with pytest.raises(AssertionError, match="1 of 10 packets of hash key src-ip were not received"):
+        test.check_hash_burst("src-ip", [SRC_PORT] * 10, [DST_PORTS], "IP")
+    assert dataplane.sent[3] == 2
+
+
+def test_check_hash_burst_next_sweep():
+    dataplane = FakeDataplane()
+    test = _hash_test(dataplane, "IP")
+    test.check_hash_burst("src-ip", [SRC_PORT] * 10, [DST_PORTS], "IP")
+    # Late packets of the previous sweep have the same indexes, but not the same sweep ID
+    dataplane.flush = lambda: None
+    dataplane.queue = list(dataplane.forwarded)
+
+    hit_count_map = test.check_hash_burst("dst-ip", [SRC_PORT] * 10, [DST_PORTS], "IP")
+
+    # Counted on the ports the packets of this sweep were forwarded to
+    expected = Counter(DST_PORTS[hash(five_tuple) % len(DST_PORTS)] for five_tuple in dataplane.five_tuples.values())
+    assert hit_count_map == dict(expected)
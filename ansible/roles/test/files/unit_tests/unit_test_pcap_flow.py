@@ -0,0 +1,220 @@
+"""
+Unit tests for ansible/roles/test/files/ptftests/py3/pcap_flow.py.
+
+Synthetic captures are examined by both paths of advanced-reboot: ReloadTest.examine_pcap_flow(), reading the
+capture with pcap_flow, and ReloadTest.examine_packets_flow(), dissecting the packets loaded by scapy. They cover:
+
+  * a flow without loss, and a flow with disruptions, floods, delayed packets, packets received but not sent,
+    packet IDs neither sent nor received, and packets not part of the flow
+  * pcap and pcapng (dumpcap) captures, and a capture stopped while writing its last record
+  * both paths return the same FlowSummary, log the same messages and dump the same filtered pcap
+
+These tests are not under ptftests: ptf imports every module of its test directory.
+
+Run from the repo root with:
+    python -m pytest --noconftest ansible/roles/test/files/unit_tests/unit_test_pcap_flow.py -v
+"""
+import importlib.util
+import os
+import sys
+import uuid
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("ptf")
+
+from scapy.all import Dot1Q, Ether, ICMP, IP, IPv6, TCP, UDP, Raw, rdpcap, wrpcap  # noqa: E402
+from scapy.utils import PcapNgWriter  # noqa: E402
+
+PTFTESTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "ptftests", "py3")
+if PTFTESTS_DIR not in sys.path:
+    sys.path.insert(0, PTFTESTS_DIR)
+
+import pcap_flow  # noqa: E402
+
+_spec = importlib.util.spec_from_file_location("advanced_reboot", os.path.join(PTFTESTS_DIR, "advanced-reboot.py"))
+advanced_reboot = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(advanced_reboot)
+
+DUT_MAC = "00:11:22:33:44:55"
+VLAN_MAC = "00:11:22:33:44:66"
+HOST_MAC = "00:aa:bb:cc:dd:01"
+T1_MAC = "00:aa:bb:cc:dd:02"
+START_TIME = 1700000000.0
+
+
+def _sent(payload_id, time):
+    """A packet sent to the DUT: from T1 to the VLAN, or from the VLAN to T1 for the IDs multiple of 5."""
+    dst = VLAN_MAC if payload_id % 5 == 0 else DUT_MAC
+    return _tcp(dst, T1_MAC, payload_id, time)
+
+
+def _received(payload_id, time):
+    src = DUT_MAC if payload_id % 5 == 0 else VLAN_MAC
+    return _tcp(HOST_MAC, src, payload_id, time)
+
+
+def _tcp(dst, src, payload_id, time, vlan=None, ipv6=False, sport=1234):
+    ip = IPv6(src="fc00::1", dst="fc00::2") if ipv6 else IP(src="10.0.0.1", dst="192.168.0.2")
+    pkt = Ether(dst=dst, src=src)
+    if vlan is not None:
+        pkt = pkt / Dot1Q(vlan=vlan)
+    pkt = pkt / ip / TCP(sport=sport, dport=5000) / Raw(str(payload_id).encode())
+    pkt.time = time
+    return pkt
+
+
+def _flow(count, lost=(), not_sent=(), not_received=()):
+    """Packets sent and received in order, every ID sent 10ms after the previous one and received 1ms later."""
+    packets = []
+    for payload_id in range(count):
+        time = START_TIME + payload_id * 0.01
+        if payload_id not in not_sent:
+            packets.append(_sent(payload_id, time))
+        if payload_id not in lost and payload_id not in not_received:
+            packets.append(_received(payload_id, time + 0.001))
+    return packets
+
+
+def _eventful_flow():
+    packets = _flow(60, lost=range(20, 30), not_sent=range(40, 43), not_received=range(40, 43))
+    end = START_TIME + 0.6
+    packets += [
+        # Flooded sent packet, and a received flood
+        _sent(7, START_TIME + 0.071),
+        _received(8, START_TIME + 0.083),
+        # Received but not sent
+        _received(1000, end),
+        # Delayed: captured after the packets sent later
+        _sent(60, end + 0.02),
+        _received(60, end + 0.01),
+        # VLAN tagged and IPv6 packets of the flow
+        _tcp(DUT_MAC, T1_MAC, 61, end + 0.03, vlan=100),
+        _tcp(HOST_MAC, VLAN_MAC, 61, end + 0.031, vlan=100),
+        _tcp(DUT_MAC, T1_MAC, 62, end + 0.04, ipv6=True),
+        _tcp(HOST_MAC, VLAN_MAC, 62, end + 0.041, ipv6=True),
+    ]
+    # Not part of the flow
+    noise = [
+        _tcp(DUT_MAC, T1_MAC, 63, end + 0.05, sport=4321),
+        Ether(dst=DUT_MAC, src=T1_MAC) / IP() / UDP(sport=1234, dport=5000) / Raw(b"64"),
+        Ether(dst=DUT_MAC, src=T1_MAC) / IP() / ICMP(),
+        Ether(dst=DUT_MAC, src=T1_MAC) / IP() / TCP(sport=1234, dport=5000) / Raw(b"not an ID"),
+        Ether(dst="ff:ff:ff:ff:ff:ff", src=HOST_MAC, type=0x0806) / Raw(b"\x00" * 28),
+    ]
+    for pkt in noise:
+        pkt.time = end + 0.06
+    return packets + noise
+
+
+def _write_capture(path, packets, pcapng):
+    if pcapng:
+        writer = PcapNgWriter(path)
+        for pkt in packets:
+            writer.write(pkt)
+        writer.close()
+    else:
+        wrpcap(path, packets)
+
+
+class FlowExaminer(object):
+    """A ReloadTest examining the flow of a capture, without running the test."""
+
+    def __init__(self, path):
+        self.path = path
+        self.logfile_suffix = "unit_test_{}".format(uuid.uuid4().hex)
+        self.filtered_path = "/tmp/capture_filtered_{}.pcap".format(self.logfile_suffix)
+
+    def _reload_test(self, logs):
+        test = advanced_reboot.ReloadTest.__new__(advanced_reboot.ReloadTest)
+        test.dut_mac = DUT_MAC
+        test.vlan_mac = VLAN_MAC
+        test.vnet = False
+        test.sent_packet_count = 100
+        test.fails = {"dut": set()}
+        test.logfile_suffix = self.logfile_suffix
+        test.log = logs.append
+        return test
+
+    def examine(self, fast_path):
+        """Return (FlowSummary, logged messages, filtered pcap)."""
+        logs = []
+        test = self._reload_test(logs)
+        try:
+            if fast_path:
+                summary = test.examine_pcap_flow(self.path)
+            else:
+                packets = rdpcap(self.path)
+                # Logged by tcpdump_sniff() when the capture is loaded by scapy
+                logs.append("Number of all packets captured: {}".format(len(packets)))
+                summary = test.examine_packets_flow(packets)
+            with open(self.filtered_path, "rb") as f:
+                filtered = f.read()
+        finally:
+            if os.path.exists(self.filtered_path):
+                os.remove(self.filtered_path)
+        return summary, logs, filtered
+
+
+def _frames(pcap, tmp_path):
+    """Frames of a pcap file content."""
+    path = str(tmp_path / "filtered_{}.pcap".format(uuid.uuid4().hex))
+    with open(path, "wb") as f:
+        f.write(pcap)
+    return [bytes(pkt) for pkt in rdpcap(path)]
+
+
+@pytest.mark.parametrize("pcapng", [False, True], ids=["pcap", "pcapng"])
+@pytest.mark.parametrize("flow", ["no_loss", "eventful"])
+def test_examine_pcap_flow_matches_scapy(tmp_path, pcapng, flow):
+    path = str(tmp_path / "capture.pcap")
+    _write_capture(path, _flow(30) if flow == "no_loss" else _eventful_flow(), pcapng)
+    examiner = FlowExaminer(path)
+
+    summary, logs, filtered = examiner.examine(fast_path=True)
+    scapy_summary, scapy_logs, scapy_filtered = examiner.examine(fast_path=False)
+
+    assert summary == scapy_summary
+    assert logs == scapy_logs
+    assert _frames(filtered, tmp_path) == _frames(scapy_filtered, tmp_path)
+    if flow == "no_loss":
+        assert summary.lost_packets == {}
+        assert (summary.sent_counter, summary.received_counter) == (30, 30)
+    else:
+        assert summary.lost_packets[19][0] == 10
+        assert summary.lost_packets[19][1] == pytest.approx(0.1, abs=1e-5)
+        assert summary.missing_sent_and_received_packet_id_sequences == ["40-42"]
+        assert summary.flooded_pkts == [7]
+        assert (summary.missed_t1_to_vlan, summary.missed_vlan_to_t1) == (8, 2)
+        assert "Ignoring received packet with payload 1000, as it was not sent" in logs
+        assert summary.last_payload == 62
+
+
+@pytest.mark.parametrize("pcapng", [False, True], ids=["pcap", "pcapng"])
+def test_examine_truncated_capture(tmp_path, pcapng):
+    path = str(tmp_path / "capture.pcap")
+    _write_capture(path, _flow(10) + [_sent(10, START_TIME + 0.1)], pcapng)
+    # The capture was stopped while writing the header of the last record
+    with open(path, "rb+") as f:
+        f.truncate(os.path.getsize(path) - len(_sent(10, 0)) - 4)
+    examiner = FlowExaminer(path)
+
+    summary, logs, _ = examiner.examine(fast_path=True)
+    scapy_summary, scapy_logs, _ = examiner.examine(fast_path=False)
+
+    assert summary == scapy_summary
+    assert logs == scapy_logs
+    assert (summary.sent_counter, summary.received_counter) == (10, 10)
+
+
+def test_unsupported_capture(tmp_path):
+    path = str(tmp_path / "capture.pcap")
+    with open(path, "wb") as f:
+        f.write(b"not a capture file")
+
+    with pytest.raises(pcap_flow.UnsupportedCaptureError):
+        pcap_flow.read_tcp_flow(path, 1234, 5000)
+    logs = []
+    assert FlowExaminer(path)._reload_test(logs).examine_pcap_flow(path) is None
+    assert logs == ["Capture is examined with scapy: Not a pcap or pcapng file: {}".format(path)]
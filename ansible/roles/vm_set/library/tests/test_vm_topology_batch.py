@@ -0,0 +1,227 @@
+"""Unit tests for the batch mode of ansible/roles/vm_set/library/vm_topology.py.
+
+The batched commands are checked in dry-run mode, where they are recorded instead of being run, and the
+queries of the host are answered by a fake VMTopology.cmd, so no root, OVS or docker is needed. They cover:
+
+  * the ports of all bridges are added with a single ovs-vsctl transaction, removing them from their old
+    bridges in the same transaction
+  * the flows of a bridge are installed with "ovs-ofctl add-flows" from a file
+  * the muxy cables of a dualtor are created by the tasks of the thread worker, without a nested worker map
+  * the DUT ports are moved into the PTF docker with one "ip -batch" on the host and one in the docker
+  * the lines of a batch are passed to the command in a file
+
+Run from the repo root with:
+    python -m pytest --noconftest ansible/roles/vm_set/library/tests/test_vm_topology_batch.py -v
+"""
+import importlib.util
+import os
+import sys
+import types
+
+import ansible.module_utils
+import pytest
+
+LIBRARY_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULE_UTILS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(LIBRARY_DIR))), "module_utils")
+
+# vm_topology imports the module_utils of the repo, which Ansible ships with the module
+if MODULE_UTILS_DIR not in ansible.module_utils.__path__:
+    ansible.module_utils.__path__.append(MODULE_UTILS_DIR)
+try:
+    import docker  # noqa: F401
+except ImportError:
+    # docker is only used to get the pid of the PTF docker, which the tests set
+    sys.modules["docker"] = types.ModuleType("docker")
+
+_spec = importlib.util.spec_from_file_location("vm_topology", os.path.join(LIBRARY_DIR, "vm_topology.py"))
+vm_topology = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(vm_topology)
+VMTopology = vm_topology.VMTopology
+
+HOST_LINKS = """1: lo: <LOOPBACK,UP,LOWER_UP> mtu 65536 qdisc noqueue state UNKNOWN mode DEFAULT group default
+2: enp1s0.100@enp1s0: <BROADCAST,MULTICAST,UP,LOWER_UP> mtu 9216 qdisc noqueue state UP mode DEFAULT group default
+3: enp1s0.101@enp1s0: <BROADCAST,MULTICAST,UP,LOWER_UP> mtu 9216 qdisc noqueue state UP mode DEFAULT group default
+"""
+
+PTF_LINKS = """1: lo: <LOOPBACK,UP,LOWER_UP> mtu 65536 qdisc noqueue state UNKNOWN mode DEFAULT group default
+5: enp1s0.102@if4: <BROADCAST,MULTICAST> mtu 9216 qdisc noqueue state DOWN mode DEFAULT group default
+6: eth3@if4: <BROADCAST,MULTICAST,UP,LOWER_UP> mtu 9216 qdisc noqueue state UP mode DEFAULT group default
+"""
+
+
+class FakeHost(object):
+    """Answer the queries of VMTopology.cmd, and record the commands run."""
+
+    def __init__(self, outputs=None):
+        self.outputs = outputs or {}
+        self.cmds = []
+
+    def cmd(self, cmdline, *args, **kwargs):
+        self.cmds.append(cmdline)
+        return self.outputs.get(cmdline, "")
+
+
+@pytest.fixture
+def host(monkeypatch):
+    fake_host = FakeHost({
+        "ip -o link show": HOST_LINKS,
+        "nsenter -t 1234 -n ip -o link show": PTF_LINKS,
+    })
+    monkeypatch.setattr(VMTopology, "cmd", staticmethod(fake_host.cmd))
+    return fake_host
+
+
+def _topology(dry_run=True, use_thread_worker=False):
+    worker = vm_topology.VMTopologyWorker(use_thread_worker, 2)
+    topology = VMTopology([], {}, vm_topology.DEFAULT_MTU, vm_topology.NUM_FP_VLANS_PER_FP, {}, worker,
+                          batch_mode=True, dry_run=dry_run)
+    topology.vm_set_name = "vms1"
+    topology.pid = 1234
+    topology._is_smartswitch_ha = False
+    return topology
+
+
+@pytest.fixture
+def net(host):
+    return _topology()
+
+
+def test_get_ifaces(host):
+    assert VMTopology.get_ifaces() == {"lo", "enp1s0.100", "enp1s0.101"}
+    assert VMTopology.get_ifaces(pid=1234) == {"lo", "enp1s0.102", "eth3"}
+
+
+def test_add_ovs_ports_single_transaction(net, monkeypatch):
+    br_ports = {"br-1": {"inje-vms1-1", "enp1s0.100"}, "br-2": set()}
+    monkeypatch.setattr(VMTopology, "get_ovs_br_ports", staticmethod(lambda bridge: set(br_ports[bridge])))
+
+    net.add_ovs_ports([("br-1", ["inje-vms1-1", "enp1s0.100", "VM0100-t0"]),
+                       ("br-2", ["inje-vms1-2", "enp1s0.101", "VM0101-t0"]),
+                       ("br-2", ["inje-vms1-2", "enp1s0.101", "VM0101-t0"])])
+
+    assert net.dry_run_batches == [(
+        "ovs-vsctl -- --if-exists del-port VM0100-t0 -- add-port br-1 VM0100-t0"
+        " -- --if-exists del-port inje-vms1-2 -- add-port br-2 inje-vms1-2"
+        " -- --if-exists del-port enp1s0.101 -- add-port br-2 enp1s0.101"
+        " -- --if-exists del-port VM0101-t0 -- add-port br-2 VM0101-t0", None)]
+
+
+def test_add_ovs_ports_already_added(net, monkeypatch):
+    monkeypatch.setattr(VMTopology, "get_ovs_br_ports", staticmethod(lambda bridge: {"inje-vms1-1", "enp1s0.100"}))
+
+    net.add_ovs_ports([("br-1", ["inje-vms1-1", "enp1s0.100"])])
+
+    assert net.dry_run_batches == []
+
+
+def test_bind_ovs_ports_flows(net, host, monkeypatch):
+    monkeypatch.setattr(VMTopology, "get_ovs_port_bindings",
+                        staticmethod(lambda bridge, vlan_iface=[]: {"enp1s0.100": "1", "inje-vms1-1": "2",
+                                                                    "VM0100-t0": "3"}))
+
+    net.bind_ovs_ports("br-1", "enp1s0.100", "inje-vms1-1", "VM0100-t0", disconnect_vm=True, ports_added=True)
+
+    assert host.cmds == []
+    assert net.dry_run_batches == [
+        ("ovs-ofctl del-flows br-1", None),
+        ("ovs-ofctl add-flows br-1", ["table=0,in_port=3,action=drop",
+                                      "table=0,in_port=1,action=output:2"]),
+    ]
+
+
+def test_create_dualtor_cable(net, host, monkeypatch):
+    monkeypatch.setattr(VMTopology, "get_ovs_br_ports", staticmethod(lambda bridge: set()))
+    monkeypatch.setattr(VMTopology, "get_ovs_port_bindings",
+                        staticmethod(lambda bridge, vlan_iface=[]: {"muxy-vms1-0": "1", "enp1s0.100": "2",
+                                                                    "enp2s0.100": "3"}))
+
+    net.create_dualtor_cable(0, "muxy-vms1-0", "enp1s0.100", "enp2s0.100", active_if_index=1)
+
+    assert host.cmds == ["ovs-vsctl --may-exist add-br mbr-vms1-0", "ifconfig mbr-vms1-0 up"]
+    assert net.dry_run_batches == [
+        ("ovs-vsctl -- --if-exists del-port muxy-vms1-0 -- add-port mbr-vms1-0 muxy-vms1-0"
+         " -- --if-exists del-port enp1s0.100 -- add-port mbr-vms1-0 enp1s0.100"
+         " -- --if-exists del-port enp2s0.100 -- add-port mbr-vms1-0 enp2s0.100", None),
+        ("ovs-ofctl del-flows mbr-vms1-0", None),
+        ("ovs-ofctl add-flows mbr-vms1-0", ["table=0,in_port=1,action=output:2,3",
+                                            "table=0,in_port=3,action=output:1"]),
+    ]
+
+
+def test_add_host_ports_dualtor(host, monkeypatch):
+    net = _topology(use_thread_worker=True)
+    net._is_multi_duts = True
+    net._is_cable = False
+    net.duts_name = ["upper-tor", "lower-tor"]
+    net.duts_fp_ports = {"upper-tor": {"1": "enp1s0.100", "2": "enp1s0.101"},
+                         "lower-tor": {"1": "enp2s0.100", "2": "enp2s0.101"}}
+    net.host_interfaces = ["0.1,1.1", "0.2,1.2"]
+    net.host_interfaces_active_active = []
+    veths = []
+    monkeypatch.setattr(net, "add_veth_if_to_docker", lambda ext_if, int_if: veths.append((ext_if, int_if)))
+    monkeypatch.setattr(VMTopology, "get_ovs_br_ports", staticmethod(lambda bridge: set()))
+    monkeypatch.setattr(VMTopology, "get_ovs_port_bindings",
+                        staticmethod(lambda bridge, vlan_iface=[]: {"muxy-vms1-0": "1", "muxy-vms1-1": "1",
+                                                                    "enp1s0.100": "2", "enp1s0.101": "2",
+                                                                    "enp2s0.100": "3", "enp2s0.101": "3"}))
+    handlers = list(vm_topology.logging.getLogger().handlers)
+
+    try:
+        net.add_host_ports()
+    finally:
+        net.worker.shutdown()
+
+    assert vm_topology.logging.getLogger().handlers == handlers
+    assert sorted(veths) == [("muxy-vms1-0", "eth0"), ("muxy-vms1-1", "eth1")]
+    assert sorted(cmdline for cmdline, _ in net.dry_run_batches if cmdline.startswith("ovs-vsctl")) == [
+        "ovs-vsctl -- --if-exists del-port muxy-vms1-0 -- add-port mbr-vms1-0 muxy-vms1-0"
+        " -- --if-exists del-port enp1s0.100 -- add-port mbr-vms1-0 enp1s0.100"
+        " -- --if-exists del-port enp2s0.100 -- add-port mbr-vms1-0 enp2s0.100",
+        "ovs-vsctl -- --if-exists del-port muxy-vms1-1 -- add-port mbr-vms1-1 muxy-vms1-1"
+        " -- --if-exists del-port enp1s0.101 -- add-port mbr-vms1-1 enp1s0.101"
+        " -- --if-exists del-port enp2s0.101 -- add-port mbr-vms1-1 enp2s0.101",
+    ]
+
+
+def test_add_dut_ifs_to_docker(net):
+    net.add_dut_ifs_to_docker([
+        ("eth0", "enp1s0.100", None),
+        ("eth1", "enp1s0.101", (".", "10")),
+        # Moved into the docker by a previous run, not renamed yet
+        ("eth2", "enp1s0.102", None),
+        # Already in the docker
+        ("eth3", "enp1s0.103", None),
+    ])
+
+    assert net.dry_run_batches == [
+        ("ip -batch", ["link set dev enp1s0.100 netns 1234",
+                       "link set dev enp1s0.101 netns 1234"]),
+        ("nsenter -t 1234 -n ip -batch", ["link set dev enp1s0.100 name eth0",
+                                          "link set eth0 up",
+                                          "link set dev enp1s0.101 name eth1",
+                                          "link set eth1 up",
+                                          "link add link eth1 name eth1.10 type vlan id 10",
+                                          "link set eth1.10 up",
+                                          "link set dev enp1s0.102 name eth2",
+                                          "link set eth2 up",
+                                          "link set eth3 up"]),
+    ]
+
+
+def test_add_dut_ifs_to_docker_missing_vlan_parent(net):
+    with pytest.raises(ValueError, match="eth4 not present"):
+        net.add_dut_ifs_to_docker([("eth4", "enp1s0.104", (".", "10"))])
+
+
+def test_run_batch_file():
+    net = _topology(dry_run=False)
+
+    assert net.run_batch("cat", ["link set eth0 up", "link set eth1 up"]) == "link set eth0 up\nlink set eth1 up\n"
+
+    with vm_topology.VMTopologyWorker.safe_subprocess_manager() as [processes, tmpdir]:
+        net.run_batch("grep -q eth1", ["link set eth1 up"], processes=processes, tmpdir=tmpdir)
+    assert len(processes) == 1
+
+    with pytest.raises(Exception, match="One of the batch commands failed"):
+        with vm_topology.VMTopologyWorker.safe_subprocess_manager() as [processes, tmpdir]:
+            net.run_batch("grep -q eth2", ["link set eth1 up"], processes=processes, tmpdir=tmpdir)
@@ -92,6 +92,9 @@ Parameters:
     - duts_mgmt_port: duts mgmt port
     - duts_name: duts names
     - fp_mtu: MTU for FP ports
+    - batch_mode: batch the commands binding the front panel and host ports: one ovs-vsctl transaction adding the
+      ports of all bridges, "ovs-ofctl add-flows" from a file per bridge, and "ip -batch" scripts moving the DUT
+      ports into the PTF docker. Set by the vm_set role from "-e vm_topology_batch_mode=true", default false
 '''
 
 EXAMPLES = '''
@@ -233,7 +236,7 @@ def adaptive_temporary_interface(vm_set_name, interface_name, reserved_space=0):
 class VMTopology(object):
 
     def __init__(self, vm_names, vm_properties, fp_mtu, max_fp_num, topo, worker, current_vm_name=None,
-                 is_dpu=False, is_vs_chassis=False, dut_interfaces=None):
+                 is_dpu=False, is_vs_chassis=False, dut_interfaces=None, batch_mode=False, dry_run=False):
         self.vm_names = vm_names
         self.current_vm_name = current_vm_name
         self.vm_properties = vm_properties
@@ -247,6 +250,11 @@ class VMTopology(object):
         self.worker = worker
         self._is_dpu = is_dpu
         self._is_vs_chassis = is_vs_chassis
+        # In batch mode, the ports are bound with batched ovs-vsctl/ovs-ofctl/ip commands
+        self.batch_mode = batch_mode
+        # In dry-run mode, the batched commands are recorded in dry_run_batches instead of being run
+        self.dry_run = dry_run
+        self.dry_run_batches = []
 
     def init(self, vm_set_name, vm_base, duts_fp_ports, duts_name, ptf_exists=True, check_bridge=True):
         self.vm_set_name = vm_set_name
@@ -1025,8 +1033,11 @@ class VMTopology(object):
                      injected_iface, vm_iface, disconnect_vm)
                 )
         with VMTopologyWorker.safe_subprocess_manager() as [processes, tmpdir]:
-            self.worker.map(lambda args: self.bind_ovs_ports(*args, processes=processes,
-                                                             tmpdir=tmpdir), bind_ovs_ports_args)
+            if self.batch_mode:
+                self.add_ovs_ports([(br_name, [injected_iface, dut_iface, vm_iface])
+                                    for br_name, dut_iface, injected_iface, vm_iface, _ in bind_ovs_ports_args])
+            self.worker.map(lambda args: self.bind_ovs_ports(*args, processes=processes, tmpdir=tmpdir,
+                                                             ports_added=self.batch_mode), bind_ovs_ports_args)
 
         for k, attr in self.VM_LINKs.items():
             logging.info("Create VM links for {} : {}".format(k, attr))
@@ -1062,8 +1073,11 @@ class VMTopology(object):
                 bind_ovs_links_args.append((br_name, port1, injected_iface, port2, disconnect_vm))
 
         with VMTopologyWorker.safe_subprocess_manager() as [processes, tmpdir]:
-            self.worker.map(lambda args: self.bind_ovs_ports(*args, processes=processes, tmpdir=tmpdir),
-                            bind_ovs_links_args)
+            if self.batch_mode:
+                self.add_ovs_ports([(br_name, [injected_iface, port1, port2])
+                                    for br_name, port1, injected_iface, port2, _ in bind_ovs_links_args])
+            self.worker.map(lambda args: self.bind_ovs_ports(*args, processes=processes, tmpdir=tmpdir,
+                                                             ports_added=self.batch_mode), bind_ovs_links_args)
 
     def unbind_fp_ports(self):
         logging.info("=== unbind front panel ports ===")
@@ -1229,32 +1243,38 @@ class VMTopology(object):
                                    |                      +---- vm_iface
                                    +----------------------+
         """
-        br = VMTopology.get_ovs_bridge_by_port(injected_iface)
-        if br is not None and br != br_name:
-            VMTopology.cmd('ovs-vsctl --if-exists del-port %s %s' % (br, injected_iface))
+        if kwargs.get("ports_added"):
+            # The ports were added to the bridge by add_ovs_ports, together with the ports of the other bridges
+            pass
+        elif self.batch_mode:
+            self.add_ovs_ports([(br_name, [injected_iface, dut_iface, vm_iface])])
+        else:
+            br = VMTopology.get_ovs_bridge_by_port(injected_iface)
+            if br is not None and br != br_name:
+                VMTopology.cmd('ovs-vsctl --if-exists del-port %s %s' % (br, injected_iface))
 
-        br = VMTopology.get_ovs_bridge_by_port(dut_iface)
-        if br is not None and br != br_name:
-            VMTopology.cmd('ovs-vsctl --if-exists del-port %s %s' % (br, dut_iface))
+            br = VMTopology.get_ovs_bridge_by_port(dut_iface)
+            if br is not None and br != br_name:
+                VMTopology.cmd('ovs-vsctl --if-exists del-port %s %s' % (br, dut_iface))
 
-        br = VMTopology.get_ovs_bridge_by_port(vm_iface)
-        if br is not None and br != br_name:
-            VMTopology.cmd('ovs-vsctl --if-exists del-port %s %s' % (br, vm_iface))
+            br = VMTopology.get_ovs_bridge_by_port(vm_iface)
+            if br is not None and br != br_name:
+                VMTopology.cmd('ovs-vsctl --if-exists del-port %s %s' % (br, vm_iface))
 
-        ports = VMTopology.get_ovs_br_ports(br_name)
-        # Combine all pending "add-port" operations into a single ovs-vsctl
-        # transaction instead of issuing them one at a time. Each write
-        # transaction to ovsdb-server/ovs-vswitchd triggers a bridge
-        # reconfiguration whose cost scales with the total number of
-        # bridges/ports on the switch, so batching them cuts that overhead
-        # roughly by the number of ports batched together.
-        add_port_args = []
-        for iface in (injected_iface, dut_iface, vm_iface):
-            if iface not in ports:
-                add_port_args.append('--may-exist add-port %s %s' % (br_name, iface))
-
-        if add_port_args:
-            VMTopology.cmd('ovs-vsctl -- %s' % (' -- '.join(add_port_args)))
+            ports = VMTopology.get_ovs_br_ports(br_name)
+            # Combine all pending "add-port" operations into a single ovs-vsctl
+            # transaction instead of issuing them one at a time. Each write
+            # transaction to ovsdb-server/ovs-vswitchd triggers a bridge
+            # reconfiguration whose cost scales with the total number of
+            # bridges/ports on the switch, so batching them cuts that overhead
+            # roughly by the number of ports batched together.
+            add_port_args = []
+            for iface in (injected_iface, dut_iface, vm_iface):
+                if iface not in ports:
+                    add_port_args.append('--may-exist add-port %s %s' % (br_name, iface))
+
+            if add_port_args:
+                VMTopology.cmd('ovs-vsctl -- %s' % (' -- '.join(add_port_args)))
 
         bindings = VMTopology.get_ovs_port_bindings(br_name, [dut_iface])
         dut_iface_id = bindings[dut_iface]
@@ -1262,7 +1282,7 @@ class VMTopology(object):
         vm_iface_id = bindings[vm_iface]
 
         # clear old bindings
-        VMTopology.cmd('ovs-ofctl del-flows %s' % br_name)
+        self.run_batch('ovs-ofctl del-flows %s' % br_name)
 
         # Collect all flow rules and install them with a single batched
         # "ovs-ofctl add-flows" call instead of one "add-flow" call per
@@ -1376,13 +1396,36 @@ class VMTopology(object):
             bind_helper("ovs-ofctl add-flow %s table=0,in_port=%s,action=output:%s" %
                         (br_name, injected_iface_id, dut_iface_id))
 
-        processes = kwargs.get("processes")
-        tmpdir = kwargs.get("tmpdir")
-        with tempfile.NamedTemporaryFile("w", dir=tmpdir, delete=False) as f:
-            for rule in all_cmds:
-                f.write(rule.strip("'") + "\n")
+        self.run_batch("ovs-ofctl add-flows %s" % br_name, [rule.strip("'") for rule in all_cmds],
+                       processes=kwargs.get("processes"), tmpdir=kwargs.get("tmpdir"))
+
+    def add_ovs_ports(self, bridges_ports):
+        """
+        add ports to ovs bridges with a single ovs-vsctl transaction
+
+        A port not on its bridge yet is removed from the bridge it is attached to in the same transaction,
+        instead of querying the bridge of every port first.
+
+        Args:
+            bridges_ports (list): list of (bridge name, ports) tuples.
+        """
+        bridges = list(dict.fromkeys(br_name for br_name, _ in bridges_ports))
+        if self.worker.in_task():
+            # Called from a task of the worker, e.g. create_dualtor_cable for each host port
+            br_ports = {br_name: VMTopology.get_ovs_br_ports(br_name) for br_name in bridges}
+        else:
+            br_ports = dict(zip(bridges, self.worker.map(VMTopology.get_ovs_br_ports, bridges)))
+
+        vsctl_args = []
+        for br_name, ports in bridges_ports:
+            for port in ports:
+                if port not in br_ports[br_name]:
+                    vsctl_args.append('--if-exists del-port %s' % port)
+                    vsctl_args.append('add-port %s %s' % (br_name, port))
+                    br_ports[br_name].add(port)
 
-        processes.append(VMTopology.fire_and_forget("ovs-ofctl add-flows {} {}".format(br_name, f.name)))
+        if vsctl_args:
+            self.run_batch('ovs-vsctl -- %s' % (' -- '.join(vsctl_args)))
 
     def unbind_ovs_ports(self, br_name, vm_port, **kwargs):
         """unbind all ports except the vm port from an ovs bridge"""
@@ -1434,18 +1477,22 @@ class VMTopology(object):
 
         self.create_ovs_bridge(br_name, self.fp_mtu)
 
-        for intf in [host_if, upper_if, lower_if]:
-            br = VMTopology.get_ovs_bridge_by_port(intf)
-            if br is not None and br != br_name:
-                VMTopology.cmd('ovs-vsctl --if-exists del-port %s %s' % (br, intf))
-
-        ports = VMTopology.get_ovs_br_ports(br_name)
         ports_to_be_attached = [host_if, upper_if, lower_if]
         if nic_if is not None:
             ports_to_be_attached.append(nic_if)
-        for intf in ports_to_be_attached:
-            if intf not in ports:
-                VMTopology.cmd('ovs-vsctl --may-exist add-port %s %s' % (br_name, intf))
+
+        if self.batch_mode:
+            self.add_ovs_ports([(br_name, ports_to_be_attached)])
+        else:
+            for intf in [host_if, upper_if, lower_if]:
+                br = VMTopology.get_ovs_bridge_by_port(intf)
+                if br is not None and br != br_name:
+                    VMTopology.cmd('ovs-vsctl --if-exists del-port %s %s' % (br, intf))
+
+            ports = VMTopology.get_ovs_br_ports(br_name)
+            for intf in ports_to_be_attached:
+                if intf not in ports:
+                    VMTopology.cmd('ovs-vsctl --may-exist add-port %s %s' % (br_name, intf))
 
         bridge_ports = [upper_if, lower_if]
         if nic_if is not None:
@@ -1456,21 +1503,26 @@ class VMTopology(object):
         lower_if_id = bindings[lower_if]
 
         # clear old bindings
-        VMTopology.cmd('ovs-ofctl del-flows %s' % br_name)
+        self.run_batch('ovs-ofctl del-flows %s' % br_name)
 
+        flows = []
         if nic_if is not None:
             # TODO: open-flow configuration for ovs-bridge simulating server smart NIC
             pass
         else:
             # open-flow configuration for ovs-bridge simulating mux of dualtor y-cable
-            VMTopology.cmd("ovs-ofctl add-flow %s table=0,in_port=%s,action=output:%s,%s" %
-                           (br_name, host_if_id, upper_if_id, lower_if_id))
+            flows.append("table=0,in_port=%s,action=output:%s,%s" % (host_if_id, upper_if_id, lower_if_id))
             if active_if_index == 0:
-                VMTopology.cmd("ovs-ofctl add-flow %s table=0,in_port=%s,action=output:%s" %
-                               (br_name, upper_if_id, host_if_id))
+                flows.append("table=0,in_port=%s,action=output:%s" % (upper_if_id, host_if_id))
             else:
-                VMTopology.cmd("ovs-ofctl add-flow %s table=0,in_port=%s,action=output:%s" %
-                               (br_name, lower_if_id, host_if_id))
+                flows.append("table=0,in_port=%s,action=output:%s" % (lower_if_id, host_if_id))
+
+        if self.batch_mode:
+            if flows:
+                self.run_batch("ovs-ofctl add-flows %s" % br_name, flows)
+        else:
+            for flow in flows:
+                VMTopology.cmd("ovs-ofctl add-flow %s %s" % (br_name, flow))
 
     def remove_dualtor_cable(self, host_ifindex, is_active_active=False):
         """
@@ -1488,6 +1540,17 @@ class VMTopology(object):
         for non-dual topo, inject the dut port into ptf docker.
         for dual-tor topo, create ovs port and add to ptf docker.
         """
+        # DUT ports injected into ptf docker in batch mode, added together once all host ports are handled
+        dut_ifs = []
+
+        def _add_dut_if(ptf_if, fp_port, vlan_subif=None):
+            if self.batch_mode:
+                dut_ifs.append((ptf_if, fp_port, vlan_subif))
+                return
+            self.add_dut_if_to_docker(ptf_if, fp_port)
+            if vlan_subif is not None:
+                self.add_dut_vlan_subif_to_docker(ptf_if, *vlan_subif)
+
         def _add_host_port(i, intf):
             if self._is_multi_duts and not self._is_cable:
                 if isinstance(intf, list):
@@ -1528,7 +1591,7 @@ class VMTopology(object):
                     fp_port = self.duts_fp_ports[self.duts_name[intf[0]]][str(
                         intf[1])]
                     ptf_if = PTF_FP_IFACE_TEMPLATE % host_ifindex
-                    self.add_dut_if_to_docker(ptf_if, fp_port)
+                    _add_dut_if(ptf_if, fp_port)
             elif self._is_multi_duts and self._is_cable:
                 # Since there could be multiple ToR's in cable topology, some Ports
                 # can be connected to muxcable and some to a DAC cable. But it could
@@ -1543,28 +1606,75 @@ class VMTopology(object):
                     fp_port = self.duts_fp_ports[self.duts_name[intf[0][0]]][str(
                         intf[0][1])]
                     ptf_if = PTF_FP_IFACE_TEMPLATE % host_ifindex
-                    self.add_dut_if_to_docker(ptf_if, fp_port)
+                    _add_dut_if(ptf_if, fp_port)
 
                 host_ifindex = intf[1][2]
                 if self.duts_fp_ports[self.duts_name[intf[1][0]]].get(str(intf[1][1])) is not None:
                     fp_port = self.duts_fp_ports[self.duts_name[intf[1][0]]][str(
                         intf[1][1])]
                     ptf_if = PTF_FP_IFACE_TEMPLATE % host_ifindex
-                    self.add_dut_if_to_docker(ptf_if, fp_port)
+                    _add_dut_if(ptf_if, fp_port)
             else:
                 fp_port = self.duts_fp_ports[self.duts_name[0]][str(intf)]
                 ptf_if = PTF_FP_IFACE_TEMPLATE % intf
-                self.add_dut_if_to_docker(ptf_if, fp_port)
+                vlan_subif = None
                 # only create sub interface for enabled ports defined in t0-backend
                 if self.dut_type == BACKEND_TOR_TYPE and intf not in self.disabled_host_interfaces:
                     vlan_separator = self.topo.get("DUT", {}).get(
                         "sub_interface_separator", SUB_INTERFACE_SEPARATOR)
                     vlan_id = self.vlan_ids[str(intf)]
-                    self.add_dut_vlan_subif_to_docker(
-                        ptf_if, vlan_separator, vlan_id)
+                    vlan_subif = (vlan_separator, vlan_id)
+                _add_dut_if(ptf_if, fp_port, vlan_subif)
 
         self.worker.map(lambda args: _add_host_port(*args), enumerate(self.host_interfaces))
 
+        if dut_ifs:
+            self.add_dut_ifs_to_docker(dut_ifs)
+
+    def add_dut_ifs_to_docker(self, dut_ifs):
+        """
+        add dut ports to the ptf docker with batched ip commands
+
+        The interfaces of the host and of the ptf docker are listed once. The ports are then moved into the ptf
+        docker with a single "ip -batch" on the host, and renamed and brought up with a single "ip -batch" in the
+        ptf docker, the same way add_dut_if_to_docker and add_dut_vlan_subif_to_docker do port by port.
+
+        Args:
+            dut_ifs (list): list of (ptf interface, dut interface, vlan sub interface) tuples. The vlan sub
+                interface is None, or a (vlan separator, vlan id) tuple.
+        """
+        host_ifs = VMTopology.get_ifaces()
+        ptf_ifs = VMTopology.get_ifaces(pid=self.pid)
+
+        host_batch = []
+        ptf_batch = []
+        for iface_name, dut_iface, vlan_subif in dut_ifs:
+            logging.info("=== Add DUT interface %s to PTF docker as %s ===" % (dut_iface, iface_name))
+            if dut_iface in host_ifs and dut_iface not in ptf_ifs and iface_name not in ptf_ifs:
+                host_batch.append("link set dev %s netns %s" % (dut_iface, self.pid))
+                host_ifs.discard(dut_iface)
+                ptf_ifs.add(dut_iface)
+
+            if dut_iface in ptf_ifs and iface_name not in ptf_ifs:
+                ptf_batch.append("link set dev %s name %s" % (dut_iface, iface_name))
+                ptf_ifs.discard(dut_iface)
+                ptf_ifs.add(iface_name)
+
+            ptf_batch.append("link set %s up" % iface_name)
+
+            if vlan_subif is not None:
+                if iface_name not in ptf_ifs:
+                    raise ValueError("Interface %s not present in docker" % iface_name)
+                vlan_separator, vlan_id = vlan_subif
+                vlan_sub_iface_name = iface_name + vlan_separator + vlan_id
+                ptf_batch.append("link add link %s name %s type vlan id %s" %
+                                 (iface_name, vlan_sub_iface_name, vlan_id))
+                ptf_batch.append("link set %s up" % vlan_sub_iface_name)
+
+        if host_batch:
+            self.run_batch("ip -batch", host_batch)
+        self.run_batch("nsenter -t %s -n ip -batch" % self.pid, ptf_batch)
+
     def enable_netns_loopback(self):
         """Enable loopback device in the netns."""
         VMTopology.cmd("ip netns exec %s ifconfig lo up" % self.netns)
@@ -1781,6 +1891,35 @@ class VMTopology(object):
         except Exception:
             return False
 
+    @staticmethod
+    def get_ifaces(pid=None, netns=None):
+        """Get the names of all the interfaces with a single command.
+
+        Like intf_exists, the command is executed on host by default, in the network namespace of the specified pid,
+        or in the specified network namespace.
+
+        Args:
+            pid (str), optional): Pid of docker. Defaults to None.
+            netns (str), optional): netns name. Default to None.
+
+        Returns:
+            set: Names of the interfaces.
+        """
+        if pid:
+            cmdline = 'nsenter -t %s -n ip -o link show' % pid
+        elif netns:
+            cmdline = 'ip netns exec %s ip -o link show' % netns
+        else:
+            cmdline = 'ip -o link show'
+
+        ifaces = set()
+        # e.g. "5: eth0@if6: <BROADCAST,MULTICAST,UP,LOWER_UP> mtu 1500 ..."
+        for line in VMTopology.cmd(cmdline).splitlines():
+            fields = line.split(':')
+            if len(fields) > 2:
+                ifaces.add(fields[1].strip().split('@')[0])
+        return ifaces
+
     @staticmethod
     def iface_up(iface_name, pid=None, netns=None):
         return VMTopology.iface_updown(iface_name, 'up', pid, netns)
@@ -1817,6 +1956,43 @@ class VMTopology(object):
                 stderr=subprocess.PIPE,
                 shell=False)
 
+    def run_batch(self, cmdline, lines=None, processes=None, tmpdir=None):
+        """Run a batched command.
+
+        The lines are written to a file whose name is appended to the command line, e.g. the script of "ip -batch"
+        or the flows of "ovs-ofctl add-flows". In dry-run mode, the command line and the lines are recorded in
+        dry_run_batches instead.
+
+        Args:
+            cmdline (str): The command line to be executed.
+            lines (list, optional): Lines of the file passed to the command. Defaults to None.
+            processes (list, optional): If specified, the command is fired and forgotten and added to the processes
+                checked by VMTopologyWorker.safe_subprocess_manager. Defaults to None.
+            tmpdir (str, optional): Directory of the file. Defaults to None.
+
+        Returns:
+            str: Output of the command, empty if it is fired and forgotten or in dry-run mode.
+        """
+        if self.dry_run:
+            logging.info('*** DRY-RUN CMD: %s%s' % (cmdline, ''.join('\n    ' + line for line in lines or [])))
+            self.dry_run_batches.append((cmdline, lines))
+            return ''
+
+        if lines is None:
+            if processes is not None:
+                processes.append(VMTopology.fire_and_forget(cmdline))
+                return ''
+            return VMTopology.cmd(cmdline)
+
+        with tempfile.NamedTemporaryFile("w", dir=tmpdir, delete=processes is None) as f:
+            for line in lines:
+                f.write(line + "\n")
+            f.flush()
+            if processes is not None:
+                processes.append(VMTopology.fire_and_forget("%s %s" % (cmdline, f.name)))
+                return ''
+            return VMTopology.cmd("%s %s" % (cmdline, f.name))
+
     @staticmethod
     def cmd(cmdline, grep_cmd=None, retry=1, negative=False, shell=False, split_cmd=True, ignore_errors=False):
         """Execute a command and return the output
@@ -2213,6 +2389,7 @@ class VMTopologyWorker(object):
         self.use_thread_worker = use_thread_worker
         self.thread_worker_count = thread_worker_count
         self.thread_buffer_handler = None
+        self._task_local = threading.local()
         if use_thread_worker:
             self.thread_pool = ThreadPool(thread_worker_count)
             self._map_helper = self.thread_pool.map
@@ -2235,16 +2412,27 @@ class VMTopologyWorker(object):
         handler = handlers[-1]
         self.thread_buffer_handler = ThreadBufferHandler(target=handler)
 
+    def in_task(self):
+        """Return True if called from a task run by map."""
+        return getattr(self._task_local, "in_task", False)
+
     def map(self, func, iterable):
-        """Apply the function to every item of the iterable."""
+        """
+        Apply the function to every item of the iterable.
+
+        A task must not call map itself: the outer map already replaced the logging handler, and the nested
+        tasks would wait for the workers busy with the outer tasks. Use in_task to run the nested calls directly.
+        """
         def _buffer_logs_helper(func, *args, **kwargs):
             if self.use_thread_worker:
                 logging.debug(LOG_SEPARATOR)
                 logging.debug("Start task %s, arguments (%s, %s), worker %s",
                               func, args, kwargs, threading.current_thread().ident)
+            self._task_local.in_task = True
             try:
-                func(*args, **kwargs)
+                return func(*args, **kwargs)
             finally:
+                self._task_local.in_task = False
                 if self.use_thread_worker:
                     logging.debug("Finish task %s, arguments (%s, %s), worker %s",
                                   func, args, kwargs, threading.current_thread().ident)
@@ -2356,7 +2544,8 @@ def main():
                                                  multiprocessing.cpu_count() // 8)),
             multi_vrf=dict(required=False, type='bool', default=False),
             multi_vrf_data=dict(required=False, type='dict', default={}),
-            topo_config=dict(required=False, type='dict', default={})
+            topo_config=dict(required=False, type='dict', default={}),
+            batch_mode=dict(required=False, type='bool', default=False)
         ),
         supports_check_mode=False)
 
@@ -2372,6 +2561,7 @@ def main():
     dut_interfaces = module.params['dut_interfaces']
     use_thread_worker = module.params['use_thread_worker']
     thread_worker_count = module.params['thread_worker_count']
+    batch_mode = module.params['batch_mode']
 
     config_module_logging(construct_log_filename(cmd, vm_set_name))
 
@@ -2382,7 +2572,7 @@ def main():
         topo = module.params['topo']
         worker = VMTopologyWorker(use_thread_worker, thread_worker_count)
         net = VMTopology(vm_names, vm_properties, fp_mtu, max_fp_num, topo, worker, current_vm_name,
-                         is_dpu, is_vs_chassis, dut_interfaces)
+                         is_dpu, is_vs_chassis, dut_interfaces, batch_mode)
 
         if cmd == 'create':
             net.create_bridges()
@@ -1,13 +1,17 @@
 
 
+import hashlib
 import inspect
 import logging
 import os
 import pickle
-import random
 import shutil
+import sqlite3
+import struct
 import sys
+import tempfile
 import time
+import zlib
 
 from collections import defaultdict
 from pickle import UnpicklingError
@@ -23,6 +27,20 @@ CACHE_LOCATION = os.path.join(CURRENT_PATH, '../../../_cache')
 SIZE_LIMIT = 1000000000  # 1G bytes, max disk usage allowed by cache
 ENTRY_LIMIT = 1000000    # Max number of pickle files allowed in cache.
 DISABLE_CACHE_PARAM = "disable_cache"
+INDEX_FILE = "_index.sqlite"  # Sidecar index tracking size and last access time of each cached entry
+INDEX_TIMEOUT = 30           # Seconds to wait for the index lock held by other processes
+
+# Header of cache file: magic, format version, crc32 and length of the pickled payload, expiry timestamp
+# (0 for never) and sha1 digest of the fingerprint (zeros for none).
+CACHE_FILE_MAGIC = b'FCACHE'
+CACHE_FILE_VERSION = 2
+CACHE_FILE_HEADER = struct.Struct('!6sBIQd20s')
+NO_FINGERPRINT = b'\x00' * 20
+
+
+class CorruptedCacheFile(Exception):
+    """Raised when content of a cache file does not match its header."""
+    pass
 
 
 class Singleton(type):
@@ -38,6 +56,161 @@ class Singleton(type):
         return cls._instances[cls]
 
 
+class _CacheIndex(object):
+    """Persistent usage index of the cache folder, stored in a sqlite sidecar file.
+
+    The index records size and last access time of every cached pickle file. Total size and number of entries are
+    maintained by triggers in the same transaction as each change, so checking usage is O(1) instead of walking the
+    whole cache folder. When the limitations are exceeded, least recently used entries are evicted.
+
+    A new connection is opened for each operation, so the index survives removal of the whole cache folder by
+    `FactsCache.cleanup` and can be shared by multiple processes.
+    """
+
+    SCHEMA = [
+        "CREATE TABLE IF NOT EXISTS entries ("
+        "zone TEXT NOT NULL, key TEXT NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL, "
+        "PRIMARY KEY (zone, key))",
+        "CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)",
+        "CREATE TABLE IF NOT EXISTS usage (id INTEGER PRIMARY KEY CHECK (id = 0), "
+        "total_size INTEGER NOT NULL, total_entries INTEGER NOT NULL)",
+        "INSERT OR IGNORE INTO usage VALUES (0, 0, 0)",
+        "CREATE TRIGGER IF NOT EXISTS entries_insert AFTER INSERT ON entries BEGIN "
+        "UPDATE usage SET total_size = total_size + NEW.size, total_entries = total_entries + 1; END",
+        "CREATE TRIGGER IF NOT EXISTS entries_delete AFTER DELETE ON entries BEGIN "
+        "UPDATE usage SET total_size = total_size - OLD.size, total_entries = total_entries - 1; END",
+        "CREATE TRIGGER IF NOT EXISTS entries_update AFTER UPDATE OF size ON entries BEGIN "
+        "UPDATE usage SET total_size = total_size - OLD.size + NEW.size; END",
+    ]
+
+    def __init__(self, cache_location):
+        self._cache_location = cache_location
+        self._index_file = os.path.join(cache_location, INDEX_FILE)
+
+    def _connect(self):
+        """Open the index, create and populate it from the cache folder if it does not exist yet."""
+        if not os.path.exists(self._cache_location):
+            os.makedirs(self._cache_location)
+        conn = sqlite3.connect(self._index_file, timeout=INDEX_TIMEOUT, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            exists = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'usage'").fetchone()
+            if not exists:
+                for statement in self.SCHEMA:
+                    conn.execute(statement)
+                self._populate(conn)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.close()
+            raise
+        return conn
+
+    def _populate(self, conn):
+        """Walk the cache folder once to index the files cached before the index was created."""
+        count = 0
+        for zone in os.listdir(self._cache_location):
+            zone_folder = os.path.join(self._cache_location, zone)
+            if not os.path.isdir(zone_folder):
+                continue
+            for f in os.listdir(zone_folder):
+                if not f.endswith(".pickle"):
+                    continue
+                try:
+                    st = os.stat(os.path.join(zone_folder, f))
+                except OSError:
+                    continue
+                conn.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)",
+                             (zone, f[:-len(".pickle")], st.st_size, st.st_atime))
+                count += 1
+        if count:
+            logger.info('[Cache] Indexed {} existing cache files under {}'.format(count, self._cache_location))
+
+    def _evict(self, conn, keep):
+        """Remove least recently used entries until cache usage is within the limitations.
+
+        Args:
+            conn (sqlite3.Connection): Connection with an active transaction.
+            keep (tuple): (zone, key) of the entry that must not be evicted.
+        """
+        total_size, total_entries = conn.execute("SELECT total_size, total_entries FROM usage").fetchone()
+        while total_size > SIZE_LIMIT or total_entries > ENTRY_LIMIT:
+            victims = conn.execute(
+                "SELECT zone, key, size FROM entries WHERE NOT (zone = ? AND key = ?) ORDER BY last_access LIMIT 100",
+                keep).fetchall()
+            if not victims:
+                return
+            for zone, key, size in victims:
+                if total_size <= SIZE_LIMIT and total_entries <= ENTRY_LIMIT:
+                    break
+                try:
+                    os.remove(os.path.join(self._cache_location, zone, '{}.pickle'.format(key)))
+                except OSError:
+                    pass
+                conn.execute("DELETE FROM entries WHERE zone = ? AND key = ?", (zone, key))
+                total_size -= size
+                total_entries -= 1
+                logger.info('[Cache] Evicted least recently used "{}.{}" from cache'.format(zone, key))
+
+    def _execute(self, action, *args):
+        try:
+            conn = self._connect()
+        except (sqlite3.Error, OSError) as e:
+            logger.warning('[Cache] Open cache index "{}" failed with exception: {}'.format(self._index_file, repr(e)))
+            return
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            action(conn, *args)
+            conn.execute("COMMIT")
+        except (sqlite3.Error, OSError) as e:
+            logger.warning('[Cache] Update cache index "{}" failed with exception: {}'
+                           .format(self._index_file, repr(e)))
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+        finally:
+            conn.close()
+
+    def _add(self, conn, zone, key, size):
+        conn.execute("INSERT INTO entries VALUES (?, ?, ?, ?) "
+                     "ON CONFLICT (zone, key) DO UPDATE SET size = excluded.size, last_access = excluded.last_access",
+                     (zone, key, size, time.time()))
+        self._evict(conn, (zone, key))
+
+    def _touch(self, conn, zone, key):
+        conn.execute("UPDATE entries SET last_access = ? WHERE zone = ? AND key = ?", (time.time(), zone, key))
+
+    def _remove(self, conn, zone, key):
+        if key is None:
+            conn.execute("DELETE FROM entries WHERE zone = ?", (zone,))
+        else:
+            conn.execute("DELETE FROM entries WHERE zone = ? AND key = ?", (zone, key))
+
+    def add(self, zone, key, size):
+        """Record a written entry and evict least recently used entries if limitations are exceeded."""
+        self._execute(self._add, zone, key, size)
+
+    def touch(self, zone, key):
+        """Refresh last access time of an entry loaded from file."""
+        self._execute(self._touch, zone, key)
+
+    def remove(self, zone, key=None):
+        """Remove an entry, or all entries of a zone when key is not specified."""
+        if os.path.exists(self._index_file):
+            self._execute(self._remove, zone, key)
+
+    def usage(self):
+        """Get current cache usage.
+
+        Returns:
+            tuple: (total_size, total_entries)
+        """
+        conn = self._connect()
+        try:
+            return conn.execute("SELECT total_size, total_entries FROM usage").fetchone()
+        finally:
+            conn.close()
+
+
 class FactsCache(with_metaclass(Singleton, object)):
     """Singleton class for reading from cache and write to cache.
 
@@ -52,71 +225,98 @@ class FactsCache(with_metaclass(Singleton, object)):
     def __init__(self, cache_location=CACHE_LOCATION):
         self._cache_location = os.path.abspath(cache_location)
         self._cache = defaultdict(dict)
+        self._meta = defaultdict(dict)   # (expires_at, fingerprint digest) of the cached facts
         self._write_lock = Lock()
-
-    def _check_usage(self):
-        """Check cache usage, raise exception if usage exceeds the limitations.
-        """
-        total_size = 0
-        total_entries = 0
-        for root, _, files in os.walk(self._cache_location):
-            for f in files:
-                fp = os.path.join(root, f)
-                total_size += os.path.getsize(fp)
-                total_entries += 1
-
-        if total_size > SIZE_LIMIT or total_entries > ENTRY_LIMIT:
-            msg = 'Cache usage exceeds limitations. total_size={}, SIZE_LIMIT={}, total_entries={}, ENTRY_LIMIT={}' \
-                .format(total_size, SIZE_LIMIT, total_entries, ENTRY_LIMIT)
-            raise Exception(msg)
+        self._index = _CacheIndex(self._cache_location)
 
     def _read_facts_file(self, facts_file, z, k):
         with open(facts_file, 'rb') as f:
-            self._cache[z][k] = pickle.load(f)
-            logger.debug('[Cache] Loaded cached facts "{}.{}" from {}'.format(z, k, facts_file))
-            return self._cache[z][k]
+            data = f.read()
+        self._cache[z][k], self._meta[z][k] = self._loads(data)
+        logger.debug('[Cache] Loaded cached facts "{}.{}" from {}'.format(z, k, facts_file))
+        self._index.touch(z, k)
+        return self._cache[z][k]
+
+    @staticmethod
+    def _fingerprint_digest(fingerprint):
+        if fingerprint is None:
+            return NO_FINGERPRINT
+        return hashlib.sha1(repr(fingerprint).encode('utf-8')).digest()
+
+    @staticmethod
+    def _dumps(value, expires_at, digest):
+        """Serialize value to the content of a cache file: header followed by pickled payload."""
+        payload = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        header = CACHE_FILE_HEADER.pack(CACHE_FILE_MAGIC, CACHE_FILE_VERSION, zlib.crc32(payload), len(payload),
+                                        expires_at, digest)
+        return header + payload
+
+    @staticmethod
+    def _loads(data):
+        """Deserialize content of a cache file, verify the payload against the header before unpickling.
 
-    def read(self, zone, key):
+        Returns:
+            tuple: (value, (expires_at, fingerprint digest))
+        """
+        if not data.startswith(CACHE_FILE_MAGIC):
+            # Cache file written before the header was introduced
+            return pickle.loads(data), (0, NO_FINGERPRINT)
+        if len(data) < CACHE_FILE_HEADER.size:
+            raise CorruptedCacheFile('truncated header')
+        _, version, crc, length, expires_at, digest = CACHE_FILE_HEADER.unpack_from(data)
+        if version != CACHE_FILE_VERSION:
+            raise CorruptedCacheFile('unsupported version {}'.format(version))
+        payload = data[CACHE_FILE_HEADER.size:]
+        if len(payload) != length or zlib.crc32(payload) != crc:
+            raise CorruptedCacheFile('checksum mismatch')
+        return pickle.loads(payload), (expires_at, digest)
+
+    def _is_valid(self, zone, key, fingerprint):
+        """Check whether the cached facts are not expired and match the fingerprint."""
+        expires_at, digest = self._meta[zone].get(key, (0, NO_FINGERPRINT))
+        if expires_at and time.time() > expires_at:
+            logger.info('[Cache] Cached facts "{}.{}" expired'.format(zone, key))
+            return False
+        if fingerprint is not None and digest != self._fingerprint_digest(fingerprint):
+            logger.info('[Cache] Cached facts "{}.{}" do not match fingerprint {}'.format(zone, key, fingerprint))
+            return False
+        return True
+
+    def read(self, zone, key, fingerprint=None):
         """Read cached facts.
 
+        Cache files are replaced atomically by `write`, so a reader either gets the old or the new content of a file.
+        A file failing the checksum verification is treated as not existing and will be overwritten.
+
         Args:
             zone (str): Cached facts are organized by zones. This argument is to specify the zone name.
                 The zone name could be hostname.
             key (str): Name of cached facts.
+            fingerprint (obj): Fingerprint of the state the facts are gathered from. Default is None. When specified,
+                cached facts written with a different fingerprint are treated as not existing.
 
         Returns:
-            obj: Cached object, usually a dictionary.
+            obj: Cached object, usually a dictionary. NOTEXIST if not cached, expired or fingerprint mismatch.
         """
         # Lazy load
         if zone in self._cache and key in self._cache[zone]:
+            if not self._is_valid(zone, key, fingerprint):
+                return self.NOTEXIST
             logger.debug('[Cache] Read cached facts "{}.{}"'.format(zone, key))
             return self._cache[zone][key]
         else:
             facts_file = os.path.join(self._cache_location, '{}/{}.pickle'.format(zone, key))
             try:
-                return self._read_facts_file(facts_file, zone, key)
+                facts = self._read_facts_file(facts_file, zone, key)
+                if not self._is_valid(zone, key, fingerprint):
+                    return self.NOTEXIST
+                return facts
             except (IOError, ValueError) as e:
                 logger.info('[Cache] Load cache file "{}" failed with IOError or ValueError: {}'
                             .format(os.path.abspath(facts_file), repr(e)))
                 return self.NOTEXIST
-            except (EOFError, UnpicklingError) as e:
-                # When parallel run is enabled, multiple processes may try to read/write the same cache file,
-                # so there will be a chance that
-                #   - a file is being written by process1 while process2 is reading it, causing EOFError in process2
-                #   - a file is being read by multiple processes at the same time, causing UnpicklingError in some of
-                #     the processes
-                # In these cases, we will retry to read the file after a short random sleep. If we still get the same
-                # error after retrying, we will return NOTEXIST to overwrite the file.
-                retry_attempts = 3
-                for attempt in range(retry_attempts):
-                    time.sleep(random.randint(3, 6))
-                    try:
-                        return self._read_facts_file(facts_file, zone, key)
-                    except (EOFError, UnpicklingError):
-                        logger.warning('[Cache] Retry {}/{} failed for file "{}"'
-                                       .format(attempt + 1, retry_attempts, facts_file))
-
-                logger.error('[Cache] Load cache file "{}" failed with EOFError or UnpicklingError: {}'
+            except (CorruptedCacheFile, EOFError, UnpicklingError) as e:
+                logger.error('[Cache] Load cache file "{}" failed with corrupted content: {}'
                              .format(facts_file, repr(e)))
                 return self.NOTEXIST
             except Exception as e:
@@ -124,35 +324,54 @@ class FactsCache(with_metaclass(Singleton, object)):
                             .format(os.path.abspath(facts_file), repr(e)))
                 return self.NOTEXIST
 
-    def write(self, zone, key, value):
+    def write(self, zone, key, value, ttl=None, fingerprint=None):
         """Store facts to cache.
 
+        The facts are dumped to a temporary file in the same folder, which then atomically replaces the cache file.
+        Concurrent readers in other processes never see a partially written file.
+
         Args:
             zone (str): Cached facts are organized by zones. This argument is to specify the zone name.
                 The zone name could be hostname.
             key (str): Name of cached facts.
             value (obj): Value of cached facts. Usually a dictionary.
+            ttl (int): Seconds the cached facts stay valid. Default is None, never expire.
+            fingerprint (obj): Fingerprint of the state the facts are gathered from, compared by `read`. Its `repr`
+                must be stable across sessions. Default is None.
 
         Returns:
             boolean: Caching facts is successful or not.
         """
         with self._write_lock:
-            self._check_usage()
             facts_file = os.path.join(self._cache_location, '{}/{}.pickle'.format(zone, key))
+            tmp_file = None
             try:
+                meta = (time.time() + ttl if ttl else 0, self._fingerprint_digest(fingerprint))
+                data = self._dumps(value, *meta)
                 cache_subfolder = os.path.join(self._cache_location, zone)
                 if not os.path.exists(cache_subfolder):
                     logger.info('[Cache] Create cache dir {}'.format(cache_subfolder))
-                    os.makedirs(cache_subfolder)
-
-                with open(facts_file, 'wb') as f:
-                    pickle.dump(value, f, pickle.HIGHEST_PROTOCOL)
-                    self._cache[zone][key] = value
-                    logger.info('[Cache] Cached facts "{}.{}" to {}'.format(zone, key, facts_file))
-                    return True
-            except (IOError, ValueError) as e:
+                    os.makedirs(cache_subfolder, exist_ok=True)
+
+                fd, tmp_file = tempfile.mkstemp(prefix='.{}.'.format(key), suffix='.tmp', dir=cache_subfolder)
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp_file, facts_file)
+                tmp_file = None
+                self._cache[zone][key] = value
+                self._meta[zone][key] = meta
+                logger.info('[Cache] Cached facts "{}.{}" to {}'.format(zone, key, facts_file))
+                self._index.add(zone, key, len(data))
+                return True
+            except (IOError, ValueError, pickle.PicklingError) as e:
                 logger.error('[Cache] Dump cache file "{}" failed with exception: {}'.format(facts_file, repr(e)))
                 return False
+            finally:
+                if tmp_file:
+                    try:
+                        os.remove(tmp_file)
+                    except OSError:
+                        pass
 
     def cleanup(self, zone=None, key=None):
         """Cleanup cached files.
@@ -167,26 +386,31 @@ class FactsCache(with_metaclass(Singleton, object)):
             if key:
                 if zone in self._cache and key in self._cache[zone]:
                     del self._cache[zone][key]
+                    self._meta[zone].pop(key, None)
                     logger.debug('[Cache] Removed "{}.{}" from cache.'.format(zone, key))
                 try:
                     cache_file = os.path.join(self._cache_location, zone, '{}.pickle'.format(key))
                     os.remove(cache_file)
                     logger.debug('[Cache] Removed cache file "{}.pickle"'.format(cache_file))
+                    self._index.remove(zone, key)
                 except OSError as e:
                     logger.error('[Cache] Cleanup cache {}.{}.pickle failed with exception: {}'
                                  .format(zone, key, repr(e)))
             else:
                 if zone in self._cache:
                     del self._cache[zone]
+                    self._meta.pop(zone, None)
                     logger.debug('[Cache] Removed zone "{}" from cache'.format(zone))
                 try:
                     cache_subfolder = os.path.join(self._cache_location, zone)
                     shutil.rmtree(cache_subfolder)
                     logger.debug('[Cache] Removed cache subfolder "{}"'.format(cache_subfolder))
+                    self._index.remove(zone)
                 except OSError as e:
                     logger.error('[Cache] Remove cache subfolder "{}" failed with exception: {}'.format(zone, repr(e)))
         else:
             self._cache = defaultdict(dict)
+            self._meta = defaultdict(dict)
             try:
                 shutil.rmtree(self._cache_location)
                 logger.debug('[Cache] Removed all cache files under "{}"'.format(self._cache_location))
@@ -241,7 +465,7 @@ def _get_disable_cache(target, args, kwargs):
     return bound_args.arguments.get(DISABLE_CACHE_PARAM, False)
 
 
-def cached(name, zone_getter=None, after_read=None, before_write=None):
+def cached(name, zone_getter=None, after_read=None, before_write=None, ttl=None, fingerprint=None):
     """Decorator for enabling cache for facts.
 
     The cached facts are to be stored by <name>.pickle. Because the cached pickle files must be stored under subfolder
@@ -252,12 +476,17 @@ def cached(name, zone_getter=None, after_read=None, before_write=None):
     With default zone getter function, this decorator can try to find zone:
     if the function is a bound method of class AnsibleHostBase and its derivatives, it will try to use its
     attribute 'hostname' as zone, or raises an error if 'hostname' doesn't exists or is not a string.
+    The cached facts can be invalidated by an optional ttl, or by an optional fingerprint getter function with the same
+    signature as the zone getter. The fingerprint should be cheap to get compared with gathering the facts, like mtime
+    of input files or image version of the DUT. When it changes, the facts are gathered again.
 
     Args:
         name ([str]): Name of the cached facts.
         zone_getter ([function]): Function used to get hostname used as zone.
         after_read ([function]): Hook function used to process facts after read from cache.
         before_write ([function]): Hook function used to process facts before write into cache.
+        ttl ([int]): Seconds the cached facts stay valid. Default is None, never expire.
+        fingerprint ([function]): Function used to get fingerprint of the state the facts are gathered from.
     Returns:
         [function]: Decorator function.
     """
@@ -274,7 +503,8 @@ def cached(name, zone_getter=None, after_read=None, before_write=None):
             _zone_getter = zone_getter or _get_default_zone
             zone = _zone_getter(target, args, kargs)
 
-            cached_facts = cache.read(zone, name)
+            _fingerprint = fingerprint(target, args, kargs) if fingerprint else None
+            cached_facts = cache.read(zone, name, fingerprint=_fingerprint)
             if after_read:
                 cached_facts = after_read(cached_facts, target, args, kargs)
             if cached_facts is not FactsCache.NOTEXIST:
@@ -284,9 +514,9 @@ def cached(name, zone_getter=None, after_read=None, before_write=None):
                 facts = target(*args, **kargs)
                 if before_write:
                     _facts = before_write(facts, target, args, kargs)
-                    cache.write(zone, name, _facts)
+                    cache.write(zone, name, _facts, ttl=ttl, fingerprint=_fingerprint)
                 else:
-                    cache.write(zone, name, facts)
+                    cache.write(zone, name, facts, ttl=ttl, fingerprint=_fingerprint)
                 return facts
         return wrapper
     return decorator
@@ -19,7 +19,10 @@ import logging
 import os
 import re
 import copy
-from typing import Dict, List, Tuple
+import hashlib
+import shutil
+import tarfile
+from typing import Dict, Iterable, Iterator, List, Tuple, Union
 from collections import Counter
 from dataclasses import dataclass
 
@@ -82,6 +85,72 @@ def dut_dump(redis_cmd, duthost, data_dir, fname):
     return db_read
 
 
+def build_parallel_dump_cmd(dbs, dump_dir, archive):
+    """
+    Build the shell command dumping Redis databases in parallel and archiving the dumps.
+
+    Each database is dumped by its own redis-dump process to <dump_dir>/<DB name>.json. The command
+    fails if any of the dumps fails, otherwise the dumps are archived in the gzip compressed tarball archive.
+
+    Args:
+        dbs (List[DBType]): Databases to dump
+        dump_dir (str): Directory on the DUT the dumps are written to
+        archive (str): Path of the tarball on the DUT
+
+    Returns:
+        str: The shell command
+    """
+    dump_files = [f"{db.name}.json" for db in dbs]
+    lines = [f"rm -rf {dump_dir} && mkdir -p {dump_dir} || exit 1", "pids=''"]
+    for db, dump_file in zip(dbs, dump_files):
+        lines.append(f"redis-dump -d {db.value} -o {dump_dir}/{dump_file} & pids=\"$pids $!\"")
+    lines.append("rc=0; for pid in $pids; do wait $pid || rc=1; done; [ $rc -eq 0 ] || exit $rc")
+    lines.append(f"tar -czf {archive} -C {dump_dir} {' '.join(dump_files)}")
+    return "\n".join(lines)
+
+
+def dut_dump_dbs(duthost, dbs, data_dir, name):
+    """
+    Dump Redis databases in parallel on a DUT and fetch all the dumps in one compressed archive.
+
+    The dumps are the compact JSON written by redis-dump, they are extracted from the archive to
+    <data_dir>/<DB name>.json without being parsed.
+
+    Args:
+        duthost: The DUT host object with shell and fetch capabilities
+        dbs (List[DBType]): Databases to dump
+        data_dir (str): Local directory path where the dump files will be stored
+        name (str): Base name of the dump directory and archive on the DUT
+
+    Returns:
+        Dict[DBType, str]: Local path of the dump of each database
+
+    Raises:
+        AssertionError: If the dump command fails or the archive could not be fetched
+    """
+    dump_dir = f"/tmp/{name}"
+    archive = f"{dump_dir}.tar.gz"
+    local_archive = os.path.join(data_dir, os.path.basename(archive))
+    try:
+        ret = duthost.shell(build_parallel_dump_cmd(dbs, dump_dir, archive), module_ignore_errors=True)
+        assert ret["rc"] == 0, "Failed to dump DBs {} on {}: {}".format(
+            [db.name for db in dbs], duthost.hostname, ret.get("stderr", ""))
+        duthost.fetch(src=archive, dest=local_archive, flat=True)
+    finally:
+        duthost.shell(f"rm -rf {dump_dir} {archive}", module_ignore_errors=True)
+    assert os.path.exists(local_archive), "Fetched file not exist: {}".format(local_archive)
+
+    dump_files = {}
+    with tarfile.open(local_archive, "r:gz") as tar:
+        for db in dbs:
+            dump_file = os.path.join(data_dir, f"{db.name}.json")
+            with tar.extractfile(f"{db.name}.json") as src, open(dump_file, "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            dump_files[db] = dump_file
+    os.remove(local_archive)
+    return dump_files
+
+
 class DBType(Enum):
     """Supported Redis database types in SONiC. Value is their numeric DB index."""
     APPL = 0
@@ -108,6 +177,11 @@ VOLATILE_TOP_LEVEL_KEYS = {
 }
 
 
+# Snapshot files of at least this size, in bytes, are streamed by diff_snapshots instead of being loaded.
+# Streaming bounds the memory used but is slower, so only ASIC DB and very large snapshots are streamed.
+STREAMED_SNAPSHOT_MIN_SIZE = 256 * 1024 * 1024
+
+
 def _matches_any_glob(key: str, patterns) -> bool:
     """Return True if `key` matches any fnmatch-style glob in `patterns`."""
     for pattern in patterns:
@@ -350,45 +424,45 @@ class DbComparisonMetrics:
 
 class SnapshotDiff:
     """Container for differing values and metrics of a snapshot comparison for a singleDB supporting metric tracking
+
+    The snapshots are either dicts or paths of snapshot files. Snapshot files are not loaded: they are read
+    once to index a digest of each top-level key, and once more to load only the keys whose digests differ,
+    so large databases like ASIC DB can be compared in bounded memory.
     """
-    def __init__(self, db_type: DBType, snapshot_a: dict, snapshot_b: dict, label_a: str = "a", label_b: str = "b"):
+    def __init__(self, db_type: DBType, snapshot_a: Union[dict, str], snapshot_b: Union[dict, str],
+                 label_a: str = "a", label_b: str = "b"):
         self._db_type = db_type
-        self._snapshot_a = snapshot_a
-        self._snapshot_b = snapshot_b
         self._label_a = label_a
         self._label_b = label_b
 
-        # Start building metrics from the raw snapshots. Volatile top-level
-        # keys (VOLATILE_TOP_LEVEL_KEYS) still count toward total_keys and the
-        # _incl_volatile value totals; they are excluded only from the
+        # Index the snapshots. Volatile top-level keys (VOLATILE_TOP_LEVEL_KEYS) still count toward
+        # total_keys and the _incl_volatile value totals; they are excluded only from the
         # _excl_volatile totals and from the diff itself.
+        index_a = _SnapshotIndex(db_type, snapshot_a)
+        index_b = _SnapshotIndex(db_type, snapshot_b, reference=index_a.entries)
         self._metrics = DbComparisonMetrics()
-        self._metrics.total_a_keys = len(self._snapshot_a)
-        self._metrics.total_a_values_incl_volatile, self._metrics.total_a_values_excl_volatile = \
-            _sum_total_values(db_type, self._snapshot_a)
-        self._metrics.total_b_keys = len(self._snapshot_b)
-        self._metrics.total_b_values_incl_volatile, self._metrics.total_b_values_excl_volatile = \
-            _sum_total_values(db_type, self._snapshot_b)
-
-        # Drop volatile top-level keys from both snapshots before diffing so
-        # their contents are not reported as mismatches.
-        self._snapshot_a = _drop_volatile_top_level_keys(db_type, self._snapshot_a)
-        self._snapshot_b = _drop_volatile_top_level_keys(db_type, self._snapshot_b)
+        self._metrics.total_a_keys = index_a.total_keys
+        self._metrics.total_a_values_incl_volatile = index_a.total_values_incl_volatile
+        self._metrics.total_a_values_excl_volatile = index_a.total_values_excl_volatile
+        self._metrics.total_b_keys = index_b.total_keys
+        self._metrics.total_b_values_incl_volatile = index_b.total_values_incl_volatile
+        self._metrics.total_b_values_excl_volatile = index_b.total_values_excl_volatile
+
+        # Only the top-level keys present in one snapshot or whose content differs are deep-diffed
+        entries_a, entries_b = index_a.entries, index_b.entries
+        differing_keys = set(entries_a.keys() ^ entries_b.keys())
+        differing_keys.update(key for key in entries_a.keys() & entries_b.keys() if entries_a[key] != entries_b[key])
+        differing_a = index_a.load_entries(differing_keys)
+        differing_b = index_b.load_entries(differing_keys)
 
         # Build the diff
         if db_type == DBType.STATE:
-            process_stats_diff = self._diff_state_db_process_stats(self._snapshot_a, self._snapshot_b)
-            # Remove all 'PROCESS_STATS|*' keys from the dbs since they've already been diffed
-            self._snapshot_a = {k: v for k, v in self._snapshot_a.items() if not k.startswith("PROCESS_STATS|")}
-            self._snapshot_b = {k: v for k, v in self._snapshot_b.items() if not k.startswith("PROCESS_STATS|")}
-            docker_stats_diff = self._diff_state_db_docker_stats(self._snapshot_a, self._snapshot_b)
-            # Remove all 'DOCKER_STATS|*' keys from the dbs since they've already been diffed
-            self._snapshot_a = {k: v for k, v in self._snapshot_a.items() if not k.startswith("DOCKER_STATS|")}
-            self._snapshot_b = {k: v for k, v in self._snapshot_b.items() if not k.startswith("DOCKER_STATS|")}
-            remaining_diff = self._diff_dict(db_type, self._snapshot_a, self._snapshot_b)
+            process_stats_diff = self._diff_state_db_process_stats(index_a.process_stats, index_b.process_stats)
+            docker_stats_diff = self._diff_state_db_docker_stats(index_a.docker_stats, index_b.docker_stats)
+            remaining_diff = self._diff_dict(db_type, differing_a, differing_b)
             self._diff = {**process_stats_diff, **docker_stats_diff, **remaining_diff}
         else:
-            self._diff = self._diff_dict(db_type, self._snapshot_a, self._snapshot_b)
+            self._diff = self._diff_dict(db_type, differing_a, differing_b)
 
         # Now that diff has been built, get metrics on the diff components
         self._metrics.populate_diff_metrics_from_diff(self._diff, label_a=self._label_a, label_b=self._label_b)
@@ -611,20 +685,6 @@ class SnapshotDiff:
         del self._diff[top_level_key]
 
 
-def _drop_volatile_top_level_keys(db_type: DBType, snapshot: dict) -> dict:
-    """Return a shallow copy of `snapshot` with volatile top-level keys removed.
-
-    Patterns from `VOLATILE_TOP_LEVEL_KEYS[db_type]` are fnmatch-style globs
-    matched against each top-level key, so `"DOCKER_STATS|LastUpdateTime"`
-    drops only that exact row while `"TRANSCEIVER_STATUS_FLAG|*"` drops
-    every key with that prefix.
-    """
-    patterns = VOLATILE_TOP_LEVEL_KEYS.get(db_type)
-    if not patterns:
-        return snapshot
-    return {k: v for k, v in snapshot.items() if not _matches_any_glob(k, patterns)}
-
-
 def _recursively_remove_keys_matching_pattern(d_for_removal, patterns):
     """
     Recursively remove keys from a dictionary that match any pattern in the given set.
@@ -645,29 +705,147 @@ def _recursively_remove_keys_matching_pattern(d_for_removal, patterns):
             _recursively_remove_keys_matching_pattern(v, patterns)
 
 
-def _sum_total_values(db_type: DBType, db_dump: dict) -> Tuple[int, int]:
-    """Summarize the number of total values in the DB dump.
+def _remove_keys(content, keys):
+    """Return a copy of dict `content` without the keys in `keys`, at any depth, like `_diff_dict` ignores them."""
+    return {k: _remove_keys(v, keys) if isinstance(v, dict) else v for k, v in content.items() if k not in keys}
 
-    Returned tuple is `(incl_volatile, excl_volatile)`. Values under
-    volatile top-level keys (`VOLATILE_TOP_LEVEL_KEYS`) and values whose
-    field name is in `VOLATILE_VALUES` are counted toward `(incl_volatile)`
-    but excluded from `(excl_volatile)`.
+
+_CANONICAL_JSON_ENCODER = json.JSONEncoder(sort_keys=True, default=str)
+
+
+def _content_digest(content, ignored_keys) -> bytes:
+    """Digest of the content of a top-level key, without the values `_diff_dict` ignores."""
+    if isinstance(content, dict) and ignored_keys:
+        content = _remove_keys(content, ignored_keys)
+    serialized = _CANONICAL_JSON_ENCODER.encode(content)
+    return hashlib.blake2b(serialized.encode("utf-8"), digest_size=16).digest()
+
+
+# Start of a JSON object, its end if empty
+_JSON_OBJECT_START = re.compile(r"\s*\{\s*(\}?)")
+# Key of an item of a JSON object, up to its value
+_JSON_OBJECT_KEY = re.compile(r'\s*("[^"\\]*(?:\\.[^"\\]*)*")\s*:\s*')
+# Separator after the value of an item of a JSON object
+_JSON_OBJECT_SEPARATOR = re.compile(r"\s*([,}])")
+
+
+def iter_snapshot_items(path: str, chunk_size: int = 1024 * 1024) -> Iterator[Tuple[str, object]]:
+    """
+    Iterate over the top-level items of a JSON object file, like a redis-dump snapshot, without loading it.
+
+    The file is read by chunks of chunk_size characters and each top-level value is decoded on its own,
+    so the memory used is bounded by the largest top-level value rather than by the file size.
+
+    Args:
+        path (str): Path of the JSON file
+        chunk_size (int): Number of characters read at a time
+
+    Yields:
+        tuple: (top-level key, decoded value)
+
+    Raises:
+        ValueError: If the file is not a JSON object
     """
-    total_incl_volatile = 0
-    total_excl_volatile = 0
-    always_ignore_keys = VOLATILE_VALUES.get(db_type, [])
-    volatile_tl_patterns = VOLATILE_TOP_LEVEL_KEYS.get(db_type, set())
-    for tl_key, content in db_dump.items():
-        assert "value" in content, f"Unexpected entry in {db_type.name} DB: {tl_key} : {content}"
-        value_dict = content["value"]
-        tl_is_volatile = _matches_any_glob(tl_key, volatile_tl_patterns) if volatile_tl_patterns else False
-        for key in value_dict:
-            total_incl_volatile += 1
+    decoder = json.JSONDecoder()
+    with open(path, "r") as f:
+        buf = f.read(chunk_size)
+        pos = 0
+        eof = not buf
+        start = None
+        while True:
+            # An item is parsed again from its start when the buffer ends in the middle of it
+            if start is None:
+                match = _JSON_OBJECT_START.match(buf, pos)
+                if match and (match.group(1) or match.end() < len(buf)):
+                    if match.group(1):
+                        return
+                    start = pos = match.end()
+                    continue
+            else:
+                item = None
+                key_match = _JSON_OBJECT_KEY.match(buf, pos)
+                if key_match:
+                    try:
+                        value, end = decoder.raw_decode(buf, key_match.end())
+                    except json.JSONDecodeError:
+                        end = None
+                    # The separator also tells that a number value was not truncated by the end of the buffer
+                    separator_match = _JSON_OBJECT_SEPARATOR.match(buf, end) if end is not None else None
+                    if separator_match:
+                        key = key_match.group(1)
+                        item = (json.loads(key) if "\\" in key else key[1:-1], value)
+                if item:
+                    pos = separator_match.end()
+                    yield item
+                    if separator_match.group(1) == "}":
+                        return
+                    continue
+
+            if eof:
+                raise ValueError(f"Invalid JSON object in {path}: {buf[pos:pos + 80]!r}")
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buf = buf[pos:] + chunk
+            pos = 0
+
+
+class _SnapshotIndex:
+    """
+    Top-level entries of a snapshot, split for diffing, with the value counts of the snapshot.
+
+    Volatile top-level keys are dropped. In STATE DB, the PROCESS_STATS and DOCKER_STATS entries are kept
+    apart since they are diffed by their own rules. The other entries are kept as they are for a snapshot
+    dict, or replaced by the digest of their content for a snapshot file, then loaded on demand. When the
+    digests of another snapshot file are given as reference, the entries which differ from the reference are
+    kept while indexing, so the snapshot file is not read again to load them.
+    """
+
+    def __init__(self, db_type: DBType, snapshot: Union[dict, str], reference: dict = None):
+        self._path = snapshot if isinstance(snapshot, str) else None
+        self._loaded = {}
+        self._ignored_keys = set(VOLATILE_VALUES.get(db_type, []))
+        volatile_tl_patterns = VOLATILE_TOP_LEVEL_KEYS.get(db_type, set())
+
+        self.total_keys = 0
+        self.total_values_incl_volatile = 0
+        self.total_values_excl_volatile = 0
+        self.entries = {}
+        self.process_stats = {}
+        self.docker_stats = {}
+        items = iter_snapshot_items(self._path) if self._path else snapshot.items()
+        for tl_key, content in items:
+            assert "value" in content, f"Unexpected entry in {db_type.name} DB: {tl_key} : {content}"
+            self.total_keys += 1
+            tl_is_volatile = _matches_any_glob(tl_key, volatile_tl_patterns) if volatile_tl_patterns else False
+            self.total_values_incl_volatile += len(content["value"])
             if tl_is_volatile:
                 continue
-            if key not in always_ignore_keys:
-                total_excl_volatile += 1
-    return total_incl_volatile, total_excl_volatile
+            self.total_values_excl_volatile += sum(1 for key in content["value"] if key not in self._ignored_keys)
+
+            if tl_key in self._ignored_keys:
+                continue
+            if db_type == DBType.STATE and tl_key.startswith("PROCESS_STATS|"):
+                self.process_stats[tl_key] = content
+            elif db_type == DBType.STATE and tl_key.startswith("DOCKER_STATS|"):
+                self.docker_stats[tl_key] = content
+            elif self._path:
+                digest = _content_digest(content, self._ignored_keys)
+                self.entries[tl_key] = digest
+                if reference is not None and reference.get(tl_key) != digest:
+                    self._loaded[tl_key] = content
+            else:
+                self.entries[tl_key] = content
+
+    def load_entries(self, keys: Iterable[str]) -> dict:
+        """Return the content of the entries of the given top-level keys present in the snapshot."""
+        keys = set(keys) & self.entries.keys()
+        if not self._path:
+            return {key: self.entries[key] for key in keys}
+        missing_keys = keys - self._loaded.keys()
+        if missing_keys:
+            self._loaded.update((key, content) for key, content in iter_snapshot_items(self._path)
+                                if key in missing_keys)
+        return {key: self._loaded[key] for key in keys}
 
 
 class SonicRedisDBSnapshotter:
@@ -702,7 +880,8 @@ class SonicRedisDBSnapshotter:
         Take a snapshot of specified Redis databases on the DUT.
 
         This method captures the current state of the specified Redis databases
-        and stores them as JSON files in a snapshot directory.
+        and stores them as JSON files in a snapshot directory. The databases are
+        dumped in parallel on the DUT and fetched in one compressed archive.
 
         Args:
             snapshot_name (str): Name identifier for this snapshot
@@ -712,25 +891,25 @@ class SonicRedisDBSnapshotter:
         # NOTE: Need trailing slash below to avoid additional dir nesting
         snapshot_dir = f"{self._snapshot_base_dir}/{snapshot_name}/"
         os.makedirs(snapshot_dir, exist_ok=True)
-        for db in snapshot_dbs:
-            cmd = f"redis-dump -d {db.value} --pretty"
-            dump = dut_dump(cmd, self._duthost, snapshot_dir, db.name)
-            with open(f"{snapshot_dir}/{db.name}.json", "w") as f:
-                f.write(json.dumps(dump, indent=4, default=str))
+        dut_dump_dbs(self._duthost, snapshot_dbs, snapshot_dir, f"db_snapshot_{snapshot_name}")
 
         logger.info(f"Snapshot {snapshot_name} taken for {self._duthost.hostname} at {snapshot_dir}")
 
-    def diff_snapshots(self, snapshot_a: str, snapshot_b: str) -> Dict[DBType, SnapshotDiff]:
+    def diff_snapshots(self, snapshot_a: str, snapshot_b: str,
+                       include_asic_db: bool = False) -> Dict[DBType, SnapshotDiff]:
         """
         Compare two snapshots and return detailed differences for each database.
 
         This method loads two previously taken snapshots and compares them,
         generating SnapshotDiff objects for each database type that contains
-        the differences and metrics.
+        the differences and metrics. ASIC DB and the snapshot files of at least
+        STREAMED_SNAPSHOT_MIN_SIZE bytes are streamed rather than loaded, see SnapshotDiff.
 
         Args:
             snapshot_a (str): Name of the first snapshot to compare
             snapshot_b (str): Name of the second snapshot to compare
+            include_asic_db (bool): Also compare ASIC DB. Its object IDs are allocated anew
+                on every boot, so it is skipped by default.
 
         Returns:
             Dict[DBType, SnapshotDiff]: Dictionary mapping database types to their
@@ -752,11 +931,14 @@ class SonicRedisDBSnapshotter:
         for db_file in snapshot_a_dbs:
             db_name = db_file.replace(".json", "")
             db_type = DBType[db_name]
-            if db_type == DBType.ASIC:
-                # NOTE: ASIC DB diffing not currently supported
+            if db_type == DBType.ASIC and not include_asic_db:
                 continue
-            db_dump_a = json.load(open(os.path.join(snapshot_a_dir, db_file), 'r'))
-            db_dump_b = json.load(open(os.path.join(snapshot_b_dir, db_file), 'r'))
+            db_dump_a = os.path.join(snapshot_a_dir, db_file)
+            db_dump_b = os.path.join(snapshot_b_dir, db_file)
+            if db_type != DBType.ASIC and \
+                    max(os.path.getsize(db_dump_a), os.path.getsize(db_dump_b)) < STREAMED_SNAPSHOT_MIN_SIZE:
+                db_dump_a = json.load(open(db_dump_a, 'r'))
+                db_dump_b = json.load(open(db_dump_b, 'r'))
             snapshot_diff = SnapshotDiff(db_type, db_dump_a, db_dump_b, label_a=snapshot_a, label_b=snapshot_b)
 
             result[db_type] = snapshot_diff
@@ -4,12 +4,17 @@ import logging
 import collections
 import os
 import signal
+import socket
 import threading
+import time
 from contextlib import contextmanager
 from multiprocessing.pool import ThreadPool
 import ansible
+import paramiko
 from pytest_ansible.results import AdHocResult, ModuleResult
 
+from tests.common.devices.ssh_fast_path import SshSession, FAST_PATH_MODULES, FAST_PATH_ARGS, \
+    build_command_line, build_module_result, module_latency
 from tests.common.errors import RunAnsibleModuleFail
 
 
@@ -108,6 +113,9 @@ class AnsibleHostBase(object):
     # Set by the ipv6_only_mgmt_enabled fixture in conftest.py
     _ipv6_only_mgmt_mode = False
 
+    # Persistent SSH session for running command and shell modules, set by enable_ssh_fast_path
+    _ssh_session = None
+
     @classmethod
     def set_ipv6_only_mgmt(cls, enabled: bool):
         """Set the IPv6-only management mode flag.
@@ -163,6 +171,72 @@ class AnsibleHostBase(object):
                 self.mgmt_ipv6 = ansible_hostv6
         self.hostname = hostname
 
+    def enable_ssh_fast_path(self, username, password):
+        """Run the command and shell modules in a persistent SSH session instead of ansible.
+
+        Only calls with a free form command and no other argument than chdir are run in the SSH session, the
+        other calls are still run by ansible. Commands are run as root with sudo, so the user must be allowed to
+        run sudo without password.
+
+        Args:
+            username (str): SSH user name.
+            password (str): SSH password.
+
+        Returns:
+            bool: True if the fast path is enabled, False if the host can't be used with the fast path.
+        """
+        session = SshSession(self.hostname, self.mgmt_ip, username, password)
+        try:
+            rc, _, stderr = session.exec_command("sudo -n true", timeout=30)
+        except (paramiko.SSHException, socket.error, EOFError) as e:
+            logger.warning("Failed to enable SSH fast path on {}: {}".format(self.hostname, repr(e)))
+            session.close()
+            return False
+        if rc != 0:
+            logger.warning("Failed to enable SSH fast path on {}, sudo without password is not allowed: {}"
+                           .format(self.hostname, stderr.decode("utf-8", errors="replace")))
+            session.close()
+            return False
+        logger.info("SSH fast path enabled on {}".format(self.hostname))
+        self._ssh_session = session
+        return True
+
+    def disable_ssh_fast_path(self):
+        """Close the persistent SSH session, so all modules are run by ansible again."""
+        if self._ssh_session is not None:
+            self._ssh_session.close()
+            self._ssh_session = None
+
+    def _run_ssh_fast_path(self, module_name, module_args, complex_args):
+        """Run a command or shell module call in the persistent SSH session.
+
+        Returns:
+            ModuleResult or None: Result of the module, or None if the call has to be run by ansible.
+        """
+        session = self._ssh_session
+        if session is None or module_name not in FAST_PATH_MODULES:
+            return None
+        if len(module_args) != 1 or not isinstance(module_args[0], str) \
+                or any(key not in FAST_PATH_ARGS for key in complex_args):
+            return None
+
+        cmd = module_args[0]
+        chdir = complex_args.get("chdir")
+        try:
+            command_line = build_command_line(module_name, cmd, chdir=chdir)
+        except ValueError:
+            # Unbalanced quotes, let the command module report the error
+            return None
+        start = time.time()
+        try:
+            rc, stdout, stderr = session.exec_command(command_line)
+        except (paramiko.SSHException, socket.error, EOFError) as e:
+            logger.warning("SSH fast path failed on {}, running {} by ansible: {}"
+                           .format(self.hostname, module_name, repr(e)))
+            session.close()
+            return None
+        return ModuleResult(build_module_result(module_name, cmd, chdir, rc, stdout, stderr, start, time.time()))
+
     def __getattr__(self, module_name):
         with _ansible_module_resolution_lock:
             has_module = self.host.has_module(module_name)
@@ -219,18 +293,24 @@ class AnsibleHostBase(object):
             result = pool.apply_async(run_module, (module_args, complex_args))
             return pool, result
 
-        module_args = json.loads(json.dumps(module_args, cls=AnsibleHostBase.CustomEncoder))
-        complex_args = json.loads(json.dumps(complex_args, cls=AnsibleHostBase.CustomEncoder))
+        start_time = time.time()
+        hostname_res = self._run_ssh_fast_path(module_name, module_args, complex_args)
+        if hostname_res is not None:
+            module_latency.record(module_name, "ssh", time.time() - start_time)
+        else:
+            module_args = json.loads(json.dumps(module_args, cls=AnsibleHostBase.CustomEncoder))
+            complex_args = json.loads(json.dumps(complex_args, cls=AnsibleHostBase.CustomEncoder))
 
-        with suppress_signal_registration_for_non_main_thread():
-            adhoc_res: AdHocResult = module(*module_args, **complex_args)
+            with suppress_signal_registration_for_non_main_thread():
+                adhoc_res: AdHocResult = module(*module_args, **complex_args)
+            module_latency.record(module_name, "ansible", time.time() - start_time)
 
-        if module_name == "meta":
-            # The meta module is special in Ansible - it doesn't execute on remote hosts, it controls Ansible's behavior
-            # There are no per-host ModuleResults contained within it
-            return
+            if module_name == "meta":
+                # The meta module is special in Ansible - it doesn't execute on remote hosts, it controls Ansible's
+                # behavior. There are no per-host ModuleResults contained within it
+                return
 
-        hostname_res: ModuleResult = adhoc_res[self.hostname]
+            hostname_res: ModuleResult = adhoc_res[self.hostname]
         hostname_res.encoder = AnsibleHostBase.CustomEncoder
 
         if verbose:
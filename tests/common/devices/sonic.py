@@ -438,16 +438,26 @@ class SonicHost(AnsibleHostBase):
         @return: A dictionary in which key is the service name and values are service status
                  and service type.
         """
-        monit_services_status = {}
         services_status_result = self.shell("sudo monit status", module_ignore_errors=True, verbose=True)
 
         exit_code = services_status_result["rc"]
         if exit_code != 0:
-            return monit_services_status
+            return {}
+
+        return self.parse_monit_services_status(services_status_result["stdout_lines"])
 
-        for index, service_info in enumerate(services_status_result["stdout_lines"]):
+    @staticmethod
+    def parse_monit_services_status(monit_status_lines):
+        """
+        @summary: Parse the output of "monit status".
+        @param monit_status_lines: Output lines of "monit status".
+        @return: A dictionary in which key is the service name and values are service status
+                 and service type.
+        """
+        monit_services_status = {}
+        for index, service_info in enumerate(monit_status_lines):
             if service_info.strip().startswith("status"):
-                service_type_name = services_status_result["stdout_lines"][index - 1]
+                service_type_name = monit_status_lines[index - 1]
                 service_type = service_type_name.split("'")[0].strip()
                 service_name = service_type_name.split("'")[1].strip()
                 service_status = service_info.split("status", 1)[1].strip()
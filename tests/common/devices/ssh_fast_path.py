@@ -0,0 +1,233 @@
+"""Persistent SSH sessions for running the command and shell modules without ansible.
+
+Running a module through ansible packages the module, opens a new SSH exec and round trips the arguments and the
+result through JSON. For the command and shell modules, which are the majority of the calls made by tests, most
+of the time is spent in this overhead. An SshSession keeps one SSH connection to the host open, and runs each
+command in a new channel multiplexed on this connection.
+
+The latency of the modules run on the hosts is recorded in ModuleLatencyCounters, so the time spent in the
+ansible and SSH paths can be compared.
+"""
+import datetime
+import logging
+import select
+import shlex
+import socket
+import threading
+import time
+
+import paramiko
+
+logger = logging.getLogger(__name__)
+
+# Modules which can be run in a persistent SSH session
+FAST_PATH_MODULES = ("command", "shell")
+
+# Module arguments supported in a persistent SSH session, calls with other arguments are run by ansible
+FAST_PATH_ARGS = ("chdir",)
+
+READ_SIZE = 32 * 1024
+
+
+class SshSession(object):
+    """
+    A persistent SSH connection to a host, on which each command is run in a new channel.
+
+    Channels opened on the same connection are independent, so commands can be run concurrently from
+    multiple threads. The connection is established on first use, and again after it is lost.
+    """
+
+    def __init__(self, hostname, address, username, password, port=22, connect_timeout=10):
+        self.hostname = hostname
+        self.address = address
+        self.username = username
+        self.password = password
+        self.port = port
+        self.connect_timeout = connect_timeout
+        self._client = None
+        self._lock = threading.Lock()
+
+    def _get_transport(self):
+        with self._lock:
+            if self._client is not None:
+                transport = self._client.get_transport()
+                if transport is not None and transport.is_active():
+                    return transport
+                self._client.close()
+                self._client = None
+
+            logger.debug("Opening persistent SSH session to {} ({})".format(self.hostname, self.address))
+            client = paramiko.SSHClient()
+            client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+            client.connect(self.address, port=self.port, username=self.username, password=self.password,
+                           allow_agent=False, look_for_keys=False, timeout=self.connect_timeout)
+            transport = client.get_transport()
+            transport.set_keepalive(30)
+            # Commands are small requests waiting for replies, don't delay them to coalesce packets
+            transport.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._client = client
+            return transport
+
+    def close(self):
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+    def exec_command(self, command, timeout=None):
+        """Run a command in a new channel of the session.
+
+        Args:
+            command (str): Command line run by the login shell of the user.
+            timeout (float): Seconds to wait for the command to complete. Default is None, wait forever.
+
+        Returns:
+            tuple: (rc, stdout, stderr), stdout and stderr are bytes.
+
+        Raises:
+            paramiko.SSHException, socket.error: The command could not be run, or did not complete in time.
+        """
+        channel = self._get_transport().open_session(timeout=self.connect_timeout)
+        try:
+            channel.exec_command(command)
+            channel.shutdown_write()
+
+            deadline = time.time() + timeout if timeout else None
+            stdout, stderr = [], []
+            while True:
+                while channel.recv_ready():
+                    stdout.append(channel.recv(READ_SIZE))
+                while channel.recv_stderr_ready():
+                    stderr.append(channel.recv_stderr(READ_SIZE))
+                if channel.exit_status_ready() and (channel.closed or channel.eof_received) \
+                        and not channel.recv_ready() and not channel.recv_stderr_ready():
+                    break
+                if deadline and time.time() > deadline:
+                    raise socket.timeout("Command '{}' timed out after {} seconds".format(command, timeout))
+                # The channel is readable when stdout or stderr data arrives, or when it is closed
+                select.select([channel], [], [], 1)
+
+            return channel.recv_exit_status(), b"".join(stdout), b"".join(stderr)
+        finally:
+            channel.close()
+
+
+def build_command_line(module_name, cmd, chdir=None, become=True):
+    """Build the command line running a command or shell module call in an SSH session.
+
+    The shell module runs the command in /bin/sh. The command module runs the command without a shell, so its
+    arguments are split the same way as the command module does and quoted, to be passed as they are.
+
+    Args:
+        module_name (str): "command" or "shell".
+        cmd (str): Free form argument of the module.
+        chdir (str): Directory to change into before running the command.
+        become (bool): Run the command as root with sudo, like ansible become.
+
+    Returns:
+        str: Command line.
+    """
+    if module_name == "shell":
+        script = cmd
+    else:
+        script = "exec " + " ".join(shlex.quote(arg) for arg in shlex.split(cmd))
+    if chdir:
+        script = "cd {} && {}".format(shlex.quote(chdir), script)
+    if become:
+        return "sudo -H -n /bin/sh -c {}".format(shlex.quote(script))
+    return "/bin/sh -c {}".format(shlex.quote(script))
+
+
+def build_module_result(module_name, cmd, chdir, rc, stdout, stderr, start, end):
+    """Build the result of a command or shell module call, in the same shape as the result returned by ansible.
+
+    Args:
+        module_name (str): "command" or "shell".
+        cmd (str): Free form argument of the module.
+        chdir (str): Directory the command was run in, or None.
+        rc (int): Exit status of the command.
+        stdout (bytes): Output of the command.
+        stderr (bytes): Error output of the command.
+        start (float): Timestamp the command was started at.
+        end (float): Timestamp the command was completed at.
+
+    Returns:
+        dict: Module result.
+    """
+    # Like ansible, trailing new lines are stripped
+    stdout = stdout.decode("utf-8", errors="replace").rstrip("\r\n")
+    stderr = stderr.decode("utf-8", errors="replace").rstrip("\r\n")
+    start_time = datetime.datetime.fromtimestamp(start)
+    end_time = datetime.datetime.fromtimestamp(end)
+    return {
+        "changed": True,
+        "cmd": cmd if module_name == "shell" else shlex.split(cmd),
+        "rc": rc,
+        "stdout": stdout,
+        "stderr": stderr,
+        "stdout_lines": stdout.splitlines(),
+        "stderr_lines": stderr.splitlines(),
+        "start": str(start_time),
+        "end": str(end_time),
+        "delta": str(end_time - start_time),
+        "msg": "non-zero return code" if rc != 0 else "",
+        "failed": rc != 0,
+        "invocation": {
+            "module_args": {
+                "_raw_params": cmd,
+                "_uses_shell": module_name == "shell",
+                "chdir": chdir,
+            }
+        },
+    }
+
+
+class ModuleLatencyCounters(object):
+    """
+    Counters of the number of calls and the time spent per module and per execution path.
+
+    The execution path is "ansible" for modules run by ansible, or "ssh" for modules run in a persistent
+    SSH session.
+    """
+
+    def __init__(self):
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def record(self, module_name, path, seconds):
+        with self._lock:
+            counter = self._counters.setdefault((module_name, path), {"count": 0, "total": 0.0, "max": 0.0})
+            counter["count"] += 1
+            counter["total"] += seconds
+            counter["max"] = max(counter["max"], seconds)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+
+    def summary(self):
+        """Get the counters.
+
+        Returns:
+            dict: {(module name, path): {"count": int, "total": float, "max": float, "avg": float}}
+        """
+        with self._lock:
+            return {
+                key: dict(counter, avg=counter["total"] / counter["count"])
+                for key, counter in self._counters.items()
+            }
+
+    def report(self):
+        """Log the counters, sorted by total time spent."""
+        summary = self.summary()
+        if not summary:
+            return
+        header = ("module", "path", "count", "total(s)", "avg(ms)", "max(ms)")
+        lines = ["{:<32} {:<8} {:>8} {:>10} {:>10} {:>10}".format(*header)]
+        for (module_name, path), counter in sorted(summary.items(), key=lambda item: -item[1]["total"]):
+            lines.append("{:<32} {:<8} {:>8} {:>10.2f} {:>10.1f} {:>10.1f}".format(
+                module_name, path, counter["count"], counter["total"], counter["avg"] * 1000, counter["max"] * 1000))
+        logger.info("Module latency:\n{}".format("\n".join(lines)))
+
+
+module_latency = ModuleLatencyCounters()
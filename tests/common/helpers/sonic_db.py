@@ -1,5 +1,6 @@
 import logging
 import json
+import shlex
 import six
 import ast
 from tests.common.helpers.constants import DEFAULT_NAMESPACE
@@ -7,6 +8,36 @@ from tests.common.devices.sonic_asic import SonicAsic
 
 logger = logging.getLogger(__name__)
 
+# Lua scripts run by EVAL for the batch methods of SonicDbCli. They return the replies of all the keys encoded
+# as one JSON string, so a single sonic-db-cli command reads any number of keys.
+HGETALL_MANY_SCRIPT = (
+    "local result = {} "
+    "for _, key in ipairs(KEYS) do "
+    "local hash = {} "
+    "local fields = redis.call('HGETALL', key) "
+    "for i = 1, #fields, 2 do hash[fields[i]] = fields[i + 1] end "
+    "result[key] = hash "
+    "end "
+    "return cjson.encode(result)"
+)
+HGET_MANY_SCRIPT = (
+    "local result = {} "
+    "for _, key in ipairs(KEYS) do "
+    "result[key] = redis.call('HGET', key, ARGV[1]) "
+    "end "
+    "return cjson.encode(result)"
+)
+SCAN_KEYS_SCRIPT = (
+    "local keys = {} "
+    "local cursor = '0' "
+    "repeat "
+    "local reply = redis.call('SCAN', cursor, 'MATCH', ARGV[1], 'COUNT', ARGV[2]) "
+    "cursor = reply[1] "
+    "for _, key in ipairs(reply[2]) do keys[#keys + 1] = key end "
+    "until cursor == '0' "
+    "return cjson.encode(keys)"
+)
+
 
 class SonicDbCli(object):
     """Base class for interface to SonicDb using sonic-db-cli command.
@@ -94,6 +125,105 @@ class SonicDbCli(object):
             else:
                 return result['stdout']
 
+    # Maximum length of the keys passed to one EVAL command, keys beyond it are read by other commands
+    MAX_EVAL_KEYS_LENGTH = 96 * 1024
+
+    def _eval_json(self, script, keys, args=()):
+        """
+        Executes a Lua script returning a JSON string with a sonic-db-cli EVAL command.
+
+        Args:
+            script: Lua script to run.
+            keys: List of keys passed to the script in KEYS.
+            args: List of arguments passed to the script in ARGV.
+
+        Returns:
+            The parsed JSON returned by the script.
+
+        Raises:
+            SonicDbNoCommandOutput: If the command had no output.
+        """
+        cmd = self._cli_prefix() + "EVAL {} {} {}".format(
+            shlex.quote(script), len(keys), " ".join(shlex.quote(str(item)) for item in list(keys) + list(args)))
+        result = self._run_and_raise(cmd)
+        return json.loads(result["stdout"])
+
+    def _eval_json_batches(self, script, keys, args=()):
+        """
+        Executes a Lua script returning a JSON object for the keys, in as few sonic-db-cli commands as possible.
+
+        The keys are split in batches, so the command lines don't exceed the maximum length of arguments.
+
+        Returns:
+            Dictionary merging the JSON objects returned for all the batches.
+        """
+        merged = {}
+        batch = []
+        batch_length = 0
+        for key in keys:
+            if batch and batch_length + len(key) > self.MAX_EVAL_KEYS_LENGTH:
+                merged.update(self._eval_json(script, batch, args) or {})
+                batch = []
+                batch_length = 0
+            batch.append(key)
+            batch_length += len(key) + 3
+        if batch:
+            merged.update(self._eval_json(script, batch, args) or {})
+        return merged
+
+    def hgetall_many(self, keys):
+        """
+        Gets all the fields of many keys in one round trip.
+
+        Args:
+            keys: List of full names of the keys to get.
+
+        Returns:
+            Dictionary of key to dictionary of fields and values. The fields of a key not present are an empty
+            dictionary, like an HGETALL command.
+        """
+        keys = list(keys)
+        if not keys:
+            return {}
+        result = self._eval_json_batches(HGETALL_MANY_SCRIPT, keys)
+        return {key: result.get(key) or {} for key in keys}
+
+    def hget_many(self, keys, field):
+        """
+        Gets a field of many keys in one round trip.
+
+        Args:
+            keys: List of full names of the keys to get.
+            field: Name of the hash field to get.
+
+        Returns:
+            Dictionary of key to value of the field, or None if the key or the field is not present.
+        """
+        keys = list(keys)
+        if not keys:
+            return {}
+        result = self._eval_json_batches(HGET_MANY_SCRIPT, keys, [field])
+        # Lua scripts return false for nil replies
+        return {key: result.get(key) if result.get(key) is not False else None for key in keys}
+
+    def scan_keys(self, pattern, count=1000):
+        """
+        Gets the keys matching a pattern in one round trip.
+
+        The keys are iterated with SCAN by a Lua script in the redis server, so all the SCAN steps take one
+        sonic-db-cli command.
+
+        Args:
+            pattern: Glob-style pattern of the keys to get.
+            count: Number of keys examined by each SCAN step.
+
+        Returns:
+            List of keys matching the pattern, empty if no key matches.
+        """
+        result = self._eval_json(SCAN_KEYS_SCRIPT, [], [pattern, count])
+        # An empty Lua table is encoded as an empty JSON object, and SCAN may return a key more than once
+        return list(dict.fromkeys(result)) if result else []
+
     def hget_all(self, key):
         """
         Executes a sonic-db-cli HGETALL command.
@@ -113,11 +113,8 @@ def verify_lag_id_in_asic_dbs(asics, lag_id, expected=True):
     for asic in asics:
         asicdb = AsicDbCli(asic)
         asic_db_lag_list = asicdb.get_asic_db_lag_list()
-        exists = False
-        for lag in asic_db_lag_list:
-            if asicdb.hget_key_value(lag, "SAI_LAG_ATTR_SYSTEM_PORT_AGGREGATE_ID") == lag_id:
-                exists = True
-                break
+        lag_ids = asicdb.hget_many(asic_db_lag_list, "SAI_LAG_ATTR_SYSTEM_PORT_AGGREGATE_ID")
+        exists = lag_id in lag_ids.values()
 
         lag_id_exists_msg = "LAG ID {} exists in {} asic{} ASIC_DB"\
                             .format(lag_id, asic.sonichost.hostname, asic.asic_index)
@@ -186,14 +183,14 @@ def verify_lag_member_in_asic_db(asics, lag_id, expected=0):
         asic_db_lag_member_list = asicdb.get_asic_db_lag_member_list()
         lag_oid = None
 
+        lag_ids = asicdb.hget_many(asic_lag_list, "SAI_LAG_ATTR_SYSTEM_PORT_AGGREGATE_ID")
         for lag in asic_lag_list:
-            if asicdb.hget_key_value(lag, "SAI_LAG_ATTR_SYSTEM_PORT_AGGREGATE_ID") == lag_id:
+            if lag_ids[lag] == lag_id:
                 lag_oid = ":".join(lag for lag in lag.split(':')[-2::1])
 
-        count = 0
-        for lag_member in asic_db_lag_member_list:
-            if asicdb.hget_key_value(lag_member, "SAI_LAG_MEMBER_ATTR_LAG_ID") == lag_oid:
-                count += 1
+        member_lag_oids = asicdb.hget_many(asic_db_lag_member_list, "SAI_LAG_MEMBER_ATTR_LAG_ID")
+        count = sum(1 for member_lag_oid in member_lag_oids.values()
+                    if member_lag_oid is not None and member_lag_oid == lag_oid)
 
         logging.info("Found {} members of LAG in {} asic {} ASIC_DB"
                      .format(count, asic.sonichost.hostname, asic.asic_index))
@@ -247,15 +244,17 @@ def verify_lag_member_status_in_asic_db(asics, lag_id, exp_disabled=0):
         count = 0
         disabled = 0
         # Find LAG members OIDs from lag id
+        lag_ids = asicdb.hget_many(asic_lag_list, "SAI_LAG_ATTR_SYSTEM_PORT_AGGREGATE_ID")
         for lag in asic_lag_list:
-            if asicdb.hget_key_value(lag, "SAI_LAG_ATTR_SYSTEM_PORT_AGGREGATE_ID") == lag_id:
+            if lag_ids[lag] == lag_id:
                 lag_oid = ":".join(lag for lag in lag.split(':')[-2::1])
                 break
 
         # Find LAG members of LAG by OID, one should have disabled status
+        lag_members = asicdb.hgetall_many(asic_db_lag_member_list)
         for lag_member in asic_db_lag_member_list:
-            if asicdb.hget_key_value(lag_member, "SAI_LAG_MEMBER_ATTR_LAG_ID") == lag_oid:
-                status = asicdb.hget_key_value(lag_member, "SAI_LAG_MEMBER_ATTR_EGRESS_DISABLE")
+            if lag_oid is not None and lag_members[lag_member].get("SAI_LAG_MEMBER_ATTR_LAG_ID") == lag_oid:
+                status = lag_members[lag_member].get("SAI_LAG_MEMBER_ATTR_EGRESS_DISABLE")
                 count += 1
                 if status == "true":
                     disabled += 1
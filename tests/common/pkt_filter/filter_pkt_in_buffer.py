@@ -7,12 +7,35 @@ import copy
 
 import ptf.mask as mask
 import ptf.packet as packet
+from scapy.fields import BitField
 
 if sys.version_info.major > 2:
     NATIVE_TYPE = (int, float, bool, list, dict, tuple, set, str, bytes, type(None))
 else:
     NATIVE_TYPE = (int, float, long, bool, list, dict, tuple, set, str, bytes, unicode, type(None))     # noqa: F821
 
+# Value of matched field which is not in the expected packet
+_NOT_MATCHED = object()
+
+
+def _field_to_str(value):
+    """
+    Convert value of packet field to string
+
+    Args:
+        value: Value of field
+
+    Returns:
+        String value of field
+    """
+    if isinstance(value, type(None)):
+        value = None
+
+    if not isinstance(value, NATIVE_TYPE):
+        value = _parse_layer(value)
+
+    return str(value)
+
 
 def _parse_layer(layer):
     """
@@ -30,14 +53,7 @@ def _parse_layer(layer):
         return None
 
     for field in layer.fields_desc:
-        value = getattr(layer, field.name)
-        if isinstance(value, type(None)):
-            value = None
-
-        if not isinstance(value, NATIVE_TYPE):
-            value = _parse_layer(value)
-
-        fields[field.name] = str(value)
+        fields[field.name] = _field_to_str(getattr(layer, field.name))
 
     return {layer.name: fields}
 
@@ -69,11 +85,87 @@ def convert_pkt_to_dict(pkt):
     return packet_dict
 
 
+def _get_layers(pkt):
+    """
+    Get layers of scapy packet by name, the innermost one when a layer is present more than once
+
+    Args:
+        pkt: Scapy packet
+
+    Returns:
+        Layer dictionary
+    """
+    layers = {}
+    layer = pkt
+    while layer:
+        layers[layer.name] = layer
+        layer = layer.payload
+
+    return layers
+
+
+def _get_field_bytes(layer, field_name):
+    """
+    Get bytes of fixed size and byte aligned field of packet layer, as it is sent on the wire
+
+    Args:
+        layer: Layer of packet
+        field_name: Name of field
+
+    Returns:
+        Bytes of field, or None if the field is not fixed size and byte aligned or has no value
+    """
+    for field in getattr(layer, 'fields_desc', []):
+        if field.name != field_name:
+            continue
+        value = layer.getfieldval(field_name)
+        # The size of bit fields, like flags, is not a whole number of bytes
+        sz = getattr(field, 'sz', None)
+        if value is None or isinstance(field, BitField) or not isinstance(sz, int) or not sz:
+            return None
+        try:
+            field_bytes = field.addfield(layer, b'', value)
+        except Exception:
+            return None
+        return field_bytes if len(field_bytes) == field.sz else None
+
+    return None
+
+
+def get_pkt_fields(pkt, fields):
+    """
+    Get values of some fields of scapy packet, in the same format as convert_pkt_to_dict
+
+    Only the requested fields are converted to string. Like in the dictionary returned by convert_pkt_to_dict,
+    when a layer is present more than once in the packet, the values are taken from the innermost one.
+
+    Args:
+        pkt: Scapy packet
+        fields: List of (layer name, field name)
+
+    Returns:
+        Tuple of values, None for the fields not available in the packet
+    """
+    layers = _get_layers(pkt)
+
+    values = []
+    for layer_name, field_name in fields:
+        layer = layers.get(layer_name)
+        if layer is None or not hasattr(layer, 'fields_desc') or \
+                field_name not in [field.name for field in layer.fields_desc]:
+            values.append(None)
+        else:
+            values.append(_field_to_str(getattr(layer, field_name)))
+
+    return tuple(values)
+
+
 class FilterPktBuffer(object):
     """
     FilterPktBuffer class for finding of packets in the buffer of PTF
     """
-    def __init__(self, ptfadapter, exp_pkt, dst_port_numbers, match_fields=None, ignore_fields=None):
+    def __init__(self, ptfadapter, exp_pkt, dst_port_numbers, match_fields=None, ignore_fields=None,
+                 timeout=3, settle_time=0.5):
         """
         Initialize an object for finding packets in the buffer
 
@@ -83,6 +175,9 @@ class FilterPktBuffer(object):
             dst_port_numbers: Destination port numbers
             match_fields: List of packet fields that should be matched
             ignore_fields: List of packet fields that should be ignored
+            timeout: Maximum time in seconds to wait for the packets to arrive in the buffer
+            settle_time: Time in seconds without new packets on the destination ports, after a matched packet
+                arrived, after which all the packets are considered arrived
         """
         self.received_pkt = None
         self.received_pkt_diff = []
@@ -99,9 +194,26 @@ class FilterPktBuffer(object):
             ignore_fields = []
         self.ignore_fields = ignore_fields
 
+        self.timeout = timeout
+        self.settle_time = settle_time
+
         self.masked_exp_pkt = mask.Mask(self.pkt)
         self.pkt_dict = convert_pkt_to_dict(self.pkt)
 
+        # Expected values of matched fields, a field missing in the expected packet never matches
+        self.match_values = tuple(self.pkt_dict.get(field, {}).get(value, _NOT_MATCHED)
+                                  for field, value in self.match_fields)
+        # Bytes of matched fields, which a matched packet contains whatever the position of the fields. They are
+        # searched in the packets of the buffer before dissecting them, most of the packets which don't match are
+        # rejected without dissection
+        exp_layers = _get_layers(self.pkt)
+        self.match_bytes = [field_bytes for field_bytes in
+                            (_get_field_bytes(exp_layers[field], value)
+                             for field, value in self.match_fields if field in exp_layers)
+                            if field_bytes]
+        # Values of matched fields of the packets already seen in the buffer, each packet is dissected once
+        self.pkt_fields_index = {}
+
         self.__ignore_fields()
 
     def __ignore_fields(self):
@@ -129,34 +241,89 @@ class FilterPktBuffer(object):
 
         return pkt_dict
 
-    def __find_pkt_in_buffer(self, dst_port_number):
+    def __is_matched(self, pkt):
+        """
+        Check if packet of buffer matches expected packet by using matched fields
+
+        Args:
+            pkt: Packet of buffer, tuple of packet data and timestamp
+
+        Returns:
+            Bool value
+        """
+        values = self.pkt_fields_index.get(pkt)
+        if values is None:
+            if all(field_bytes in pkt[0] for field_bytes in self.match_bytes):
+                values = get_pkt_fields(packet.Ether(pkt[0]), self.match_fields)
+            else:
+                values = ()
+            self.pkt_fields_index[pkt] = values
+
+        return values == self.match_values
+
+    def __get_buffers(self):
+        """
+        Get copy of buffers of destination ports
+
+        Returns:
+            Dictionary of destination port number to list of packets
+        """
+        dataplane = self.ptfadapter.dataplane
+        with dataplane.cvar:
+            return {port: list(dataplane.packet_queues.get((0, port), [])) for port in self.dst_port_numbers}
+
+    def __wait_for_pkts(self):
+        """
+        Wait for packets to arrive in buffers of destination ports
+
+        The dataplane notifies each arrived packet. Returns when a matched packet arrived and no more packets
+        arrived for settle_time, or after timeout.
+
+        Returns:
+            Dictionary of destination port number to list of packets
+        """
+        dataplane = self.ptfadapter.dataplane
+        deadline = time.time() + self.timeout
+        last_counts = None
+        last_arrival = time.time()
+        found = False
+
+        while True:
+            buffers = self.__get_buffers()
+            counts = [len(buffers[port]) for port in self.dst_port_numbers]
+            now = time.time()
+            if counts != last_counts:
+                last_counts = counts
+                last_arrival = now
+                found = found or any(self.__is_matched(pkt) for buffer in buffers.values() for pkt in buffer)
+
+            if now >= deadline or (found and now - last_arrival >= self.settle_time):
+                return buffers
+
+            with dataplane.cvar:
+                dataplane.cvar.wait(min(deadline - now, self.settle_time))
+
+    def __find_pkt_in_buffer(self, dst_port_number, packet_buffer):
         """
         Find expected packet in buffer by using matched fields
 
+        Args:
+            dst_port_number: Destination port number
+            packet_buffer: Packets of buffer of destination port
+
         Returns:
             Received packet
         """
-        time.sleep(3)
-        common_buffer = self.ptfadapter.dataplane.packet_queues
-        packet_buffer = common_buffer[(0, dst_port_number)][:]
         matched_index = 0
         received_pkt = None
 
         for pkt in packet_buffer:
-            packet_dict = convert_pkt_to_dict(packet.Ether(pkt[0]))
-
-            for field, value in self.match_fields:
-                try:
-                    if packet_dict[field][value] != self.pkt_dict[field][value]:
-                        break
-                except KeyError:
-                    break
-            else:
+            if self.__is_matched(pkt):
                 matched_index += 1
-                received_pkt = packet.Ether(pkt[0])
+                received_pkt = pkt
 
         if received_pkt:
-            return ({dst_port_number: matched_index}, received_pkt)
+            return ({dst_port_number: matched_index}, packet.Ether(received_pkt[0]))
 
         return (None, None)
 
@@ -211,8 +378,10 @@ class FilterPktBuffer(object):
         Returns:
             Bool value or difference between received packet and expected packet
         """
+        buffers = self.__wait_for_pkts()
+
         for dst_port in self.dst_port_numbers:
-            matched_index, received_pkt = self.__find_pkt_in_buffer(dst_port)
+            matched_index, received_pkt = self.__find_pkt_in_buffer(dst_port, buffers[dst_port])
 
             if received_pkt:
                 self.received_pkt = received_pkt
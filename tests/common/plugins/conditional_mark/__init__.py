@@ -11,8 +11,11 @@ import re
 import subprocess
 import yaml
 import glob
+import hashlib
 import pytest
 
+from tests.common.cache import FactsCache
+from tests.common.helpers.multi_thread_utils import SafeThreadPoolExecutor
 from tests.common.testbed import TestbedInfo
 from .issue import check_issues
 from tests.common.utilities import get_duts_from_host_pattern
@@ -29,6 +32,11 @@ ANSIBLE_CONFIG_PATH = pathlib.Path(os.getenv("ANSIBLE_CONFIG",
                                              pathlib.Path(__file__).resolve().parent.joinpath("../../../ansible")))
 ASIC_NAME_PATH = ANSIBLE_CONFIG_PATH.joinpath("group_vars/sonic/variables")
 ANSIBLE_LIBRARY_PATH = ANSIBLE_CONFIG_PATH.joinpath("library")
+# Basic facts are not cached by default: the cached facts are not invalidated when the DUT image or config changes
+BASIC_FACTS_CACHE_TTL = 0
+# Directory the inventory passed to the ansible commands loading the basic facts is in, relative to the tests
+# directory they are run from
+INVENTORY_DIR = "../ansible"
 MARK_CONDITIONS_CONSTANTS = {
     # Cisco platform prefixes for use in conditions like:
     #   platform.startswith(constants['CISCO_8122_PREFIX'])
@@ -82,6 +90,16 @@ def pytest_addoption(parser):
         help="Dynamically update the skip reason based on the conditions, "
              "by default it will not use the static reason specified in the mark conditions file")
 
+    parser.addoption(
+        '--basic-facts-cache-ttl',
+        action='store',
+        dest='basic_facts_cache_ttl',
+        type=int,
+        default=BASIC_FACTS_CACHE_TTL,
+        help="Seconds the DUT basic facts loaded for conditions evaluation are cached in FactsCache. "
+             "Default is 0, always load the facts from the DUT. The cached facts are not invalidated when the "
+             "DUT image or config changes, only use it while they don't.")
+
 
 def load_conditions(session):
     """Load the content from mark conditions file
@@ -257,8 +275,8 @@ def load_minigraph_facts(inv_name, dut_name):
         # get minigraph basic faces
         ansible_cmd = (
             "ansible -M {} -m minigraph_facts"
-            " -i ../ansible/{} {} -a host={}"
-            .format(ANSIBLE_LIBRARY_PATH, inv_name, dut_name, dut_name))
+            " -i {}/{} {} -a host={}"
+            .format(ANSIBLE_LIBRARY_PATH, INVENTORY_DIR, inv_name, dut_name, dut_name))
         raw_output = subprocess.check_output(ansible_cmd.split()).decode('utf-8')
         logger.debug('raw minigraph basic facts:\n{}'.format(raw_output))
         output_fields = raw_output.split('SUCCESS =>', 1)
@@ -293,7 +311,7 @@ def load_config_facts(inv_name, dut_name):
         ansible_cmd = [
             'ansible', '-M', ANSIBLE_LIBRARY_PATH,
             '-m', 'config_facts',
-            '-i', '../ansible/{}'.format(inv_name),
+            '-i', '{}/{}'.format(INVENTORY_DIR, inv_name),
                        '{}'.format(dut_name), '-a', 'host={} source=\'persistent\''.format(dut_name)]
         raw_output = subprocess.check_output(ansible_cmd).decode('utf-8')
         logger.debug('raw config basic facts:\n{}'.format(raw_output))
@@ -336,8 +354,8 @@ def load_switch_capabilities_facts(inv_name, dut_name):
         # get switch capabilities basic faces
         ansible_cmd = (
             "ansible -M {} -m switch_capabilities_facts"
-            " -i ../ansible/{} {}"
-            .format(ANSIBLE_LIBRARY_PATH, inv_name, dut_name))
+            " -i {}/{} {}"
+            .format(ANSIBLE_LIBRARY_PATH, INVENTORY_DIR, inv_name, dut_name))
         raw_output = subprocess.check_output(ansible_cmd.split()).decode('utf-8')
         logger.debug('raw switch capabilities basic facts:\n{}'.format(raw_output))
         output_fields = raw_output.split('SUCCESS =>', 1)
@@ -368,8 +386,8 @@ def load_console_facts(inv_name, dut_name):
         # get console basic faces
         ansible_cmd = (
             "ansible -M {} -m console_facts"
-            " -i ../ansible/{} {}"
-            .format(ANSIBLE_LIBRARY_PATH, inv_name, dut_name))
+            " -i {}/{} {}"
+            .format(ANSIBLE_LIBRARY_PATH, INVENTORY_DIR, inv_name, dut_name))
         raw_output = subprocess.check_output(ansible_cmd.split()).decode('utf-8')
         logger.debug('raw console basic facts:\n{}'.format(raw_output))
         output_fields = raw_output.split('SUCCESS =>', 1)
@@ -382,6 +400,69 @@ def load_console_facts(inv_name, dut_name):
     return results
 
 
+# Functions loading the basic facts, in the order their facts are merged
+BASIC_FACTS_LOADERS = [
+    load_dut_basic_facts,
+    load_minigraph_facts,
+    load_config_facts,
+    load_switch_capabilities_facts,
+]
+
+
+def get_basic_facts_fingerprint(inv_name, dut_name):
+    """Get modification time of the files the basic facts are loaded from.
+
+    Args:
+        inv_name (str): The name of inventory.
+        dut_name (str): The name of dut.
+
+    Returns:
+        list: List of (file path, modification time or None if the file does not exist).
+    """
+    fingerprint = []
+    for path in [os.path.join(INVENTORY_DIR, inv_name),
+                 os.path.join(INVENTORY_DIR, "minigraph", "{}.xml".format(dut_name))]:
+        path = os.path.abspath(path)
+        try:
+            fingerprint.append((str(path), os.path.getmtime(path)))
+        except OSError:
+            fingerprint.append((str(path), None))
+    return fingerprint
+
+
+def load_cached_basic_facts(loader, inv_name, dut_name, ttl):
+    """Load basic facts with the loader function, or read them from FactsCache if they are already cached.
+
+    The cached facts are invalidated after ttl seconds, or when the inventory file or the minigraph file of the DUT
+    is changed. They are also removed when cached facts of the DUT are cleaned up. They are not invalidated when the
+    DUT image or config changes. Empty facts are not cached, so facts failed to be loaded are loaded again next time.
+
+    Args:
+        loader (function): Function loading the facts, called with inv_name and dut_name.
+        inv_name (str): The name of inventory.
+        dut_name (str): The name of dut.
+        ttl (int): Seconds the loaded facts are cached. 0 to not use the cache.
+
+    Returns:
+        dict: Dict of facts.
+    """
+    if not ttl:
+        return loader(inv_name, dut_name)
+
+    cache = FactsCache()
+    key = "conditional_mark_{}".format(loader.__name__)
+    fingerprint = get_basic_facts_fingerprint(inv_name, dut_name)
+    facts = cache.read(dut_name, key, fingerprint=fingerprint)
+    if facts is not FactsCache.NOTEXIST:
+        logger.info("Read cached facts of {} for DUT: {}".format(loader.__name__, dut_name))
+        return facts
+
+    facts = loader(inv_name, dut_name)
+    if facts:
+        cache.write(dut_name, key, facts, ttl=ttl, fingerprint=fingerprint)
+    return facts
+
+
 def load_basic_facts(dut_name, session):
     """Load some basic facts that can be used in condition statement evaluation.
 
@@ -425,30 +506,16 @@ def load_basic_facts(dut_name, session):
     # Since internal repo add vendor test support, add check to see if it's sonic-os, other wise skip load facts.
     vendor = session.config.getoption("--dut_vendor", "sonic")
     if vendor == "sonic":
-        # Load DUT basic facts
-        _facts = load_dut_basic_facts(inv_name, dut_name)
-        if _facts:
-            results.update(_facts)
-
-        # Load minigraph basic facts
-        _facts = load_minigraph_facts(inv_name, dut_name)
-        if _facts:
-            results.update(_facts)
-
-        # Load config basic facts
-        _facts = load_config_facts(inv_name, dut_name)
-        if _facts:
-            results.update(_facts)
-
-        # Load switch capabilities basic facts
-        _facts = load_switch_capabilities_facts(inv_name, dut_name)
-        if _facts:
-            results.update(_facts)
-
-        # Load console basic facts
-        _facts = load_config_facts(inv_name, dut_name)
-        if _facts:
-            results.update(_facts)
+        ttl = session.config.getoption("basic_facts_cache_ttl", BASIC_FACTS_CACHE_TTL)
+        # Each loader runs an ansible command, run them concurrently
+        with SafeThreadPoolExecutor(max_workers=len(BASIC_FACTS_LOADERS)) as executor:
+            loads = [executor.submit(load_cached_basic_facts, loader, inv_name, dut_name, ttl)
+                     for loader in BASIC_FACTS_LOADERS]
+        # Update in the order of the loaders, so facts loaded later override the same facts loaded earlier
+        for load in loads:
+            _facts = load.get()
+            if _facts:
+                results.update(_facts)
 
         # Load possible other facts here
 
@@ -458,6 +525,102 @@ def load_basic_facts(dut_name, session):
     return results
 
 
+class ConditionsIndex(object):
+    """Index of the mark conditions for finding the entries matching a test case name.
+
+    Entries matched by prefix are stored in a character trie, so all the entries that are prefixes of a test case
+    name are found by walking the test case name once. Entries matched by regular expression are pre-checked with
+    a single combined regular expression, and only checked one by one if it matches. The positions of the entries
+    in the conditions list are kept, so the matches are returned in the same order as a scan of the list.
+    """
+
+    def __init__(self, conditions):
+        self.conditions = conditions
+        self._trie = {}
+        self._regex_entries = []
+
+        for position, condition in enumerate(conditions):
+            # condition is a dict which has only one item, so we use condition.keys()[0] to get its key.
+            condition_entry = list(condition.keys())[0]
+            condition_items = condition[condition_entry]
+            if "regex" in condition_items.keys():
+                assert isinstance(condition_items["regex"], bool), \
+                    "The value of 'regex' in the mark conditions yaml should be bool type."
+                if condition_items["regex"] is True:
+                    self._regex_entries.append((position, re.compile(condition_entry)))
+                continue
+
+            if "use_longest" in condition_items.keys():
+                assert isinstance(condition_items["use_longest"], bool), \
+                    "The value of 'use_longest' in the mark conditions yaml should be bool type."
+
+            node = self._trie
+            for char in condition_entry:
+                node = node.setdefault(char, {})
+            # The None key of a trie node holds the positions of the entries ending at this node
+            node.setdefault(None, []).append(position)
+
+        self._regex_gate = self._combine_regex([regex.pattern for _, regex in self._regex_entries])
+
+    @staticmethod
+    def _combine_regex(patterns):
+        """Combine regular expressions into one which matches if any of them matches.
+
+        Returns:
+            Compiled regular expression or None if the regular expressions can't be combined.
+        """
+        if not patterns:
+            return None
+        # Group numbers are shifted in the combined regular expression, so back references would be broken
+        if any(re.search(r'\\[1-9]|\(\?P=', pattern) for pattern in patterns):
+            return None
+        try:
+            return re.compile('|'.join('(?:{})'.format(pattern) for pattern in patterns))
+        except re.error:
+            return None
+
+    def find(self, nodeid):
+        """Find the conditions whose entry matches the test case name.
+
+        Args:
+            nodeid (str): Full test case name
+
+        Returns:
+            list: Matching conditions, in the order of the conditions list.
+        """
+        node = self._trie
+        positions = list(node.get(None, []))
+        for char in nodeid:
+            node = node.get(char)
+            if node is None:
+                break
+            positions.extend(node.get(None, []))
+
+        if self._regex_entries and (self._regex_gate is None or self._regex_gate.search(nodeid)):
+            positions.extend(position for position, regex in self._regex_entries if regex.search(nodeid))
+
+        return [self.conditions[position] for position in sorted(positions)]
+
+
+# The index of the last conditions list, it is rebuilt when another conditions list is used
+_conditions_index = None
+
+
+def get_conditions_index(conditions):
+    """Get the index of the conditions list, build it if it is not built yet.
+
+    Args:
+        conditions (list): List of conditions
+
+    Returns:
+        ConditionsIndex: Index of the conditions.
+    """
+    global _conditions_index
+    if _conditions_index is None or _conditions_index.conditions is not conditions:
+        _conditions_index = ConditionsIndex(conditions)
+    return _conditions_index
+
+
 def find_all_matches(nodeid, conditions, session, dynamic_update_skip_reason, basic_facts):
     """Find all matches of the given test case name in the conditions list.
 
@@ -473,30 +636,12 @@ def find_all_matches(nodeid, conditions, session, dynamic_update_skip_reason, ba
     conditional_marks = {}
     matches = []
 
-    for condition in conditions:
-        # condition is a dict which has only one item, so we use condition.keys()[0] to get its key.
-        condition_entry = list(condition.keys())[0]
-        condition_items = condition[condition_entry]
-        if "regex" in condition_items.keys():
-            assert isinstance(condition_items["regex"], bool), \
-                "The value of 'regex' in the mark conditions yaml should be bool type."
-            if condition_items["regex"] is True:
-                match = re.search(condition_entry, nodeid)
-            else:
-                match = None
-
-        elif "use_longest" in condition_items.keys():
-            assert isinstance(condition_items["use_longest"], bool), \
-                "The value of 'use_longest' in the mark conditions yaml should be bool type."
-            if nodeid.startswith(condition_entry) and condition_items["use_longest"] is True:
-                all_matches = []
+    for condition in get_conditions_index(conditions).find(nodeid):
+        condition_items = list(condition.values())[0]
+        if "regex" not in condition_items.keys() and condition_items.get("use_longest") is True:
+            all_matches = []
 
-            match = nodeid.startswith(condition_entry)
-        else:
-            match = nodeid.startswith(condition_entry)
-
-        if match:
-            all_matches.append(condition)
+        all_matches.append(condition)
 
     for match in all_matches:
         case_starting_substring = list(match.keys())[0]
@@ -577,6 +722,32 @@ def update_issue_status(condition_str, session):
     return condition_str
 
 
+# Results of evaluated conditions, keyed on (condition string, digest of basic facts)
+_condition_results = {}
+
+# The last basic facts and their digest
+_facts_digest = {'facts': None, 'digest': None}
+
+
+def get_facts_digest(basic_facts):
+    """Get the digest of the basic facts.
+
+    The digest of the last basic facts is reused while the basic facts are not changed, so the basic facts are
+    only serialized again when they change.
+
+    Args:
+        basic_facts (dict): A one level dict with basic facts.
+
+    Returns:
+        str: Digest of the basic facts.
+    """
+    if _facts_digest['facts'] is None or _facts_digest['facts'] != basic_facts:
+        serialized = json.dumps(basic_facts, sort_keys=True, default=str)
+        _facts_digest['facts'] = dict(basic_facts)
+        _facts_digest['digest'] = hashlib.sha1(serialized.encode('utf-8')).hexdigest()
+    return _facts_digest['digest']
+
+
 def evaluate_condition(dynamic_update_skip_reason, mark_details, condition, basic_facts, session):
     """Evaluate a condition string based on supplied basic facts.
 
@@ -596,26 +767,30 @@ def evaluate_condition(dynamic_update_skip_reason, mark_details, condition, basi
     if condition is None or condition.strip() == '':
         return True    # Empty condition item will be evaluated as True. Equivalent to be ignored.
 
-    condition_str = update_issue_status(condition, session)
-    try:
-        safe_facts = {k: v for k, v in basic_facts.items()}
-        safe_globals = {}
-        safe_globals.update(safe_facts)
+    key = (condition, get_facts_digest(basic_facts))
+    condition_result = _condition_results.get(key)
+    if condition_result is None:
+        condition_str = update_issue_status(condition, session)
+        try:
+            safe_facts = {k: v for k, v in basic_facts.items()}
+            safe_globals = {}
+            safe_globals.update(safe_facts)
 
-        for var in ["asic_type", "platform", "hwsku", "asic_gen"]:
-            if var not in safe_globals:
-                logger.warning("Variable %s not found in basic_facts, defaulting to None", var)
-                safe_globals[var] = None
+            for var in ["asic_type", "platform", "hwsku", "asic_gen"]:
+                if var not in safe_globals:
+                    logger.warning("Variable %s not found in basic_facts, defaulting to None", var)
+                    safe_globals[var] = None
 
-        condition_result = bool(eval(condition_str, safe_globals))
+            condition_result = bool(eval(condition_str, safe_globals))
+        except Exception:
+            raise RuntimeError('Failed to evaluate condition, raw_condition={}, condition_str={}'.format(
+                condition,
+                condition_str))
+        _condition_results[key] = condition_result
 
-        if condition_result and dynamic_update_skip_reason:
-            mark_details['reason'].append(condition)
-        return condition_result
-    except Exception:
-        raise RuntimeError('Failed to evaluate condition, raw_condition={}, condition_str={}'.format(
-            condition,
-            condition_str))
+    if condition_result and dynamic_update_skip_reason:
+        mark_details['reason'].append(condition)
+    return condition_result
 
 
 def evaluate_conditions(dynamic_update_skip_reason, mark_details, conditions, basic_facts,
@@ -667,6 +842,7 @@ def pytest_collection(session):
 
     # Always clear cached conditions of previous run.
     session.config.cache.set('TESTS_MARK_CONDITIONS', None)
+    _condition_results.clear()
 
     if session.config.option.ignore_conditional_mark:
         logger.info('Ignore conditional mark')
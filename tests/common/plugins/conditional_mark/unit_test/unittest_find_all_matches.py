@@ -1,7 +1,8 @@
 import logging
 import unittest
 from unittest.mock import MagicMock
-from tests.common.plugins.conditional_mark import find_all_matches, load_conditions
+from tests.common.plugins.conditional_mark import find_all_matches, load_conditions, ConditionsIndex, \
+    evaluate_condition
 
 logger = logging.getLogger(__name__)
 
@@ -292,6 +293,36 @@ class TestFindAllMatches(unittest.TestCase):
         self.assertEqual(len(marks_found), 1)
         self.assertIn('xfail', marks_found)
 
+    # Test case: the index returns prefix and regex matches in the order of the conditions list
+    def test_conditions_index_order(self):
+        conditions = [
+            {"test_conditional_mark.py::test_mark": {"skip": {"reason": "prefix"}}},
+            {r"test_conditional_mark\.py::test_mark_\d+$": {"regex": True, "xfail": {"reason": "regex"}}},
+            {"test_conditional_mark.py": {"skip": {"reason": "shorter prefix"}}},
+            {"test_conditional_mark.py::test_mark_1": {"regex": False, "skip": {"reason": "disabled regex"}}},
+            {"test_other.py": {"skip": {"reason": "other"}}},
+        ]
+        index = ConditionsIndex(conditions)
+
+        self.assertEqual(index.find("test_conditional_mark.py::test_mark_1"),
+                         [conditions[0], conditions[1], conditions[2]])
+        self.assertEqual(index.find("test_conditional_mark.py::test_mark_1[param]"), [conditions[0], conditions[2]])
+        self.assertEqual(index.find("test_other_module.py"), [])
+
+    # Test case: the result of a condition is reused for the same basic facts only
+    def test_memoized_condition_evaluation(self):
+        session_mock = MagicMock()
+        condition = "asic_type in ['vs'] and topo_type in ['t0']"
+
+        self.assertTrue(evaluate_condition(False, {}, condition, CUSTOM_BASIC_FACTS, session_mock))
+        self.assertTrue(evaluate_condition(False, {}, condition, dict(CUSTOM_BASIC_FACTS), session_mock))
+        self.assertFalse(evaluate_condition(False, {}, condition, {"asic_type": "vs", "topo_type": "t1"},
+                                            session_mock))
+
+        mark_details = {"reason": []}
+        self.assertTrue(evaluate_condition(True, mark_details, condition, CUSTOM_BASIC_FACTS, session_mock))
+        self.assertEqual(mark_details["reason"], [condition])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -43,6 +43,9 @@ def pytest_addoption(parser):
                      help="store loganalyzer errors")
     parser.addoption("--ignore_la_failure", action="store_true", default=False,
                      help="do not fail the test if new bugs were found")
+    parser.addoption("--loganalyzer_analyze_on_dut", action="store_true", default=False,
+                     help="analyze extracted logs on the DUT and only fetch matching lines, "
+                          "instead of fetching the whole extracted logs")
     parser.addoption("--loganalyzer_rotate_logs", action="store_true", default=True,
                      help="rotate log on all the dut engines at the beginning of the log analyzer fixture")
     parser.addoption("--bug_handler_params", action="store", default=None,
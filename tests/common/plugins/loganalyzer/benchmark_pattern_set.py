@@ -0,0 +1,117 @@
+"""
+Benchmark PatternSet against the combined regular expressions previously used by LogAnalyzer.
+
+Both paths analyze the same log lines with the common match/ignore/expect regular expressions
+and must produce the same matching lines, expected lines and unused expected regular expressions.
+
+Usage:
+    python benchmark_pattern_set.py --syslog /tmp/syslog.captured
+    python benchmark_pattern_set.py --lines 200000 --expect 200
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from system_msg_handler import AnsibleLogAnalyzer, PatternSet   # noqa: E402
+
+LOGANALYZER_DIR = os.path.dirname(os.path.abspath(__file__))
+COMMON_MATCH = os.path.join(LOGANALYZER_DIR, "loganalyzer_common_match.txt")
+COMMON_IGNORE = os.path.join(LOGANALYZER_DIR, "loganalyzer_common_ignore.txt")
+
+SAMPLE_LINES = [
+    "Jan  1 00:00:00.000000 vlab-01 INFO swss#orchagent: :- doTask: Port Ethernet{} oper state set from down to up",
+    "Jan  1 00:00:00.000000 vlab-01 NOTICE syncd#syncd: :- processEvent: op = get, key = SAI_OBJECT_TYPE_PORT:oid:{}",
+    "Jan  1 00:00:00.000000 vlab-01 INFO bgp#bgpcfgd: Peer 10.0.0.{} admin state is set to 'up'",
+    "Jan  1 00:00:00.000000 vlab-01 ERR snmp#snmp-subagent [ax_interface] ERROR: SubtreeMIBEntry.__call__() {}",
+    "Jan  1 00:00:00.000000 vlab-01 ERR swss#orchagent: :- doTask: unknown port Ethernet{}",
+    "Jan  1 00:00:00.000000 vlab-01 WARNING kernel: [ {}.000000] kernel: memory allocation warning",
+]
+
+
+def generate_lines(count):
+    rnd = random.Random(0)
+    weights = [40, 30, 25, 2, 1, 2]
+    return [rnd.choices(SAMPLE_LINES, weights)[0].format(rnd.randint(0, 255)) + "\n" for _ in range(count)]
+
+
+def generate_expect_regex(count):
+    return [r".*INFO bgp#bgpcfgd: Peer 10\.0\.0\.{} admin state.*".format(i) for i in range(count)]
+
+
+def analyze(analyzer, lines, match, ignore, expect):
+    matching_lines = []
+    expected_lines = []
+    for line in lines:
+        if analyzer.line_is_expected(line, expect):
+            expected_lines.append(line)
+        elif analyzer.line_matches(line, match, ignore):
+            matching_lines.append(line)
+    return matching_lines, expected_lines
+
+
+def legacy_path(analyzer, lines, match_regex, ignore_regex, expect_regex):
+    match = re.compile('|'.join(match_regex))
+    ignore = re.compile('|'.join(ignore_regex))
+    expect = re.compile('|'.join(expect_regex))
+    matching_lines, expected_lines = analyze(analyzer, lines, match, ignore, expect)
+    unused = []
+    for regex in expect_regex:
+        for line in expected_lines:
+            if re.search(regex, line):
+                break
+        else:
+            unused.append(regex)
+    return matching_lines, expected_lines, unused
+
+
+def pattern_set_path(analyzer, lines, match_regex, ignore_regex, expect_regex):
+    match = PatternSet(match_regex)
+    ignore = PatternSet(ignore_regex)
+    expect = PatternSet(expect_regex)
+    matching_lines, expected_lines = analyze(analyzer, lines, match, ignore, expect)
+    return matching_lines, expected_lines, expect.unused_patterns(expected_lines)
+
+
+def timed(func, *args):
+    start = time.time()
+    result = func(*args)
+    return result, time.time() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--syslog", help="captured syslog file, synthetic lines are used if not specified")
+    parser.add_argument("--lines", type=int, default=50000, help="number of synthetic lines")
+    parser.add_argument("--expect", type=int, default=100, help="number of expected regular expressions")
+    args = parser.parse_args()
+
+    if args.syslog:
+        with open(args.syslog, errors="replace") as f:
+            lines = f.readlines()
+    else:
+        lines = generate_lines(args.lines)
+
+    analyzer = AnsibleLogAnalyzer("benchmark", False)
+    match_regex = analyzer.create_msg_regex([COMMON_MATCH])[1]
+    ignore_regex = analyzer.create_msg_regex([COMMON_IGNORE])[1]
+    expect_regex = generate_expect_regex(args.expect)
+    print("lines: {}, match: {}, ignore: {}, expect: {}".format(
+        len(lines), len(match_regex), len(ignore_regex), len(expect_regex)))
+
+    legacy, legacy_time = timed(legacy_path, analyzer, lines, match_regex, ignore_regex, expect_regex)
+    new, new_time = timed(pattern_set_path, analyzer, lines, match_regex, ignore_regex, expect_regex)
+
+    assert legacy == new, "PatternSet results differ from combined regular expressions"
+    print("matching lines: {}, expected lines: {}, unused expected regex: {}".format(
+        len(new[0]), len(new[1]), len(new[2])))
+    print("combined regex: {:.3f}s".format(legacy_time))
+    print("PatternSet:     {:.3f}s ({:.1f}x)".format(new_time, legacy_time / new_time if new_time else float("inf")))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,7 @@ import json
 import logging
 import os
 import re
+import shlex
 import time
 import pprint
 import shutil
@@ -10,6 +11,7 @@ from . import system_msg_handler
 from .bug_handler_helper import get_bughandler_instance, BugHandler
 
 from .system_msg_handler import AnsibleLogAnalyzer as ansible_loganalyzer
+from .system_msg_handler import get_pattern_set
 from os.path import join, split
 
 ANSIBLE_LOGANALYZER_MODULE = system_msg_handler.__file__.replace(r".pyc", ".py")
@@ -17,6 +19,7 @@ COMMON_MATCH = join(split(__file__)[0], "loganalyzer_common_match.txt")
 COMMON_IGNORE = join(split(__file__)[0], "loganalyzer_common_ignore.txt")
 COMMON_EXPECT = join(split(__file__)[0], "loganalyzer_common_expect.txt")
 SYSLOG_TMP_FOLDER = "/tmp/syslog"
+DUT_REGEX_FILE = "loganalyzer_regex.json"
 
 
 class DisableLogrotateCronContext:
@@ -172,8 +175,11 @@ class LogAnalyzer:
         self.ignore_regex = []
         self.expected_matches_target = 0
         self._markers = []
+        # Inode and size of log files before start markers were added, see _setup_marker
+        self._marker_positions = {}
         self.fail = True
         self.store_la_logs = False
+        self.analyze_on_dut = False
 
         self.additional_files = list(additional_files.keys())
         self.additional_start_str = list(additional_files.values())
@@ -182,6 +188,7 @@ class LogAnalyzer:
             # override the fail and store_la_logs if they are set in the request config options
             self.fail = not (self.request.config.getoption("--ignore_la_failure"))
             self.store_la_logs = self.request.config.getoption("--store_la_logs")
+            self.analyze_on_dut = self.request.config.getoption("--loganalyzer_analyze_on_dut")
 
         self._la_logs_dir = "/tmp/loganalyzer/{}".format(self.ansible_host.hostname)
         self.bughandler = bughandler
@@ -425,9 +432,25 @@ class LogAnalyzer:
             cmd += " --logs {}".format(','.join(log_files))
 
         logging.debug("Adding start marker '{}'".format(start_marker))
-        self.ansible_host.command(cmd)
+        output = self.ansible_host.command(cmd)["stdout"]
+        # The last line of output is inode and size of the log files before the marker was added,
+        # which are used by extract_log to seek to the marker instead of searching all the log files.
+        try:
+            self._marker_positions[start_marker] = json.loads(output.splitlines()[-1])
+        except (ValueError, IndexError):
+            logging.debug("Log positions are not available for start marker '{}'".format(start_marker))
         return start_marker
 
+    @staticmethod
+    def _get_log_position(positions, path):
+        """
+        @summary: Get extract_log arguments to start searching the marker from the position recorded in init.
+        """
+        position = positions.get(path)
+        if not position:
+            return {}
+        return {"start_inode": position["inode"], "start_offset": position["offset"]}
+
     def analyze(self, marker, fail=None, maximum_log_length=None, store_la_logs=None):
         """
         @summary: Extract syslog logs based on the start/stop markers and compose one file.
@@ -457,8 +480,10 @@ class LogAnalyzer:
 
         if not self.start_marker:
             start_string = 'start-LogAnalyzer-{}'.format(marker)
+            positions = self._marker_positions.pop(marker, {})
         else:
             start_string = self.start_marker
+            positions = {}
 
         with DisableLogrotateCronContext(self.ansible_host):
             # Add end marker into DUT syslog
@@ -466,44 +491,55 @@ class LogAnalyzer:
 
             # On DUT extract syslog files from /var/log/ and create one file by location - /tmp/syslog
             self.ansible_host.extract_log(directory='/var/log', file_prefix='syslog', start_string=start_string,
-                                          target_filename=self.extracted_syslog)
+                                          target_filename=self.extracted_syslog,
+                                          **self._get_log_position(positions, '/var/log/syslog'))
             for idx, path in enumerate(self.additional_files):
                 file_dir, file_name = split(path)
                 extracted_file_name = os.path.join(self.dut_run_dir, file_name)
                 if self.additional_start_str and self.additional_start_str[idx] != '':
                     start_str = self.additional_start_str[idx]
+                    position = {}
                 else:
                     start_str = start_string
+                    position = self._get_log_position(positions, path)
                 self.ansible_host.extract_log(directory=file_dir, file_prefix=file_name, start_string=start_str,
-                                              target_filename=extracted_file_name)
-
-        # Download extracted logs from the DUT to the temporal folder defined in SYSLOG_TMP_FOLDER
-        self.save_extracted_log(dest=tmp_folder)
-        file_list = [tmp_folder]
-
-        for path in self.additional_files:
-            file_dir, file_name = split(path)
-            extracted_file_name = os.path.join(self.dut_run_dir, file_name)
-            tmp_folder = ".".join((extracted_file_name, timestamp))
-            self.save_extracted_file(dest=tmp_folder, src=extracted_file_name)
-            file_list.append(tmp_folder)
-
-        match_messages_regex = re.compile('|'.join(self.match_regex)) if len(self.match_regex) else None
-        ignore_messages_regex = re.compile('|'.join(self.ignore_regex)) if len(self.ignore_regex) else None
-        expect_messages_regex = re.compile('|'.join(self.expect_regex)) if len(self.expect_regex) else None
-
-        logging.debug("Analyze files {}".format(file_list))
-        logging.debug('    match_regex="{}"'.format(match_messages_regex.pattern if match_messages_regex else ''))
-        logging.debug('    ignore_regex="{}"'.format(ignore_messages_regex.pattern if ignore_messages_regex else ''))
-        logging.debug('    expect_regex="{}"'.format(expect_messages_regex.pattern if expect_messages_regex else ''))
-        analyzer_parse_result = self.ansible_loganalyzer.analyze_file_list(
-            file_list, match_messages_regex, ignore_messages_regex, expect_messages_regex,
-            maximum_log_length=maximum_log_length)
-        # Print file content and remove the file
-        for folder in file_list:
-            with open(folder) as fo:
-                logging.debug("{} file content:\n\n{}".format(folder, fo.read()))
-            os.remove(folder)
+                                              target_filename=extracted_file_name, **position)
+
+        if self.analyze_on_dut:
+            dut_file_list = [self.extracted_syslog]
+            for path in self.additional_files:
+                dut_file_list.append(os.path.join(self.dut_run_dir, split(path)[1]))
+            analyzer_parse_result = self._analyze_on_dut(marker, dut_file_list, maximum_log_length)
+        else:
+            # Download extracted logs from the DUT to the temporal folder defined in SYSLOG_TMP_FOLDER
+            self.save_extracted_log(dest=tmp_folder)
+            file_list = [tmp_folder]
+
+            for path in self.additional_files:
+                file_dir, file_name = split(path)
+                extracted_file_name = os.path.join(self.dut_run_dir, file_name)
+                tmp_folder = ".".join((extracted_file_name, timestamp))
+                self.save_extracted_file(dest=tmp_folder, src=extracted_file_name)
+                file_list.append(tmp_folder)
+
+            match_messages_regex = get_pattern_set(self.match_regex)
+            ignore_messages_regex = get_pattern_set(self.ignore_regex)
+            expect_messages_regex = get_pattern_set(self.expect_regex)
+
+            logging.debug("Analyze files {}".format(file_list))
+            logging.debug('    match_regex="{}"'.format(match_messages_regex.pattern if match_messages_regex else ''))
+            logging.debug('    ignore_regex="{}"'.format(
+                ignore_messages_regex.pattern if ignore_messages_regex else ''))
+            logging.debug('    expect_regex="{}"'.format(
+                expect_messages_regex.pattern if expect_messages_regex else ''))
+            analyzer_parse_result = self.ansible_loganalyzer.analyze_file_list(
+                file_list, match_messages_regex, ignore_messages_regex, expect_messages_regex,
+                maximum_log_length=maximum_log_length)
+            # Print file content and remove the file
+            for folder in file_list:
+                with open(folder) as fo:
+                    logging.debug("{} file content:\n\n{}".format(folder, fo.read()))
+                os.remove(folder)
 
         expected_lines_total = []
         unused_regex_messages = []
@@ -519,12 +555,8 @@ class LogAnalyzer:
             expected_lines_total.extend(expecting_lines)
 
         # Find unused regex matches
-        for regex in self.expect_regex:
-            for line in expected_lines_total:
-                if re.search(regex, line):
-                    break
-            else:
-                unused_regex_messages.append(regex)
+        if self.expect_regex:
+            unused_regex_messages = get_pattern_set(self.expect_regex).unused_patterns(expected_lines_total)
         analyzer_summary["total"]["expected_missing_match"] = len(unused_regex_messages)
         analyzer_summary["unused_expected_regexp"] = unused_regex_messages
         logging.debug("Analyzer summary: {}".format(pprint.pformat(analyzer_summary)))
@@ -545,6 +577,33 @@ class LogAnalyzer:
             logging.warning("Skip bug handler execution because it is not a valid BugHandler")
         return analyzer_summary
 
+    def _analyze_on_dut(self, marker, file_list, maximum_log_length=None):
+        """
+        @summary: Analyze extracted log files on the DUT. The regular expressions are copied to the DUT and
+                  loganalyzer.py scans the files there, so only the matching and expected lines are transferred
+                  back instead of the whole extracted files.
+
+        @param marker: Marker obtained from "init" method.
+        @param file_list: Paths of the extracted log files on the DUT.
+        @param maximum_log_length: The long message (length > maximum_log_length) will be skipped.
+        @return: Dictionary of <file path, [matching lines, expected lines]>, same as analyze_file_list.
+        """
+        regex_file = os.path.join(self.dut_run_dir, DUT_REGEX_FILE)
+        regex = {"match": self.match_regex, "ignore": self.ignore_regex, "expect": self.expect_regex}
+        self.ansible_host.copy(content=json.dumps(regex), dest=regex_file)
+
+        cmd = "python {run_dir}/loganalyzer.py --action analyze_extracted --run_id {marker} --logs {logs}" \
+              " --regex_file {regex_file}".format(run_dir=self.dut_run_dir, marker=marker, logs=",".join(file_list),
+                                                  regex_file=regex_file)
+        if self.ansible_loganalyzer.start_marker:
+            cmd += " --start_marker {}".format(shlex.quote(self.ansible_loganalyzer.start_marker))
+        if maximum_log_length is not None:
+            cmd += " --maximum_log_length {}".format(maximum_log_length)
+
+        logging.debug("Analyze files {} on DUT".format(file_list))
+        output = self.ansible_host.command(cmd)["stdout"]
+        return json.loads(output)
+
     def save_extracted_log(self, dest):
         """
         @summary: Download extracted syslog log file to the ansible host.
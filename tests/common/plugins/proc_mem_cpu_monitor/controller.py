@@ -19,6 +19,8 @@ from typing import Any, Dict, List, Optional, Set, Tuple, Union
 import pytest
 
 from tests.common.plugins.proc_mem_cpu_monitor.constants import MEM_LEAK_EVENT
+from tests.common.plugins.proc_mem_cpu_monitor.resident_agent import KIND_CPU, KIND_MEM
+from tests.common.plugins.proc_mem_cpu_monitor.resident_sampler import ResidentSampler, SampleColumns
 from tests.common.plugins.proc_mem_cpu_monitor.tcmalloc_parser import parse_tcmalloc_stats
 from tests.common.plugins.proc_mem_cpu_monitor.top_parser import (
     SYSTEM_CPU_IDLE_PROCESS,
@@ -309,6 +311,11 @@ class ProcMemCpuMonitor(object):
         self._tcmalloc_raw_log_path: Optional[str] = None
         self._output_basename_style: str = "full"
         self._host_top_num_cores: Optional[int] = None
+        # Resident sampler per DUT hostname; its samples are kept in ``_columns`` until ``stop()``.
+        self._resident_samplers: Dict[str, ResidentSampler] = {}
+        self._resident_lock = threading.Lock()
+        self._resident_latest: Dict[str, Dict[Tuple[str, str, str], float]] = {}
+        self._columns = SampleColumns()
 
     def _next_seq(self) -> int:
         self._seq += 1
@@ -413,11 +420,55 @@ class ProcMemCpuMonitor(object):
                     self._host_top_num_cores = n
                     return
 
+    def _fetch_resident(self, duthost: Any, hostname: str) -> None:
+        """Fetch the records written by the resident sampler of ``hostname`` since the previous fetch."""
+        sampler = self._resident_samplers[hostname]
+        # One fetch at a time: the sampler thread and the mem_leak check read from the same sequence number.
+        with self._resident_lock:
+            stdout = self._dut_command_raw(duthost, sampler.read_cmd(), hostname, "host", "resident")
+            if not stdout:
+                return
+            wall = time.time()
+            mono = time.monotonic()
+            dut_now, records = sampler.parse_read_output(stdout)
+            if not records:
+                return
+            last_t = records[-1][1]
+            latest: Dict[Tuple[str, str, str], float] = {}
+            with self._lock:
+                for record in records:
+                    _seq, t, _pid, kind, values, name = record
+                    scope = "host:free" if kind == KIND_MEM else "host"
+                    # DUT time -> controller time by the age of the record at the fetch
+                    age = max(0.0, dut_now - t)
+                    self._columns.append(hostname, scope, record, self._next_seq(), wall - age, mono - age)
+                    if kind == KIND_CPU:
+                        continue
+                    key = (hostname, scope, name)
+                    mem_pct = round(values[0] if kind == KIND_MEM else values[1], 2)
+                    if key not in self._baseline_mem and (kind == KIND_MEM or self._should_set_mem_baseline(name)):
+                        self._baseline_mem[key] = mem_pct
+                    if t == last_t:
+                        latest[key] = mem_pct
+                self._resident_latest[hostname] = latest
+
+    def _stop_resident_samplers(self) -> None:
+        for hostname, sampler in self._resident_samplers.items():
+            try:
+                self._fetch_resident(sampler.duthost, hostname)
+                sampler.stop()
+            except Exception as ex:  # noqa: BLE001  the agent exits by itself when no longer read
+                logger.warning("mem_cpu_monitor: stopping the resident sampler on %s failed: %s", hostname, ex)
+        self._resident_samplers = {}
+
     def _poll_tick(self) -> None:
         proc_list = self._proc_list
         for duthost, scope, cmd, kind in self._targets:
             try:
                 hostname = duthost.hostname
+                if kind == "resident":
+                    self._fetch_resident(duthost, hostname)
+                    continue
                 stdout = self._dut_command_raw(duthost, cmd, hostname, scope, kind)
                 now = datetime.now(timezone.utc)
                 mono = time.monotonic()
@@ -565,6 +616,9 @@ class ProcMemCpuMonitor(object):
         include_tcmalloc_stats: bool = False,
         tcmalloc_raw_log_path: Optional[str] = None,
         output_basename_style: str = "full",
+        resident_sampler: bool = False,
+        sample_interval: float = 0.25,
+        ring_capacity: int = 65536,
     ) -> None:
         """
         Begin background sampling.
@@ -606,6 +660,12 @@ class ProcMemCpuMonitor(object):
                 ``<tmp_path>/mem_cpu_monitor_tcmalloc_raw.log`` when ``include_tcmalloc_stats`` is True.
             output_basename_style: how to build PNG/JSON/CSV basename  ``full`` (default, long
                 ``nodeid``), ``short_node`` (``node.name`` only), or ``dut_ts_hash`` (DUT + time + hash).
+            resident_sampler: if True, the host ``top`` / ``free`` probes are replaced by an agent pushed to each
+                DUT, which samples ``/proc`` every ``sample_interval`` seconds into a binary ring buffer. Each poll
+                round fetches the new records with one command (see README). Docker ``top`` and tcmalloc probes
+                are unchanged. Falls back to ``top`` / ``free`` on a DUT where the agent fails to start.
+            sample_interval: seconds between two samples of the resident sampler (default ``0.25``).
+            ring_capacity: number of records in the ring buffer of the resident sampler (default ``65536``).
         """
         if output_basename_style not in OUTPUT_BASENAME_STYLES:
             raise ValueError(
@@ -649,12 +709,31 @@ class ProcMemCpuMonitor(object):
                 with open(self._raw_log_path, "w", encoding="utf-8") as fh:
                     fh.write("# mem_cpu_monitor: raw DUT stdout for each command invocation\n")
             self._targets = []
+            self._resident_samplers = {}
             self._top_raw_log_path = None
             self._tcmalloc_raw_log_path = None
             use_asics = asics or "frontend"
 
             for duthost in dut_list:
-                if host_top_all_procs:
+                resident = None
+                if resident_sampler and (host_top_all_procs or include_host_top or include_host_free):
+                    resident = ResidentSampler(
+                        duthost, self._proc_list, self._host_top_all_procs, include_host_top, include_host_free,
+                        self._jumper_top_n, float(sample_interval), int(ring_capacity),
+                    )
+                    try:
+                        resident.start()
+                    except Exception as ex:  # noqa: BLE001
+                        logger.warning(
+                            "mem_cpu_monitor: resident sampler failed to start on %s, using top/free: %s",
+                            duthost.hostname, ex,
+                        )
+                        resident = None
+
+                if resident is not None:
+                    self._resident_samplers[duthost.hostname] = resident
+                    self._targets.append((duthost, "host", "", "resident"))
+                elif host_top_all_procs:
                     self._targets.append((duthost, "host", _top_cmd_host(), "top_all"))
                 elif include_host_top:
                     self._targets.append((duthost, "host", _top_cmd_host(), "top"))
@@ -670,7 +749,7 @@ class ProcMemCpuMonitor(object):
                         cmd = _top_cmd_docker(duthost, asic, docker_service)
                         self._targets.append((duthost, scope, cmd, "top"))
 
-                if include_host_free:
+                if include_host_free and resident is None:
                     self._targets.append((duthost, "host:free", "free -m", "free"))
 
                 if self._include_tcmalloc_stats:
@@ -717,6 +796,8 @@ class ProcMemCpuMonitor(object):
             self._events.clear()
             self._seq = 0
             self._baseline_mem.clear()
+            self._resident_latest.clear()
+            self._columns.clear()
             self._last_result = None
             self._stopped = False
             self._append_event(
@@ -734,6 +815,7 @@ class ProcMemCpuMonitor(object):
                     "tcmalloc_raw_log_path": self._tcmalloc_raw_log_path,
                     "output_basename_style": output_basename_style,
                     "num_cores": self._host_top_num_cores,
+                    "resident_sampler": sorted(self._resident_samplers),
                 },
             )
             self._poll_tick()
@@ -773,8 +855,13 @@ class ProcMemCpuMonitor(object):
         current: Dict[Tuple[str, str, str], float] = {}
         proc_list = self._proc_list
         for duthost, scope, cmd, kind in self._targets:
-            stdout = self._dut_command_raw(duthost, cmd, duthost.hostname, scope, kind)
             hostname = duthost.hostname
+            if kind == "resident":
+                self._fetch_resident(duthost, hostname)
+                with self._lock:
+                    current.update(self._resident_latest.get(hostname, {}))
+                continue
+            stdout = self._dut_command_raw(duthost, cmd, hostname, scope, kind)
             if kind == "free":
                 data = parse_free_m_used(stdout)
                 if data:
@@ -819,13 +906,16 @@ class ProcMemCpuMonitor(object):
         if self._thread is not None:
             self._thread.join(timeout=30.0)
             self._thread = None
+        self._stop_resident_samplers()
         self._append_event("stop")
 
         with self._lock:
-            merged = list(self._samples) + list(self._events)
+            samples = list(self._samples) + list(self._columns.samples())
+            samples.sort(key=lambda r: (r["t_mono"], r["seq"]))
+            merged = samples + list(self._events)
             merged.sort(key=lambda r: (r["t_mono"], r["seq"]))
             result = MemCpuMonitorResult(
-                samples=list(self._samples),
+                samples=samples,
                 events=list(self._events),
                 timeline=merged,
                 top_raw_log_path=self._top_raw_log_path,
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Resident CPU/memory sampler pushed to the DUT by ``ProcMemCpuMonitor`` (``start(..., resident_sampler=True)``).
+
+Standalone (stdlib only). ``run`` samples ``/proc`` every ``--interval`` seconds into a fixed-size binary ring
+buffer file; ``read`` prints the records written since a sequence number, for the controller to fetch in bulk:
+
+    python3 resident_agent.py run --buffer /tmp/buf --interval 0.25 --all --top-n 5 --free --proc bgpd
+    python3 resident_agent.py read --buffer /tmp/buf --since 0
+
+Ring buffer file: a ``HEADER`` followed by ``capacity`` slots of ``RECORD``. The record of sequence number ``seq``
+is in slot ``seq % capacity``; ``next_seq`` in the header is the number of records written so far. The writer
+holds an exclusive ``flock`` while writing the records of a tick, the reader a shared one while copying them.
+``run`` exits when no ``read`` happened for ``--idle-timeout`` seconds, so a dead controller leaves nothing behind.
+"""
+import argparse
+import base64
+import fcntl
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+
+MAGIC = b"PMCR"
+VERSION = 1
+# magic, version, record size, capacity, reserved, next_seq, last read time
+HEADER = struct.Struct("<4sHHIIQd")
+HEADER_SIZE = 64
+NEXT_SEQ_OFFSET = 16
+LAST_READ_OFFSET = 24
+# seq, time, pid, kind, reserved, 4 values, name
+RECORD = struct.Struct("<QdIHHffff32s")
+
+# Record kinds and their values
+KIND_PROCESS = 0  # cpu %, mem %, RSS MiB, -
+KIND_CPU = 1  # idle %, busy %, us %, sy %
+KIND_MEM = 2  # used %, used MiB, total MiB, -
+
+CLK_TCK = os.sysconf("SC_CLK_TCK")
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+
+def read_cpu_times():
+    """user, nice, system, idle, iowait, irq, softirq, steal jiffies of the ``cpu`` line of /proc/stat."""
+    with open("/proc/stat") as fh:
+        fields = fh.readline().split()[1:9]
+    return [int(v) for v in fields] + [0] * (8 - len(fields))
+
+
+def read_meminfo():
+    """MemTotal and MemAvailable in KiB."""
+    info = {}
+    with open("/proc/meminfo") as fh:
+        for line in fh:
+            key, _, value = line.partition(":")
+            if key in ("MemTotal", "MemAvailable"):
+                info[key] = int(value.split()[0])
+    return info.get("MemTotal", 0), info.get("MemAvailable", 0)
+
+
+def read_processes():
+    """Dict of pid to (comm, utime + stime jiffies, RSS bytes)."""
+    procs = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open("/proc/{}/stat".format(entry)) as fh:
+                data = fh.read()
+        except (IOError, OSError):
+            continue  # exited meanwhile
+        comm = data[data.index("(") + 1:data.rindex(")")]
+        rest = data[data.rindex(")") + 2:].split()
+        procs[int(entry)] = (comm, int(rest[11]) + int(rest[12]), int(rest[21]) * PAGE_SIZE)
+    return procs
+
+
+def capture_names(rows, proc_list, top_n):
+    """Process names stored in host-wide mode, as ``controller._host_top_capture_names``."""
+    ordered = [row["process"] for row in sorted(rows, key=lambda r: (-r["mem_res_mib"], r["process"]))]
+    top_set = set(ordered[:max(0, top_n)])
+    user = set(row["process"] for row in rows if any(u in row["process"] for u in proc_list))
+    need_extra = max(0, top_n - len(top_set & user))
+    extras = [name for name in ordered if name not in user][:need_extra]
+    return user.union(extras)
+
+
+class Sampler(object):
+    """Compute the records of a tick from the deltas between two reads of /proc."""
+
+    def __init__(self, proc_list, host_all, top, top_n, free):
+        self.proc_list = proc_list
+        self.host_all = host_all
+        self.top = top or host_all
+        self.top_n = top_n
+        self.free = free
+        self._prev_time = None
+        self._prev_cpu = None
+        self._prev_procs = {}
+
+    def sample(self):
+        """Return (time, list of (kind, pid, values, name)) of this tick. No records on the first tick."""
+        now = time.time()
+        cpu = read_cpu_times()
+        total_kib, available_kib = read_meminfo()
+        procs = read_processes() if self.top else {}
+
+        records = []
+        if self._prev_time is not None:
+            elapsed = now - self._prev_time
+            if self.top:
+                records.append(self._cpu_record(cpu))
+                records.extend(self._process_records(procs, elapsed, total_kib))
+            if self.free and total_kib:
+                used_kib = total_kib - available_kib
+                records.append((KIND_MEM, 0, (100.0 * used_kib / total_kib, used_kib / 1024.0,
+                                              total_kib / 1024.0, 0.0), "free_used"))
+        self._prev_time, self._prev_cpu, self._prev_procs = now, cpu, procs
+        return now, records
+
+    def _cpu_record(self, cpu):
+        deltas = [cur - prev for cur, prev in zip(cpu, self._prev_cpu)]
+        total = float(sum(deltas)) or 1.0
+        idle = 100.0 * deltas[3] / total
+        return (KIND_CPU, 0, (idle, 100.0 - idle, 100.0 * deltas[0] / total, 100.0 * deltas[2] / total), "cpu")
+
+    def _process_records(self, procs, elapsed, total_kib):
+        rows = []
+        for pid, (comm, jiffies, rss) in procs.items():
+            prev = self._prev_procs.get(pid)
+            if prev is None or prev[0] != comm:
+                continue  # started since the previous tick
+            if self.host_all:
+                name = comm
+            else:
+                name = next((u for u in self.proc_list if u in comm), None)
+                if name is None:
+                    continue
+            rows.append({
+                "process": name,
+                "pid": pid,
+                "cpu_pct": 100.0 * (jiffies - prev[1]) / CLK_TCK / elapsed if elapsed > 0 else 0.0,
+                "mem_pct": 100.0 * rss / 1024.0 / total_kib if total_kib else 0.0,
+                "mem_res_mib": rss / (1024.0 * 1024.0),
+            })
+        if self.host_all:
+            # One row per name, largest RSS wins, as ``parse_top_host_all``
+            merged = {}
+            for row in rows:
+                if row["process"] not in merged or row["mem_res_mib"] > merged[row["process"]]["mem_res_mib"]:
+                    merged[row["process"]] = row
+            captured = capture_names(list(merged.values()), self.proc_list, self.top_n)
+            rows = [row for name, row in merged.items() if name in captured]
+        return [(KIND_PROCESS, row["pid"], (row["cpu_pct"], row["mem_pct"], row["mem_res_mib"], 0.0),
+                 row["process"]) for row in rows]
+
+
+def create_buffer(path, capacity):
+    size = HEADER_SIZE + capacity * RECORD.size
+    fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+    os.ftruncate(fd, size)
+    buf = mmap.mmap(fd, size)
+    HEADER.pack_into(buf, 0, MAGIC, VERSION, RECORD.size, capacity, 0, 0, time.time())
+    return fd, buf
+
+
+def open_buffer(path):
+    fd = os.open(path, os.O_RDWR)
+    buf = mmap.mmap(fd, 0)
+    magic, version, record_size, capacity, _, _, _ = HEADER.unpack_from(buf, 0)
+    if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+        raise ValueError("{} is not a ring buffer of this agent".format(path))
+    return fd, buf, capacity
+
+
+def write_records(fd, buf, capacity, t, records):
+    fcntl.flock(fd, fcntl.LOCK_EX)
+    try:
+        seq = struct.unpack_from("<Q", buf, NEXT_SEQ_OFFSET)[0]
+        for kind, pid, values, name in records:
+            RECORD.pack_into(buf, HEADER_SIZE + (seq % capacity) * RECORD.size,
+                             seq, t, pid, kind, 0, values[0], values[1], values[2], values[3],
+                             name.encode("utf-8", "replace"))
+            seq += 1
+        struct.pack_into("<Q", buf, NEXT_SEQ_OFFSET, seq)
+        return struct.unpack_from("<d", buf, LAST_READ_OFFSET)[0]
+    finally:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+def read_records(fd, buf, capacity, since):
+    """Return (next_seq, lost, raw records with seq >= since still in the ring)."""
+    fcntl.flock(fd, fcntl.LOCK_SH)
+    try:
+        next_seq = struct.unpack_from("<Q", buf, NEXT_SEQ_OFFSET)[0]
+        start = min(max(since, next_seq - capacity), next_seq)
+        chunks = []
+        for seq in range(start, next_seq):
+            offset = HEADER_SIZE + (seq % capacity) * RECORD.size
+            chunks.append(buf[offset:offset + RECORD.size])
+        struct.pack_into("<d", buf, LAST_READ_OFFSET, time.time())
+    finally:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    return next_seq, max(0, start - since), b"".join(chunks)
+
+
+def run(args):
+    fd, buf = create_buffer(args.buffer, args.capacity)
+    sampler = Sampler(args.proc, args.all, args.top, args.top_n, args.free)
+    try:
+        next_tick = time.time()
+        while True:
+            t, records = sampler.sample()
+            last_read = write_records(fd, buf, args.capacity, t, records)
+            if t - last_read > args.idle_timeout:
+                break
+            next_tick += args.interval
+            time.sleep(max(0.0, next_tick - time.time()))
+            if not os.path.exists(args.buffer):
+                break
+    finally:
+        buf.close()
+        os.close(fd)
+        if os.path.exists(args.buffer):
+            os.remove(args.buffer)
+
+
+def read(args):
+    fd, buf, capacity = open_buffer(args.buffer)
+    try:
+        next_seq, lost, data = read_records(fd, buf, capacity, args.since)
+    finally:
+        buf.close()
+        os.close(fd)
+    json.dump({"now": time.time(), "next_seq": next_seq, "lost": lost,
+               "records": base64.b64encode(data).decode("ascii")}, sys.stdout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resident /proc sampler with a binary ring buffer")
+    subparsers = parser.add_subparsers(dest="command")
+    run_parser = subparsers.add_parser("run")
+    run_parser.add_argument("--buffer", required=True)
+    run_parser.add_argument("--capacity", type=int, default=65536)
+    run_parser.add_argument("--interval", type=float, default=0.25)
+    run_parser.add_argument("--idle-timeout", type=float, default=600.0)
+    run_parser.add_argument("--proc", action="append", default=[])
+    run_parser.add_argument("--all", action="store_true", help="all host processes, as top_all")
+    run_parser.add_argument("--top", action="store_true", help="host processes matching --proc, as top")
+    run_parser.add_argument("--top-n", type=int, default=5)
+    run_parser.add_argument("--free", action="store_true", help="used memory, as free")
+    read_parser = subparsers.add_parser("read")
+    read_parser.add_argument("--buffer", required=True)
+    read_parser.add_argument("--since", type=int, default=0)
+    args = parser.parse_args()
+    if args.command == "run":
+        run(args)
+    elif args.command == "read":
+        read(args)
+    else:
+        parser.error("run or read is required")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+"""
+Controller side of the resident sampler (``start(..., resident_sampler=True)``).
+
+``resident_agent.py`` is pushed to each DUT and samples ``/proc`` there at a high frequency into a binary ring
+buffer. Every poll round fetches the records written since the previous fetch with one command, and stores them
+in ``SampleColumns`` (one ``array`` per field) instead of one dict per sample.
+"""
+from __future__ import annotations
+
+import base64
+import json
+import logging
+import os
+import shlex
+from array import array
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from tests.common.plugins.proc_mem_cpu_monitor import resident_agent
+from tests.common.plugins.proc_mem_cpu_monitor.top_parser import SYSTEM_CPU_IDLE_PROCESS
+
+logger = logging.getLogger(__name__)
+
+AGENT_SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resident_agent.py")
+AGENT_DEST = "/tmp/mem_cpu_monitor_agent.py"
+BUFFER_PATH = "/tmp/mem_cpu_monitor_ring.bin"
+AGENT_LOG = "/tmp/mem_cpu_monitor_agent.log"
+# The agent exits if not read for this long (controller gone without stop())
+AGENT_IDLE_TIMEOUT = 600
+
+# (seq, DUT time, pid, kind, values, name)
+Record = Tuple[int, float, int, int, Tuple[float, float, float, float], str]
+
+
+def decode_records(data: bytes) -> List[Record]:
+    """Decode raw ring buffer records."""
+    records = []
+    for seq, t, pid, kind, _, v1, v2, v3, v4, name in resident_agent.RECORD.iter_unpack(data):
+        records.append((seq, t, pid, kind, (v1, v2, v3, v4), name.rstrip(b"\0").decode("utf-8", "replace")))
+    return records
+
+
+class ResidentSampler(object):
+    """The resident agent of one DUT: start, fetch the new records, stop."""
+
+    def __init__(
+        self,
+        duthost: Any,
+        proc_list: List[str],
+        host_top_all_procs: bool,
+        include_host_top: bool,
+        include_host_free: bool,
+        top_n: int,
+        sample_interval: float,
+        capacity: int,
+    ):
+        self.duthost = duthost
+        self.proc_list = list(proc_list)
+        self.host_top_all_procs = host_top_all_procs
+        self.include_host_top = include_host_top
+        self.include_host_free = include_host_free
+        self.top_n = top_n
+        self.sample_interval = sample_interval
+        self.capacity = capacity
+        self.next_seq = 0
+        self.lost = 0
+        self.pid: Optional[int] = None
+
+    def run_cmd(self) -> str:
+        args = [
+            "python3", AGENT_DEST, "run", "--buffer", BUFFER_PATH, "--capacity", str(self.capacity),
+            "--interval", str(self.sample_interval), "--idle-timeout", str(AGENT_IDLE_TIMEOUT),
+            "--top-n", str(self.top_n),
+        ]
+        for proc in self.proc_list:
+            args += ["--proc", proc]
+        if self.host_top_all_procs:
+            args.append("--all")
+        elif self.include_host_top:
+            args.append("--top")
+        if self.include_host_free:
+            args.append("--free")
+        return " ".join(shlex.quote(arg) for arg in args)
+
+    def read_cmd(self) -> str:
+        return "python3 {} read --buffer {} --since {}".format(AGENT_DEST, BUFFER_PATH, self.next_seq)
+
+    def start(self) -> None:
+        """Push the agent to the DUT and start it in the background."""
+        self.stop()
+        self.duthost.copy(src=AGENT_SRC, dest=AGENT_DEST)
+        res = self.duthost.shell("nohup {} > {} 2>&1 & echo $!".format(self.run_cmd(), AGENT_LOG))
+        self.pid = int(res["stdout"].strip())
+        self.next_seq = 0
+        self.lost = 0
+        logger.info("mem_cpu_monitor resident sampler started on %s, pid %s", self.duthost.hostname, self.pid)
+
+    def parse_read_output(self, stdout: str) -> Tuple[float, List[Record]]:
+        """
+        Parse the output of ``read_cmd()`` and advance to the next records.
+
+        Returns (DUT time of the read, records). Records overwritten before they were fetched are counted in
+        ``lost``.
+        """
+        out = json.loads(stdout)
+        if out["lost"]:
+            self.lost += out["lost"]
+            logger.warning("mem_cpu_monitor resident sampler on %s: %d records overwritten before fetched",
+                           self.duthost.hostname, out["lost"])
+        records = [r for r in decode_records(base64.b64decode(out["records"])) if r[0] >= self.next_seq]
+        self.next_seq = out["next_seq"]
+        return out["now"], records
+
+    def stop(self) -> None:
+        """Stop the agent and remove its files from the DUT."""
+        # Also an agent left by a previous run. "[x]yz" keeps pkill from matching the shell running it.
+        name = os.path.basename(AGENT_DEST)
+        cmd = "pkill -f '[{}]{} run'; rm -f {} {}".format(name[0], name[1:], BUFFER_PATH, AGENT_DEST)
+        if self.pid:
+            cmd = "kill {} 2>/dev/null; {}".format(self.pid, cmd)
+        self.duthost.shell(cmd, module_ignore_errors=True)
+        self.pid = None
+
+
+class SampleColumns(object):
+    """
+    Samples of the resident samplers stored column by column. DUT, scope and process names are interned.
+
+    ``samples()`` builds the same sample dicts as the ``top`` / ``free`` probes for plot and export.
+    """
+
+    def __init__(self):
+        self.names: List[str] = []
+        self._name_ids: Dict[str, int] = {}
+        self.dut = array("H")
+        self.scope = array("H")
+        self.process = array("H")
+        self.kind = array("B")
+        self.pid = array("I")
+        self.seq = array("Q")
+        self.t_wall = array("d")
+        self.t_mono = array("d")
+        self.values = [array("f") for _ in range(4)]
+
+    def __len__(self) -> int:
+        return len(self.seq)
+
+    def _name_id(self, name: str) -> int:
+        name_id = self._name_ids.get(name)
+        if name_id is None:
+            name_id = self._name_ids[name] = len(self.names)
+            self.names.append(name)
+        return name_id
+
+    def append(self, dut: str, scope: str, record: Record, seq: int, t_wall: float, t_mono: float) -> None:
+        _, _, pid, kind, values, name = record
+        self.dut.append(self._name_id(dut))
+        self.scope.append(self._name_id(scope))
+        self.process.append(self._name_id(name))
+        self.kind.append(kind)
+        self.pid.append(pid)
+        self.seq.append(seq)
+        self.t_wall.append(t_wall)
+        self.t_mono.append(t_mono)
+        for column, value in zip(self.values, values):
+            column.append(value)
+
+    def clear(self) -> None:
+        self.__init__()
+
+    def samples(self) -> Iterator[Dict[str, Any]]:
+        for i in range(len(self.seq)):
+            v1, v2, v3, v4 = (round(column[i], 2) for column in self.values)
+            sample = {
+                "kind": "sample",
+                "dut": self.names[self.dut[i]],
+                "scope": self.names[self.scope[i]],
+                "t_wall": datetime.fromtimestamp(self.t_wall[i], timezone.utc),
+                "t_mono": self.t_mono[i],
+                "seq": self.seq[i],
+            }
+            kind = self.kind[i]
+            if kind == resident_agent.KIND_PROCESS:
+                sample.update({
+                    "process": self.names[self.process[i]],
+                    "cpu_pct": v1,
+                    "mem_pct": v2,
+                    "mem_res_mib": v3,
+                    "mem_unit": "%",
+                    "probe_transport": "top",
+                    "pid": self.pid[i],
+                })
+            elif kind == resident_agent.KIND_CPU:
+                sample.update({
+                    "process": SYSTEM_CPU_IDLE_PROCESS,
+                    "cpu_pct": v1,
+                    "mem_pct": None,
+                    "mem_res_mib": None,
+                    "mem_unit": "%",
+                    "probe_transport": "top_summary",
+                    "system_cpu_idle_pct": v1,
+                    "system_cpu_busy_pct": v2,
+                    "system_cpu_us_pct": v3,
+                    "system_cpu_sy_pct": v4,
+                })
+            elif kind == resident_agent.KIND_MEM:
+                sample.update({
+                    "process": "free_used",
+                    "cpu_pct": None,
+                    "mem_pct": v1,
+                    "mem_mib_used": v2,
+                    "mem_total_mib": v3,
+                    "mem_res_mib": v2,
+                    "mem_unit": "%",
+                    "probe_transport": "free",
+                })
+            else:
+                continue
+            yield sample
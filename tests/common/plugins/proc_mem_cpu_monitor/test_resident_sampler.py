@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+import base64
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+import pytest
+from tests.common.plugins.proc_mem_cpu_monitor import resident_agent, resident_sampler
+from tests.common.plugins.proc_mem_cpu_monitor.controller import ProcMemCpuMonitor
+from tests.common.plugins.proc_mem_cpu_monitor.resident_agent import KIND_CPU, KIND_MEM, KIND_PROCESS
+from tests.common.plugins.proc_mem_cpu_monitor.resident_sampler import ResidentSampler, SampleColumns, decode_records
+from tests.common.plugins.proc_mem_cpu_monitor.top_parser import SYSTEM_CPU_IDLE_PROCESS
+
+pytestmark = [
+    pytest.mark.topology('t0', 't1', 'any')
+]
+
+# comm of this test process, as the agent sees it
+OWN_COMM = open("/proc/self/comm").read().strip()
+
+
+class LocalDut(object):
+    """A DUT running its commands locally."""
+
+    hostname = "dut-1"
+
+    def copy(self, src, dest):
+        shutil.copy(src, dest)
+
+    def shell(self, cmd, module_ignore_errors=False):
+        result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
+        return {"rc": result.returncode, "stdout": result.stdout, "stderr": result.stderr}
+
+    def command(self, cmd, module_ignore_errors=False):
+        return self.shell(cmd)
+
+
+@pytest.fixture
+def agent_paths(tmp_path, monkeypatch):
+    monkeypatch.setattr(resident_sampler, "AGENT_DEST", str(tmp_path / "test_mem_cpu_monitor_agent.py"))
+    monkeypatch.setattr(resident_sampler, "BUFFER_PATH", str(tmp_path / "ring.bin"))
+    monkeypatch.setattr(resident_sampler, "AGENT_LOG", str(tmp_path / "agent.log"))
+    return tmp_path
+
+
+def test_sampler_records():
+    sampler = resident_agent.Sampler([OWN_COMM], host_all=True, top=False, top_n=2, free=True)
+    assert sampler.sample()[1] == []
+    time.sleep(0.05)
+    _, records = sampler.sample()
+
+    by_kind = {}
+    for kind, pid, values, name in records:
+        by_kind.setdefault(kind, []).append((pid, values, name))
+    idle, busy, _, _ = by_kind[KIND_CPU][0][1]
+    assert idle + busy == pytest.approx(100.0)
+    used_pct, used_mib, total_mib, _ = by_kind[KIND_MEM][0][1]
+    assert by_kind[KIND_MEM][0][2] == "free_used"
+    assert used_pct == pytest.approx(100.0 * used_mib / total_mib)
+    # One record per name: the user process plus the highest-RSS others
+    names = [name for _, _, name in by_kind[KIND_PROCESS]]
+    assert OWN_COMM in names
+    assert len(names) == len(set(names)) <= 3
+
+
+def test_sampler_filtered():
+    sampler = resident_agent.Sampler([OWN_COMM], host_all=False, top=True, top_n=2, free=False)
+    sampler.sample()
+    time.sleep(0.05)
+    _, records = sampler.sample()
+
+    processes = [(pid, name) for kind, pid, _, name in records if kind == KIND_PROCESS]
+    assert (os.getpid(), OWN_COMM) in processes
+    assert set(name for _, name in processes) == {OWN_COMM}
+    assert KIND_MEM not in [kind for kind, _, _, _ in records]
+
+
+def test_ring_buffer_wraps(tmp_path):
+    path = str(tmp_path / "ring.bin")
+    fd, buf = resident_agent.create_buffer(path, 4)
+    for i in range(6):
+        resident_agent.write_records(fd, buf, 4, 100.0 + i, [(KIND_PROCESS, i, (1.0, 2.0, 3.0, 0.0), "p{}".format(i))])
+    buf.close()
+    os.close(fd)
+
+    fd, buf, capacity = resident_agent.open_buffer(path)
+    next_seq, lost, data = resident_agent.read_records(fd, buf, capacity, 1)
+    assert (next_seq, lost) == (6, 1)
+    assert [(r[0], r[1], r[2], r[5]) for r in decode_records(data)] == [
+        (2, 102.0, 2, "p2"), (3, 103.0, 3, "p3"), (4, 104.0, 4, "p4"), (5, 105.0, 5, "p5")]
+    assert resident_agent.read_records(fd, buf, capacity, 6)[1:] == (0, b"")
+    buf.close()
+    os.close(fd)
+
+
+def test_parse_read_output():
+    sampler = ResidentSampler(LocalDut(), ["bgpd"], False, True, False, 5, 0.25, 16)
+    data = resident_agent.RECORD.pack(7, 10.0, 1001, KIND_PROCESS, 0, 5.5, 2.5, 78.1, 0.0, b"bgpd")
+    out = {"now": 12.0, "next_seq": 8, "lost": 0, "records": base64.b64encode(data).decode("ascii")}
+
+    now, records = sampler.parse_read_output(json.dumps(out))
+    assert now == 12.0
+    assert records == [(7, 10.0, 1001, KIND_PROCESS, (5.5, 2.5, pytest.approx(78.1), 0.0), "bgpd")]
+    assert (sampler.next_seq, sampler.lost) == (8, 0)
+    assert "--since 8" in sampler.read_cmd()
+    assert "--top" in sampler.run_cmd() and "--free" not in sampler.run_cmd()
+
+
+def test_sample_columns():
+    columns = SampleColumns()
+    columns.append("dut-1", "host", (0, 10.0, 1001, KIND_PROCESS, (5.5, 2.5, 78.125, 0.0), "bgpd"), 1, 10.0, 1.0)
+    columns.append("dut-1", "host", (1, 10.0, 0, KIND_CPU, (90.0, 10.0, 6.0, 4.0), "cpu"), 2, 10.0, 1.0)
+    columns.append("dut-1", "host:free", (2, 10.0, 0, KIND_MEM, (25.0, 1000.0, 4000.0, 0.0), "free_used"), 3,
+                   10.0, 1.0)
+
+    samples = list(columns.samples())
+    assert len(columns) == 3
+    assert columns.names == ["dut-1", "host", "bgpd", "cpu", "host:free", "free_used"]
+    assert samples[0]["process"] == "bgpd"
+    assert (samples[0]["cpu_pct"], samples[0]["mem_pct"], samples[0]["mem_res_mib"]) == (5.5, 2.5, 78.12)
+    assert samples[0]["pid"] == 1001 and samples[0]["probe_transport"] == "top"
+    assert samples[0]["t_wall"].timestamp() == 10.0
+    assert samples[1]["process"] == SYSTEM_CPU_IDLE_PROCESS
+    assert samples[1]["system_cpu_sy_pct"] == 4.0
+    assert samples[2]["scope"] == "host:free"
+    assert (samples[2]["mem_pct"], samples[2]["mem_mib_used"], samples[2]["mem_total_mib"]) == (25.0, 1000.0, 4000.0)
+
+
+def test_agent_run_and_read(tmp_path):
+    buffer_path = str(tmp_path / "ring.bin")
+    agent = subprocess.Popen([sys.executable, resident_agent.__file__, "run", "--buffer", buffer_path,
+                              "--interval", "0.05", "--free"])
+    try:
+        time.sleep(0.5)
+        out = subprocess.run([sys.executable, resident_agent.__file__, "read", "--buffer", buffer_path],
+                             capture_output=True, text=True, check=True).stdout
+        records = decode_records(base64.b64decode(json.loads(out)["records"]))
+        assert records and all(r[3] == KIND_MEM for r in records)
+        assert [r[0] for r in records] == list(range(len(records)))
+        # The agent exits when its ring buffer is removed
+        os.remove(buffer_path)
+        agent.wait(timeout=5)
+    finally:
+        agent.kill()
+
+
+def test_monitor_with_resident_sampler(agent_paths):
+    monitor = ProcMemCpuMonitor(request=None)
+    monitor.start(LocalDut(), [OWN_COMM], interval=0.3, include_host_free=True, host_top_all_procs=True,
+                  jumper_top_n=2, resident_sampler=True, sample_interval=0.05)
+    assert [kind for _, _, _, kind in monitor._targets] == ["resident"]
+    time.sleep(0.8)
+    monitor.snapshot(event="mem_leak", threshold="100%")
+    result = monitor.stop()
+
+    assert not os.path.exists(resident_sampler.BUFFER_PATH)
+    assert not os.path.exists(resident_sampler.AGENT_DEST)
+    transports = set(s["probe_transport"] for s in result.samples)
+    assert transports == {"top", "top_summary", "free"}
+    assert OWN_COMM in [s["process"] for s in result.samples]
+    assert [s["t_mono"] for s in result.samples] == sorted(s["t_mono"] for s in result.samples)
+    assert ("dut-1", "host:free", "free_used") in monitor._baseline_mem
+    mem_leak = [e for e in result.events if e["event"] == "mem_leak"][0]
+    assert not [f for f in mem_leak["mem_leak_failures"] if "free_used" in f or OWN_COMM in f]
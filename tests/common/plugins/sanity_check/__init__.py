@@ -1,6 +1,7 @@
 import logging
 import copy
 import json
+import time
 from contextlib import contextmanager
 
 import pytest
@@ -13,6 +14,10 @@ from tests.common.plugins.sanity_check import constants
 from tests.common.plugins.sanity_check import checks
 from tests.common.plugins.sanity_check.checks import *      # noqa: F401, F403
 from tests.common.plugins.sanity_check.recover import recover, recover_chassis
+from tests.common.plugins.sanity_check.scheduler import run_check_items, log_check_durations
+from tests.common.plugins.sanity_check.snapshot import (
+    take_snapshots, clear_snapshots, save_pre_test_state, pop_unchanged_results, SNAPSHOT_CHECK_INPUTS
+)
 from tests.common.plugins.sanity_check.constants import STAGE_PRE_TEST, STAGE_POST_TEST
 from tests.common.helpers.assertions import pytest_assert as pt_assert
 from tests.common.helpers.custom_msg_utils import add_custom_msg
@@ -149,10 +154,36 @@ def filter_check_items(tbinfo, duthosts, check_items):
 
 
 def do_checks(request, check_items, *args, **kwargs):
+    stage = kwargs.get("stage")
+    start = time.time()
+
+    # Collect the DUT state read by the check items once for all of them
+    snapshots = take_snapshots(request.getfixturevalue("duthosts"))
+    unchanged_results = {}
+    if stage == STAGE_POST_TEST and not kwargs.get("after_recovery"):
+        unchanged_results = pop_unchanged_results(request.node.nodeid, snapshots, check_items, SNAPSHOT_CHECK_INPUTS)
+        for item in unchanged_results:
+            logger.info("Skip post-test check item '{}', its inputs are unchanged since the pre-test check passed"
+                        .format(item))
+
+    # Fixtures can only be resolved in the main thread, the check functions are run by the scheduler
+    check_funcs = {item: request.getfixturevalue(item) for item in check_items if item not in unchanged_results}
+    max_workers = request.config.getoption("--sanity_check_workers", default=None) or constants.DEFAULT_CHECK_WORKERS
+
+    try:
+        run_results, durations = run_check_items(check_funcs, constants.CHECK_ITEM_DEPENDENCIES, max_workers,
+                                                 *args, **kwargs)
+    finally:
+        clear_snapshots()
+    log_check_durations(durations, time.time() - start, stage)
+
+    items_results = {item: unchanged_results[item] if item in unchanged_results else run_results[item]
+                     for item in check_items}
+    if stage == STAGE_PRE_TEST:
+        save_pre_test_state(request.node.nodeid, snapshots, items_results)
+
     check_results = []
-    for item in check_items:
-        check_fixture = request.getfixturevalue(item)
-        results = check_fixture(*args, **kwargs)
+    for item, results in items_results.items():
         logger.debug("check results of each item {}".format(results))
         if results and isinstance(results, list):
             check_results.extend(results)
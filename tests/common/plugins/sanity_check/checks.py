@@ -15,6 +15,7 @@ from tests.common.dualtor.constants import UPPER_TOR, LOWER_TOR, NIC
 from tests.common.dualtor.dual_tor_common import CableType, active_standby_ports                # noqa: F401
 from tests.common.cache import FactsCache
 from tests.common.plugins.sanity_check.constants import STAGE_PRE_TEST, STAGE_POST_TEST
+from tests.common.plugins.sanity_check.snapshot import get_snapshot, DISK_USAGE, SNAPSHOT_RESULT_KEY
 from tests.common.helpers.parallel import parallel_run, reset_ansible_local_tmp
 from tests.common.dualtor.mux_simulator_control import _probe_mux_ports
 from tests.common.fixtures.duthost_utils import check_bgp_router_id
@@ -47,6 +48,15 @@ CHECK_ITEMS = [
 __all__ = CHECK_ITEMS
 
 
+def _get_networking_uptime(dut):
+    """Get the networking uptime from the DUT state snapshot of the stage, or from the DUT if not in the snapshot."""
+    snapshot = get_snapshot(dut.hostname)
+    networking_uptime = snapshot.networking_uptime() if snapshot else None
+    if networking_uptime is None:
+        networking_uptime = dut.get_networking_uptime()
+    return networking_uptime
+
+
 def _find_down_phy_ports(dut, phy_interfaces):
     down_phy_ports = []
     include_inband_intfs = True if dut.sonichost.get_facts().get(
@@ -115,7 +125,7 @@ def check_interfaces(duthosts, tbinfo):
         results = kwargs['results']
         logger.info("Checking interfaces status on %s..." % dut.hostname)
 
-        networking_uptime = dut.get_networking_uptime().seconds
+        networking_uptime = _get_networking_uptime(dut).seconds
         timeout = max((SYSTEM_STABILIZE_MAX_TIME - networking_uptime), MIN_PROCESS_CHECK_TIMEOUT)
         if dut.get_facts().get("modular_chassis"):
             timeout = max(timeout, 600)
@@ -308,7 +318,7 @@ def check_bgp(duthosts, tbinfo):
             results[dut.hostname] = check_result
             return
 
-        networking_uptime = dut.get_networking_uptime().seconds
+        networking_uptime = _get_networking_uptime(dut).seconds
         if SYSTEM_STABILIZE_MAX_TIME - networking_uptime + 480 > 500:
             # If max_timeout is higher than 600, it will exceed parallel_run's timeout
             # the check will be killed by parallel_run, we can't get expected results.
@@ -387,9 +397,12 @@ def check_dbmemory(duthosts):
         logger.info("Checking database memory on %s..." % dut.hostname)
         redis_cmd = "client list"
         check_result = {"failed": False, "check_item": "dbmemory", "host": dut.hostname}
+        snapshot = get_snapshot(dut.hostname)
         # check the db memory on the redis instance running on each instance
         for asic in dut.asics:
-            res = asic.run_redis_cli_cmd(redis_cmd)['stdout_lines']
+            res = snapshot.redis_client_list(asic.namespace) if snapshot else None
+            if res is None:
+                res = asic.run_redis_cli_cmd(redis_cmd)['stdout_lines']
             result, total_omem, non_zero_output = _is_db_omem_over_threshold(res)
             check_result["total_omem"] = total_omem
             if result:
@@ -852,7 +865,7 @@ def check_monit(duthosts):
         results = kwargs['results']
 
         logger.info("Checking status of each Monit service...")
-        networking_uptime = dut.get_networking_uptime().seconds
+        networking_uptime = _get_networking_uptime(dut).seconds
         timeout = max((MONIT_STABILIZE_MAX_TIME - networking_uptime), 0)
         interval = 20
         logger.info("networking_uptime = {} seconds, timeout = {} seconds, interval = {} seconds"
@@ -860,8 +873,21 @@ def check_monit(duthosts):
 
         check_result = {"failed": False, "check_item": "monit", "host": dut.hostname}
 
+        # The first attempt uses the DUT state snapshot of the stage, the retries query the DUT
+        snapshot = get_snapshot(dut.hostname)
+        snapshot_monit_services_status = snapshot.monit_services_status() if snapshot else None
+        from_snapshot = False
+
+        def _get_monit_services_status():
+            nonlocal snapshot_monit_services_status, from_snapshot
+            from_snapshot = snapshot_monit_services_status is not None
+            if from_snapshot:
+                monit_services_status, snapshot_monit_services_status = snapshot_monit_services_status, None
+                return monit_services_status
+            return dut.get_monit_services_status()
+
         if timeout == 0:
-            monit_services_status = dut.get_monit_services_status()
+            monit_services_status = _get_monit_services_status()
             if not monit_services_status:
                 logger.info("Monit was not running.")
                 check_result["failed"] = True
@@ -877,7 +903,7 @@ def check_monit(duthosts):
             is_monit_running = False
             while elapsed < timeout:
                 check_result["failed"] = False
-                monit_services_status = dut.get_monit_services_status()
+                monit_services_status = _get_monit_services_status()
                 if not monit_services_status:
                     wait(interval, msg="Monit was not started and wait {} seconds to retry. Remaining time: {}."
                          .format(interval, timeout - elapsed))
@@ -900,6 +926,8 @@ def check_monit(duthosts):
                 check_result["failed"] = True
                 check_result["failed_reason"] = "Monit was not running"
 
+        # Only a result of the snapshot can be reused when the snapshot is unchanged, not one of a retry
+        check_result[SNAPSHOT_RESULT_KEY] = from_snapshot
         logger.info("Checking status of each Monit service was done on %s" % dut.hostname)
         results[dut.hostname] = check_result
     return _check
@@ -924,7 +952,7 @@ def check_processes(duthosts):
         results = kwargs['results']
         logger.info("Checking process status on %s..." % dut.hostname)
 
-        networking_uptime = dut.get_networking_uptime().seconds
+        networking_uptime = _get_networking_uptime(dut).seconds
         timeout = max((SYSTEM_STABILIZE_MAX_TIME - networking_uptime), MIN_PROCESS_CHECK_TIMEOUT)
         interval = 20
         logger.info("networking_uptime=%d seconds, timeout=%d seconds, interval=%d seconds" %
@@ -1420,7 +1448,11 @@ def check_disk_usage(duthosts):
         logger.info("Checking disk usage on %s..." % dut.hostname)
         check_result = {"failed": False, "check_item": "disk_usage", "host": dut.hostname}
 
-        res = dut.shell("df --output=pcent,target,source,fstype", module_ignore_errors=True)
+        snapshot = get_snapshot(dut.hostname)
+        res = snapshot.get(DISK_USAGE) if snapshot else None
+        check_result[SNAPSHOT_RESULT_KEY] = res is not None
+        if res is None:
+            res = dut.shell("df --output=pcent,target,source,fstype", module_ignore_errors=True)
         if res["rc"] != 0:
             logger.error("Failed to get disk usage on %s: %s" % (dut.hostname, res.get("stderr", "")))
             check_result["failed"] = True
@@ -27,6 +27,15 @@ INFRA_CHECK_ITEMS = [
     "mux_simulator"
 ]
 
+# Check items which must be run after other check items
+CHECK_ITEM_DEPENDENCIES = {
+    "check_mux_simulator": ["check_interfaces"],
+    "check_bfd_up_count": ["check_bgp"],
+}
+
+# Default number of check items run at the same time
+DEFAULT_CHECK_WORKERS = 4
+
 # Recover related definitions
 RECOVER_METHODS = {
     "config_reload": {
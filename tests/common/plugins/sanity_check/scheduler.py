@@ -0,0 +1,80 @@
+"""
+Run the sanity check items concurrently, in the order of their dependencies.
+
+Each check item already runs its check on the DUTs in parallel. Most check items are independent and spend
+their time waiting on the DUTs, so the check items are run concurrently as well. A check item is started after
+the check items it depends on are completed.
+"""
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+logger = logging.getLogger(__name__)
+
+
+def run_check_items(check_funcs, dependencies, max_workers, *args, **kwargs):
+    """
+    @summary: Run check functions concurrently, each one after the check functions it depends on are completed.
+    @param check_funcs: Dict of check item name to check function, in the order the check items are started.
+    @param dependencies: Dict of check item name to the names of the check items it must be run after. Check items
+        not in check_funcs are ignored.
+    @param max_workers: Maximum number of check functions run at the same time. 1 to run them one by one.
+    @param args, kwargs: Arguments of the check functions.
+    @return: Tuple (results, durations). Dicts of check item name to the result of its check function, and to the
+        seconds it took to run, in the order of check_funcs.
+    @raise: The first exception raised by a check function, after the running check functions are completed.
+        The check items not started yet are not run. ValueError if the dependencies have a cycle.
+    """
+    waiting = {
+        item: set(dep for dep in dependencies.get(item, []) if dep in check_funcs and dep != item)
+        for item in check_funcs
+    }
+    results, durations = {}, {}
+    running, started = {}, {}
+    error = None
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="sanity_check") as executor:
+        while True:
+            if error is None:
+                ready = [item for item, deps in waiting.items() if not deps]
+                for item in ready[:max_workers - len(running)]:
+                    del waiting[item]
+                    logger.info("Start sanity check item '{}'".format(item))
+                    started[item] = time.time()
+                    running[executor.submit(check_funcs[item], *args, **kwargs)] = item
+                if waiting and not running:
+                    raise ValueError("Sanity check items {} have circular dependencies: {}".format(
+                        list(waiting), {item: sorted(deps) for item, deps in waiting.items()}))
+            if not running:
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                item = running.pop(future)
+                durations[item] = time.time() - started[item]
+                try:
+                    results[item] = future.result()
+                except BaseException as e:
+                    logger.error("Sanity check item '{}' raised exception: {}".format(item, repr(e)))
+                    if error is None:
+                        error = e
+                for deps in waiting.values():
+                    deps.discard(item)
+
+    if error is not None:
+        raise error
+
+    return ({item: results[item] for item in check_funcs},
+            {item: durations[item] for item in check_funcs})
+
+
+def log_check_durations(durations, total, stage):
+    """
+    @summary: Log the time taken by each check item, slowest first.
+    @param durations: Dict of check item name to the seconds it took to run.
+    @param total: Seconds taken to run all the check items.
+    @param stage: Sanity check stage.
+    """
+    lines = ["{:<32} {:>10.1f}".format(item, seconds)
+             for item, seconds in sorted(durations.items(), key=lambda item: -item[1])]
+    logger.info("Sanity check items of {} completed in {:.1f}s:\n{}".format(stage, total, "\n".join(lines)))
@@ -0,0 +1,283 @@
+"""
+Snapshot of the DUT state shared by the sanity check items of a stage.
+
+The data read by several check items is collected once per DUT at the beginning of each stage, by a single
+script run on the DUT which runs all the commands concurrently and returns their outputs in JSON. The check
+items use the snapshot for their first attempt, and query the DUT again when they retry.
+
+The snapshots of the pre-test stage are kept with the results of the check items. In the post-test stage, a
+check item which passed on the snapshot in the pre-test stage, without retrying, and whose inputs in the
+snapshots are byte-identical is not run again, its pre-test results are reused.
+"""
+import copy
+import hashlib
+import json
+import logging
+import shlex
+import time
+from datetime import datetime, timedelta
+
+from tests.common.devices.sonic import SonicHost
+from tests.common.helpers.multi_thread_utils import SafeThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Seconds to wait for each command of the snapshot script
+SNAPSHOT_COMMAND_TIMEOUT = 60
+
+# Script run on the DUT: runs the commands given in JSON concurrently and prints their outputs in JSON
+SNAPSHOT_SCRIPT = """
+import json, subprocess, sys
+procs = {}
+for name, cmd in json.loads(sys.argv[1]).items():
+    procs[name] = subprocess.Popen(cmd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                   universal_newlines=True)
+outputs = {}
+for name, proc in procs.items():
+    try:
+        stdout, stderr = proc.communicate(timeout=int(sys.argv[2]))
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        stdout, stderr = proc.communicate()
+    outputs[name] = {"rc": proc.returncode, "stdout": stdout.rstrip("\\n"), "stderr": stderr.rstrip("\\n")}
+print(json.dumps(outputs))
+"""
+
+NETWORKING_START_TIME = "networking_start_time"
+NOW_TIME = "now_time"
+MONIT_STATUS = "monit_status"
+DISK_USAGE = "disk_usage"
+REDIS_CLIENT_LIST = "redis_client_list"
+
+# Outputs of the snapshot the result of a check item only depends on. The post-test check item is skipped
+# if they didn't change since the pre-test check item passed on them.
+SNAPSHOT_CHECK_INPUTS = {
+    "check_monit": [MONIT_STATUS],
+    "check_disk_usage": [DISK_USAGE],
+}
+
+# Key set to True in the result of a check item on a DUT when the result was computed from the snapshot, and
+# not from a query of the DUT, e.g. when the check item retried. Only such results are reused.
+SNAPSHOT_RESULT_KEY = "from_snapshot"
+
+# Current snapshots by hostname, read by the check items. Set before the check items are run, so the check items
+# forked by parallel_run see them as well.
+_current_snapshots = {}
+
+# Snapshots and results of the pre-test check items of the current module, by module
+_pre_test_states = {}
+
+
+def build_snapshot_commands(dut):
+    """
+    @summary: Build the commands collecting the DUT state read by the check items.
+    @param dut: The SonicHost or MultiAsicSonicHost.
+    @return: Dict of output name to command.
+    """
+    commands = {
+        NETWORKING_START_TIME: "systemctl -p ExecMainStartTimestamp show networking",
+        NOW_TIME: 'date +"%Y-%m-%d %H:%M:%S"',
+        # Only the service names and statuses parsed by the monit check, without the changing figures
+        MONIT_STATUS: "sudo monit status | grep -E \"^[[:alpha:]]+ '|^[[:space:]]+status[[:space:]]\"",
+        DISK_USAGE: "df --output=pcent,target,source,fstype",
+    }
+    for asic in dut.asics:
+        # Same command as SonicAsic.run_redis_cli_cmd
+        redis_cli = "/usr/bin/redis-cli client list"
+        if asic.namespace:
+            redis_cli = "sudo ip netns exec {} {}".format(asic.namespace, redis_cli)
+        commands[redis_client_list_name(asic.namespace)] = redis_cli
+    return commands
+
+
+def redis_client_list_name(namespace):
+    return "{}/{}".format(REDIS_CLIENT_LIST, namespace or "")
+
+
+def build_snapshot_cmd(commands):
+    """
+    @summary: Build the command line running the snapshot script on the DUT.
+    @param commands: Dict of output name to command.
+    @return: The command line.
+    """
+    return "python3 -c {} {} {}".format(shlex.quote(SNAPSHOT_SCRIPT), shlex.quote(json.dumps(commands)),
+                                        SNAPSHOT_COMMAND_TIMEOUT)
+
+
+class DutStateSnapshot(object):
+    """
+    Outputs of the commands collecting the DUT state, taken at the same time.
+    """
+
+    def __init__(self, hostname, outputs, taken_at=None):
+        """
+        @param hostname: Hostname of the DUT.
+        @param outputs: Dict of output name to {"rc": int, "stdout": str, "stderr": str}.
+        @param taken_at: Local time the snapshot was taken at.
+        """
+        self.hostname = hostname
+        self.outputs = outputs
+        self.taken_at = taken_at if taken_at is not None else time.time()
+
+    @classmethod
+    def take(cls, dut):
+        """
+        @summary: Take a snapshot of the DUT state with a single run of the snapshot script.
+        @param dut: The SonicHost or MultiAsicSonicHost.
+        @return: DutStateSnapshot, or None if the snapshot script failed.
+        """
+        try:
+            res = dut.shell(build_snapshot_cmd(build_snapshot_commands(dut)), module_ignore_errors=True,
+                            verbose=False)
+            taken_at = time.time()
+            if res["rc"] != 0:
+                logger.warning("Failed to take DUT state snapshot on {}: {}".format(dut.hostname, res["stderr"]))
+                return None
+            return cls(dut.hostname, json.loads(res["stdout"]), taken_at)
+        except Exception as e:
+            logger.warning("Failed to take DUT state snapshot on {}: {}".format(dut.hostname, repr(e)))
+            return None
+
+    def get(self, name):
+        """
+        @summary: Get the output of a command in the shape of a shell module result.
+        @return: Dict with rc, stdout, stdout_lines, stderr keys, or None if the command is not in the snapshot.
+        """
+        output = self.outputs.get(name)
+        if output is None:
+            return None
+        return dict(output, stdout_lines=output["stdout"].splitlines())
+
+    def digest(self, names):
+        """
+        @summary: Get a digest of the outputs of commands, to find out whether they changed between snapshots.
+        @return: The digest, or None if a command is not in the snapshot.
+        """
+        if any(name not in self.outputs for name in names):
+            return None
+        content = json.dumps([self.outputs[name] for name in names], sort_keys=True)
+        return hashlib.sha256(content.encode()).hexdigest()
+
+    def networking_uptime(self):
+        """
+        @summary: Get the time since the networking service was started, as SonicHost.get_networking_uptime.
+            The time elapsed since the snapshot was taken is included.
+        @return: timedelta, or None if it cannot be parsed.
+        """
+        start_time = self.get(NETWORKING_START_TIME)
+        now_time = self.get(NOW_TIME)
+        if not start_time or not now_time or start_time["rc"] != 0 or now_time["rc"] != 0:
+            return None
+        try:
+            start = datetime.strptime(start_time["stdout"].split("=", 1)[1].strip(), "%a %Y-%m-%d %H:%M:%S %Z")
+            now = datetime.strptime(now_time["stdout"].strip(), "%Y-%m-%d %H:%M:%S")
+        except (IndexError, ValueError) as e:
+            logger.warning("Failed to parse networking start time in snapshot of {}: {}".format(self.hostname, e))
+            return None
+        return now - start + timedelta(seconds=time.time() - self.taken_at)
+
+    def monit_services_status(self):
+        """
+        @summary: Get the status of the services monitored by Monit, as SonicHost.get_monit_services_status.
+        @return: Dict of service name to service status and type, or None if not in the snapshot.
+        """
+        monit_status = self.get(MONIT_STATUS)
+        if monit_status is None:
+            return None
+        if monit_status["rc"] != 0:
+            return {}
+        return SonicHost.parse_monit_services_status(monit_status["stdout_lines"])
+
+    def redis_client_list(self, namespace):
+        """
+        @summary: Get the output lines of redis-cli client list of a namespace.
+        @return: List of lines, or None if not in the snapshot or failed.
+        """
+        client_list = self.get(redis_client_list_name(namespace))
+        if client_list is None or client_list["rc"] != 0:
+            return None
+        return client_list["stdout_lines"]
+
+
+def take_snapshots(duthosts):
+    """
+    @summary: Take the DUT state snapshots of all DUTs in parallel, and make them the current snapshots.
+    @return: Dict of hostname to DutStateSnapshot or None.
+    """
+    snapshots = {}
+
+    def _take_snapshot(dut):
+        snapshots[dut.hostname] = DutStateSnapshot.take(dut)
+
+    with SafeThreadPoolExecutor(max_workers=8) as executor:
+        for dut in duthosts:
+            executor.submit(_take_snapshot, dut)
+
+    _current_snapshots.clear()
+    _current_snapshots.update(snapshots)
+    return snapshots
+
+
+def get_snapshot(hostname):
+    """
+    @summary: Get the current DUT state snapshot of a DUT.
+    @return: DutStateSnapshot, or None if there is no snapshot of the DUT.
+    """
+    return _current_snapshots.get(hostname)
+
+
+def clear_snapshots():
+    _current_snapshots.clear()
+
+
+def save_pre_test_state(module_id, snapshots, items_results):
+    """
+    @summary: Keep the snapshots and results of the pre-test check items of a module.
+    @param module_id: Node ID of the module.
+    @param snapshots: Dict of hostname to DutStateSnapshot or None.
+    @param items_results: Dict of check item to its results.
+    """
+    _pre_test_states.clear()
+    _pre_test_states[module_id] = (snapshots, copy.deepcopy(items_results))
+
+
+def pop_unchanged_results(module_id, snapshots, check_items, check_inputs):
+    """
+    @summary: Get the pre-test results of the check items of a module which passed on the snapshot, and whose
+        inputs are byte-identical in the pre-test and current snapshots of all DUTs. The pre-test state of the module is
+        discarded.
+    @param module_id: Node ID of the module.
+    @param snapshots: Dict of hostname to the current DutStateSnapshot or None.
+    @param check_items: Check items to be run.
+    @param check_inputs: Dict of check item to the names of the outputs of the snapshot its result depends on.
+    @return: Dict of check item to its pre-test results.
+    """
+    pre_test_state = _pre_test_states.pop(module_id, None)
+    if pre_test_state is None:
+        return {}
+    pre_snapshots, pre_items_results = pre_test_state
+    if set(pre_snapshots) != set(snapshots):
+        return {}
+
+    unchanged_results = {}
+    for item in check_items:
+        if item not in check_inputs or item not in pre_items_results:
+            continue
+        results = pre_items_results[item]
+        results_list = results if isinstance(results, list) else [results]
+        if any(result.get("failed", True) or not result.get(SNAPSHOT_RESULT_KEY) for result in results_list if result):
+            continue
+        unchanged = all(
+            _is_unchanged(pre_snapshots[hostname], snapshot, check_inputs[item])
+            for hostname, snapshot in snapshots.items()
+        )
+        if unchanged:
+            unchanged_results[item] = results
+    return unchanged_results
+
+
+def _is_unchanged(pre_snapshot, snapshot, names):
+    if pre_snapshot is None or snapshot is None:
+        return False
+    digest = snapshot.digest(names)
+    return digest is not None and digest == pre_snapshot.digest(names)
@@ -10,7 +10,7 @@ from .base import Reporter, Metric, MetricCollection, MetricDefinition, default_
 from .metrics import GaugeMetric, HistogramMetric
 
 # Reporters
-from .reporters import TSReporter, DBReporter
+from .reporters import TSReporter, DBReporter, read_metric_records
 
 # Device metric collections
 from .metrics.device import (
@@ -52,7 +52,7 @@ __all__ = [
     'GaugeMetric', 'HistogramMetric',
 
     # Reporters
-    'TSReporter', 'DBReporter',
+    'TSReporter', 'DBReporter', 'read_metric_records',
 
     # Device metrics
     'DevicePortMetrics', 'DevicePSUMetrics', 'DeviceQueueMetrics',
@@ -79,6 +79,8 @@ METRIC_NAMESPACE_TEST_RESULT = "test.result"
 
 # Environment Variables
 ENV_SONIC_MGMT_TS_REPORT_ENDPOINT = "SONIC_MGMT_TS_REPORT_ENDPOINT"
+ENV_SONIC_MGMT_TS_REPORT_FALLBACK_DIR = "SONIC_MGMT_TS_REPORT_FALLBACK_DIR"
+ENV_SONIC_MGMT_DB_REPORT_FORMAT = "SONIC_MGMT_DB_REPORT_FORMAT"
 ENV_SONIC_MGMT_GENERATE_BASELINE = "SONIC_MGMT_GENERATE_BASELINE"
 ENV_SONIC_MGMT_TESTBED_NAME = "SONIC_MGMT_TESTBED_NAME"
 ENV_SONIC_MGMT_BUILD_VERSION = "SONIC_MGMT_BUILD_VERSION"
@@ -102,6 +104,10 @@ UNIT_ROUTES = "routes"
 REPORTER_TYPE_TS = "ts"
 REPORTER_TYPE_DB = "db"
 
+# DB Reporter Output Formats
+DB_REPORTER_FORMAT_JSON = "json"
+DB_REPORTER_FORMAT_JSONL = "jsonl"
+
 # Metric Types
 METRIC_TYPE_GAUGE = "gauge"
 METRIC_TYPE_HISTOGRAM = "histogram"
@@ -5,7 +5,10 @@ Histogram metrics track the distribution of values over time,
 useful for measuring latencies, response times, or request sizes.
 """
 
-from typing import List, Optional, Dict
+from bisect import bisect_left
+from collections import Counter
+from functools import partial
+from typing import Iterable, List, Optional, Dict
 from ..base import HistogramRecordData, Metric, Reporter, MetricDataEntry
 from ..constants import METRIC_TYPE_HISTOGRAM
 
@@ -28,11 +31,18 @@ class HistogramMetric(Metric):
             description: Human-readable description
             unit: Unit of measurement (e.g., 'seconds', 'milliseconds', 'bytes')
             reporter: Reporter instance to send measurements to
-            buckets: Optional bucket boundaries for histogram distribution
+            buckets: Bucket boundaries for histogram distribution, in increasing order
             common_labels: Common labels to apply to all measurements of this metric
+
+        Raises:
+            ValueError: If the bucket boundaries are not in increasing order
         """
         super().__init__(METRIC_TYPE_HISTOGRAM, name, description, unit, reporter, None, common_labels)
+        if any(lower >= upper for lower, upper in zip(buckets, buckets[1:])):
+            raise ValueError(f"Histogram {name} bucket boundaries must be in increasing order: {buckets}")
         self.buckets = buckets
+        # Index of the bucket of a value: the first bucket whose boundary is greater than or equal to the value
+        self._bucket_index = partial(bisect_left, buckets)
 
     def record(self, value: float, additional_labels: Optional[Dict[str, str]] = None):
         """
@@ -48,20 +58,39 @@ class HistogramMetric(Metric):
         # Update bucket counts and statistics
         self._insert_value_to_buckets(value, record_data)
 
-    def record_multi(self, values: List[float], additional_labels: Optional[Dict[str, str]] = None):
+    def record_multi(self, values: Iterable[float], additional_labels: Optional[Dict[str, str]] = None):
         """
         Record multiple measurements for this histogram metric.
 
+        The bucket counts and the statistics are updated once for all the values, which is much faster
+        than recording them one by one for large numbers of values.
+
         Args:
-            values: List of measured values for histogram distribution
+            values: Measured values for histogram distribution
             additional_labels: Additional labels for this specific measurement
         """
+        values = values if isinstance(values, (list, tuple)) else list(values)
+        if not values:
+            return
+
         labels_key = self._labels_to_key(additional_labels)
         record_data = self._get_or_new_record_data(labels_key, additional_labels)
 
         # Update bucket counts and statistics for all values
-        for value in values:
-            self._insert_value_to_buckets(value, record_data)
+        for bucket_index, count in Counter(map(self._bucket_index, values)).items():
+            record_data.bucket_counts[bucket_index] += count
+        record_data.total_count += len(values)
+
+        # Values are added in order to the current sum, so the sum is the same as recording them one by one
+        record_data.sum = sum(values, record_data.sum if record_data.sum is not None else 0)
+
+        values_min = min(values)
+        if record_data.min is None or values_min < record_data.min:
+            record_data.min = values_min
+
+        values_max = max(values)
+        if record_data.max is None or values_max > record_data.max:
+            record_data.max = values_max
 
     def record_bucket_counts(self, counts: List[float], additional_labels: Optional[Dict[str, str]] = None):
         """
@@ -94,7 +123,7 @@ class HistogramMetric(Metric):
             )
 
             # Store with labels
-            self._data[labels_key] = MetricDataEntry(data=record_data, labels=labels)
+            self._data[labels_key] = MetricDataEntry(data=record_data, labels=labels or {})
 
         return record_data
 
@@ -106,13 +135,8 @@ class HistogramMetric(Metric):
             value: The value to categorize into buckets
             record_data: The histogram record data to update
         """
-        for i, bucket_boundary in enumerate(self.buckets):
-            if value <= bucket_boundary:
-                record_data.bucket_counts[i] += 1
-                break
-        else:
-            # Value is greater than all bucket boundaries, add to overflow bucket
-            record_data.bucket_counts[-1] += 1
+        # Values greater than all bucket boundaries are counted in the overflow bucket, the last one
+        record_data.bucket_counts[self._bucket_index(value)] += 1
 
         record_data.total_count += 1
 
@@ -3,6 +3,6 @@ Reporter implementations for the SONiC telemetry framework.
 """
 
 from .ts_reporter import TSReporter
-from .db_reporter import DBReporter
+from .db_reporter import DBReporter, read_metric_records
 
-__all__ = ['TSReporter', 'DBReporter']
+__all__ = ['TSReporter', 'DBReporter', 'read_metric_records']
@@ -0,0 +1,197 @@
+"""
+Background exporter for the SONiC telemetry framework reporters.
+
+Reports are queued by the test thread and exported by a background thread,
+so exporting never blocks the test. Queued reports are exported in batches,
+failed exports are retried with backoff, and the reports which cannot be
+exported are handed to a fallback, e.g. written to a local file.
+"""
+
+import collections
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+
+class BackgroundExporter:
+    """
+    Bounded queue of reports exported in batches by a background thread.
+
+    The export function takes a batch of reports and returns True if they are exported.
+    When it fails, or raises, the batch is retried with exponential backoff, then handed to
+    the fallback function. When the queue is full, reports are handed to the fallback
+    function right away, so the memory used by the queue is bounded.
+    """
+
+    def __init__(self, name: str, export_func: Callable[[List[Any]], bool],
+                 fallback_func: Optional[Callable[[List[Any]], None]] = None,
+                 max_queue_size: int = 1000, max_batch_size: int = 32,
+                 max_retries: int = 3, retry_backoff: float = 1.0, max_retry_backoff: float = 30.0):
+        """
+        Initialize background exporter.
+
+        Args:
+            name: Name of the exporter, used in logs and for the thread name
+            export_func: Function exporting a batch of reports, returning True on success
+            fallback_func: Function taking the batches which could not be exported (default: drop them)
+            max_queue_size: Maximum number of reports waiting to be exported
+            max_batch_size: Maximum number of reports exported in one batch
+            max_retries: Number of retries of a failed export
+            retry_backoff: Seconds to wait before the first retry, doubled on each retry
+            max_retry_backoff: Maximum seconds to wait before a retry
+        """
+        self.name = name
+        self.export_func = export_func
+        self.fallback_func = fallback_func
+        self.max_queue_size = max_queue_size
+        self.max_batch_size = max_batch_size
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.max_retry_backoff = max_retry_backoff
+
+        self._queue = collections.deque()
+        self._condition = threading.Condition()
+        self._pending = 0   # Reports queued or being exported
+        self._closing = threading.Event()
+        self._closed = False
+        self._thread = None
+        self._stats = {"exported": 0, "fallback": 0, "dropped": 0, "retries": 0}
+
+    def submit(self, report: Any):
+        """
+        Queue a report to be exported, without waiting for the export.
+
+        Args:
+            report: Report passed in a batch to the export function
+        """
+        with self._condition:
+            if self._closed:
+                rejected = "closed"
+            elif len(self._queue) >= self.max_queue_size:
+                rejected = "full"
+            else:
+                rejected = None
+                self._queue.append(report)
+                self._pending += 1
+                self._start_thread()
+                self._condition.notify_all()
+
+        if rejected:
+            logging.warning(f"{self.name}: Export queue is {rejected}, report not exported")
+            self._fallback([report])
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until all queued reports are exported or handed to the fallback.
+
+        Args:
+            timeout: Maximum seconds to wait (default: wait forever)
+
+        Returns:
+            True if all reports were processed, False on timeout
+        """
+        with self._condition:
+            return self._condition.wait_for(lambda: self._pending == 0, timeout)
+
+    def close(self, timeout: Optional[float] = None):
+        """
+        Export the queued reports and stop the background thread.
+
+        Failed exports are not retried any more, and the reports still queued
+        after the timeout are handed to the fallback.
+
+        Args:
+            timeout: Maximum seconds to wait for the queued reports to be exported
+        """
+        self._closing.set()
+        self.flush(timeout)
+
+        with self._condition:
+            self._closed = True
+            remaining = list(self._queue)
+            self._queue.clear()
+            self._pending -= len(remaining)
+            self._condition.notify_all()
+            thread = self._thread
+
+        if remaining:
+            self._fallback(remaining)
+        if thread is not None:
+            thread.join(timeout)
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Get the number of reports exported, handed to the fallback and dropped, and the number of retries.
+        """
+        with self._condition:
+            return dict(self._stats, pending=self._pending)
+
+    def _start_thread(self):
+        """
+        Start the background thread if not running. Must be called with the condition held.
+        """
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        """
+        Export the queued reports in batches until closed.
+        """
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._queue or self._closed)
+                if not self._queue:
+                    return
+                batch = [self._queue.popleft() for _ in range(min(len(self._queue), self.max_batch_size))]
+
+            try:
+                self._export(batch)
+            except Exception as e:
+                logging.error(f"{self.name}: Failed to process {len(batch)} reports: {e}")
+            finally:
+                with self._condition:
+                    self._pending -= len(batch)
+                    self._condition.notify_all()
+
+    def _export(self, batch: List[Any]):
+        """
+        Export a batch, retrying with backoff, and hand it to the fallback if it cannot be exported.
+        """
+        backoff = self.retry_backoff
+        for attempt in range(self.max_retries + 1):
+            if attempt > 0:
+                # Don't wait for a broken endpoint when closing
+                if self._closing.wait(backoff):
+                    break
+                backoff = min(backoff * 2, self.max_retry_backoff)
+                with self._condition:
+                    self._stats["retries"] += 1
+
+            try:
+                if self.export_func(batch):
+                    with self._condition:
+                        self._stats["exported"] += len(batch)
+                    return
+                logging.warning(f"{self.name}: Export of {len(batch)} reports failed (attempt {attempt + 1})")
+            except Exception as e:
+                logging.warning(f"{self.name}: Export of {len(batch)} reports failed (attempt {attempt + 1}): {e}")
+
+        self._fallback(batch)
+
+    def _fallback(self, batch: List[Any]):
+        """
+        Hand reports which could not be exported to the fallback function, or drop them.
+        """
+        if self.fallback_func is not None:
+            try:
+                self.fallback_func(batch)
+                with self._condition:
+                    self._stats["fallback"] += len(batch)
+                return
+            except Exception as e:
+                logging.error(f"{self.name}: Fallback of {len(batch)} reports failed: {e}")
+
+        logging.error(f"{self.name}: Dropped {len(batch)} reports")
+        with self._condition:
+            self._stats["dropped"] += len(batch)
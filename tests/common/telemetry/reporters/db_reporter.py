@@ -3,15 +3,35 @@ Database (DB) Reporter for historical analysis and trend tracking.
 
 This reporter writes metrics to local files that can be uploaded to
 OLTP databases for historical analysis, reporting, and trend tracking.
+
+Two output formats are supported:
+
+- json: One JSON document per test file, rewritten on each report.
+- jsonl: An append-only line-delimited JSON stream. The test context, the
+  metric metadata and the label sets are written once, and each report is
+  appended as one columnar line referring to them, and flushed right away.
+  Use read_metric_records() to read the records back for post-processing.
 """
 
 import datetime
 import json
 import logging
 import os
-from typing import Optional, List
-from ..base import Reporter, HistogramRecordData
-from ..constants import REPORTER_TYPE_DB
+import uuid
+from typing import Dict, Iterator, Optional, List
+from ..base import Reporter, HistogramRecordData, MetricRecord
+from ..constants import (
+    REPORTER_TYPE_DB, DB_REPORTER_FORMAT_JSON, DB_REPORTER_FORMAT_JSONL,
+    ENV_SONIC_MGMT_DB_REPORT_FORMAT
+)
+
+DB_REPORTER_FORMATS = (DB_REPORTER_FORMAT_JSON, DB_REPORTER_FORMAT_JSONL)
+
+# Line types of the jsonl format
+JSONL_LINE_CONTEXT = "context"
+JSONL_LINE_METRIC = "metric"
+JSONL_LINE_LABELS = "labels"
+JSONL_LINE_REPORT = "report"
 
 
 class DBReporter(Reporter):
@@ -22,7 +42,8 @@ class DBReporter(Reporter):
     to databases for long-term storage, trend analysis, and reporting.
     """
 
-    def __init__(self, output_dir: Optional[str] = None, request=None, tbinfo=None):
+    def __init__(self, output_dir: Optional[str] = None, request=None, tbinfo=None,
+                 output_format: Optional[str] = None):
         """
         Initialize DB reporter with file output configuration.
 
@@ -30,14 +51,27 @@ class DBReporter(Reporter):
             output_dir: Directory for output files (default: current directory)
             request: pytest request object for test context
             tbinfo: testbed info fixture data
+            output_format: "json" or "jsonl" (default: from SONIC_MGMT_DB_REPORT_FORMAT env var, or "json")
         """
         super().__init__(REPORTER_TYPE_DB, request, tbinfo)
         self.output_dir = output_dir or os.getcwd()
+        self.output_format = output_format or os.environ.get(ENV_SONIC_MGMT_DB_REPORT_FORMAT,
+                                                             DB_REPORTER_FORMAT_JSON)
+        if self.output_format not in DB_REPORTER_FORMATS:
+            raise ValueError(f"Unsupported DB reporter output format '{self.output_format}', "
+                             f"expected one of {DB_REPORTER_FORMATS}")
+
+        # Ids of the definitions already written to the jsonl stream, the context id is unique
+        # so that the reporters of multiple test cases can append to the same file
+        self._stream_context_id = uuid.uuid4().hex
+        self._stream_metric_ids: Dict[tuple, int] = {}
+        self._stream_labels_ids: Dict[str, int] = {}
+        self._stream_context_written = False
 
         # Ensure output directory exists
         os.makedirs(self.output_dir, exist_ok=True)
 
-        logging.info(f"DBReporter initialized: output_dir={self.output_dir}")
+        logging.info(f"DBReporter initialized: output_dir={self.output_dir}, output_format={self.output_format}")
 
     def _report(self, timestamp: float):
         """
@@ -55,6 +89,10 @@ class DBReporter(Reporter):
         # Convert timestamp to datetime for ISO format
         timestamp_dt = datetime.datetime.fromtimestamp(timestamp / 1e9)  # timestamp is in nanoseconds
 
+        if self.output_format == DB_REPORTER_FORMAT_JSONL:
+            self._append_report(filepath, timestamp, timestamp_dt.isoformat())
+            return
+
         # Prepare data structure
         report_data = {
             "metadata": {
@@ -101,12 +139,113 @@ class DBReporter(Reporter):
             logging.error(f"DBReporter: Failed to write metric records to {filepath}: {e}")
             raise
 
+    def _append_report(self, filepath: str, timestamp: float, timestamp_iso: str):
+        """
+        Append all collected metrics to the jsonl stream as one report line.
+
+        The definitions of the context, metrics and label sets not yet in the file are
+        written before the report line, which refers to them by id.
+
+        Args:
+            filepath: Path of the jsonl file
+            timestamp: Timestamp for this reporting batch
+            timestamp_iso: Timestamp for this reporting batch in ISO format
+        """
+        if not os.path.exists(filepath):
+            # New file, or removed since the last report: all definitions need to be written again
+            self._stream_context_written = False
+            self._stream_metric_ids.clear()
+            self._stream_labels_ids.clear()
+
+        lines = []
+        if not self._stream_context_written:
+            lines.append({
+                "type": JSONL_LINE_CONTEXT,
+                "context": self._stream_context_id,
+                "reporter_type": self.reporter_type,
+                "test_context": self.test_context
+            })
+
+        report_line = {
+            "type": JSONL_LINE_REPORT,
+            "context": self._stream_context_id,
+            "timestamp": timestamp,
+            "timestamp_iso": timestamp_iso,
+            "metric": [],
+            "labels": [],
+            "data": []
+        }
+        for record in self.recorded_metrics:
+            report_line["metric"].append(self._get_stream_metric_id(record, lines))
+            report_line["labels"].append(self._get_stream_labels_id(record, lines))
+            report_line["data"].append(
+                record.data.to_dict() if isinstance(record.data, HistogramRecordData) else record.data)
+        lines.append(report_line)
+
+        try:
+            with open(filepath, 'a') as f:
+                f.write("".join(json.dumps(line, separators=(",", ":")) + "\n" for line in lines))
+                f.flush()
+            self._stream_context_written = True
+
+            logging.info(f"DBReporter: Successfully appended {len(self.recorded_metrics)} "
+                         f"metric records to {filepath}")
+
+        except Exception as e:
+            # The definitions may be partially written, write them again in the next report
+            self._stream_context_written = False
+            self._stream_metric_ids.clear()
+            self._stream_labels_ids.clear()
+            logging.error(f"DBReporter: Failed to append metric records to {filepath}: {e}")
+            raise
+
+    def _get_stream_metric_id(self, record: MetricRecord, lines: List[dict]) -> int:
+        """
+        Get the id of the metric of a record in the jsonl stream, adding its definition to lines if new.
+        """
+        metric = record.metric
+        buckets = getattr(metric, 'buckets', None)
+        key = (metric.name, metric.metric_type, metric.description, metric.unit,
+               tuple(buckets) if buckets is not None else None)
+        metric_id = self._stream_metric_ids.get(key)
+        if metric_id is None:
+            metric_id = self._stream_metric_ids[key] = len(self._stream_metric_ids)
+            definition = {
+                "type": JSONL_LINE_METRIC,
+                "context": self._stream_context_id,
+                "id": metric_id,
+                "metric_name": metric.name,
+                "metric_type": metric.metric_type,
+                "description": metric.description,
+                "unit": metric.unit
+            }
+            if buckets is not None:
+                definition["buckets"] = buckets
+            lines.append(definition)
+        return metric_id
+
+    def _get_stream_labels_id(self, record: MetricRecord, lines: List[dict]) -> int:
+        """
+        Get the id of the label set of a record in the jsonl stream, adding its definition to lines if new.
+        """
+        key = json.dumps(record.labels, sort_keys=True)
+        labels_id = self._stream_labels_ids.get(key)
+        if labels_id is None:
+            labels_id = self._stream_labels_ids[key] = len(self._stream_labels_ids)
+            lines.append({
+                "type": JSONL_LINE_LABELS,
+                "context": self._stream_context_id,
+                "id": labels_id,
+                "labels": record.labels
+            })
+        return labels_id
+
     def _generate_filename(self) -> str:
         """
         Generate filename based on test file path.
 
         Returns:
-            Filename in format: <test_file_path_without_extension>.metrics.json,
+            Filename in format: <test_file_path_without_extension>.metrics.<output_format>,
             e.g. "/dns/static_dns/test_static_dns.metrics.json"
         """
         # Get test file path from test context
@@ -116,7 +255,7 @@ class DBReporter(Reporter):
         if test_file.endswith('.py'):
             test_file = test_file[:-3]
 
-        return f"{test_file}.metrics.json"
+        return f"{test_file}.metrics.{self.output_format}"
 
     def get_output_files(self) -> List[str]:
         """
@@ -127,7 +266,7 @@ class DBReporter(Reporter):
         """
         files = []
         for filename in os.listdir(self.output_dir):
-            if filename.endswith('.metrics.json'):
+            if filename.endswith(tuple(f".metrics.{output_format}" for output_format in DB_REPORTER_FORMATS)):
                 files.append(os.path.join(self.output_dir, filename))
         return sorted(files)
 
@@ -144,3 +283,64 @@ class DBReporter(Reporter):
                 logging.info(f"DBReporter: Removed output file {filepath}")
             except Exception as e:
                 logging.warning(f"DBReporter: Failed to remove {filepath}: {e}")
+
+
+def read_metric_records(filepath: str) -> Iterator[dict]:
+    """
+    Read the metric records of a DBReporter output file, in json or jsonl format.
+
+    The records are yielded in the order they were reported, in the same shape as the
+    records of the json format, with the test context of the reporter added.
+
+    A jsonl file can be read while it is still being written, or after the test was
+    aborted: an incomplete last line is ignored.
+
+    Args:
+        filepath: Path of a .metrics.json or .metrics.jsonl file
+
+    Yields:
+        Records with metric_name, metric_type, description, unit, labels, data,
+        timestamp, timestamp_iso and test_context keys
+    """
+    if not filepath.endswith(f".metrics.{DB_REPORTER_FORMAT_JSONL}"):
+        with open(filepath) as f:
+            report_data = json.load(f)
+        test_context = report_data["metadata"]["test_context"]
+        for record in report_data["records"]:
+            yield dict(record, test_context=test_context)
+        return
+
+    contexts = {}
+    with open(filepath) as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.endswith("\n"):
+                logging.warning(f"DBReporter: Ignoring incomplete line {line_number} of {filepath}")
+                return
+
+            line = json.loads(line)
+            line_type = line["type"]
+            if line_type == JSONL_LINE_CONTEXT:
+                contexts[line["context"]] = {"test_context": line["test_context"], "metric": {}, "labels": {}}
+            elif line_type == JSONL_LINE_METRIC:
+                contexts[line["context"]]["metric"][line["id"]] = line
+            elif line_type == JSONL_LINE_LABELS:
+                contexts[line["context"]]["labels"][line["id"]] = line["labels"]
+            elif line_type == JSONL_LINE_REPORT:
+                context = contexts[line["context"]]
+                for metric_id, labels_id, data in zip(line["metric"], line["labels"], line["data"]):
+                    metric = context["metric"][metric_id]
+                    if "buckets" in metric and isinstance(data, dict):
+                        data = dict(data, buckets=metric["buckets"])
+                    yield {
+                        "metric_name": metric["metric_name"],
+                        "metric_type": metric["metric_type"],
+                        "description": metric["description"],
+                        "unit": metric["unit"],
+                        "labels": context["labels"][labels_id],
+                        "data": data,
+                        "timestamp": line["timestamp"],
+                        "timestamp_iso": line["timestamp_iso"],
+                        "test_context": context["test_context"]
+                    }
+            else:
+                raise ValueError(f"Unknown line type '{line_type}' at line {line_number} of {filepath}")
@@ -3,16 +3,24 @@ TimeSeries (TS) Reporter for real-time monitoring via OTLP.
 
 This reporter sends metrics directly to OpenTelemetry collectors using
 the OTLP protocol for real-time monitoring, dashboards, and alerting.
+
+The reports are exported by a background thread, so reporting doesn't block
+the test. The OTLP exporter and the export queue are shared by all reporters
+sending to the same endpoint, so the connection to the collector is reused.
 """
 
+import atexit
 import logging
 import os
+import threading
+from functools import partial
 from typing import Dict, Optional, List
 from ..base import Reporter, MetricRecord
 from ..constants import (
     REPORTER_TYPE_TS, METRIC_TYPE_GAUGE, METRIC_TYPE_HISTOGRAM,
-    ENV_SONIC_MGMT_TS_REPORT_ENDPOINT
+    ENV_SONIC_MGMT_TS_REPORT_ENDPOINT, ENV_SONIC_MGMT_TS_REPORT_FALLBACK_DIR
 )
+from .background_exporter import BackgroundExporter
 
 # OTLP exporter imports (optional - graceful degradation if not available)
 try:
@@ -31,6 +39,86 @@ except ImportError as e:
     OTLP_AVAILABLE = False
     logging.warning(f"OTLP exporter not available, TSReporter will operate in mock mode: {e}")
 
+# File the reports which cannot be exported are written to, in the fallback directory
+TS_REPORTER_FALLBACK_FILE = "ts_reporter.otlp.jsonl"
+
+# Seconds to wait for the queued reports to be exported on exit
+TS_REPORTER_EXIT_TIMEOUT = 30
+
+# OTLP exporters and their background exporters, by endpoint, headers and fallback directory
+_background_exporters: Dict[tuple, tuple] = {}
+_background_exporters_lock = threading.Lock()
+
+
+def _get_background_exporter(endpoint: str, headers: Dict[str, str],
+                             fallback_dir: Optional[str]) -> tuple:
+    """
+    Get the OTLP exporter of an endpoint and its background exporter, creating them on first use.
+
+    Returns:
+        (OTLPMetricExporter, BackgroundExporter), or (None, None) if the OTLP exporter cannot be created
+    """
+    key = (endpoint, tuple(sorted(headers.items())), fallback_dir)
+    with _background_exporters_lock:
+        if key in _background_exporters:
+            return _background_exporters[key]
+
+        try:
+            exporter = OTLPMetricExporter(endpoint=endpoint, headers=headers)
+            logging.info(f"TSReporter: OTLP exporter initialized for endpoint {endpoint}")
+        except Exception as e:
+            logging.error(f"TSReporter: Failed to initialize OTLP exporter: {e}")
+            return None, None
+
+        background_exporter = BackgroundExporter(
+            name=f"TSReporter({endpoint})",
+            export_func=partial(_export_batch, exporter),
+            fallback_func=partial(_write_fallback_file, fallback_dir) if fallback_dir else None
+        )
+        _background_exporters[key] = (exporter, background_exporter)
+        return exporter, background_exporter
+
+
+def _export_batch(exporter: "OTLPMetricExporter", batch: List["MetricsData"]) -> bool:
+    """
+    Export a batch of reports in one OTLP request.
+    """
+    metrics_data = MetricsData(resource_metrics=[
+        resource_metrics for report in batch for resource_metrics in report.resource_metrics
+    ])
+    result = exporter.export(metrics_data)
+    if result.name != 'SUCCESS':
+        return False
+
+    logging.info(f"TSReporter: Successfully exported {len(batch)} reports to OTLP endpoint")
+    return True
+
+
+def _write_fallback_file(fallback_dir: str, batch: List["MetricsData"]):
+    """
+    Append the reports which cannot be exported to the fallback file, one OTLP JSON report per line.
+    """
+    os.makedirs(fallback_dir, exist_ok=True)
+    filepath = os.path.join(fallback_dir, TS_REPORTER_FALLBACK_FILE)
+    with open(filepath, 'a') as f:
+        for report in batch:
+            f.write(report.to_json(indent=None) + "\n")
+    logging.warning(f"TSReporter: Wrote {len(batch)} reports not exported to {filepath}")
+
+
+@atexit.register
+def _close_background_exporters():
+    """
+    Export the queued reports before exiting.
+    """
+    with _background_exporters_lock:
+        background_exporters = list(_background_exporters.values())
+        _background_exporters.clear()
+
+    for exporter, background_exporter in background_exporters:
+        background_exporter.close(TS_REPORTER_EXIT_TIMEOUT)
+        exporter.shutdown()
+
 
 class TSReporter(Reporter):
     """
@@ -41,7 +129,7 @@ class TSReporter(Reporter):
     """
 
     def __init__(self, endpoint: Optional[str] = None, headers: Optional[Dict[str, str]] = None,
-                 request=None, tbinfo=None):
+                 request=None, tbinfo=None, fallback_dir: Optional[str] = None):
         """
         Initialize TS reporter with OTLP exporter.
 
@@ -50,32 +138,43 @@ class TSReporter(Reporter):
             headers: Additional headers for OTLP requests
             request: pytest request object for test context
             tbinfo: testbed info fixture data
+            fallback_dir: Directory of the file the reports which cannot be exported are written to
+                          (default: from SONIC_MGMT_TS_REPORT_FALLBACK_DIR env var, or drop them)
         """
         super().__init__(REPORTER_TYPE_TS, request, tbinfo)
 
         # Configuration
         self.endpoint = endpoint or os.environ.get(ENV_SONIC_MGMT_TS_REPORT_ENDPOINT, 'http://localhost:4317')
         self.headers = headers or {}
+        self.fallback_dir = fallback_dir or os.environ.get(ENV_SONIC_MGMT_TS_REPORT_FALLBACK_DIR)
         self.mock_exporter = None  # For testing compatibility
         self._setup_exporter()
 
     def _setup_exporter(self):
         """
-        Set up OTLP metric exporter.
+        Set up OTLP metric exporter, shared with the other reporters of the same endpoint.
         """
+        self.background_exporter = None
+        self.exporter = None
         if not OTLP_AVAILABLE:
-            self.exporter = None
             return
 
-        try:
-            self.exporter = OTLPMetricExporter(
-                endpoint=self.endpoint,
-                headers=self.headers
-            )
-            logging.info(f"TSReporter: OTLP exporter initialized for endpoint {self.endpoint}")
-        except Exception as e:
-            logging.error(f"TSReporter: Failed to initialize OTLP exporter: {e}")
-            self.exporter = None
+        self.exporter, self.background_exporter = _get_background_exporter(
+            self.endpoint, self.headers, self.fallback_dir)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until the reports queued for export are exported.
+
+        Args:
+            timeout: Maximum seconds to wait (default: wait forever)
+
+        Returns:
+            True if all reports were exported or written to the fallback file, False on timeout
+        """
+        if self.background_exporter is None:
+            return True
+        return self.background_exporter.flush(timeout)
 
     def set_mock_exporter(self, mock_exporter_func):
         """
@@ -248,17 +347,13 @@ class TSReporter(Reporter):
 
     def _export_metrics(self, metrics_data: "MetricsData"):
         """
-        Export MetricsData using the configured OTLP exporter.
+        Queue MetricsData to be exported by the background exporter.
 
         Args:
             metrics_data: MetricsData object to export
         """
-        if self.exporter:
-            result = self.exporter.export(metrics_data)
-            if result.name == 'SUCCESS':
-                logging.info("TSReporter: Successfully exported to OTLP endpoint")
-            else:
-                logging.warning(f"TSReporter: Export failed with result: {result}")
+        if self.background_exporter:
+            self.background_exporter.submit(metrics_data)
         else:
             logging.warning("TSReporter: No exporter available")
 
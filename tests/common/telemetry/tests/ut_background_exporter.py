@@ -0,0 +1,126 @@
+"""
+Tests for BackgroundExporter, the export queue of TSReporter.
+
+This module focuses on testing the background export behavior:
+- Reports are exported by a background thread, without blocking the caller
+- Queued reports are exported in batches
+- Failed exports are retried with backoff, then handed to the fallback
+- The queue is bounded, and closing it hands the queued reports to the fallback
+"""
+
+import threading
+
+import pytest
+
+from common.telemetry.reporters.background_exporter import BackgroundExporter
+
+pytestmark = [
+    pytest.mark.topology('any'),
+    pytest.mark.disable_loganalyzer
+]
+
+
+class BlockingExport:
+    """Export function recording the batches, blocked until released."""
+
+    def __init__(self, results=None):
+        self.batches = []
+        self.results = list(results or [])
+        self.released = threading.Event()
+        self.called = threading.Event()
+
+    def __call__(self, batch):
+        self.called.set()
+        self.released.wait(10)
+        self.batches.append(list(batch))
+        if self.results:
+            result = self.results.pop(0)
+            if isinstance(result, Exception):
+                raise result
+            return result
+        return True
+
+
+def test_background_export_batches():
+    """Test reports queued while an export is in progress are exported in one batch."""
+    export = BlockingExport()
+    exporter = BackgroundExporter("test", export, max_batch_size=3)
+
+    exporter.submit(1)
+    assert export.called.wait(10)
+    # The export is in progress, submitting doesn't wait for it
+    for report in range(2, 7):
+        exporter.submit(report)
+    assert exporter.get_stats()["pending"] == 6
+
+    export.released.set()
+    assert exporter.flush(10)
+    assert export.batches == [[1], [2, 3, 4], [5, 6]]
+    assert exporter.get_stats() == {"exported": 6, "fallback": 0, "dropped": 0, "retries": 0, "pending": 0}
+    exporter.close(10)
+
+
+def test_background_export_retry_and_fallback():
+    """Test failed exports are retried, then handed to the fallback."""
+    export = BlockingExport(results=[False, RuntimeError("unavailable"), True, False, False, False])
+    export.released.set()
+    fallback_batches = []
+    exporter = BackgroundExporter("test", export, fallback_func=fallback_batches.append,
+                                  max_retries=2, retry_backoff=0.01)
+
+    exporter.submit("report-1")
+    assert exporter.flush(10)
+    assert export.batches == [["report-1"]] * 3
+    assert fallback_batches == []
+
+    exporter.submit("report-2")
+    assert exporter.flush(10)
+    assert fallback_batches == [["report-2"]]
+    assert exporter.get_stats() == {"exported": 1, "fallback": 1, "dropped": 0, "retries": 4, "pending": 0}
+    exporter.close(10)
+
+
+def test_background_export_bounded_queue():
+    """Test reports submitted when the queue is full are handed to the fallback right away."""
+    export = BlockingExport()
+    fallback_batches = []
+    exporter = BackgroundExporter("test", export, fallback_func=fallback_batches.append, max_queue_size=2)
+
+    exporter.submit(1)
+    assert export.called.wait(10)
+    exporter.submit(2)
+    exporter.submit(3)
+    exporter.submit(4)
+    assert fallback_batches == [[4]]
+
+    export.released.set()
+    assert exporter.flush(10)
+    assert export.batches == [[1], [2, 3]]
+    exporter.close(10)
+
+
+def test_background_export_close():
+    """Test closing hands the reports not exported in time to the fallback, and drops them without fallback."""
+    export = BlockingExport(results=[False])
+    fallback_batches = []
+    exporter = BackgroundExporter("test", export, fallback_func=fallback_batches.append,
+                                  max_batch_size=1, retry_backoff=60)
+
+    exporter.submit(1)
+    assert export.called.wait(10)
+    exporter.submit(2)
+    threading.Timer(0.5, export.released.set).start()
+    # The failed export of 1 is not retried, 2 is not exported before the timeout
+    exporter.close(0.2)
+    assert fallback_batches == [[2]]
+    export.released.wait(10)
+    exporter._thread.join(10)
+    assert fallback_batches == [[2], [1]]
+
+    exporter.submit(3)
+    assert fallback_batches[-1] == [3]
+
+    exporter = BackgroundExporter("test", export)
+    exporter.close()
+    exporter.submit(4)
+    assert exporter.get_stats()["dropped"] == 1
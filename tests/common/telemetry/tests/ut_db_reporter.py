@@ -6,6 +6,8 @@ JSON files for validation. When SONIC_MGMT_GENERATE_BASELINE=1, it generates
 new baseline files instead of testing.
 """
 
+import json
+import os
 import tempfile
 from unittest.mock import Mock
 
@@ -15,7 +17,7 @@ import pytest
 from common.telemetry import (
     GaugeMetric, HistogramMetric
 )
-from common.telemetry.reporters.db_reporter import DBReporter
+from common.telemetry.reporters.db_reporter import DBReporter, read_metric_records
 from .common_utils import validate_db_reporter_output
 
 pytestmark = [
@@ -103,6 +105,100 @@ class TestDBReporter:
         # Validate against baseline
         validate_db_reporter_output(db_reporter)
 
+    def _report_metrics(self, output_format, testcases=("test_case_1", "test_case_2")):
+        """Report gauge and histogram metrics twice per test case, and return the output file."""
+        self.mock_request.node.fspath.strpath = "/test/path/test_stream.py"
+        for testcase in testcases:
+            self.mock_request.node.name = testcase
+            db_reporter = DBReporter(
+                output_dir=self.temp_dir,
+                request=self.mock_request,
+                tbinfo=self.mock_tbinfo,
+                output_format=output_format
+            )
+            gauge_metric = GaugeMetric(
+                name="test.stream.gauge",
+                description="Gauge metric",
+                unit="percent",
+                reporter=db_reporter
+            )
+            histogram_metric = HistogramMetric(
+                name="test.stream.histogram",
+                description="Histogram metric",
+                unit="milliseconds",
+                reporter=db_reporter,
+                buckets=[1.0, 2.0, 5.0]
+            )
+            for iteration in range(2):
+                gauge_metric.record(10.0 + iteration, {"device.id": "dut-01"})
+                gauge_metric.record(20.0 + iteration, {"device.id": "dut-02"})
+                histogram_metric.record_multi([0.5, 3, 8], {"device.id": "dut-01"})
+                db_reporter.report(timestamp=1234567890000000000 + iteration)
+
+        output_file = os.path.join(self.temp_dir, f"test_stream.metrics.{output_format}")
+        assert output_file in db_reporter.get_output_files()
+        return output_file
+
+    def test_db_reporter_jsonl_append(self):
+        """Test the jsonl stream writes the definitions once and appends each report."""
+        output_file = self._report_metrics("jsonl")
+        assert output_file.endswith("test_stream.metrics.jsonl")
+
+        with open(output_file) as f:
+            lines = [json.loads(line) for line in f]
+        line_types = [line["type"] for line in lines]
+        # Per test case: context, 2 metrics and 2 label sets once, then one line per report
+        assert line_types == ["context", "metric", "labels", "labels", "metric", "report", "report"] * 2
+        assert lines[0]["test_context"]["test.testcase"] == "test_case_1"
+        assert lines[7]["test_context"]["test.testcase"] == "test_case_2"
+        assert lines[0]["context"] != lines[7]["context"]
+        assert lines[4]["buckets"] == [1.0, 2.0, 5.0]
+        assert lines[5]["metric"] == [0, 0, 1]
+        assert lines[5]["labels"] == [0, 1, 0]
+        assert lines[5]["data"][:2] == [10.0, 20.0]
+
+        records = list(read_metric_records(output_file))
+        assert len(records) == 12
+        assert [record["test_context"]["test.testcase"] for record in records] == \
+            ["test_case_1"] * 6 + ["test_case_2"] * 6
+        assert records[4]["labels"] == {"device.id": "dut-02"}
+        assert records[4]["data"] == 21.0
+        assert records[4]["timestamp"] == 1234567890000000001
+        assert records[5]["data"]["bucket_counts"] == [1, 0, 1, 1]
+        assert records[5]["data"]["buckets"] == [1.0, 2.0, 5.0]
+
+    def test_db_reporter_jsonl_matches_json(self):
+        """Test the records read from the jsonl stream are the records of the json output."""
+        jsonl_records = list(read_metric_records(self._report_metrics("jsonl", testcases=["test_case_1"])))
+
+        # The json output only keeps the last report
+        json_records = list(read_metric_records(self._report_metrics("json", testcases=["test_case_1"])))
+        assert len(json_records) == 3
+        assert jsonl_records[3:] == json_records
+
+    def test_db_reporter_jsonl_removed_file(self):
+        """Test the definitions are written again when the stream file is removed."""
+        output_file = self._report_metrics("jsonl", testcases=["test_case_1"])
+        os.remove(output_file)
+        self._report_metrics("jsonl", testcases=["test_case_1"])
+
+        records = list(read_metric_records(output_file))
+        assert len(records) == 6
+
+    def test_read_metric_records_incomplete_line(self):
+        """Test an incomplete last line, e.g. of an aborted test, is ignored."""
+        output_file = self._report_metrics("jsonl", testcases=["test_case_1"])
+        with open(output_file, "a") as f:
+            f.write('{"type":"report","context":')
+
+        assert len(list(read_metric_records(output_file))) == 6
+
+    def test_db_reporter_invalid_format(self):
+        """Test an unsupported output format is rejected."""
+        with pytest.raises(ValueError):
+            DBReporter(output_dir=self.temp_dir, request=self.mock_request, tbinfo=self.mock_tbinfo,
+                       output_format="parquet")
+
 
 if __name__ == "__main__":
     # Allow running tests directly
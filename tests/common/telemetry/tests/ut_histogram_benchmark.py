@@ -0,0 +1,91 @@
+"""
+Microbenchmark of HistogramMetric recording.
+
+Records the same samples one by one with record, in bulk with record_multi and with a
+reference linear bucketing, verifies that they build the same histogram and logs the
+recording rate of each, so regressions of the bucketing cost are visible in the test log.
+"""
+
+import logging
+import random
+import time
+
+import pytest
+
+from common.telemetry import HistogramMetric
+
+
+pytestmark = [
+    pytest.mark.topology('any'),
+    pytest.mark.disable_loganalyzer
+]
+
+logger = logging.getLogger(__name__)
+
+# Latency buckets in milliseconds, the typical shape of the buckets of telemetry tests
+BUCKETS = [0.1 * 2 ** i for i in range(24)]
+SAMPLES_NUMBER = 200000
+
+
+def linear_histogram(buckets, values):
+    """Reference histogram, bucketing each value with a linear scan of the bucket boundaries."""
+    bucket_counts = [0] * (len(buckets) + 1)
+    for value in values:
+        for i, bucket_boundary in enumerate(buckets):
+            if value <= bucket_boundary:
+                bucket_counts[i] += 1
+                break
+        else:
+            bucket_counts[-1] += 1
+    return bucket_counts
+
+
+def new_histogram_metric(name, reporter):
+    return HistogramMetric(
+        name=name,
+        description="Benchmark latency distribution",
+        unit="milliseconds",
+        reporter=reporter,
+        buckets=BUCKETS
+    )
+
+
+def test_histogram_recording_benchmark(mock_reporter):
+    """Benchmark record and record_multi against a linear bucketing, and check they agree."""
+    rng = random.Random(0)
+    # Exponentially distributed latencies, plus values on the bucket boundaries
+    values = [rng.expovariate(1 / 50.0) for _ in range(SAMPLES_NUMBER)] + BUCKETS
+
+    start = time.perf_counter()
+    expected_bucket_counts = linear_histogram(BUCKETS, values)
+    linear_time = time.perf_counter() - start
+
+    single_metric = new_histogram_metric("benchmark.latency.single", mock_reporter)
+    start = time.perf_counter()
+    for value in values:
+        single_metric.record(value)
+    single_time = time.perf_counter() - start
+
+    multi_metric = new_histogram_metric("benchmark.latency.multi", mock_reporter)
+    start = time.perf_counter()
+    multi_metric.record_multi(values)
+    multi_time = time.perf_counter() - start
+
+    mock_reporter.gather_all_recorded_metrics()
+    records = {record.metric.name: record.data for record in mock_reporter.recorded_metrics}
+    for name in ("benchmark.latency.single", "benchmark.latency.multi"):
+        data = records[name]
+        assert data.bucket_counts == expected_bucket_counts, name
+        assert data.total_count == len(values)
+        assert data.sum == sum(values)
+        assert data.min == min(values)
+        assert data.max == max(values)
+
+    for label, elapsed in (("linear scan", linear_time), ("record", single_time), ("record_multi", multi_time)):
+        logger.info("Histogram of {} values in {} buckets with {}: {:.3f}s, {:.0f} values/s".format(
+            len(values), len(BUCKETS), label, elapsed, len(values) / elapsed))
+
+
+if __name__ == "__main__":
+    # Allow running tests directly
+    pytest.main([__file__])
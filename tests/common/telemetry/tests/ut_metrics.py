@@ -72,6 +72,43 @@ def test_recording_histogram_metric(mock_reporter):
     assert record.data.total_count == 19
 
 
+def test_histogram_metric_buckets(mock_reporter):
+    """Test that HistogramMetric counts values in the first bucket whose boundary is greater or equal."""
+    metric = HistogramMetric(
+        name="response.time",
+        description="API response time distribution",
+        unit="milliseconds",
+        reporter=mock_reporter,
+        buckets=[1.0, 2.0, 5.0, 10.0]
+    )
+
+    # Values on the boundaries, between them, below the first and above the last one
+    metric.record(1.0)
+    metric.record_multi([0.5, 2.0, 2.5, 10.0, 10.5, 11])
+    metric.record_multi([])
+
+    mock_reporter.gather_all_recorded_metrics()
+    assert len(mock_reporter.recorded_metrics) == 1
+    data = mock_reporter.recorded_metrics[0].data
+    assert data.bucket_counts == [2, 1, 1, 1, 2]
+    assert data.total_count == 7
+    assert data.sum == 37.5
+    assert data.min == 0.5
+    assert data.max == 11
+
+
+def test_histogram_metric_unsorted_buckets(mock_reporter):
+    """Test that HistogramMetric rejects bucket boundaries not in increasing order."""
+    with pytest.raises(ValueError):
+        HistogramMetric(
+            name="response.time",
+            description="API response time distribution",
+            unit="milliseconds",
+            reporter=mock_reporter,
+            buckets=[1.0, 5.0, 2.0]
+        )
+
+
 def test_label_precedence_and_merging(mock_reporter):
     """Test that labels are merged correctly with proper precedence."""
     # Set up test context in mock reporter
@@ -8,14 +8,18 @@ This module focuses on testing the TSReporter implementation:
 - Tests device metrics integration
 """
 
+import json
+import os
+
 import pytest
-from unittest.mock import Mock
+from unittest.mock import Mock, patch
 
 # Import the telemetry framework
 from common.telemetry import (
     GaugeMetric, HistogramMetric,
     DevicePortMetrics
 )
+from common.telemetry.reporters import ts_reporter as ts_reporter_module
 from common.telemetry.reporters.ts_reporter import TSReporter
 from .common_utils import validate_ts_reporter_output
 
@@ -170,6 +174,61 @@ class TestTSReporter:
         # Validate against baseline
         validate_ts_reporter_output(ts_reporter, exported_metrics)
 
+    def test_background_export(self):
+        """Test reports are exported in the background, with one OTLP exporter per endpoint."""
+        with patch.object(ts_reporter_module, "OTLPMetricExporter") as exporter_class, \
+                patch.dict(ts_reporter_module._background_exporters, clear=True):
+            exporter = exporter_class.return_value
+            exporter.export.return_value.name = "SUCCESS"
+
+            ts_reporters = [
+                TSReporter(endpoint="http://collector:4317", request=self.mock_request, tbinfo=self.mock_tbinfo)
+                for _ in range(2)
+            ]
+            assert exporter_class.call_count == 1
+            assert ts_reporters[0].background_exporter is ts_reporters[1].background_exporter
+
+            for value, ts_reporter in enumerate(ts_reporters):
+                metric = GaugeMetric(
+                    name="test.background.metric",
+                    description="Background export metric",
+                    unit="count",
+                    reporter=ts_reporter
+                )
+                metric.record(value, {"device.id": "dut-01"})
+                ts_reporter.report(timestamp=1234567890000000000)
+
+            assert ts_reporters[0].flush(10)
+            exported_metrics = [call.args[0] for call in exporter.export.call_args_list]
+            assert sum(len(metrics_data.resource_metrics) for metrics_data in exported_metrics) == 2
+            ts_reporters[0].background_exporter.close(10)
+
+    def test_background_export_fallback_file(self, tmp_path):
+        """Test reports which cannot be exported are written to the fallback file."""
+        with patch.object(ts_reporter_module, "OTLPMetricExporter") as exporter_class, \
+                patch.dict(ts_reporter_module._background_exporters, clear=True):
+            exporter_class.return_value.export.return_value.name = "FAILURE"
+
+            ts_reporter = TSReporter(endpoint="http://collector:4317", request=self.mock_request,
+                                     tbinfo=self.mock_tbinfo, fallback_dir=str(tmp_path))
+            ts_reporter.background_exporter.retry_backoff = 0.01
+            metric = GaugeMetric(
+                name="test.background.metric",
+                description="Background export metric",
+                unit="count",
+                reporter=ts_reporter
+            )
+            metric.record(1, {"device.id": "dut-01"})
+            ts_reporter.report(timestamp=1234567890000000000)
+
+            assert ts_reporter.flush(10)
+            with open(os.path.join(tmp_path, ts_reporter_module.TS_REPORTER_FALLBACK_FILE)) as f:
+                lines = [json.loads(line) for line in f]
+            assert len(lines) == 1
+            assert len(lines[0]["resource_metrics"]) == 1
+            assert ts_reporter.background_exporter.get_stats()["fallback"] == 1
+            ts_reporter.background_exporter.close(10)
+
     def _create_mock_export_func(self):
         """
         Create a mock exporter function for testing TSReporter.
@@ -0,0 +1,222 @@
+"""
+Unit tests for tests/common/cache/facts_cache.py (FactsCache).
+
+These tests use a temporary cache location so no real testbed facts are
+touched. They cover:
+
+  * write/read round trip from memory and from pickle files
+  * atomic writes and checksum verification of cache files
+  * the sqlite usage index kept in sync by write and cleanup
+  * LRU eviction when SIZE_LIMIT/ENTRY_LIMIT are exceeded
+  * ttl and fingerprint invalidation, also through the ``cached`` decorator
+  * the inventory variables cached by tests/common/utilities.py are refreshed when the inventory changes
+
+Follows the repo unit-test convention (unit_test_*.py, unittest.mock).
+"""
+
+import os
+import pickle
+import sys
+from unittest.mock import patch
+
+import pytest
+
+# Make the repo root importable so ``tests.common.cache.facts_cache`` resolves
+# regardless of the pytest invocation directory.
+_TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+_REPO_ROOT = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.dirname(_TEST_DIR)))
+)
+if _REPO_ROOT not in sys.path:
+    sys.path.insert(0, _REPO_ROOT)
+
+from tests.common.cache import facts_cache  # noqa: E402
+from tests.common.cache.facts_cache import FactsCache, cached  # noqa: E402
+from tests.common.unit_tests.conftest import _bypass_repo_log_format  # noqa: E402,F401
+
+
+@pytest.fixture
+def cache(tmp_path):
+    """A FactsCache bound to a temporary folder, bypassing the singleton."""
+    instance = object.__new__(FactsCache)
+    instance.__init__(str(tmp_path / "_cache"))
+    return instance
+
+
+def pickle_files(cache_location):
+    return sorted(
+        os.path.join(zone, f)
+        for zone in os.listdir(cache_location)
+        if os.path.isdir(os.path.join(cache_location, zone))
+        for f in os.listdir(os.path.join(cache_location, zone))
+    )
+
+
+def test_write_then_read_from_file(cache):
+    assert cache.write("dut-1", "basic_facts", {"hwsku": "sku"})
+
+    # Drop the in-memory copy so read has to load the pickle file.
+    cache._cache.clear()
+    assert cache.read("dut-1", "basic_facts") == {"hwsku": "sku"}
+    assert cache.read("dut-1", "missing") is FactsCache.NOTEXIST
+
+
+def test_write_is_atomic(cache):
+    cache.write("dut-1", "a", {"k": "v"})
+    cache.write("dut-1", "a", {"k": "v2"})
+
+    # No temporary file is left behind after replacing the cache file.
+    assert os.listdir(os.path.join(cache._cache_location, "dut-1")) == ["a.pickle"]
+
+
+def test_read_corrupted_file(cache):
+    cache.write("dut-1", "a", {"k": "v" * 100})
+    facts_file = os.path.join(cache._cache_location, "dut-1", "a.pickle")
+    with open(facts_file, "rb") as f:
+        data = f.read()
+    with open(facts_file, "wb") as f:
+        f.write(data[:-10])
+
+    cache._cache.clear()
+    with patch.object(facts_cache.time, "sleep") as mock_sleep:
+        assert cache.read("dut-1", "a") is FactsCache.NOTEXIST
+    mock_sleep.assert_not_called()
+
+
+def test_read_legacy_file(cache):
+    os.makedirs(os.path.join(cache._cache_location, "dut-1"))
+    with open(os.path.join(cache._cache_location, "dut-1", "a.pickle"), "wb") as f:
+        pickle.dump({"k": "v"}, f)
+
+    assert cache.read("dut-1", "a") == {"k": "v"}
+
+
+def test_index_tracks_usage(cache):
+    cache.write("dut-1", "a", {"k": "v"})
+    cache.write("dut-1", "b", list(range(100)))
+    cache.write("dut-2", "a", "x")
+    size, entries = cache._index.usage()
+    assert entries == 3
+    assert size == sum(
+        os.path.getsize(os.path.join(cache._cache_location, f))
+        for f in pickle_files(cache._cache_location)
+    )
+
+    # Overwriting an entry updates its size without adding an entry.
+    cache.write("dut-2", "a", "x" * 1000)
+    assert cache._index.usage()[1] == 3
+
+    cache.cleanup("dut-1", "a")
+    assert cache._index.usage()[1] == 2
+    cache.cleanup("dut-1")
+    assert cache._index.usage()[1] == 1
+    cache.cleanup()
+    assert cache._index.usage() == (0, 0)
+
+
+def test_index_populated_from_existing_files(cache, tmp_path):
+    cache.write("dut-1", "a", 1)
+    cache.write("dut-1", "b", 2)
+    os.remove(os.path.join(cache._cache_location, facts_cache.INDEX_FILE))
+
+    assert cache._index.usage()[1] == 2
+
+
+def test_evict_least_recently_used(cache):
+    with patch.object(facts_cache, "ENTRY_LIMIT", 2):
+        cache.write("dut-1", "a", 1)
+        cache.write("dut-1", "b", 2)
+        cache._cache.clear()
+        # Reading "a" from file makes "b" the least recently used entry.
+        cache.read("dut-1", "a")
+        cache.write("dut-1", "c", 3)
+
+    assert pickle_files(cache._cache_location) == [
+        os.path.join("dut-1", "a.pickle"),
+        os.path.join("dut-1", "c.pickle"),
+    ]
+    assert cache._index.usage()[1] == 2
+
+
+def test_write_never_fails_on_size_limit(cache):
+    with patch.object(facts_cache, "SIZE_LIMIT", 1):
+        assert cache.write("dut-1", "a", {"k": "v"})
+        assert cache.write("dut-1", "b", {"k": "v"})
+
+    # Only the newest entry is kept, even though it alone exceeds the limit.
+    assert pickle_files(cache._cache_location) == [os.path.join("dut-1", "b.pickle")]
+
+
+@pytest.mark.parametrize("from_file", [False, True])
+def test_ttl(cache, from_file):
+    with patch.object(facts_cache.time, "time", return_value=1000):
+        cache.write("dut-1", "a", 1, ttl=60)
+    if from_file:
+        cache._cache.clear()
+
+    with patch.object(facts_cache.time, "time", return_value=1059):
+        assert cache.read("dut-1", "a") == 1
+    with patch.object(facts_cache.time, "time", return_value=1061):
+        assert cache.read("dut-1", "a") is FactsCache.NOTEXIST
+
+
+@pytest.mark.parametrize("from_file", [False, True])
+def test_fingerprint(cache, from_file):
+    cache.write("dut-1", "a", 1, fingerprint=("image", "20240101"))
+    if from_file:
+        cache._cache.clear()
+
+    assert cache.read("dut-1", "a") == 1
+    assert cache.read("dut-1", "a", fingerprint=("image", "20240101")) == 1
+    assert cache.read("dut-1", "a", fingerprint=("image", "20250101")) is FactsCache.NOTEXIST
+
+
+def test_cached_decorator_fingerprint(cache):
+    # The decorator grabs the cache instance when decorating the function.
+    with patch.object(facts_cache, "FactsCache", return_value=cache):
+        class Host(object):
+            hostname = "dut-1"
+            version = "v1"
+            calls = 0
+
+            @cached(name="facts", fingerprint=lambda function, args, kargs: args[0].version)
+            def facts(self):
+                self.calls += 1
+                return {"version": self.version}
+
+    host = Host()
+    assert host.facts() == {"version": "v1"}
+    assert host.facts() == {"version": "v1"}
+    assert host.calls == 1
+
+    host.version = "v2"
+    assert host.facts() == {"version": "v2"}
+    assert host.calls == 2
+    assert os.listdir(os.path.join(cache._cache_location, "dut-1")) == ["facts.pickle"]
+
+
+def test_cached_inventory_vars_refreshed(cache, tmp_path):
+    from tests.common.utilities import (
+        _check_inv_files_after_read, _mark_inv_files_before_write, zone_getter_factory
+    )
+    inv_file = tmp_path / "inventory"
+    inv_file.write_text("dut-1 ansible_host=10.0.0.1\n")
+    calls = []
+
+    with patch.object(facts_cache, "FactsCache", return_value=cache):
+        @cached("host_vars", zone_getter=zone_getter_factory("hostname"), after_read=_check_inv_files_after_read,
+                before_write=_mark_inv_files_before_write)
+        def get_host_vars(inv_files, hostname):
+            calls.append(inv_files)
+            return {"ansible_host": inv_file.read_text().split("=")[1].strip()}
+
+    assert get_host_vars([str(inv_file)], "dut-1") == {"ansible_host": "10.0.0.1"}
+    assert get_host_vars([str(inv_file)], "dut-1") == {"ansible_host": "10.0.0.1"}
+    assert len(calls) == 1
+
+    # Another inventory, then the inventory modified
+    assert get_host_vars([str(inv_file), str(tmp_path / "other")], "dut-1") == {"ansible_host": "10.0.0.1"}
+    inv_file.write_text("dut-1 ansible_host=10.0.0.2\n")
+    os.utime(str(inv_file), (1700000000, 1700000000))
+    assert get_host_vars([str(inv_file)], "dut-1") == {"ansible_host": "10.0.0.2"}
+    assert len(calls) == 3
@@ -0,0 +1,22 @@
+"""
+Fixtures shared by the unit tests in this directory.
+
+The unit tests are usually run with ``--noconftest`` (see README.md), which doesn't load this file either, so
+the unit test modules import the fixtures they need from here explicitly.
+"""
+import logging
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def _bypass_repo_log_format(monkeypatch):
+    """The repo's ``tests/pytest.ini`` log format uses ``%(funcNamewithModule)s``
+    which is only injected by a plugin not loaded under ``--noconftest``. Use a
+    plain formatter so log records emitted by the code under test don't crash pytest."""
+    import _pytest.logging as _pylog
+    plain = logging.Formatter("%(message)s")
+    monkeypatch.setattr(
+        _pylog.PercentStyleMultiline, "format",
+        lambda self, record: plain.format(record),
+    )
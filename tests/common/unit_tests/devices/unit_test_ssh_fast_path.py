@@ -0,0 +1,185 @@
+"""
+Unit tests for tests/common/devices/ssh_fast_path.py and the SSH fast path of
+AnsibleHostBase in tests/common/devices/base.py.
+
+The persistent SSH session is mocked, so no host is needed. They cover:
+
+  * command lines built for the command and shell modules
+  * the shape of the module result, compared to the ansible command module
+  * AnsibleHostBase._run dispatching to the SSH session or to ansible
+  * the per-module latency counters
+
+Follows the repo unit-test convention (unit_test_*.py, unittest.mock).
+"""
+
+import os
+import socket
+import subprocess
+import sys
+from unittest.mock import MagicMock, patch
+
+import pytest
+from pytest_ansible.results import ModuleResult
+
+# Make the repo root importable so ``tests.common.devices.base`` resolves
+# regardless of the pytest invocation directory.
+_TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+_REPO_ROOT = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.dirname(_TEST_DIR)))
+)
+if _REPO_ROOT not in sys.path:
+    sys.path.insert(0, _REPO_ROOT)
+
+from tests.common.devices import ssh_fast_path  # noqa: E402
+from tests.common.devices.base import AnsibleHostBase  # noqa: E402
+from tests.common.devices.ssh_fast_path import (  # noqa: E402
+    ModuleLatencyCounters, build_command_line, build_module_result
+)
+from tests.common.errors import RunAnsibleModuleFail  # noqa: E402
+from tests.common.unit_tests.conftest import _bypass_repo_log_format  # noqa: E402,F401
+
+
+@pytest.fixture
+def host():
+    """An AnsibleHostBase with a mocked SSH session and ansible module, without touching ansible_adhoc."""
+    host = AnsibleHostBase.__new__(AnsibleHostBase)
+    host.hostname = "dut-1"
+    host.host = MagicMock()
+    host.host.has_module.return_value = True
+    host._ssh_session = MagicMock()
+    host._ssh_session.exec_command.return_value = (0, b"line1\nline2\n", b"")
+    with patch.object(AnsibleHostBase, "_get_ansible_module") as get_module:
+        host.ansible_module = get_module.return_value
+        yield host
+
+
+def run_locally(command_line):
+    """Run a command line built without become the way sshd does, through the login shell."""
+    result = subprocess.run(command_line, shell=True, capture_output=True)
+    return result.returncode, result.stdout, result.stderr
+
+
+# --- command lines ---------------------------------------------------------
+
+def test_shell_command_line_runs_in_shell():
+    rc, stdout, _ = run_locally(build_command_line("shell", "echo a | tr a b; exit 3", become=False))
+    assert rc == 3
+    assert stdout == b"b\n"
+
+
+def test_command_command_line_passes_arguments_literally():
+    command_line = build_command_line("command", "printf '%s|' 'a b' $HOME '|' \"c;d\"", become=False)
+    rc, stdout, _ = run_locally(command_line)
+    assert rc == 0
+    assert stdout == b"a b|$HOME|||c;d|"
+
+
+def test_command_line_chdir_and_become(tmp_path):
+    rc, stdout, _ = run_locally(build_command_line("command", "pwd", chdir=str(tmp_path), become=False))
+    assert rc == 0
+    assert stdout.decode().strip() == str(tmp_path)
+    assert build_command_line("shell", "id -u").startswith("sudo -H -n /bin/sh -c ")
+
+
+def test_command_line_unbalanced_quotes():
+    with pytest.raises(ValueError):
+        build_command_line("command", "echo 'a")
+
+
+# --- module result ---------------------------------------------------------
+
+def test_module_result_shape():
+    result = build_module_result("command", "ls -l /tmp", None, 2, b"out1\nout2\n", b"err\n", 100.0, 100.5)
+    assert result["cmd"] == ["ls", "-l", "/tmp"]
+    assert result["rc"] == 2
+    assert result["stdout"] == "out1\nout2"
+    assert result["stdout_lines"] == ["out1", "out2"]
+    assert result["stderr_lines"] == ["err"]
+    assert result["delta"] == "0:00:00.500000"
+    assert result["failed"] is True
+    assert result["msg"] == "non-zero return code"
+    assert result["invocation"]["module_args"]["_uses_shell"] is False
+
+    result = build_module_result("shell", "ls | wc -l", None, 0, b"", b"", 100.0, 100.0)
+    assert result["cmd"] == "ls | wc -l"
+    assert result["stdout_lines"] == []
+    assert result["failed"] is False
+
+
+# --- AnsibleHostBase._run ----------------------------------------------------
+
+def test_run_uses_ssh_session(host):
+    result = host.shell("cat /etc/hosts", module_ignore_errors=False, verbose=False)
+
+    host.ansible_module.assert_not_called()
+    command_line = host._ssh_session.exec_command.call_args[0][0]
+    assert command_line == build_command_line("shell", "cat /etc/hosts")
+    assert result["stdout_lines"] == ["line1", "line2"]
+    assert result["failed"] is False
+    assert not result.is_failed
+
+
+def test_run_ssh_session_failure_raises(host):
+    host._ssh_session.exec_command.return_value = (1, b"", b"no such file\n")
+
+    with pytest.raises(RunAnsibleModuleFail):
+        host.command("cat /nonexistent")
+
+    result = host.command("cat /nonexistent", module_ignore_errors=True)
+    assert result["rc"] == 1
+    assert result["stderr"] == "no such file"
+
+
+def test_run_falls_back_to_ansible(host):
+    host.ansible_module.return_value = {"dut-1": _ansible_result()}
+    # Arguments not supported by the fast path
+    host.shell("cat", stdin="input")
+    host.command(argv=["ls", "/"])
+    # Module not supported by the fast path
+    host._run("copy", src="a", dest="b")
+    assert host.ansible_module.call_count == 3
+    host._ssh_session.exec_command.assert_not_called()
+
+
+def test_run_falls_back_to_ansible_on_ssh_error(host):
+    host._ssh_session.exec_command.side_effect = socket.error("connection reset")
+    host.ansible_module.return_value = {"dut-1": _ansible_result()}
+
+    result = host.shell("uptime")
+
+    assert result["stdout"] == "ansible"
+    host._ssh_session.close.assert_called_once()
+
+
+def test_run_without_ssh_session(host):
+    host._ssh_session = None
+    host.ansible_module.return_value = {"dut-1": _ansible_result()}
+
+    assert host.command("uptime")["stdout"] == "ansible"
+
+
+def _ansible_result():
+    return ModuleResult({"rc": 0, "stdout": "ansible", "failed": False})
+
+
+# --- latency counters --------------------------------------------------------
+
+def test_latency_counters(host):
+    counters = ModuleLatencyCounters()
+    counters.record("shell", "ssh", 0.1)
+    counters.record("shell", "ssh", 0.3)
+    counters.record("shell", "ansible", 1.0)
+
+    summary = counters.summary()
+    assert summary[("shell", "ssh")]["count"] == 2
+    assert summary[("shell", "ssh")]["max"] == pytest.approx(0.3)
+    assert summary[("shell", "ssh")]["avg"] == pytest.approx(0.2)
+    assert summary[("shell", "ansible")]["total"] == pytest.approx(1.0)
+
+    counters.reset()
+    assert counters.summary() == {}
+
+    with patch.object(ssh_fast_path, "module_latency", counters), \
+            patch("tests.common.devices.base.module_latency", counters):
+        host.shell("uptime")
+    assert counters.summary()[("shell", "ssh")]["count"] == 1
@@ -0,0 +1,125 @@
+"""
+Unit tests for the batch methods of tests/common/helpers/sonic_db.py (SonicDbCli).
+
+``run_sonic_db_cli_cmd`` of the host is mocked, so no DUT is needed. They cover:
+
+  * the sonic-db-cli EVAL command lines built for the Lua scripts
+  * splitting many keys in several commands
+  * parsing of the JSON returned by hgetall_many, hget_many and scan_keys
+
+Follows the repo unit-test convention (unit_test_*.py, unittest.mock).
+"""
+
+import json
+import os
+import shlex
+import sys
+from unittest.mock import MagicMock
+
+import pytest
+
+# Make the repo root importable so ``tests.common.helpers.sonic_db`` resolves
+# regardless of the pytest invocation directory.
+_TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+_REPO_ROOT = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.dirname(_TEST_DIR)))
+)
+if _REPO_ROOT not in sys.path:
+    sys.path.insert(0, _REPO_ROOT)
+
+from tests.common.helpers.sonic_db import (  # noqa: E402
+    AsicDbCli, HGET_MANY_SCRIPT, HGETALL_MANY_SCRIPT, SCAN_KEYS_SCRIPT, SonicDbCli, SonicDbNoCommandOutput
+)
+from tests.common.unit_tests.conftest import _bypass_repo_log_format  # noqa: E402,F401
+
+
+ASIC_DB = {
+    "ASIC_STATE:SAI_OBJECT_TYPE_LAG:oid:0x2000000000a01": {"SAI_LAG_ATTR_SYSTEM_PORT_AGGREGATE_ID": "1"},
+    "ASIC_STATE:SAI_OBJECT_TYPE_LAG:oid:0x2000000000a02": {"SAI_LAG_ATTR_SYSTEM_PORT_AGGREGATE_ID": "2"},
+    "ASIC_STATE:SAI_OBJECT_TYPE_LAG_MEMBER:oid:0x1b000000000a03": {},
+}
+
+
+def fake_eval(cmd):
+    """Run the EVAL command against ASIC_DB the way the Lua scripts do, and return the module result."""
+    args = shlex.split(cmd)
+    assert args[:2] == ["ASIC_DB", "EVAL"]
+    script, numkeys = args[2], int(args[3])
+    keys, argv = args[4:4 + numkeys], args[4 + numkeys:]
+    if script == HGETALL_MANY_SCRIPT:
+        result = {key: ASIC_DB.get(key, {}) for key in keys}
+    elif script == HGET_MANY_SCRIPT:
+        result = {key: ASIC_DB.get(key, {}).get(argv[0], False) for key in keys}
+    elif script == SCAN_KEYS_SCRIPT:
+        prefix = argv[0].rstrip("*")
+        # Lua encodes an empty table as an empty object, and SCAN may return duplicates
+        result = [key for key in ASIC_DB if key.startswith(prefix)] * 2 or {}
+    else:
+        raise AssertionError("Unexpected script {}".format(script))
+    stdout = json.dumps(result)
+    return {"stdout": stdout, "stdout_lines": stdout.splitlines()}
+
+
+@pytest.fixture
+def asicdb():
+    host = MagicMock()
+    host.run_sonic_db_cli_cmd.side_effect = fake_eval
+    return AsicDbCli(host)
+
+
+def test_hgetall_many(asicdb):
+    keys = list(ASIC_DB) + ["ASIC_STATE:SAI_OBJECT_TYPE_LAG:oid:0x0"]
+
+    result = asicdb.hgetall_many(keys)
+
+    assert asicdb.host.run_sonic_db_cli_cmd.call_count == 1
+    assert list(result) == keys
+    assert result[keys[0]] == {"SAI_LAG_ATTR_SYSTEM_PORT_AGGREGATE_ID": "1"}
+    assert result[keys[2]] == {}
+    assert result[keys[3]] == {}
+
+
+def test_hget_many(asicdb):
+    keys = list(ASIC_DB)
+
+    result = asicdb.hget_many(keys, "SAI_LAG_ATTR_SYSTEM_PORT_AGGREGATE_ID")
+
+    assert asicdb.host.run_sonic_db_cli_cmd.call_count == 1
+    assert result == {keys[0]: "1", keys[1]: "2", keys[2]: None}
+
+
+def test_empty_keys_no_command(asicdb):
+    assert asicdb.hgetall_many([]) == {}
+    assert asicdb.hget_many([], "field") == {}
+    asicdb.host.run_sonic_db_cli_cmd.assert_not_called()
+
+
+def test_many_keys_split_in_batches(asicdb):
+    keys = ["ASIC_STATE:SAI_OBJECT_TYPE_ROUTE_ENTRY:{}".format(i) for i in range(5000)]
+
+    result = asicdb.hget_many(keys, "field")
+
+    calls = asicdb.host.run_sonic_db_cli_cmd.call_args_list
+    assert 1 < len(calls) < 10
+    for call in calls:
+        assert len(call[0][0]) < SonicDbCli.MAX_EVAL_KEYS_LENGTH + 1024
+    assert list(result) == keys
+    assert set(result.values()) == {None}
+
+
+def test_scan_keys(asicdb):
+    assert asicdb.scan_keys("ASIC_STATE:SAI_OBJECT_TYPE_LAG:*") == [
+        "ASIC_STATE:SAI_OBJECT_TYPE_LAG:oid:0x2000000000a01",
+        "ASIC_STATE:SAI_OBJECT_TYPE_LAG:oid:0x2000000000a02",
+    ]
+    assert asicdb.scan_keys("ASIC_STATE:SAI_OBJECT_TYPE_ROUTE_ENTRY:*") == []
+    args = shlex.split(asicdb.host.run_sonic_db_cli_cmd.call_args[0][0])
+    assert args[3:] == ["0", "ASIC_STATE:SAI_OBJECT_TYPE_ROUTE_ENTRY:*", "1000"]
+
+
+def test_no_output_raises(asicdb):
+    asicdb.host.run_sonic_db_cli_cmd.side_effect = None
+    asicdb.host.run_sonic_db_cli_cmd.return_value = {"stdout": "", "stdout_lines": []}
+
+    with pytest.raises(SonicDbNoCommandOutput):
+        asicdb.hgetall_many(["key"])
@@ -0,0 +1,182 @@
+"""
+Unit tests for tests/common/pkt_filter/filter_pkt_in_buffer.py (FilterPktBuffer).
+
+The PTF dataplane is faked by a buffer of packets, so no PTF container is needed. They check that the packets
+matched by FilterPktBuffer, which rejects most packets by searching the bytes of the matched fields before
+dissecting them, are exactly the packets matched by comparing the full dictionary of each packet of the buffer to
+the expected packet, for:
+
+  * packets matching the expected packet, and packets differing by each of the matched fields
+  * VLAN tagged, IPv6, IP in IP, ARP packets
+  * packets truncated in the middle of their headers
+  * matched fields missing in the expected packet, bit fields and flags
+
+Follows the repo unit-test convention (unit_test_*.py, unittest.mock).
+"""
+
+import os
+import sys
+import threading
+
+import pytest
+
+pytest.importorskip("ptf")
+
+# Make the repo root importable so ``tests.common.pkt_filter`` resolves
+# regardless of the pytest invocation directory.
+_TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(_TEST_DIR))))
+if _REPO_ROOT not in sys.path:
+    sys.path.insert(0, _REPO_ROOT)
+
+import ptf.packet as packet  # noqa: E402
+import ptf.testutils as testutils  # noqa: E402
+
+from tests.common.pkt_filter.filter_pkt_in_buffer import FilterPktBuffer, convert_pkt_to_dict  # noqa: E402
+from tests.common.unit_tests.conftest import _bypass_repo_log_format  # noqa: E402,F401
+
+DST_PORT = 1
+ROUTER_MAC = "00:11:22:33:44:55"
+PTF_MAC = "00:aa:bb:cc:dd:01"
+
+MATCH_FIELDS = {
+    "l2_l3_l4": [("Ethernet", "dst"), ("IP", "src"), ("IP", "dst"), ("IP", "ttl"), ("TCP", "dport")],
+    "ip_dst": [("IP", "dst")],
+    "bit_fields": [("IP", "flags"), ("IP", "frag"), ("TCP", "flags"), ("IP", "dst")],
+    "not_in_exp_pkt": [("IP", "dst"), ("UDP", "dport")],
+    "ipv6": [("IPv6", "dst"), ("TCP", "sport")],
+}
+
+
+class FakeDataplane(object):
+    """The packet buffers of the PTF dataplane."""
+
+    def __init__(self, buffers):
+        self.cvar = threading.Condition()
+        self.packet_queues = {(0, port): [(bytes(pkt), 1700000000.0 + index) for index, pkt in enumerate(pkts)]
+                              for port, pkts in buffers.items()}
+
+
+class FakePtfAdapter(object):
+
+    def __init__(self, buffers):
+        self.dataplane = FakeDataplane(buffers)
+
+
+def _full_match(exp_pkt_dict, pkt_data, match_fields):
+    """Match a packet of the buffer by the full dictionary of the packet, like FilterPktBuffer originally did."""
+    packet_dict = convert_pkt_to_dict(packet.Ether(pkt_data))
+    for field, value in match_fields:
+        try:
+            if packet_dict[field][value] != exp_pkt_dict[field][value]:
+                return False
+        except KeyError:
+            return False
+    return True
+
+
+def _exp_pkts():
+    return {
+        "ipv4": testutils.simple_tcp_packet(eth_dst=PTF_MAC, eth_src=ROUTER_MAC, ip_src="10.0.0.1",
+                                            ip_dst="192.168.0.2", ip_ttl=63, tcp_sport=1234, tcp_dport=80),
+        "ipv6": testutils.simple_tcpv6_packet(eth_dst=PTF_MAC, eth_src=ROUTER_MAC, ipv6_src="fc00::1",
+                                              ipv6_dst="fc00::2", ipv6_hlim=63, tcp_sport=1234, tcp_dport=80),
+    }
+
+
+def _buffer(exp_pkt):
+    """Packets matching exp_pkt or not, and truncated packets."""
+    pkts = [exp_pkt]
+    if packet.IP in exp_pkt:
+        variants = {
+            ("Ether", "dst"): "00:aa:bb:cc:dd:02",
+            ("IP", "src"): "10.0.0.2",
+            ("IP", "dst"): "192.168.0.3",
+            ("IP", "ttl"): 62,
+            ("IP", "flags"): "DF",
+            ("IP", "frag"): 5,
+            ("TCP", "dport"): 81,
+            ("TCP", "flags"): "A",
+        }
+        # Matching as inner packet of an IP in IP packet
+        pkts.append(testutils.simple_ipv4ip_packet(eth_dst=PTF_MAC, eth_src=ROUTER_MAC, ip_src="1.1.1.1",
+                                                   ip_dst="2.2.2.2", inner_frame=exp_pkt[packet.IP]))
+    else:
+        variants = {
+            ("IPv6", "dst"): "fc00::3",
+            ("IPv6", "hlim"): 62,
+            ("TCP", "sport"): 1235,
+        }
+    for (layer, field), value in variants.items():
+        pkt = exp_pkt.copy()
+        setattr(pkt[layer], field, value)
+        pkts.append(pkt)
+    pkts += [
+        # Matching with a VLAN tag
+        testutils.simple_tcp_packet(eth_dst=PTF_MAC, eth_src=ROUTER_MAC, dl_vlan_enable=True, vlan_vid=100,
+                                    ip_src="10.0.0.1", ip_dst="192.168.0.2", ip_ttl=63, tcp_dport=80),
+        # The matched bytes at other positions
+        testutils.simple_tcp_packet(eth_dst=PTF_MAC, eth_src=ROUTER_MAC, ip_src="192.168.0.2", ip_dst="10.0.0.1",
+                                    ip_ttl=63, tcp_sport=80, tcp_dport=1234),
+        testutils.simple_udp_packet(eth_dst=PTF_MAC, eth_src=ROUTER_MAC, ip_src="10.0.0.1", ip_dst="192.168.0.2",
+                                    ip_ttl=63, udp_sport=1234, udp_dport=80),
+        packet.Ether(dst=PTF_MAC, src=ROUTER_MAC) / packet.ARP(psrc="10.0.0.1", pdst="192.168.0.2"),
+        testutils.simple_tcpv6_packet(eth_dst=PTF_MAC, eth_src=ROUTER_MAC, ipv6_src="fc00::1", ipv6_dst="fc00::2",
+                                      tcp_sport=1234, tcp_dport=80),
+    ]
+    # Truncated in the middle of each header, PTF doesn't receive frames shorter than an Ethernet header
+    data = bytes(exp_pkt)
+    pkts += [packet.Ether(data[:length]) for length in (14, 20, 30, 34, 40, 50, 54, 60, 64, 70, 74)]
+    return pkts
+
+
+def _filter(exp_pkt, pkts, match_fields):
+    pkt_filter = FilterPktBuffer(FakePtfAdapter({DST_PORT: pkts}), exp_pkt, DST_PORT, match_fields=match_fields,
+                                 timeout=0, settle_time=0)
+    return pkt_filter
+
+
+@pytest.mark.parametrize("match_fields", list(MATCH_FIELDS.values()), ids=list(MATCH_FIELDS))
+@pytest.mark.parametrize("version", ["ipv4", "ipv6"])
+def test_matched_pkts(version, match_fields):
+    exp_pkt = _exp_pkts()[version]
+    pkts = _buffer(exp_pkt)
+    pkt_filter = _filter(exp_pkt, pkts, match_fields)
+    exp_pkt_dict = convert_pkt_to_dict(exp_pkt)
+
+    for pkt_data, _ in pkt_filter.ptfadapter.dataplane.packet_queues[(0, DST_PORT)]:
+        expected = _full_match(exp_pkt_dict, pkt_data, match_fields)
+        assert pkt_filter._FilterPktBuffer__is_matched((pkt_data, 0)) == expected, packet.Ether(pkt_data).summary()
+
+
+@pytest.mark.parametrize("match_fields", list(MATCH_FIELDS.values()), ids=list(MATCH_FIELDS))
+@pytest.mark.parametrize("version", ["ipv4", "ipv6"])
+def test_filter_pkt_in_buffer(version, match_fields):
+    exp_pkt = _exp_pkts()[version]
+    pkts = _buffer(exp_pkt)
+    pkt_filter = _filter(exp_pkt, pkts, match_fields)
+    exp_pkt_dict = convert_pkt_to_dict(exp_pkt)
+    matched = [pkt for pkt in pkts if _full_match(exp_pkt_dict, bytes(pkt), match_fields)]
+
+    result = pkt_filter.filter_pkt_in_buffer()
+
+    assert pkt_filter.matched_index == {DST_PORT: len(matched)}
+    if matched:
+        assert bytes(pkt_filter.received_pkt) == bytes(matched[-1])
+        assert result is True or isinstance(result, list)
+    else:
+        assert pkt_filter.received_pkt is None
+        assert result is False
+
+
+def test_matched_pkts_counted():
+    exp_pkt = _exp_pkts()["ipv4"]
+    pkts = _buffer(exp_pkt)
+    pkt_filter = _filter(exp_pkt, pkts, MATCH_FIELDS["l2_l3_l4"])
+
+    pkt_filter.filter_pkt_in_buffer()
+
+    # The expected packet, the packets with other IP and TCP flags, the IP in IP and the VLAN tagged packets, and
+    # the 5 packets truncated after the TCP ports. The last one is returned.
+    assert pkt_filter.matched_index == {DST_PORT: 10}
+    assert bytes(pkt_filter.received_pkt) == bytes(exp_pkt)[:74]
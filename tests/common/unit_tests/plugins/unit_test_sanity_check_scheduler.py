@@ -0,0 +1,147 @@
+"""
+Unit tests for tests/common/plugins/sanity_check/scheduler.py.
+
+The check functions are plain functions recording when they run, so no DUT is needed. They cover:
+
+  * independent check items run concurrently, up to the number of workers
+  * a check item runs after the check items it depends on
+  * the results and durations are returned in the order of the check items
+  * an exception raised by a check item stops the check items not started yet
+  * circular dependencies are rejected
+
+Follows the repo unit-test convention (unit_test_*.py, unittest.mock).
+"""
+
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+# Make the repo root importable so ``tests.common.plugins.sanity_check`` resolves
+# regardless of the pytest invocation directory.
+_TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(_TEST_DIR))))
+if _REPO_ROOT not in sys.path:
+    sys.path.insert(0, _REPO_ROOT)
+
+from tests.common.plugins.sanity_check.scheduler import run_check_items  # noqa: E402
+from tests.common.unit_tests.conftest import _bypass_repo_log_format  # noqa: E402,F401
+
+
+# Seconds to wait for the other check items to reach a synchronization point, only reached if they don't run
+# concurrently as expected
+SYNC_TIMEOUT = 10
+
+
+class CheckRecorder(object):
+    """Build check functions recording the order they start and complete in, and the maximum concurrency."""
+
+    def __init__(self):
+        self.events = []
+        self.running = 0
+        self.max_running = 0
+        self._lock = threading.Lock()
+
+    def check(self, name, seconds=0.0, sync=None, error=None):
+        """
+        @param seconds: Seconds the check function takes at least.
+        @param sync: Function called while the check function runs, to wait for other check functions.
+        @param error: Exception raised by the check function.
+        """
+        def _check(*args, **kwargs):
+            with self._lock:
+                self.events.append(("start", name))
+                self.running += 1
+                self.max_running = max(self.max_running, self.running)
+            time.sleep(seconds)
+            if sync:
+                sync()
+            with self._lock:
+                self.events.append(("end", name))
+                self.running -= 1
+            if error:
+                raise error
+            return {"check_item": name, "failed": False, "args": args, "kwargs": kwargs}
+        return _check
+
+
+def test_independent_checks_run_concurrently():
+    recorder = CheckRecorder()
+    # Each check item completes only when all of them are running
+    barrier = threading.Barrier(3, timeout=SYNC_TIMEOUT)
+    check_funcs = {name: recorder.check(name, seconds=0.05, sync=barrier.wait)
+                   for name in ("check_a", "check_b", "check_c")}
+
+    results, durations = run_check_items(check_funcs, {}, 4, stage="stage_pre_test")
+
+    assert recorder.max_running == 3
+    assert list(results) == ["check_a", "check_b", "check_c"]
+    assert results["check_b"]["kwargs"] == {"stage": "stage_pre_test"}
+    assert list(durations) == ["check_a", "check_b", "check_c"]
+    assert all(seconds >= 0.05 for seconds in durations.values())
+
+
+def test_max_workers():
+    recorder = CheckRecorder()
+    check_funcs = {name: recorder.check(name, seconds=0.05) for name in ("check_a", "check_b", "check_c")}
+
+    run_check_items(check_funcs, {}, 1)
+
+    assert recorder.max_running == 1
+    assert recorder.events == [("start", "check_a"), ("end", "check_a"), ("start", "check_b"),
+                               ("end", "check_b"), ("start", "check_c"), ("end", "check_c")]
+
+
+def _wait_event(event):
+    def _wait():
+        assert event.wait(SYNC_TIMEOUT), "check items not run concurrently"
+    return _wait
+
+
+def test_dependencies():
+    recorder = CheckRecorder()
+    bgp_started = threading.Event()
+    check_funcs = {
+        "check_mux_simulator": recorder.check("check_mux_simulator"),
+        # check_bgp doesn't depend on check_interfaces, so it's started while check_interfaces runs
+        "check_interfaces": recorder.check("check_interfaces", sync=_wait_event(bgp_started)),
+        "check_bgp": recorder.check("check_bgp", sync=bgp_started.set),
+    }
+    dependencies = {"check_mux_simulator": ["check_interfaces"], "check_bfd_up_count": ["check_bgp"]}
+
+    results, _ = run_check_items(check_funcs, dependencies, 4)
+
+    events = recorder.events
+    assert events.index(("start", "check_mux_simulator")) > events.index(("end", "check_interfaces"))
+    assert events.index(("start", "check_bgp")) < events.index(("end", "check_interfaces"))
+    assert list(results) == ["check_mux_simulator", "check_interfaces", "check_bgp"]
+
+
+def test_exception_stops_checks_not_started():
+    recorder = CheckRecorder()
+    a_failed = threading.Event()
+    check_funcs = {
+        "check_a": recorder.check("check_a", sync=a_failed.set, error=RuntimeError("DUT unreachable")),
+        # Still running when check_a raises
+        "check_b": recorder.check("check_b", sync=_wait_event(a_failed)),
+        # Ready to start when check_a completes
+        "check_c": recorder.check("check_c"),
+    }
+
+    with pytest.raises(RuntimeError, match="DUT unreachable"):
+        run_check_items(check_funcs, {"check_c": ["check_a"]}, 2)
+
+    # The running check item is completed, the check item not started yet is not run
+    assert ("end", "check_b") in recorder.events
+    assert ("start", "check_c") not in recorder.events
+
+
+def test_circular_dependencies():
+    recorder = CheckRecorder()
+    check_funcs = {name: recorder.check(name) for name in ("check_a", "check_b")}
+
+    with pytest.raises(ValueError, match="circular dependencies"):
+        run_check_items(check_funcs, {"check_a": ["check_b"], "check_b": ["check_a"]}, 4)
+    assert recorder.events == []
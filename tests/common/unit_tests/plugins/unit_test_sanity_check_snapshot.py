@@ -0,0 +1,242 @@
+"""
+Unit tests for tests/common/plugins/sanity_check/snapshot.py.
+
+The DUT is emulated locally: its shell runs the snapshot script in a local shell. They cover:
+
+  * the snapshot script runs all the commands and returns their outputs in JSON
+  * the snapshot outputs parsed the same way as the DUT queries of the check items
+  * the pre-test results reused only for the check items which passed and whose inputs are unchanged
+
+Follows the repo unit-test convention (unit_test_*.py, unittest.mock).
+"""
+
+import os
+import subprocess
+import sys
+from datetime import timedelta
+from unittest.mock import patch
+
+
+# Make the repo root importable so ``tests.common.plugins.sanity_check`` resolves
+# regardless of the pytest invocation directory.
+_TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(_TEST_DIR))))
+if _REPO_ROOT not in sys.path:
+    sys.path.insert(0, _REPO_ROOT)
+
+from tests.common.devices.sonic import SonicHost  # noqa: E402
+from tests.common.plugins.sanity_check import checks, snapshot  # noqa: E402
+from tests.common.plugins.sanity_check.snapshot import (  # noqa: E402
+    DutStateSnapshot, build_snapshot_cmd, build_snapshot_commands, pop_unchanged_results, save_pre_test_state
+)
+from tests.common.unit_tests.conftest import _bypass_repo_log_format  # noqa: E402,F401
+
+MONIT_STATUS_OUTPUT = """Monit 5.20.0 uptime: 1h 3m
+
+Process 'rsyslog'
+  status                       OK
+  monitoring status            Monitored
+  monitoring mode              active
+  pid                          4123
+  uptime                       1h 3m
+  memory total                 3.4 MB [0.1%]
+
+File 'root-overlay'
+  status                       Does not exist
+  monitoring status            Monitored
+
+System 'sonic'
+  status                       Resource limit matched
+  load average                 [0.48] [0.52] [0.50]
+"""
+
+
+class LocalAsic(object):
+    def __init__(self, namespace):
+        self.namespace = namespace
+
+
+class LocalDut(object):
+    """A DUT running its shell commands locally."""
+
+    def __init__(self, hostname="dut-1", namespaces=(None,)):
+        self.hostname = hostname
+        self.asics = [LocalAsic(namespace) for namespace in namespaces]
+        self.commands = []
+
+    def shell(self, cmd, module_ignore_errors=False, verbose=True):
+        self.commands.append(cmd)
+        result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
+        return {"rc": result.returncode, "stdout": result.stdout.rstrip("\n"), "stderr": result.stderr}
+
+
+def _snapshot(hostname="dut-1", **outputs):
+    return DutStateSnapshot(hostname, {name: {"rc": 0, "stdout": stdout, "stderr": ""}
+                                       for name, stdout in outputs.items()})
+
+
+def test_build_snapshot_commands():
+    commands = build_snapshot_commands(LocalDut(namespaces=("asic0", "asic1")))
+
+    assert commands["redis_client_list/asic0"] == "sudo ip netns exec asic0 /usr/bin/redis-cli client list"
+    assert commands["redis_client_list/asic1"] == "sudo ip netns exec asic1 /usr/bin/redis-cli client list"
+    assert commands[snapshot.DISK_USAGE] == "df --output=pcent,target,source,fstype"
+    assert build_snapshot_commands(LocalDut())["redis_client_list/"] == "/usr/bin/redis-cli client list"
+
+
+def test_take_snapshot_runs_commands_in_one_script():
+    dut = LocalDut()
+    commands = {"out": "printf 'line1\\nline2\\n'", "fail": "echo error >&2; exit 3", "quote": "echo \"'a' b\""}
+
+    with patch.object(snapshot, "build_snapshot_commands", return_value=commands):
+        dut_snapshot = DutStateSnapshot.take(dut)
+
+    assert len(dut.commands) == 1
+    assert dut_snapshot.get("out") == {"rc": 0, "stdout": "line1\nline2", "stdout_lines": ["line1", "line2"],
+                                       "stderr": ""}
+    assert dut_snapshot.get("fail")["rc"] == 3
+    assert dut_snapshot.get("fail")["stderr"] == "error"
+    assert dut_snapshot.get("quote")["stdout"] == "'a' b"
+    assert dut_snapshot.get("missing") is None
+
+
+def test_take_snapshot_failure():
+    dut = LocalDut()
+    dut.shell = lambda *args, **kwargs: {"rc": 127, "stdout": "", "stderr": "python3: not found"}
+
+    assert DutStateSnapshot.take(dut) is None
+
+
+def test_monit_services_status(tmp_path):
+    monit_output = tmp_path / "monit_status"
+    monit_output.write_text(MONIT_STATUS_OUTPUT)
+    # Run the snapshot command on the sample output, instead of on monit
+    monit_cmd = build_snapshot_commands(LocalDut())[snapshot.MONIT_STATUS].replace(
+        "sudo monit status", "cat {}".format(monit_output))
+    stdout = subprocess.run(monit_cmd, shell=True, capture_output=True, text=True).stdout.rstrip("\n")
+
+    # Only the lines parsed are kept, without the figures changing between snapshots
+    assert "uptime" not in stdout
+    expected = SonicHost.parse_monit_services_status(MONIT_STATUS_OUTPUT.splitlines())
+    assert expected["root-overlay"] == {"service_status": "Does not exist", "service_type": "File"}
+    assert _snapshot(monit_status=stdout).monit_services_status() == expected
+
+    failed = DutStateSnapshot("dut-1", {snapshot.MONIT_STATUS: {"rc": 1, "stdout": "", "stderr": ""}})
+    assert failed.monit_services_status() == {}
+    assert _snapshot().monit_services_status() is None
+
+
+def test_networking_uptime():
+    dut_snapshot = _snapshot(networking_start_time="ExecMainStartTimestamp=Mon 2024-01-01 10:00:00 UTC",
+                             now_time="2024-01-01 10:05:00")
+    dut_snapshot.taken_at -= 10
+
+    uptime = dut_snapshot.networking_uptime()
+    assert timedelta(seconds=310) <= uptime < timedelta(seconds=320)
+
+    assert _snapshot(networking_start_time="ExecMainStartTimestamp=",
+                     now_time="2024-01-01 10:05:00").networking_uptime() is None
+
+
+def test_redis_client_list():
+    dut_snapshot = _snapshot(**{"redis_client_list/asic0": "id=1 omem=0\nid=2 omem=10"})
+
+    assert dut_snapshot.redis_client_list("asic0") == ["id=1 omem=0", "id=2 omem=10"]
+    assert dut_snapshot.redis_client_list(None) is None
+
+
+def test_pop_unchanged_results():
+    passed = [{"failed": False, "check_item": "monit", "host": "dut-1", "from_snapshot": True}]
+    failed = [{"failed": True, "check_item": "disk_usage", "host": "dut-1"}]
+    pre_snapshots = {"dut-1": _snapshot(monit_status="a", disk_usage="90%")}
+    check_inputs = {"check_monit": ["monit_status"], "check_disk_usage": ["disk_usage"]}
+    check_items = ["check_monit", "check_disk_usage", "check_bgp"]
+
+    save_pre_test_state("test_a.py", pre_snapshots, {"check_monit": passed, "check_disk_usage": failed,
+                                                     "check_bgp": passed})
+    # Only the passed check items with unchanged inputs are reused, once
+    snapshots = {"dut-1": _snapshot(monit_status="a", disk_usage="90%")}
+    assert pop_unchanged_results("test_a.py", snapshots, check_items, check_inputs) == {"check_monit": passed}
+    assert pop_unchanged_results("test_a.py", snapshots, check_items, check_inputs) == {}
+
+    # Passed on a retry querying the DUT, not on the snapshot
+    retried = [{"failed": False, "check_item": "monit", "host": "dut-1", "from_snapshot": False}]
+    save_pre_test_state("test_a.py", pre_snapshots, {"check_monit": retried})
+    assert pop_unchanged_results("test_a.py", snapshots, check_items, check_inputs) == {}
+
+    # Changed inputs
+    save_pre_test_state("test_a.py", pre_snapshots, {"check_monit": passed})
+    snapshots = {"dut-1": _snapshot(monit_status="b", disk_usage="90%")}
+    assert pop_unchanged_results("test_a.py", snapshots, check_items, check_inputs) == {}
+
+    # No snapshot of a DUT, or pre-test state of another module
+    save_pre_test_state("test_a.py", pre_snapshots, {"check_monit": passed})
+    assert pop_unchanged_results("test_a.py", {"dut-1": None}, check_items, check_inputs) == {}
+    save_pre_test_state("test_a.py", pre_snapshots, {"check_monit": passed})
+    save_pre_test_state("test_b.py", pre_snapshots, {})
+    assert pop_unchanged_results("test_a.py", pre_snapshots, check_items, check_inputs) == {}
+
+
+def test_build_snapshot_cmd_quoting():
+    rc_out = subprocess.run(build_snapshot_cmd({"a": "echo \"$((1 + 2))\" 'x'"}), shell=True,
+                            capture_output=True, text=True)
+    assert rc_out.returncode == 0
+    assert rc_out.stdout.strip() == '{"a": {"rc": 0, "stdout": "3 x", "stderr": ""}}'
+
+
+class MonitDut(LocalDut):
+    """A DUT answering the Monit status queries of the check_monit retries."""
+
+    def __init__(self, monit_statuses):
+        super(MonitDut, self).__init__()
+        self.monit_statuses = list(monit_statuses)
+
+    def get_monit_services_status(self):
+        return self.monit_statuses.pop(0)
+
+
+def _run_check_monit(dut):
+    def _serial_run(target, args, kwargs, nodes, timeout=None, init_result=None):
+        results = {}
+        for node in nodes:
+            target(*args, node=node, results=results, **kwargs)
+        return results
+
+    with patch.object(checks, "parallel_run", _serial_run), patch.object(checks, "wait"):
+        return checks.check_monit.__wrapped__([dut])()
+
+
+def test_check_monit_retry_result_not_reused(monkeypatch):
+    failed_monit = "Process 'rsyslog'\n  status                       Does not exist"
+    running = {"rsyslog": {"service_status": "Running", "service_type": "Process"}}
+    # Networking just started: check_monit retries until Monit services are running
+    pre_snapshot = _snapshot(monit_status=failed_monit, networking_start_time="ExecMainStartTimestamp=Mon 2024-01-01 "
+                             "10:00:00 UTC", now_time="2024-01-01 10:00:00")
+    monkeypatch.setitem(snapshot._current_snapshots, "dut-1", pre_snapshot)
+
+    dut = MonitDut([running])
+    results = _run_check_monit(dut)
+    assert results == [{"failed": False, "check_item": "monit", "host": "dut-1", "from_snapshot": False,
+                        "services_status": {"rsyslog": "Running"}}]
+    assert dut.monit_statuses == []
+
+    # Same failed Monit output in the post-test snapshot: check_monit is run again, not reused
+    save_pre_test_state("test_a.py", {"dut-1": pre_snapshot}, {"check_monit": results})
+    post_snapshots = {"dut-1": _snapshot(monit_status=failed_monit)}
+    assert pop_unchanged_results("test_a.py", post_snapshots, ["check_monit"], snapshot.SNAPSHOT_CHECK_INPUTS) == {}
+
+
+def test_check_monit_snapshot_result_reused(monkeypatch):
+    ok_monit = "Process 'rsyslog'\n  status                       Running"
+    pre_snapshot = _snapshot(monit_status=ok_monit, networking_start_time="ExecMainStartTimestamp=Mon 2024-01-01 "
+                             "10:00:00 UTC", now_time="2024-01-01 10:00:00")
+    monkeypatch.setitem(snapshot._current_snapshots, "dut-1", pre_snapshot)
+
+    dut = MonitDut([])
+    results = _run_check_monit(dut)
+    assert results[0]["failed"] is False and results[0]["from_snapshot"] is True
+
+    save_pre_test_state("test_a.py", {"dut-1": pre_snapshot}, {"check_monit": results})
+    post_snapshots = {"dut-1": _snapshot(monit_status=ok_monit)}
+    assert pop_unchanged_results("test_a.py", post_snapshots, ["check_monit"],
+                                 snapshot.SNAPSHOT_CHECK_INPUTS) == {"check_monit": results}
@@ -0,0 +1,244 @@
+"""
+Unit tests for the snapshots and diffs of tests/common/db_comparison.py.
+
+The DUT is emulated locally: its shell runs the commands in a local shell with a fake
+redis-dump, and fetch copies the local file. They cover:
+
+  * the databases are dumped in parallel and fetched in one archive
+  * the snapshot files are the compact dumps, loaded by diff_snapshots
+  * a failing dump fails the snapshot and the DUT files are removed
+  * snapshot files are streamed by key, and diffing them matches diffing the loaded snapshots
+  * diff_snapshots streams ASIC DB and large snapshot files only
+
+Follows the repo unit-test convention (unit_test_*.py, unittest.mock).
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import uuid
+
+import pytest
+
+# Make the repo root importable so ``tests.common.db_comparison`` resolves
+# regardless of the pytest invocation directory.
+_TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(_TEST_DIR)))
+if _REPO_ROOT not in sys.path:
+    sys.path.insert(0, _REPO_ROOT)
+
+from tests.common import db_comparison  # noqa: E402
+from tests.common.db_comparison import (  # noqa: E402
+    DBType, SnapshotDiff, SonicRedisDBSnapshotter, build_parallel_dump_cmd, iter_snapshot_items
+)
+from tests.common.unit_tests.conftest import _bypass_repo_log_format  # noqa: E402,F401
+
+# Fake redis-dump: writes the DB number and waits until all the expected dumps are started,
+# so the dumps only complete if they are run in parallel.
+FAKE_REDIS_DUMP = """#!/bin/sh
+while [ $# -gt 0 ]; do
+    case "$1" in
+        -d) db=$2; shift;;
+        -o) out=$2; shift;;
+    esac
+    shift
+done
+[ "$db" = "$FAIL_DB" ] && exit 1
+touch "$MARKER_DIR/$db"
+for i in $(seq 50); do
+    [ $(ls "$MARKER_DIR" | wc -l) -ge "$EXPECTED_DUMPS" ] && break
+    sleep 0.1
+done
+[ $(ls "$MARKER_DIR" | wc -l) -ge "$EXPECTED_DUMPS" ] || exit 2
+printf '{"KEY|%s":{"type":"hash","value":{"db":"%s"}}}' "$db" "$db" > "$out"
+"""
+
+
+class LocalDut(object):
+    """A DUT running its shell commands locally."""
+
+    def __init__(self, tmp_path):
+        self.hostname = "dut-1"
+        self.commands = []
+        bin_dir = tmp_path / "bin"
+        bin_dir.mkdir()
+        (bin_dir / "redis-dump").write_text(FAKE_REDIS_DUMP)
+        (bin_dir / "redis-dump").chmod(0o755)
+        self.marker_dir = tmp_path / "markers"
+        self.marker_dir.mkdir()
+        self.env = dict(os.environ, PATH="{}:{}".format(bin_dir, os.environ["PATH"]),
+                        MARKER_DIR=str(self.marker_dir), EXPECTED_DUMPS="0", FAIL_DB="")
+
+    def shell(self, cmd, module_ignore_errors=False):
+        self.commands.append(cmd)
+        result = subprocess.run(cmd, shell=True, capture_output=True, text=True, env=self.env)
+        return {"rc": result.returncode, "stdout": result.stdout, "stderr": result.stderr}
+
+    def fetch(self, src, dest, flat=False):
+        shutil.copy(src, dest)
+        return {"dest": dest}
+
+
+@pytest.fixture
+def dut(tmp_path):
+    return LocalDut(tmp_path)
+
+
+def test_build_parallel_dump_cmd():
+    cmd = build_parallel_dump_cmd([DBType.APPL, DBType.CONFIG], "/tmp/d", "/tmp/d.tar.gz")
+    assert "redis-dump -d 0 -o /tmp/d/APPL.json &" in cmd
+    assert "redis-dump -d 4 -o /tmp/d/CONFIG.json &" in cmd
+    assert "--pretty" not in cmd
+    assert cmd.endswith("tar -czf /tmp/d.tar.gz -C /tmp/d APPL.json CONFIG.json")
+
+
+def test_take_snapshot_dumps_in_parallel(dut, tmp_path):
+    dbs = [DBType.APPL, DBType.CONFIG, DBType.STATE]
+    dut.env["EXPECTED_DUMPS"] = str(len(dbs))
+    snapshotter = SonicRedisDBSnapshotter(dut, str(tmp_path / "snapshots"))
+    name = "snap_{}".format(uuid.uuid4().hex)
+
+    snapshotter.take_snapshot(name, dbs)
+
+    snapshot_dir = tmp_path / "snapshots" / name
+    assert sorted(os.listdir(snapshot_dir)) == ["APPL.json", "CONFIG.json", "STATE.json"]
+    content = (snapshot_dir / "CONFIG.json").read_text()
+    assert content == '{"KEY|4":{"type":"hash","value":{"db":"4"}}}'
+    # The dump and the archive are removed from the DUT
+    assert not os.path.exists("/tmp/db_snapshot_{}".format(name))
+    assert not os.path.exists("/tmp/db_snapshot_{}.tar.gz".format(name))
+
+
+def test_diff_snapshots_loads_compact_dumps(dut, tmp_path):
+    dbs = [DBType.APPL, DBType.STATE]
+    dut.env["EXPECTED_DUMPS"] = str(len(dbs))
+    snapshotter = SonicRedisDBSnapshotter(dut, str(tmp_path / "snapshots"))
+    name_a = "a_{}".format(uuid.uuid4().hex)
+    name_b = "b_{}".format(uuid.uuid4().hex)
+    snapshotter.take_snapshot(name_a, dbs)
+    snapshotter.take_snapshot(name_b, dbs)
+    with open(tmp_path / "snapshots" / name_b / "APPL.json", "w") as f:
+        json.dump({"KEY|0": {"type": "hash", "value": {"db": "changed"}}}, f)
+
+    diff = snapshotter.diff_snapshots(name_a, name_b)
+
+    assert diff[DBType.STATE].diff == {}
+    assert diff[DBType.APPL].diff == {"KEY|0": {"value": {"db": {name_a: "0", name_b: "changed"}}}}
+
+
+def test_take_snapshot_dump_failure(dut, tmp_path):
+    dut.env["EXPECTED_DUMPS"] = "1"
+    dut.env["FAIL_DB"] = "4"
+    snapshotter = SonicRedisDBSnapshotter(dut, str(tmp_path / "snapshots"))
+    name = "snap_{}".format(uuid.uuid4().hex)
+
+    with pytest.raises(AssertionError, match="Failed to dump DBs"):
+        snapshotter.take_snapshot(name, [DBType.APPL, DBType.CONFIG])
+
+    assert dut.commands[-1].startswith("rm -rf /tmp/db_snapshot_{}".format(name))
+    assert not os.path.exists("/tmp/db_snapshot_{}".format(name))
+
+
+# --- streamed diff -----------------------------------------------------------
+
+def _entry(**values):
+    return {"type": "hash", "value": values}
+
+
+SNAPSHOT_A = {
+    "PORT|Ethernet0": _entry(admin_status="up", mtu="9100"),
+    "PORT|Ethernet4": _entry(admin_status="up", mtu="9100", timestamp="1"),
+    "PORT|Ethernet8": _entry(admin_status="up"),
+    "PROCESS_STATS|100": _entry(CMD="orchagent", PPID="1"),
+    "DOCKER_STATS|abc": _entry(NAME="swss", CPU="1"),
+    "TRANSCEIVER_STATUS_FLAG|Ethernet0": _entry(flag="1"),
+}
+SNAPSHOT_B = {
+    "PORT|Ethernet0": _entry(admin_status="down", mtu="9100"),
+    "PORT|Ethernet4": _entry(admin_status="up", mtu="9100", timestamp="2"),
+    "PORT|Ethernet12": _entry(admin_status="up"),
+    "PROCESS_STATS|200": _entry(CMD="orchagent", PPID="1"),
+    "DOCKER_STATS|def": _entry(NAME="swss", CPU="2"),
+    "TRANSCEIVER_STATUS_FLAG|Ethernet0": _entry(flag="2"),
+}
+
+
+@pytest.mark.parametrize("indent", [None, 4])
+@pytest.mark.parametrize("chunk_size", [1, 7, 1024 * 1024])
+def test_iter_snapshot_items(tmp_path, indent, chunk_size):
+    path = tmp_path / "snapshot.json"
+    path.write_text(json.dumps(dict(SNAPSHOT_A, number={"value": {"n": -1.5e3}}), indent=indent))
+
+    assert dict(iter_snapshot_items(str(path), chunk_size=chunk_size)) == json.loads(path.read_text())
+
+
+@pytest.mark.parametrize("content", ["[]", '{"a" 1}', '{"a": 1', '{"a": 1 "b": 2}'])
+def test_iter_snapshot_items_invalid(tmp_path, content):
+    path = tmp_path / "snapshot.json"
+    path.write_text(content)
+
+    with pytest.raises(ValueError):
+        list(iter_snapshot_items(str(path), chunk_size=2))
+
+
+@pytest.mark.parametrize("db_type", [DBType.APPL, DBType.STATE])
+def test_snapshot_diff_of_files_matches_dicts(tmp_path, db_type):
+    path_a, path_b = tmp_path / "a.json", tmp_path / "b.json"
+    path_a.write_text(json.dumps(SNAPSHOT_A))
+    path_b.write_text(json.dumps(SNAPSHOT_B, indent=4))
+
+    from_dicts = SnapshotDiff(db_type, SNAPSHOT_A, SNAPSHOT_B, label_a="a", label_b="b")
+    from_files = SnapshotDiff(db_type, str(path_a), str(path_b), label_a="a", label_b="b")
+
+    assert from_files.to_dict() == from_dicts.to_dict()
+    diff = from_files.diff
+    assert diff["PORT|Ethernet0"] == {"value": {"admin_status": {"a": "up", "b": "down"}}}
+    assert diff["PORT|Ethernet8"]["b"] is None
+    assert diff["PORT|Ethernet12"]["a"] is None
+    if db_type == DBType.STATE:
+        # Only volatile values differ, PIDs and container IDs are not compared
+        assert "PORT|Ethernet4" not in diff
+        assert not any(key.startswith(("PROCESS_STATS|", "DOCKER_STATS|", "TRANSCEIVER")) for key in diff)
+        assert from_files.metrics.total_a_values_incl_volatile == 11
+        assert from_files.metrics.total_a_values_excl_volatile == 7
+    else:
+        assert diff["PORT|Ethernet4"] == {"value": {"timestamp": {"a": "1", "b": "2"}}}
+
+
+def test_diff_snapshots_include_asic_db(tmp_path):
+    snapshotter = SonicRedisDBSnapshotter(None, str(tmp_path))
+    for name, snapshot in (("a", SNAPSHOT_A), ("b", SNAPSHOT_B)):
+        os.makedirs(tmp_path / name)
+        for db_name in ("ASIC", "CONFIG"):
+            (tmp_path / name / "{}.json".format(db_name)).write_text(json.dumps(snapshot))
+
+    assert list(snapshotter.diff_snapshots("a", "b")) == [DBType.CONFIG]
+    diff = snapshotter.diff_snapshots("a", "b", include_asic_db=True)
+    assert sorted(db_type.name for db_type in diff) == ["ASIC", "CONFIG"]
+    assert diff[DBType.ASIC].diff["PORT|Ethernet0"] == {"value": {"admin_status": {"a": "up", "b": "down"}}}
+
+
+def test_diff_snapshots_streams_large_files(tmp_path, monkeypatch):
+    snapshotter = SonicRedisDBSnapshotter(None, str(tmp_path))
+    for name, snapshot in (("a", SNAPSHOT_A), ("b", SNAPSHOT_B)):
+        os.makedirs(tmp_path / name)
+        for db_name in ("ASIC", "APPL"):
+            (tmp_path / name / "{}.json".format(db_name)).write_text(json.dumps(snapshot))
+    streamed = []
+
+    def _iter_snapshot_items(path, *args, **kwargs):
+        streamed.append(os.path.relpath(path, str(tmp_path)))
+        return iter_snapshot_items(path, *args, **kwargs)
+
+    monkeypatch.setattr(db_comparison, "iter_snapshot_items", _iter_snapshot_items)
+
+    diff = snapshotter.diff_snapshots("a", "b", include_asic_db=True)
+    assert sorted(set(streamed)) == ["a/ASIC.json", "b/ASIC.json"]
+    assert diff[DBType.APPL].diff == diff[DBType.ASIC].diff
+
+    streamed.clear()
+    monkeypatch.setattr(db_comparison, "STREAMED_SNAPSHOT_MIN_SIZE", os.path.getsize(tmp_path / "b" / "APPL.json"))
+    snapshotter.diff_snapshots("a", "b")
+    assert sorted(set(streamed)) == ["a/APPL.json", "b/APPL.json"]
@@ -143,6 +143,8 @@ def pytest_addoption(parser):
     parser.addoption("--testbed_file", action="store", default=None, help="testbed file name")
     parser.addoption("--ipv6_only_mgmt", action="store_true", default=False,
                      help="Use IPv6-only management network. DUT mgmt_ip will be set to IPv6 address.")
+    parser.addoption("--ssh_fast_path", action="store_true", default=False,
+                     help="Run command and shell modules on DUTs in a persistent SSH session instead of ansible.")
     parser.addoption("--uhd_config", action="store", help="Enable UHD config mode")
     parser.addoption("--save_uhd_config", action="store_true", help="Save UHD config mode")
     parser.addoption("--npu_dpu_startup", action="store_true", help="Startup NPU and DPUs and install configurations")
@@ -240,6 +242,8 @@ def pytest_addoption(parser):
                      help="Change (add|remove) post test check items based on pre test check items")
     parser.addoption("--recover_method", action="store", default="adaptive",
                      help="Set method to use for recover if sanity failed")
+    parser.addoption("--sanity_check_workers", action="store", default=None, type=int,
+                     help="Number of sanity check items run at the same time (default 4), 1 to run them one by one")
 
     ########################
     #   pre-test options   #
@@ -556,6 +560,35 @@ def ipv6_only_mgmt_enabled(request):
     return enabled
 
 
+@pytest.fixture(scope="session", autouse=True)
+def ssh_fast_path(request):
+    """
+    Fixture to enable the SSH fast path of DUTs and report the latency of the modules run on hosts.
+
+    When --ssh_fast_path is passed to pytest, the command and shell modules are run on the DUTs in a persistent
+    SSH session instead of ansible. The latency of the modules is logged at the end of the session in both cases,
+    so the time spent with and without the fast path can be compared.
+
+    Returns:
+        bool: True if the SSH fast path is requested, False otherwise.
+    """
+    from tests.common.devices.ssh_fast_path import module_latency
+
+    enabled = request.config.getoption("ssh_fast_path", default=False)
+    duthosts = []
+    if enabled:
+        duthosts = request.getfixturevalue("duthosts")
+        for duthost in duthosts:
+            creds = creds_on_dut(duthost)
+            duthost.enable_ssh_fast_path(creds["sonicadmin_user"], creds["sonicadmin_password"])
+
+    yield enabled
+
+    for duthost in duthosts:
+        duthost.disable_ssh_fast_path()
+    module_latency.report()
+
+
 @pytest.fixture(scope="session", autouse=True)
 def enhance_inventory(request, tbinfo):
     """
@@ -0,0 +1,9 @@
+"""
+    Pytest configuration used by the FIB tests.
+"""
+
+
+def pytest_addoption(parser):
+    parser.addoption("--balancing_burst", action="store_true", default=False,
+                     help="Send the packets of the load balancing checks of the FIB and hash tests in bursts "
+                          "instead of one by one")
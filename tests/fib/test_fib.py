@@ -270,6 +270,11 @@ def ignore_ttl(duthosts):
     return False
 
 
+@pytest.fixture(scope="module")
+def balancing_burst(request):
+    return request.config.getoption("--balancing_burst")
+
+
 @pytest.fixture(scope="module")
 def updated_tbinfo(tbinfo):
     if tbinfo['topo']['name'] == 't0-56-po2vlan':
@@ -292,7 +297,7 @@ def test_basic_fib(duthosts, ptfhost, tbinfo, ipv4, ipv6, mtu,
                    ignore_ttl, single_fib_for_duts,                     # noqa: F401, F811
                    duts_running_config_facts, duts_minigraph_facts,
                    validate_active_active_dualtor_setup,                # noqa: F401, F811
-                   request):                                            # noqa: F811
+                   balancing_burst, request):                           # noqa: F811
 
     if 'dualtor' in updated_tbinfo['topo']['name']:
         wait(30, 'Wait some time for mux active/standby state to be stable after toggled mux state')
@@ -331,6 +336,7 @@ def test_basic_fib(duthosts, ptfhost, tbinfo, ipv4, ipv6, mtu,
             "ipv6": ipv6,
             "testbed_mtu": mtu,
             "test_balancing": test_balancing,
+            "balancing_burst": balancing_burst,
             "ignore_ttl": ignore_ttl,
             "single_fib_for_duts": single_fib_for_duts,
             "switch_type": switch_type,
@@ -542,7 +548,7 @@ def test_hash(add_default_route_to_dut, duthosts, tbinfo, setup_vlan,      # noq
               hash_keys, ptfhost, ipver, toggle_all_simulator_ports_to_rand_selected_tor_m,     # noqa: F811
               updated_tbinfo, mux_server_url, mux_status_from_nic_simulator, ignore_ttl,        # noqa: F811
               single_fib_for_duts, duts_running_config_facts, duts_minigraph_facts,             # noqa: F811
-              setup_active_active_ports, active_active_ports, request):                         # noqa: F811
+              setup_active_active_ports, active_active_ports, balancing_burst, request):        # noqa: F811
 
     if 'dualtor' in updated_tbinfo['topo']['name']:
         wait(30, 'Wait some time for mux active/standby state to be stable after toggled mux state')
@@ -589,6 +595,7 @@ def test_hash(add_default_route_to_dut, duthosts, tbinfo, setup_vlan,      # noq
             "topo_name": updated_tbinfo['topo']['name'],
             "topo_type": updated_tbinfo['topo']['type'],
             "is_v6_topo": is_ipv6_only_topology(updated_tbinfo),
+            "balancing_burst": balancing_burst,
         },
         log_file=log_file,
         qlen=PTF_QLEN,
@@ -605,7 +612,7 @@ def test_ipinip_hash(add_default_route_to_dut, duthost, duthosts,
                      ignore_ttl, single_fib_for_duts, duts_running_config_facts,                    # noqa: F811
                      duts_minigraph_facts, toggle_all_simulator_ports_to_rand_selected_tor_m,       # noqa: F811
                      mux_status_from_nic_simulator, setup_standby_ports_on_rand_unselected_tor,     # noqa: F811
-                     request):                                                                      # noqa: F811
+                     balancing_burst, request):                                                     # noqa: F811
     # Only run this test on T1 or T0 (including dualtor) topologies
     pytest_require(tbinfo['topo']['type'] in ['t1', 't0'], "The test case runs on T1 or T0 topology")
     logging.info(f"Topology type: {tbinfo['topo']['type']}")
@@ -641,6 +648,7 @@ def test_ipinip_hash(add_default_route_to_dut, duthost, duthosts,
                        "ipver": ipver,
                        "topo_name": tbinfo['topo']['name'],
                        "is_v6_topo": is_ipv6_only_topology(tbinfo),
+                       "balancing_burst": balancing_burst,
                        },
                log_file=log_file,
                qlen=PTF_QLEN,
@@ -654,7 +662,7 @@ def test_ipinip_hash(add_default_route_to_dut, duthost, duthosts,
 def test_ipinip_hash_negative(add_default_route_to_dut, duthosts,           # noqa: F811
                               ptfhost, ipver, tbinfo, mux_server_url, ignore_ttl, single_fib_for_duts,  # noqa: F811
                               duts_running_config_facts, duts_minigraph_facts, mux_status_from_nic_simulator,
-                              request):                  # noqa: F811
+                              balancing_burst, request):                  # noqa: F811
     hash_keys = ['inner_length']
     fib_files = fib_info_files_per_function(duthosts, ptfhost, duts_running_config_facts, duts_minigraph_facts,
                                             tbinfo, request)
@@ -688,6 +696,7 @@ def test_ipinip_hash_negative(add_default_route_to_dut, duthosts,           # no
                    "topo_name": tbinfo['topo']['name'],
                    "topo_type": tbinfo['topo']['type'],
                    "is_v6_topo": is_ipv6_only_topology(tbinfo),
+                   "balancing_burst": balancing_burst,
                },
                log_file=log_file,
                qlen=PTF_QLEN,
@@ -705,7 +714,7 @@ def test_vxlan_hash(add_default_route_to_dut, duthost, duthosts,
                     ignore_ttl, single_fib_for_duts, duts_running_config_facts,          # noqa: F811
                     duts_minigraph_facts, toggle_all_simulator_ports_to_rand_selected_tor_m,   # noqa: F811
                     mux_status_from_nic_simulator, setup_standby_ports_on_rand_unselected_tor,  # noqa: F811
-                    request):                                                                  # noqa: F811
+                    balancing_burst, request):                                                 # noqa: F811
 
     fib_files = fib_info_files_per_function(duthosts, ptfhost, duts_running_config_facts, duts_minigraph_facts,
                                             tbinfo, request)
@@ -749,6 +758,7 @@ def test_vxlan_hash(add_default_route_to_dut, duthost, duthosts,
                        "topo_name": tbinfo['topo']['name'],
                        "topo_type": tbinfo['topo']['type'],
                        "is_v6_topo": is_ipv6_only_topology(tbinfo),
+                       "balancing_burst": balancing_burst,
                        },
                log_file=log_file,
                qlen=PTF_QLEN,
@@ -766,7 +776,7 @@ def test_nvgre_hash(add_default_route_to_dut, duthost, duthosts,
                     ignore_ttl, single_fib_for_duts, duts_running_config_facts,             # noqa: F811
                     duts_minigraph_facts, request,                                          # noqa: F811
                     setup_active_active_ports, active_active_ports,                         # noqa: F811
-                    mux_status_from_nic_simulator):                                         # noqa: F811
+                    mux_status_from_nic_simulator, balancing_burst):                        # noqa: F811
 
     fib_files = fib_info_files_per_function(duthosts, ptfhost, duts_running_config_facts, duts_minigraph_facts,
                                             tbinfo, request)
@@ -818,6 +828,7 @@ def test_nvgre_hash(add_default_route_to_dut, duthost, duthosts,
                        "topo_name": tbinfo['topo']['name'],
                        "topo_type": tbinfo['topo']['type'],
                        "is_v6_topo": is_ipv6_only_topology(tbinfo),
+                       "balancing_burst": balancing_burst,
                        },
                log_file=log_file,
                qlen=PTF_QLEN,
@@ -833,7 +844,7 @@ def test_ecmp_group_member_flap(
     mux_status_from_nic_simulator, ignore_ttl,
     single_fib_for_duts,  # noqa: F401, F811
     duts_running_config_facts, duts_minigraph_facts,
-    validate_active_active_dualtor_setup, request  # noqa: F401, F811
+    validate_active_active_dualtor_setup, balancing_burst, request  # noqa: F401, F811
 ):
     """Test ECMP group member flap handling."""
 
@@ -897,6 +908,7 @@ def test_ecmp_group_member_flap(
             "ipv6": ipv6,
             "testbed_mtu": mtu,
             "test_balancing": test_balancing,
+            "balancing_burst": balancing_burst,
             "ignore_ttl": ignore_ttl,
             "single_fib_for_duts": single_fib_for_duts,
             "switch_type": switch_type,
@@ -955,6 +967,7 @@ def test_ecmp_group_member_flap(
             "ipv6": ipv6,
             "testbed_mtu": mtu,
             "test_balancing": test_balancing,
+            "balancing_burst": balancing_burst,
             "ignore_ttl": ignore_ttl,
             "single_fib_for_duts": single_fib_for_duts,
             "switch_type": switch_type,
@@ -1007,6 +1020,7 @@ def test_ecmp_group_member_flap(
             "ipv6": ipv6,
             "testbed_mtu": mtu,
             "test_balancing": test_balancing,
+            "balancing_burst": balancing_burst,
             "ignore_ttl": ignore_ttl,
             "single_fib_for_duts": single_fib_for_duts,
             "switch_type": switch_type,